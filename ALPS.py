@@ -1,13 +1,61 @@
+import os
+import json
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.path_utils import get_cache_dir
+from utils.compact_columns import encode_columns
 
 # Get or create a logger
 logger = logging.getLogger(__name__)
 
-def ALPSfunction(Site, start_date_str=None, end_date_str=None):
+ALPS_BASE_URL = "https://midway.eu-west-1.prod.tsv.alps.lamps.amazon.dev/labor-plan"
+# The densities (units per bundle) forecast rarely changes; reuse it for this long (seconds)
+ALPS_DENSITIES_TTL = 6 * 3600
+
+
+def _densities_cache_path(Site):
+    return os.path.join(get_cache_dir('alps'), f"densities_{Site}.json")
+
+
+def _load_cached_densities(Site, start_of_week_str, now=None):
+    """Cached ALPS_DENSITIES for the site and week, or None if missing or older than the TTL."""
+    try:
+        with open(_densities_cache_path(Site), 'r') as f:
+            cached = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"ALPS: Could not read densities cache: {e}")
+        return None
+    age = (now or time.time()) - cached.get("fetched_at", 0)
+    if cached.get("start_of_week") != start_of_week_str or age > ALPS_DENSITIES_TTL:
+        return None
+    return cached.get("densities")
+
+
+def _store_densities(Site, start_of_week_str, densities, now=None):
+    path = _densities_cache_path(Site)
+    try:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({"fetched_at": now or time.time(), "start_of_week": start_of_week_str,
+                       "densities": densities}, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"ALPS: Could not write densities cache: {e}")
+
+
+def ALPSfunction(Site, start_date_str=None, end_date_str=None, compact=False):
     """
     Downloads ALPS data (IB, Hours, Densities) for the given Site.
     If start_date_str/end_date_str are provided, uses them for both IB and Hours portions;
     otherwise falls back to (today-1, today+6).
+
+    The three reports are requested concurrently; densities come from the local
+    cache while younger than ALPS_DENSITIES_TTL. With compact=True the IB and
+    Hours lists are written in the dict-rle form of utils.compact_columns.
     """
 
     logger.info('ALPS: Importing libraries...')
@@ -28,12 +76,9 @@ def ALPSfunction(Site, start_date_str=None, end_date_str=None):
     cookie_jar = MozillaCookieJar(cookie_file_path)
     cookie_jar.load()
 
-    # Extraer la sesión de Midway del archivo de cookies
-    midway_session = ''
-    with open(cookie_file_path, 'r') as file:
-        for line in file:
-            if 'session' in line:
-                midway_session = 'session=' + line.split('session')[-1].strip()
+    # One session (and connection pool) shared by the concurrent report requests
+    session = requests.Session()
+    session.cookies.update(cookie_jar)
 
     # Initialize the JSON dictionary to return
     ALPS_JSON = {}
@@ -52,155 +97,103 @@ def ALPSfunction(Site, start_date_str=None, end_date_str=None):
         endDate_str = endDate.strftime("%Y-%m-%d")
         logger.info(f'ALPS: Using default date range: {startDate_str} to {endDate_str}')
 
-    # ------------------------- ALPS IB -------------------------
-    logger.info(f'ALPS: Requesting IB data for period {startDate_str} to {endDate_str}...')
-
-    url = (
-        "https://midway.eu-west-1.prod.tsv.alps.lamps.amazon.dev/"
-        f"labor-plan?sites={Site}&concept=PROCESSING_CAPABILITY&aspect=FORECAST&"
-        f"startDate={startDate_str}&endDate={endDate_str}"
-    )
-
-    try:
-        response = requests.get(url, cookies=cookie_jar, verify=False)
-        if response.status_code == 200:
-            logger.info('ALPS: IB Request successful')
-            df = pd.read_csv(io.StringIO(response.text), delimiter='\t')
-
-            ALPS_IB_LaborPool1 = df.iloc[:, 6]  # Column 7
-            ALPS_IB_LaborPool2 = df.iloc[:, 7]  # Column 8
-            ALPS_IB_Date       = df.iloc[:, 14] # Column 15
-            ALPS_IB_Value      = df.iloc[:, 15] # Column 16
-
-            ALPS_IB = {
-                "ALPS_IB_Labor Pool 1": ALPS_IB_LaborPool1.fillna('NaN').tolist(),
-                "ALPS_IB_Labor Pool 2": ALPS_IB_LaborPool2.fillna('NaN').tolist(),
-                "ALPS_IB_Date": ALPS_IB_Date.fillna('NaN').tolist(),
-                "ALPS_IB_Value": ALPS_IB_Value.fillna('NaN').tolist(),
-            }
-
-            ALPS_JSON.update({"ALPS_IB": ALPS_IB})
-        else:
-            logger.warning(f'ALPS: IB request returned status code {response.status_code}')
-
-    except requests.RequestException as ALPS_request_error1:
-        logger.error(f"ALPS: The ALPS_request_error1 is: {ALPS_request_error1}")
-
-    # ------------------------- ALPS HOURS -------------------------
-    logger.info(f'ALPS: Requesting Hours data for period {startDate_str} to {endDate_str}...')
-
-    url = (
-        "https://midway.eu-west-1.prod.tsv.alps.lamps.amazon.dev/"
-        f"labor-plan?sites={Site}&concept=SHOW_HOURS&aspect=FORECAST&"
-        f"startDate={startDate_str}&endDate={endDate_str}"
-    )
-
-    try:
-        response = requests.get(url, cookies=cookie_jar, verify=False)
-        if response.status_code == 200:
-            logger.info('ALPS: Hours Request successful')
+    def labor_plan_columns(concept, label, prefix):
+        """IB / Hours report: labor pools, dates and values of a SHOW-style forecast."""
+        logger.info(f'ALPS: Requesting {label} data for period {startDate_str} to {endDate_str}...')
+        url = (
+            f"{ALPS_BASE_URL}?sites={Site}&concept={concept}&aspect=FORECAST&"
+            f"startDate={startDate_str}&endDate={endDate_str}"
+        )
+        try:
+            response = session.get(url, verify=False)
+            if response.status_code != 200:
+                logger.warning(f'ALPS: {label} request returned status code {response.status_code}')
+                return None
+            logger.info(f'ALPS: {label} Request successful')
             df = pd.read_csv(io.StringIO(response.text), delimiter='\t')
-
-            ALPS_HOURS_LaborPool1 = df.iloc[:, 6]
-            ALPS_HOURS_LaborPool2 = df.iloc[:, 7]
-            ALPS_HOURS_Date       = df.iloc[:, 14]
-            ALPS_HOURS_Value      = df.iloc[:, 15]
-
-            ALPS_HOURS = {
-                "ALPS_HOURS_Labor Pool 1": ALPS_HOURS_LaborPool1.fillna('NaN').tolist(),
-                "ALPS_HOURS_Labor Pool 2": ALPS_HOURS_LaborPool2.fillna('NaN').tolist(),
-                "ALPS_HOURS_Date": ALPS_HOURS_Date.fillna('NaN').tolist(),
-                "ALPS_HOURS_Value": ALPS_HOURS_Value.fillna('NaN').tolist(),
+            return {
+                f"{prefix}_Labor Pool 1": df.iloc[:, 6].fillna('NaN').tolist(),   # Column 7
+                f"{prefix}_Labor Pool 2": df.iloc[:, 7].fillna('NaN').tolist(),   # Column 8
+                f"{prefix}_Date": df.iloc[:, 14].fillna('NaN').tolist(),          # Column 15
+                f"{prefix}_Value": df.iloc[:, 15].fillna('NaN').tolist(),         # Column 16
             }
-
-            ALPS_JSON.update({"ALPS_HOURS": ALPS_HOURS})
-        else:
-            logger.warning(f'ALPS: Hours request returned status code {response.status_code}')
-
-    except requests.RequestException as ALPS_request_error2:
-        logger.error(f"ALPS: The ALPS_request_error2 is: {ALPS_request_error2}")
-
-    # ------------------------- ALPS DENSITIES -------------------------
-    logger.info('ALPS: Requesting Densities data...')
-    startDate = datetime.now() - timedelta(days=7)
-    startDate_str_dens = startDate.strftime("%Y-%m-%d")
-    today = datetime.now().strftime("%Y-%m-%d")
-    start_of_week = datetime.now() - timedelta(
-        days=datetime.now().weekday() + 1 if datetime.now().weekday() != 6 else 0
-    )
-    start_of_week_str = start_of_week.strftime("%Y-%m-%d")
-    logger.debug(f"The day is {today}. The start of the week is {start_of_week_str}")
-
-    url = (
-        "https://midway.eu-west-1.prod.tsv.alps.lamps.amazon.dev/"
-        f"labor-plan?sites={Site}&concept=UNITS_PER_BUNDLE&aspect=FORECAST&"
-        f"startDate={startDate_str_dens}"
-    )
-    print(url)
-
-    try:
-        response = requests.get(url, cookies=cookie_jar, verify=False)
-        if response.status_code == 200:
+        except requests.RequestException as ALPS_request_error:
+            logger.error(f"ALPS: The {label} request error is: {ALPS_request_error}")
+            return None
+
+    def densities():
+        """LP Receive UPC and Pallet Receive UPP of the current week (cached with a TTL)."""
+        startDate = datetime.now() - timedelta(days=7)
+        startDate_str_dens = startDate.strftime("%Y-%m-%d")
+        today = datetime.now().strftime("%Y-%m-%d")
+        start_of_week = datetime.now() - timedelta(
+            days=datetime.now().weekday() + 1 if datetime.now().weekday() != 6 else 0
+        )
+        start_of_week_str = start_of_week.strftime("%Y-%m-%d")
+        logger.debug(f"The day is {today}. The start of the week is {start_of_week_str}")
+
+        cached = _load_cached_densities(Site, start_of_week_str)
+        if cached is not None:
+            logger.info(f'ALPS: Using cached Densities for week {start_of_week_str}')
+            return cached
+
+        logger.info('ALPS: Requesting Densities data...')
+        url = (
+            f"{ALPS_BASE_URL}?sites={Site}&concept=UNITS_PER_BUNDLE&aspect=FORECAST&"
+            f"startDate={startDate_str_dens}"
+        )
+        logger.debug(url)
+        try:
+            response = session.get(url, verify=False)
+            if response.status_code != 200:
+                logger.warning(f'ALPS: Densities request returned status code {response.status_code}')
+                return None
             logger.info('ALPS: Densities Request successful')
             df = pd.read_csv(io.StringIO(response.text), delimiter='\t')
-
-            # FIXED: Get LP Receive UPC (not sum)
-            # First try with week filter
-            lp_week_data = df[
-                (df.iloc[:, 14] == start_of_week_str) & 
-                (df.iloc[:, 6] == "PPR_DETAIL_INBOUND_RECEIVE_LP_RECEIVE")
-            ].iloc[:, 15]
-            
-            if len(lp_week_data) > 0:
-                # Found data for specific week - use mean instead of sum
-                ALPS_Densitites_LPReceive = float(lp_week_data.mean())
-                logger.info(f'ALPS: LP Receive UPC for week {start_of_week_str}: {ALPS_Densitites_LPReceive}')
-            else:
-                # No data for that week, get ANY LP Receive data
-                lp_any_data = df[df.iloc[:, 6] == "PPR_DETAIL_INBOUND_RECEIVE_LP_RECEIVE"].iloc[:, 15]
-                
-                if len(lp_any_data) > 0:
-                    # Use mean of all available data
-                    ALPS_Densitites_LPReceive = float(lp_any_data.mean())
-                    logger.info(f'ALPS: No LP data for week {start_of_week_str}, using overall mean: {ALPS_Densitites_LPReceive}')
-                else:
-                    ALPS_Densitites_LPReceive = 0.0
-                    logger.warning('ALPS: No LP Receive data found at all')
-
-            # FIXED: Get Pallet Receive UPP (not sum)
-            # First try with week filter
-            pallet_week_data = df[
-                (df.iloc[:, 14] == start_of_week_str) & 
-                (df.iloc[:, 6] == "PPR_DETAIL_INBOUND_RECEIVE_PALLET_RECEIVE")
-            ].iloc[:, 15]
-            
-            if len(pallet_week_data) > 0:
-                # Found data for specific week - use mean instead of sum
-                ALPS_Densitites_PalletReceive = float(pallet_week_data.mean())
-                logger.info(f'ALPS: Pallet Receive UPP for week {start_of_week_str}: {ALPS_Densitites_PalletReceive}')
-            else:
-                # No data for that week, get ANY Pallet Receive data
-                pallet_any_data = df[df.iloc[:, 6] == "PPR_DETAIL_INBOUND_RECEIVE_PALLET_RECEIVE"].iloc[:, 15]
-                
-                if len(pallet_any_data) > 0:
-                    # Use mean of all available data
-                    ALPS_Densitites_PalletReceive = float(pallet_any_data.mean())
-                    logger.info(f'ALPS: No Pallet data for week {start_of_week_str}, using overall mean: {ALPS_Densitites_PalletReceive}')
-                else:
-                    ALPS_Densitites_PalletReceive = 0.0
-                    logger.warning('ALPS: No Pallet Receive data found at all')
-
-            ALPS_DENSITIES = {
-                "ALPS_Densitites_LPReceive": ALPS_Densitites_LPReceive,
-                "ALPS_Densitites_PalletReceive": ALPS_Densitites_PalletReceive
-            }
-
-            ALPS_JSON.update({"ALPS_DENSITIES": ALPS_DENSITIES})
-        else:
-            logger.warning(f'ALPS: Densities request returned status code {response.status_code}')
-
-    except requests.RequestException as ALPS_request_error3:
-        logger.error(f"ALPS: The ALPS_request_error3 is: {ALPS_request_error3}")
+        except requests.RequestException as ALPS_request_error3:
+            logger.error(f"ALPS: The ALPS_request_error3 is: {ALPS_request_error3}")
+            return None
+
+        def weekly_mean(process, name):
+            # Mean for the current week, else the mean of all available data
+            values = df[df.iloc[:, 6] == process]
+            week_data = values[values.iloc[:, 14] == start_of_week_str].iloc[:, 15]
+            if len(week_data) > 0:
+                value = float(week_data.mean())
+                logger.info(f'ALPS: {name} for week {start_of_week_str}: {value}')
+                return value
+            any_data = values.iloc[:, 15]
+            if len(any_data) > 0:
+                value = float(any_data.mean())
+                logger.info(f'ALPS: No {name} data for week {start_of_week_str}, using overall mean: {value}')
+                return value
+            logger.warning(f'ALPS: No {name} data found at all')
+            return 0.0
+
+        ALPS_DENSITIES = {
+            "ALPS_Densitites_LPReceive": weekly_mean("PPR_DETAIL_INBOUND_RECEIVE_LP_RECEIVE", "LP Receive UPC"),
+            "ALPS_Densitites_PalletReceive": weekly_mean("PPR_DETAIL_INBOUND_RECEIVE_PALLET_RECEIVE",
+                                                         "Pallet Receive UPP"),
+        }
+        _store_densities(Site, start_of_week_str, ALPS_DENSITIES)
+        return ALPS_DENSITIES
+
+    # ------------------------- ALPS IB / HOURS / DENSITIES -------------------------
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        ib_future = executor.submit(labor_plan_columns, "PROCESSING_CAPABILITY", "IB", "ALPS_IB")
+        hours_future = executor.submit(labor_plan_columns, "SHOW_HOURS", "Hours", "ALPS_HOURS")
+        densities_future = executor.submit(densities)
+        ALPS_IB = ib_future.result()
+        ALPS_HOURS = hours_future.result()
+        ALPS_DENSITIES = densities_future.result()
+    session.close()
+
+    if ALPS_IB is not None:
+        ALPS_JSON.update({"ALPS_IB": encode_columns(ALPS_IB) if compact else ALPS_IB})
+    if ALPS_HOURS is not None:
+        ALPS_JSON.update({"ALPS_HOURS": encode_columns(ALPS_HOURS) if compact else ALPS_HOURS})
+    if ALPS_DENSITIES is not None:
+        ALPS_JSON.update({"ALPS_DENSITIES": ALPS_DENSITIES})
 
     logger.info('ALPS: Finished!')
-    return ALPS_JSON
\ No newline at end of file
+    return ALPS_JSON
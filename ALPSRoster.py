@@ -1,4 +1,6 @@
 # ALPSRoster.py
+import os
+import time
 import logging
 import requests
 import pandas as pd
@@ -8,8 +10,66 @@ import re
 import urllib3
 from http.cookiejar import MozillaCookieJar
 
+from utils.path_utils import get_cache_dir
+from utils.frame_cache import read_frame, write_frame, list_frames, remove_frame
+
 logger = logging.getLogger(__name__)
 
+# Parsed rosters are cached per (site, Roster Upload Id) and kept this long after last use
+ALPS_ROSTER_RETENTION_DAYS = 14
+
+
+def _roster_path(Site, roster_upload_id, root=None):
+    return os.path.join(root or get_cache_dir('alps_roster', Site), str(roster_upload_id))
+
+
+def load_cached_roster(Site, roster_upload_id, root=None):
+    """
+    Returns the parsed roster of an upload id, or None if it is not cached.
+    The TSV of an upload id never changes, so a cached copy is always valid.
+    """
+    path_base = _roster_path(Site, roster_upload_id, root)
+    df = read_frame(path_base)
+    if df is not None:
+        # Last use keeps the entry inside the retention period
+        for ext in ('.parquet', '.pkl'):
+            try:
+                os.utime(path_base + ext)
+            except OSError:
+                pass
+    return df
+
+
+def store_roster(Site, roster_upload_id, df, root=None):
+    try:
+        write_frame(_roster_path(Site, roster_upload_id, root), df)
+    except Exception as e:
+        logger.warning(f"Could not cache ALPS roster {roster_upload_id} for {Site}: {e}")
+
+
+def prune_roster_cache(Site, retention_days=ALPS_ROSTER_RETENTION_DAYS, root=None, now=None):
+    """Deletes cached rosters of a site not used within the retention period."""
+    cutoff = (now or time.time()) - retention_days * 86400
+    for path_base in list_frames(root or get_cache_dir('alps_roster', Site)):
+        mtimes = [os.path.getmtime(path_base + ext) for ext in ('.parquet', '.pkl') if os.path.exists(path_base + ext)]
+        if mtimes and max(mtimes) < cutoff:
+            remove_frame(path_base)
+
+
+def _roster_result(Site, roster_upload_id, df, from_cache):
+    """Result dictionary with the roster DataFrame and metadata."""
+    return {
+        "RosterData": df,
+        "Metadata": {
+            "RosterUploadId": roster_upload_id,
+            "RowCount": len(df),
+            "Site": Site,
+            "TimeStamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "FromCache": from_cache
+        }
+    }
+
+
 def ALPSRosterFunction(Site, midway_session=None, cookie_jar=None, session=None):
     """
     Retrieves ALPS Roster data for a specific site using Midway authentication.
@@ -55,7 +115,13 @@ def ALPSRosterFunction(Site, midway_session=None, cookie_jar=None, session=None)
             if match:
                 roster_upload_id = match.group(1)
                 logger.info(f"Found Roster Upload Id: {roster_upload_id}")
-                
+
+                prune_roster_cache(Site)
+                df = load_cached_roster(Site, roster_upload_id)
+                if df is not None:
+                    logger.info(f"Using cached roster for upload {roster_upload_id} ({len(df)} rows)")
+                    return _roster_result(Site, roster_upload_id, df, from_cache=True)
+
                 # Get the TSV data using the Roster Upload Id
                 tsv_url = f"https://alps-eu.amazon.com/roster_uploads/report/employee/{roster_upload_id}.tsv"
                 logger.info(f"Requesting TSV data from {tsv_url}")
@@ -74,19 +140,9 @@ def ALPSRosterFunction(Site, midway_session=None, cookie_jar=None, session=None)
                     df = pd.read_csv(tsv_data, sep='\t')
                     
                     logger.info(f"Parsed TSV data into DataFrame with {len(df)} rows")
-                    
-                    # Create a result dictionary with DataFrame and metadata
-                    result = {
-                        "RosterData": df,
-                        "Metadata": {
-                            "RosterUploadId": roster_upload_id,
-                            "RowCount": len(df),
-                            "Site": Site,
-                            "TimeStamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                    }
-                    
-                    return result
+                    store_roster(Site, roster_upload_id, df)
+
+                    return _roster_result(Site, roster_upload_id, df, from_cache=False)
                 else:
                     logger.error(f"Error retrieving TSV data: {tsv_response.status_code}")
             else:
@@ -12,6 +12,11 @@ that can be used to fill in missing values in YMS records.
 
 import getpass
 import os
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime
 from http.cookiejar import MozillaCookieJar
 import pandas as pd
 import warnings
@@ -21,6 +26,8 @@ from bs4 import BeautifulSoup
 # Suppress warnings (review before production use)
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
 def FMCfunction(Site):
     """
     Upgraded FMCfunction:
@@ -131,3 +138,109 @@ def FMCfunction(Site):
         return final_df
     except requests.RequestException as e:
         return pd.DataFrame()
+
+
+def frame_fingerprint(df):
+    """Content hash of a DataFrame (columns + values), used to verify snapshot integrity."""
+    if df is None or df.empty:
+        return "empty"
+    digest = hashlib.sha1("|".join(map(str, df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class FMCSnapshotProvider:
+    """
+    Run-scoped FMC snapshots: the FMC page of a site is scraped once per run
+    and every consumer (FMC module, YMS, YMS_API) receives a copy of the same
+    parsed table.
+
+    The table is fingerprinted once, when it is fetched. Every hand-out is
+    recorded with the fingerprint and fetch time of the snapshot served, so
+    the Audit flags a site whose consumers saw different data (e.g. after a
+    max_age re-fetch, or a retry after an empty scrape).
+    """
+
+    def __init__(self, fetch_func=None, max_age_seconds=900):
+        self.fetch_func = fetch_func or FMCfunction
+        # Bounds reuse when no run boundary is signalled (standalone callers)
+        self.max_age_seconds = max_age_seconds
+        self._snapshots = {}
+        self._served = {}
+        self._site_locks = {}
+        self._lock = threading.Lock()
+
+    def begin_run(self):
+        """Drops all snapshots and hand-out records; call once at the start of every OneFlow run."""
+        with self._lock:
+            self._snapshots = {}
+            self._served = {}
+
+    def _site_lock(self, site):
+        with self._lock:
+            return self._site_locks.setdefault(site, threading.Lock())
+
+    def get(self, site, consumer):
+        """
+        Returns a copy of the run's FMC table for a site, scraping it on first use.
+        Empty results are not kept, so a later consumer retries the scrape.
+        """
+        with self._site_lock(site):
+            snapshot = self._snapshots.get(site)
+            if snapshot and time.monotonic() - snapshot["created"] > self.max_age_seconds:
+                snapshot = None
+            if snapshot is None:
+                df = self.fetch_func(site)
+                if not isinstance(df, pd.DataFrame):
+                    df = pd.DataFrame(df)
+                snapshot = {
+                    "frame": df,
+                    "fingerprint": frame_fingerprint(df),
+                    "fetched_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    "created": time.monotonic(),
+                }
+                logger.info(f"FMC snapshot for {site} taken at {snapshot['fetched_at']} ({len(df)} rows)")
+                if not df.empty:
+                    self._snapshots[site] = snapshot
+
+            with self._lock:
+                served = self._served.setdefault(site, [])
+                if served and served[-1]["fingerprint"] != snapshot["fingerprint"]:
+                    logger.warning(f"FMC snapshot for {site} served to {consumer} differs from the one "
+                                   f"{served[-1]['consumer']} received (fetched {served[-1]['fetched_at']})")
+                served.append({
+                    "consumer": consumer,
+                    "fingerprint": snapshot["fingerprint"],
+                    "fetched_at": snapshot["fetched_at"],
+                    "rows": len(snapshot["frame"]),
+                })
+            return snapshot["frame"].copy()
+
+    def audit(self):
+        """Summarises, per site, the snapshots served and whether all consumers saw the same data."""
+        with self._lock:
+            served = {site: list(entries) for site, entries in self._served.items()}
+        report = {}
+        for site, entries in served.items():
+            latest = entries[-1]
+            fingerprints = {entry["fingerprint"] for entry in entries}
+            report[site] = {
+                "FetchedAt": latest["fetched_at"],
+                "Rows": latest["rows"],
+                "Fingerprint": latest["fingerprint"],
+                "Consumers": [{"Consumer": entry["consumer"], "FetchedAt": entry["fetched_at"],
+                               "Fingerprint": entry["fingerprint"]} for entry in entries],
+                "Consistent": len(fingerprints) == 1,
+            }
+            if len(fingerprints) > 1:
+                report[site]["InconsistentConsumers"] = [
+                    entry["consumer"] for entry in entries if entry["fingerprint"] != latest["fingerprint"]]
+        return report
+
+
+FMC_SNAPSHOTS = FMCSnapshotProvider()
+
+
+def get_fmc_snapshot(Site, consumer="FMC"):
+    """Returns the run's shared FMC DataFrame for a site (see FMCSnapshotProvider)."""
+    return FMC_SNAPSHOTS.get(Site, consumer)
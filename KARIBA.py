@@ -12,19 +12,205 @@ Supported sites:
 
 import logging
 import re
+import math
 from datetime import datetime
+from html.parser import HTMLParser
 import requests
 from http.cookiejar import MozillaCookieJar
 import getpass
-import pandas as pd
 import warnings
-from bs4 import BeautifulSoup
 import io
 
 # Create or retrieve a logger
 logger = logging.getLogger(__name__)
 warnings.filterwarnings('ignore')
 
+# Characters decoded and parsed per step while streaming the ItemList page
+ITEMLIST_CHUNK_SIZE = 64 * 1024
+
+
+def _to_number(text):
+    """float of a cell, NaN when it is not numeric (as pd.to_numeric(errors='coerce'))."""
+    if text is None or '_' in text:
+        return math.nan
+    try:
+        return float(text)
+    except ValueError:
+        return math.nan
+
+
+class ItemListTable:
+    """
+    One top-level <table> of the ItemList page, reduced to what KARIBA needs:
+    its headers, the row count and the cells of the column units are read from.
+    """
+
+    def __init__(self):
+        self.headers = []
+        self.has_tr = False
+        self.rows = 0
+        self.row_width = None
+        self.has_quantity = False
+        self.quantity_index = None
+        # Fallback tables without a quantity header keep numeric cells per column
+        self.columns = None
+        self.values = []
+
+    def start_rows(self, width, keep_columns):
+        """Fixes the column layout on the first data row."""
+        self.row_width = width
+        self.has_quantity = any('quantity' in header.lower() for header in self.headers)
+        if len(self.headers) != width:
+            return
+        if self.has_quantity:
+            self.quantity_index = next(i for i, h in enumerate(self.headers) if 'quantity' in h.lower())
+        elif width >= 11:
+            # Without a quantity header the units are usually the 11th column
+            self.quantity_index = 10
+        elif keep_columns and width > 2:
+            self.columns = [[] for _ in range(width)]
+
+    def add_row(self, cells):
+        self.rows += 1
+        if self.quantity_index is not None:
+            self.values.append(_to_number(cells[self.quantity_index] if self.quantity_index < len(cells) else None))
+        elif self.columns is not None:
+            for pos, column in enumerate(self.columns):
+                column.append(_to_number(cells[pos] if pos < len(cells) else None))
+
+    def quantity_values(self):
+        """Numeric units per row (NaN where not numeric), or None if no column qualifies."""
+        if self.row_width is not None and len(self.headers) != self.row_width:
+            raise ValueError(f"{len(self.headers)} headers for rows of {self.row_width} cells")
+        if self.quantity_index is not None:
+            logger.info(f"KARIBA: Using quantity column: {self.headers[self.quantity_index]}")
+            return self.values
+        if self.columns is not None:
+            logger.warning("KARIBA: Could not identify quantity column, using the first numeric column")
+            for header, column in zip(self.headers, self.columns):
+                if any(not math.isnan(value) for value in column):
+                    logger.info(f"KARIBA: Using numeric column: {header}")
+                    return column
+        return None
+
+
+class ItemListExtractor(HTMLParser):
+    """
+    Streaming extractor for the RODEO ItemList page.
+
+    HTML is fed in chunks as it arrives; only the cells of the units column are
+    kept, so memory does not grow with the page beyond one number per item. The
+    data table is the first top-level table with a 'quantity' header, else the
+    first table with any rows; parsing stops as soon as the former is complete.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.done = False
+        self.quantity_table = None
+        self.fallback_table = None
+        self._table = None
+        self._depth = 0
+        self._cells = None
+        self._cell = None
+        self._cell_tag = None
+
+    def _close_cell(self):
+        if self._cell is None:
+            return
+        text = ''.join(self._cell).strip()
+        if self._cell_tag == 'th':
+            self._table.headers.append(text)
+        elif self._cells is not None:
+            self._cells.append(text)
+        self._cell = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._cells:
+            table = self._table
+            if table.row_width is None:
+                table.start_rows(len(self._cells), keep_columns=self.fallback_table is None)
+            table.add_row(self._cells)
+        self._cells = None
+
+    def _close_table(self):
+        self._close_row()
+        table = self._table
+        if table.row_width is None:
+            table.has_quantity = any('quantity' in header.lower() for header in table.headers)
+        if table.has_quantity:
+            logger.info(f"KARIBA: Found table with headers: {[h.lower() for h in table.headers]}")
+            self.quantity_table = table
+            self.done = True
+        elif table.has_tr and self.fallback_table is None:
+            self.fallback_table = table
+        self._table = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'table':
+            self._depth += 1
+            if self._depth == 1:
+                self._table = ItemListTable()
+        elif self._table is None:
+            return
+        elif tag == 'tr':
+            self._close_row()
+            self._table.has_tr = True
+            self._cells = []
+        elif tag in ('td', 'th'):
+            self._close_cell()
+            self._cell = []
+            self._cell_tag = tag
+
+    def handle_endtag(self, tag):
+        if self.done or self._table is None:
+            return
+        if tag in ('td', 'th'):
+            self._close_cell()
+        elif tag == 'tr':
+            self._close_row()
+        elif tag == 'table':
+            self._depth -= 1
+            if self._depth == 0:
+                self._close_table()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def close(self):
+        super().close()
+        if self._table is not None and not self.done:
+            self._close_table()
+
+    def data_table(self):
+        """The table units are read from, or None if the page has none."""
+        if self.quantity_table:
+            return self.quantity_table
+        if self.fallback_table:
+            logger.info(f"KARIBA: Using fallback table with {self.fallback_table.rows} data rows")
+        return self.fallback_table
+
+def parse_itemlist(chunks):
+    """
+    Feeds ItemList HTML chunks (str) to an ItemListExtractor, stopping early
+    once the data table is complete.
+
+    Returns:
+        ItemListExtractor: use data_table() for the extracted table.
+    """
+    extractor = ItemListExtractor()
+    for chunk in chunks:
+        extractor.feed(chunk)
+        if extractor.done:
+            break
+    extractor.close()
+    return extractor
+
+
 def KARIBAPuller(Site=None):
     """
     Pulls picked WIP data from RODEO for KARIBA-TSI planning.
@@ -102,7 +288,7 @@ def KARIBAPuller(Site=None):
     try:
         # 3) Send GET request
         logger.info(f"KARIBA: Requesting data from URL: {url}")
-        response = requests.get(url, cookies=cookie_jar, verify=False)
+        response = requests.get(url, cookies=cookie_jar, verify=False, stream=True)
         status_code = response.status_code
         logger.info(f"KARIBA: HTTP status code: {status_code}")
 
@@ -110,44 +296,19 @@ def KARIBAPuller(Site=None):
             logger.warning(f"KARIBA: Error in HTTP request: {status_code}")
             return None
 
-        # 4) Parse the HTML response
-        logger.info("KARIBA: Request successful. Parsing HTML...")
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 5) Find the data table
-        data_table = None
-        
-        # Look for table with headers containing 'quantity'
-        for table in soup.find_all('table'):
-            headers = [th.get_text().strip().lower() for th in table.find_all('th')]
-            if any('quantity' in header for header in headers):
-                data_table = table
-                logger.info(f"KARIBA: Found table with headers: {headers}")
-                break
-        
-        if not data_table:
-            # Fallback to any table with rows
-            tables = soup.find_all('table')
-            for table in tables:
-                if table.find_all('tr'):
-                    data_table = table
-                    logger.info(f"KARIBA: Using fallback table with {len(table.find_all('tr'))} rows")
-                    break
-        
-        if not data_table:
+        # 4) Stream the HTML response into the extractor chunk by chunk
+        logger.info("KARIBA: Request successful. Streaming ItemList rows...")
+        response.encoding = response.encoding or 'utf-8'
+        with response:
+            extractor = parse_itemlist(response.iter_content(chunk_size=ITEMLIST_CHUNK_SIZE, decode_unicode=True))
+
+        # 5) Resolve the data table and its quantity column
+        table = extractor.data_table()
+        if not table:
             logger.error("KARIBA: Could not find data table in response")
             return None
-        
-        # 6) Extract headers and rows
-        headers = [header.get_text().strip() for header in data_table.find_all('th')]
-        rows = []
-        
-        for row in data_table.find_all('tr'):
-            cells = row.find_all('td')
-            if cells:  # Skip header row
-                rows.append([cell.get_text().strip() for cell in cells])
-        
-        if not rows:
+
+        if not table.rows:
             logger.warning("KARIBA: No data rows found in table")
             return {
                 "total_units": 0,
@@ -157,53 +318,20 @@ def KARIBAPuller(Site=None):
                 "kariba_site": kariba_site,
                 "destination_fc": destination_fc
             }
-        
-        # 7) Create DataFrame from extracted data
-        df = pd.DataFrame(rows, columns=headers if len(headers) == len(rows[0]) else None)
-        
-        # 8) Find the quantity column
-        quantity_column = None
-        for col in df.columns:
-            if 'quantity' in col.lower():
-                quantity_column = col
-                logger.info(f"KARIBA: Found quantity column: {col}")
-                break
-        
-        if not quantity_column:
-            logger.warning("KARIBA: Could not identify quantity column, trying index-based approach")
-            # Try to use column position (often quantity is 10th column)
-            if len(df.columns) >= 11:
-                quantity_column = df.columns[10]  # 11th column (index 10)
-                logger.info(f"KARIBA: Using column at position 10: {quantity_column}")
-            elif len(df.columns) > 2:
-                # Try any column that can be converted to numeric
-                for col in df.columns:
-                    try:
-                        if pd.to_numeric(df[col], errors='coerce').notna().any():
-                            quantity_column = col
-                            logger.info(f"KARIBA: Using numeric column: {col}")
-                            break
-                    except:
-                        continue
-        
-        if not quantity_column:
+
+        units_values = table.quantity_values()
+        if units_values is None:
             logger.error("KARIBA: Failed to find a valid quantity column")
             return None
-        
-        # 9) Calculate the total units
-        try:
-            df[quantity_column] = pd.to_numeric(df[quantity_column], errors='coerce')
-            total_units = df[quantity_column].sum()
-            units_list = df[quantity_column].fillna(0).tolist()
-        except Exception as e:
-            logger.error(f"KARIBA: Error calculating units: {e}")
-            return None
-        
-        # 10) Return the results
+
+        # 6) Calculate the total units
+        total_units = sum(u for u in units_values if not math.isnan(u))
+
+        # 7) Return the results
         result = {
             "total_units": int(total_units),
-            "units": [int(u) if not pd.isna(u) else 0 for u in units_list],
-            "item_count": len(units_list),
+            "units": [int(u) if not math.isnan(u) else 0 for u in units_values],
+            "item_count": len(units_values),
             "extraction_time": datetime.now().isoformat(),
             "kariba_site": kariba_site,
             "destination_fc": destination_fc
@@ -1,6 +1,7 @@
 import time
 import logging
 import sys
+import threading
 import pandas as pd
 
 from OneFlow.oneflow_config import FC_TO_COUNTRY
@@ -11,6 +12,24 @@ from OneFlow.oneflow_concurrency import run_all_tasks
 
 logger = logging.getLogger(__name__)
 
+
+def run_deferred_validations(background=False):
+    """
+    Runs validations modules deferred until the output exists (YMS_API does
+    this by default). Only modules that were loaded in this run can have any.
+    In the background they run on a daemon thread, so they never hold up
+    process exit (whatever is still pending then is dropped).
+    """
+    framework = sys.modules.get("YMS_API.yms_validation_framework")
+    if framework is None or not framework.DEFERRED_VALIDATIONS.pending():
+        return
+    if background:
+        threading.Thread(target=framework.run_deferred_validations, name="deferred-validations",
+                         daemon=True).start()
+    else:
+        framework.run_deferred_validations()
+
+
 def OneFlow_MainFunction(Site: str, SOSdatetime: str, EOSdatetime: str,
                          plan_type: str, shift: str,
                          modules=None, max_workers=5, external_auth=None,
@@ -147,7 +166,7 @@ def OneFlow_MainFunction(Site: str, SOSdatetime: str, EOSdatetime: str,
                 outputJSON[mod_name] = processed_data
 
     # --- F) Audit block ---
-    from OneFlow.oneflow_audit import build_audit_block, record_execution_time, generate_module_status_report
+    from OneFlow.oneflow_audit import build_audit_block, record_execution_time, generate_module_status_report, extract_module_audit
 
     # If you want to preserve older runs in 'History' across multiple calls or merges,
     # fetch it from a prior object, e.g.:
@@ -160,7 +179,8 @@ def OneFlow_MainFunction(Site: str, SOSdatetime: str, EOSdatetime: str,
         modules,
         error_list,
         module_exec_times,
-        previous_history
+        previous_history,
+        module_audit=extract_module_audit(outputJSON)
     )
     outputJSON["Audit"] = audit_info
 
@@ -222,9 +242,12 @@ def OneFlow_MainFunction(Site: str, SOSdatetime: str, EOSdatetime: str,
             print(f"Failed to save JSON: {e}")
             logger.error(f"Failed to save JSON: {e}", exc_info=True)
             final_json_filepath = None
-            
+
+        # --- I) Deferred validations, now that the output is written ---
+        run_deferred_validations()
         return final_json_filepath
     else:
+        run_deferred_validations(background=True)
         return outputJSON
 
 
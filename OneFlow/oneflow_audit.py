@@ -274,7 +274,29 @@ def generate_module_status_report(site, module_exec_times, module_statuses, erro
         return None
 
 
-def build_audit_block(start_time, modules, error_list, module_exec_times=None, previous_history=None):
+def extract_module_audit(outputJSON):
+    """
+    Pops the '_audit' entry that modules may attach to their dict output
+    (e.g. PPR fetch paths) so it is reported in the Audit instead of the data.
+
+    Returns:
+        dict: {module_name: audit_dict}
+    """
+    module_audit = {}
+    for mod_name, data in outputJSON.items():
+        if isinstance(data, dict) and isinstance(data.get("_audit"), dict):
+            module_audit[mod_name] = data.pop("_audit")
+
+    # Which consumers shared each run-scoped FMC snapshot, and whether they all saw the same data
+    from FMC import FMC_SNAPSHOTS
+    fmc_snapshots = FMC_SNAPSHOTS.audit()
+    if fmc_snapshots:
+        module_audit.setdefault("FMC", {})["Snapshots"] = fmc_snapshots
+    return module_audit
+
+
+def build_audit_block(start_time, modules, error_list, module_exec_times=None, previous_history=None,
+                      module_audit=None):
     """
     Creates or updates an 'audit_info' dictionary that tracks:
     - Execution time in seconds/minutes
@@ -283,6 +305,7 @@ def build_audit_block(start_time, modules, error_list, module_exec_times=None, p
     - Modules downloaded/attempted
     - Execution mode and executable name
     - Dictionary of individual module execution times for the current run
+    - Module-reported audit details (e.g. which source served each PPR process)
     - A full 'History' array containing all runs
     """
     end_time = time.time()
@@ -310,6 +333,8 @@ def build_audit_block(start_time, modules, error_list, module_exec_times=None, p
         "ExecutionMode": script_mode,
         "ExecutableName": executable_name
     }
+    if module_audit:
+        new_record["ModuleAudit"] = module_audit
 
     # Ensure previous_history is a list
     if previous_history is None:
@@ -334,6 +359,8 @@ def build_audit_block(start_time, modules, error_list, module_exec_times=None, p
         "ErrorDetails":         most_recent["ErrorDetails"],
         "History":              previous_history  # Include the full history
     }
+    if "ModuleAudit" in most_recent:
+        audit_info["ModuleAudit"] = most_recent["ModuleAudit"]
 
     # Calculate cumulative time based on the potentially updated history
     cumulative_seconds = sum(item.get("TotalExecutionTimeSeconds", 0.0) for item in previous_history)
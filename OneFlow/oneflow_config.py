@@ -64,6 +64,30 @@ STANDALONE_MODULES = [
     "PPR_Q"  # Added PPR_Q as standalone module
 ]
 
+# Race the PPR_Q fallback against slow primary PPR fetches for critical processes
+PPR_RACE_MODE = False
+
+# Compose PPR_Q functionRollup reports from a local hour-bucket cube
+PPR_Q_HOURLY_CUBE = False
+
+# ALPS IB/Hours lists in dictionary/run-length form (utils.compact_columns).
+# False keeps the plain-list shape current FlexSim loaders read.
+ALPS_COMPACT_OUTPUT = False
+
+# RODEO ExSD export: None pulls it in one request; a number of hours splits it
+# into ExSD buckets fetched concurrently and merged by work pool
+RODEO_SHARD_HOURS = None
+
+# YMS yard backends ("YMS" or "YMS_API"). The primary serves the run; in shadow
+# mode the other one runs off the critical path and both results are compared
+# field by field (latency and agreement are kept in the local cache).
+YMS_PRIMARY_BACKEND = "YMS"
+YMS_SHADOW_MODE = False
+# Serve from the faster backend once recent comparisons agree well enough
+YMS_AUTO_SELECT_BACKEND = False
+YMS_AUTO_SELECT_MIN_AGREEMENT = 0.98
+YMS_AUTO_SELECT_MIN_COMPARISONS = 5
+
 # Function to get base directory
 def get_base_dir():
     """
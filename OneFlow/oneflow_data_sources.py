@@ -23,14 +23,18 @@ def PPR_Q_function(Site, SOSdatetime, EOSdatetime):
         return {}
     
     # Create PPRQProcessor and run it
-    ppr_q = PPRQProcessor(site=Site, sos_datetime=sos_dt, eos_datetime=eos_dt)
+    ppr_q = PPRQProcessor(site=Site, sos_datetime=sos_dt, eos_datetime=eos_dt, hourly_cube=PPR_Q_HOURLY_CUBE)
     return ppr_q.run()
 from RODEO import RODEOfunction
 # ULTRA-ENHANCED YMS: 100% traditional quality, 8x faster!
 # from YMS_API.yms_ultra_main import YMSfunction
-from YMS.yms_main import YMSfunction
-from FMC import FMCfunction
+# Serving backend (YMS or YMS_API) and shadow comparison: see YMS_* in oneflow_config
+from OneFlow.oneflow_yms_shadow import YMS_with_shadow
+from FMC import get_fmc_snapshot, FMC_SNAPSHOTS
+from data_retrieval.dock_master_fetch import DOCK_MASTER_FETCHES, DOCKMASTER_VIEWS
+from utils.single_flight import FCLM_FLIGHTS
 from OneFlow.oneflow_utils import parse_datetime
+from OneFlow.oneflow_config import PPR_RACE_MODE, PPR_Q_HOURLY_CUBE, RODEO_SHARD_HOURS, ALPS_COMPACT_OUTPUT
 from ALPSRoster import ALPSRosterFunction
 
 
@@ -91,12 +95,12 @@ def retrieve_ALPS(Site, SOSdatetime, EOSdatetime):
         logger.info(f"ALPS: Adjusting requested date range ({SOSdatetime} to {EOSdatetime}) to cover "
                     f"{adjusted_start_str} to {adjusted_end_str} for FlexSim compatibility.")
         # Pass the *adjusted* date strings to ALPSfunction
-        return ALPSfunction(Site, adjusted_start_str, adjusted_end_str)
+        return ALPSfunction(Site, adjusted_start_str, adjusted_end_str, compact=ALPS_COMPACT_OUTPUT)
     else:
         # If specific dates weren't provided or couldn't be parsed,
         # call ALPSfunction without date arguments to trigger its default logic.
         logger.info("ALPS: No valid SOS/EOS provided. Using ALPSfunction default date range.")
-        return ALPSfunction(Site, None, None)
+        return ALPSfunction(Site, None, None, compact=ALPS_COMPACT_OUTPUT)
 
 
 def build_data_sources(modules, fc, mp, default_start_date, default_end_date, current_date,
@@ -109,6 +113,13 @@ def build_data_sources(modules, fc, mp, default_start_date, default_end_date, cu
       2) A retrieval function that does the raw data fetch.
       3) A processing function for post-processing.
     """
+    # FMC is scraped at most once per run and shared by FMC, YMS and YMS_API
+    FMC_SNAPSHOTS.begin_run()
+    # DockMaster and DockMaster2 share one sharded DockMaster fetch per run
+    DOCK_MASTER_FETCHES.begin_run([view for view in DOCKMASTER_VIEWS if view in modules])
+    # FCLM results lingering from the previous run are not reused
+    FCLM_FLIGHTS.clear()
+
     DATA_SOURCES = [
         {
             "name": "DockMaster",
@@ -204,7 +215,7 @@ def build_data_sources(modules, fc, mp, default_start_date, default_end_date, cu
         {
             "name": "PPR",
             "condition": lambda: "PPR" in modules and plan_type == 'Prior-Day',
-            "retrieve_func": lambda: PPRfunction(Site, ppr_sos_str, ppr_eos_str),
+            "retrieve_func": lambda: PPRfunction(Site, ppr_sos_str, ppr_eos_str, race_mode=PPR_RACE_MODE),
             "process_func": no_processing,
         },
         {
@@ -287,19 +298,20 @@ def build_data_sources(modules, fc, mp, default_start_date, default_end_date, cu
         {
             "name": "RODEO",
             "condition": lambda: "RODEO" in modules,
-            "retrieve_func": lambda: RODEOfunction(Site),
+            "retrieve_func": lambda: RODEOfunction(Site, session=session, cookie_jar=cookie_jar,
+                                                    shard_hours=RODEO_SHARD_HOURS),
             "process_func": no_processing,
         },
         {
             "name": "YMS",
             "condition": lambda: "YMS" in modules,
-            "retrieve_func": lambda: YMSfunction(Site),
+            "retrieve_func": lambda: YMS_with_shadow(Site),
             "process_func": no_processing,
         },
         {
             "name": "FMC",
             "condition": lambda: "FMC" in modules,
-            "retrieve_func": lambda: FMCfunction(Site),
+            "retrieve_func": lambda: get_fmc_snapshot(Site, consumer="FMC"),
             "process_func": no_processing,
         },
         {
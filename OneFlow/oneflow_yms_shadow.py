@@ -0,0 +1,268 @@
+# oneflow_yms_shadow.py
+"""
+Shadow mode for the two yard backends (YMS/ and YMS_API/).
+
+The primary backend serves the run. With shadow mode on, the secondary one
+runs in a background thread once the primary returned, and both results are
+normalized and compared field by field. Latency per backend and agreement per
+comparison are kept in the local cache, and with auto-selection on, the faster
+backend becomes primary once recent comparisons agree above a threshold.
+"""
+import os
+import json
+import time
+import logging
+import threading
+import statistics
+
+from utils.path_utils import get_cache_dir
+from utils.latency_tracker import LatencyTracker
+from OneFlow.oneflow_config import (YMS_PRIMARY_BACKEND, YMS_SHADOW_MODE, YMS_AUTO_SELECT_BACKEND,
+                                    YMS_AUTO_SELECT_MIN_AGREEMENT, YMS_AUTO_SELECT_MIN_COMPARISONS)
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("YMS", "YMS_API")
+
+# Output lists compared per record; records are matched on (name, type, ordinal)
+COMPARED_FIELDS = ["YMS_status", "YMS_SCAC", "YMS_Unavailable", "YMS_UnavailableReason",
+                   "YMS_Lane", "YMS_Load", "YMS_VRID"]
+KEY_FIELDS = ["YMS_name", "YMS_type"]
+EMPTY_VALUES = {None, "", "NaN", "nan", "None"}
+MISMATCH_SAMPLES = 5
+
+
+def run_backend(backend, site, shadow=False):
+    """
+    Runs one yard backend (imported lazily so either can be absent). A shadow
+    run of the traditional YMS keeps off its session pool and yard-diff state,
+    which belong to the serving runs; YMS_API keeps no such state.
+    """
+    if backend == "YMS_API":
+        from YMS_API.yms_ultra_main import YMSfunction
+        return YMSfunction(site)
+    from YMS.yms_main import YMSfunction
+    return YMSfunction(site, shadow=shadow)
+
+
+def _normalize_value(value):
+    if isinstance(value, float) and value != value:
+        return "NaN"
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+    return "NaN" if value in EMPTY_VALUES else value
+
+
+def normalize_result(result):
+    """
+    Normalized records of a backend result, keyed by 'name|type|n'.
+
+    Returns:
+        dict key -> {field: value}, or None if the result carries no yard data.
+    """
+    main = (result or {}).get("Main") if isinstance(result, dict) else None
+    if not isinstance(main, dict) or "error" in main or not main.get("YMS_name"):
+        return None
+    columns = {field: main.get(field) or [] for field in KEY_FIELDS + COMPARED_FIELDS}
+    records = {}
+    seen = {}
+    for pos, name in enumerate(columns["YMS_name"]):
+        identity = f"{_normalize_value(name)}|{_normalize_value(_at(columns['YMS_type'], pos))}"
+        ordinal = seen.get(identity, 0)
+        seen[identity] = ordinal + 1
+        records[f"{identity}|{ordinal}"] = {field: _normalize_value(_at(columns[field], pos))
+                                            for field in COMPARED_FIELDS}
+    return records
+
+
+def _at(values, pos):
+    return values[pos] if pos < len(values) else None
+
+
+def compare_results(primary_records, shadow_records):
+    """
+    Field-by-field diff of two normalized results.
+
+    Agreement is the share of (record, field) pairs with equal values over
+    the union of records, so records only one backend reported count as
+    disagreeing on every field.
+    """
+    matched = primary_records.keys() & shadow_records.keys()
+    union = len(primary_records.keys() | shadow_records.keys())
+    fields = {}
+    for field in COMPARED_FIELDS:
+        agree = 0
+        samples = []
+        for key in matched:
+            a, b = primary_records[key][field], shadow_records[key][field]
+            if a == b:
+                agree += 1
+            elif len(samples) < MISMATCH_SAMPLES:
+                samples.append({"record": key, "primary": a, "shadow": b})
+        fields[field] = {"agreement": round(agree / union, 4) if union else 1.0, "mismatches": samples}
+    overall = statistics.fmean(f["agreement"] for f in fields.values()) if fields else 1.0
+    return {
+        "records": {"primary": len(primary_records), "shadow": len(shadow_records), "matched": len(matched)},
+        "agreement": round(overall, 4),
+        "fields": fields,
+    }
+
+
+class ShadowComparisonStore:
+    """Recent comparison summaries per site in a small JSON file (cache dir)."""
+
+    def __init__(self, window=50, path=None):
+        self.window = window
+        self.path = path or os.path.join(get_cache_dir('yms_shadow'), "comparisons.json")
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return {site: list(entries) for site, entries in data.items() if isinstance(entries, list)}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Could not read YMS shadow store {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f, default=str)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not write YMS shadow store {self.path}: {e}")
+
+    def record(self, site, entry):
+        with self._lock:
+            entries = self._entries.setdefault(site, [])
+            entries.append(entry)
+            del entries[:-self.window]
+            self._save()
+
+    def recent(self, site, count=None):
+        with self._lock:
+            entries = list(self._entries.get(site, []))
+        return entries[-count:] if count else entries
+
+
+class YMSShadowRunner:
+    """Chooses the serving backend per site and runs the other one in shadow."""
+
+    def __init__(self, primary=YMS_PRIMARY_BACKEND, shadow_mode=YMS_SHADOW_MODE,
+                 auto_select=YMS_AUTO_SELECT_BACKEND, min_agreement=YMS_AUTO_SELECT_MIN_AGREEMENT,
+                 min_comparisons=YMS_AUTO_SELECT_MIN_COMPARISONS, store=None, latency=None,
+                 runner=run_backend):
+        self.primary = primary if primary in BACKENDS else "YMS"
+        self.shadow_mode = shadow_mode
+        self.auto_select = auto_select
+        self.min_agreement = min_agreement
+        self.min_comparisons = min_comparisons
+        self._store = store
+        self._latency = latency
+        self.runner = runner
+        self._threads = []
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = ShadowComparisonStore()
+        return self._store
+
+    @property
+    def latency(self):
+        if self._latency is None:
+            self._latency = LatencyTracker("yms_backends")
+        return self._latency
+
+    def select(self, site):
+        """
+        Returns (backend, reason). The configured primary is used unless
+        auto-selection is on and the last `min_comparisons` comparisons all
+        reached `min_agreement`, in which case the backend with the lower
+        median latency serves.
+        """
+        if not self.auto_select:
+            return self.primary, "config"
+        recent = self.store.recent(site, self.min_comparisons)
+        if len(recent) < self.min_comparisons or any(e.get("agreement", 0) < self.min_agreement for e in recent):
+            return self.primary, "config (agreement not established)"
+        medians = {}
+        for backend in BACKENDS:
+            samples = self.latency.samples(f"{site}:{backend}")
+            if len(samples) >= self.min_comparisons:
+                medians[backend] = statistics.median(samples)
+        if len(medians) < len(BACKENDS):
+            return self.primary, "config (latency not established)"
+        return min(BACKENDS, key=medians.get), "auto (faster, agreement established)"
+
+    def run(self, site):
+        """Serves the site from the selected backend; starts the shadow run if enabled."""
+        backend, reason = self.select(site)
+        start = time.time()
+        result = self.runner(backend, site)
+        elapsed = time.time() - start
+        primary_records = normalize_result(result)
+        if primary_records is not None and (self.shadow_mode or self.auto_select):
+            self.latency.record(f"{site}:{backend}", elapsed)
+
+        shadow = None
+        if self.shadow_mode and primary_records is not None:
+            shadow = BACKENDS[1] if backend == BACKENDS[0] else BACKENDS[0]
+            # Daemon: exiting never waits for a shadow run (up to several full YMS cycles)
+            thread = threading.Thread(target=self._run_shadow, name=f"yms-shadow-{site}",
+                                      args=(site, backend, shadow, primary_records, elapsed), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        if isinstance(result, dict):
+            audit = result.setdefault("_audit", {})
+            audit["Backend"] = {"serving": backend, "reason": reason, "shadow": shadow,
+                                "seconds": round(elapsed, 2)}
+        return result
+
+    def _run_shadow(self, site, primary, shadow, primary_records, primary_seconds):
+        start = time.time()
+        try:
+            result = self.runner(shadow, site, shadow=True)
+        except Exception as e:
+            logger.warning(f"[YMS shadow] {shadow} failed for {site}: {e}")
+            return
+        elapsed = time.time() - start
+        shadow_records = normalize_result(result)
+        if shadow_records is None:
+            logger.warning(f"[YMS shadow] {shadow} returned no yard data for {site}")
+            return
+        self.latency.record(f"{site}:{shadow}", elapsed)
+
+        comparison = compare_results(primary_records, shadow_records)
+        entry = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "primary": primary,
+            "shadow": shadow,
+            "latency": {primary: round(primary_seconds, 2), shadow: round(elapsed, 2)},
+            **comparison,
+        }
+        self.store.record(site, entry)
+        logger.info(f"[YMS shadow] {site}: {primary} vs {shadow} agreement {comparison['agreement']:.1%}, "
+                    f"latency {primary_seconds:.1f}s vs {elapsed:.1f}s")
+
+    def wait(self, timeout=None):
+        """Waits for shadow runs started so far (tests and tooling)."""
+        for thread in list(self._threads):
+            thread.join(timeout)
+        self._threads = [t for t in self._threads if t.is_alive()]
+
+
+YMS_SHADOW = YMSShadowRunner()
+
+
+def YMS_with_shadow(site):
+    """YMS module entry point: selected backend serves, the other runs in shadow if enabled."""
+    return YMS_SHADOW.run(site)
@@ -31,11 +31,12 @@ def parse_as_datetime(dt_input: Union[str, datetime]) -> datetime:
     return datetime.now()
 
 
-def PPRfunction(Site: str, SOSdatetime, EOSdatetime) -> Dict[str, Any]:
+def PPRfunction(Site: str, SOSdatetime, EOSdatetime, race_mode: bool = False) -> Dict[str, Any]:
     """
     Interface function to execute PPR processing.
     Ensures that SOSdatetime and EOSdatetime are real datetime objects 
     before creating PPRProcessor.
+    race_mode enables racing the PPR_Q fallback for slow critical processes.
     """
 
     # 1) Convert SOSdatetime / EOSdatetime to datetime if needed
@@ -43,7 +44,7 @@ def PPRfunction(Site: str, SOSdatetime, EOSdatetime) -> Dict[str, Any]:
     eos_dt = parse_as_datetime(EOSdatetime)
 
     # 2) Now pass them as true datetime objects into PPRProcessor
-    processor = PPRProcessor(Site, sos_dt, eos_dt)
+    processor = PPRProcessor(Site, sos_dt, eos_dt, race_mode=race_mode)
     return processor.run()
 
 # Example usage (commented out):
@@ -13,7 +13,8 @@ from http.cookiejar import MozillaCookieJar
 from io import StringIO
 from getpass import getuser
 from typing import Dict, Any, List, Optional, Callable
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from threading import Event, Lock
 
 # Import each process-specific file:
 from .PPR_PRU import process_PPR_PRU, CONFIG as PRU_CONFIG
@@ -36,6 +37,8 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from PPR_Q.PPR_Q_processor import PPRQProcessor
+from utils.single_flight import FCLM_FLIGHTS, request_key, window_linger
+from utils.latency_tracker import LatencyTracker
 
 # Configure logging
 logging.basicConfig(
@@ -54,7 +57,13 @@ class PPRProcessor:
     Now refactored to delegate each PPR process to its own file with enhanced error handling and PPR_Q fallback.
     """
 
-    def __init__(self, site: str, sos_datetime: datetime, eos_datetime: datetime):
+    # Race mode: start the PPR_Q fallback once the primary fetch of a critical
+    # process exceeds this quantile of its recorded latencies.
+    RACE_LATENCY_QUANTILE = 0.9
+    # Threshold used until enough primary latencies have been recorded
+    RACE_DEFAULT_THRESHOLD_SECONDS = 45.0
+
+    def __init__(self, site: str, sos_datetime: datetime, eos_datetime: datetime, race_mode: bool = False):
         """
         Initializes the PPRProcessor with site details and datetime range.
 
@@ -62,10 +71,13 @@ class PPRProcessor:
             site (str): The warehouse site identifier.
             sos_datetime (datetime): Start of the shift datetime.
             eos_datetime (datetime): End of the shift datetime.
+            race_mode (bool): Race the PPR_Q fallback against slow primary fetches
+                for critical processes instead of waiting for the primary to fail.
         """
         self.site = site
         self.sos_datetime = sos_datetime
         self.eos_datetime = eos_datetime
+        self.race_mode = race_mode
         self.cookie_file_path = f'C:/Users/{getuser()}/.midway/cookie'
 
         # Map each process key to the numeric process ID (if any)
@@ -96,6 +108,11 @@ class PPRProcessor:
         # Our final PPR data structure
         self.PPR_JSON: Dict[str, Any] = {}
 
+        # Which source (primary/fallback) served each process, surfaced in the Audit
+        self.fetch_audit: Dict[str, Dict[str, Any]] = {}
+        self._fetch_audit_lock = Lock()
+        self.latency_tracker = LatencyTracker("ppr_primary_fetch") if race_mode else None
+
         # Track overall execution time
         self.start_time = time.time()
 
@@ -239,10 +256,11 @@ class PPRProcessor:
             logging.debug(f"Generated shift {i}: {shift}")
         return shifts
 
-    def fetch_process_data(self, process_key: str) -> pd.DataFrame:
+    def fetch_process_data(self, process_key: str, cancel_event: Optional[Event] = None) -> pd.DataFrame:
         """
         Fetches data for a specific process across multiple shifts, returning a concatenated DataFrame.
         Enhanced with better error handling and CSV parsing fallbacks.
+        If cancel_event is set (race lost), remaining weeks are not requested.
         """
         logging.info(f"Fetching data for process: {process_key}")
         process_id = self.process_ids.get(process_key, "")
@@ -250,67 +268,98 @@ class PPRProcessor:
         shifts = self.get_shifts()
 
         for idx, shift in enumerate(shifts, 1):
+            if cancel_event is not None and cancel_event.is_set():
+                logging.info(f"Primary fetch for {process_key} cancelled before week {idx}.")
+                return pd.DataFrame()
             logging.info(f"Fetching data for week {idx}/{len(shifts)} for process {process_key}...")
             url = self.build_url(process_key, process_id, shift)
-            try:
-                response = requests.get(url, cookies=self.cookie_jar, verify=False, timeout=30)
-                if response.status_code == 200:
-                    logging.info(f"Data fetched successfully for week {idx} of process {process_key}.")
-                    
-                    # Try multiple CSV parsing strategies
-                    df = None
-                    parsing_strategies = [
-                        # Strategy 1: Original approach
-                        lambda: pd.read_csv(StringIO(response.text), delimiter=';', encoding='ISO-8859-1', on_bad_lines='skip'),
-                        # Strategy 2: Try comma delimiter
-                        lambda: pd.read_csv(StringIO(response.text), delimiter=',', encoding='ISO-8859-1', on_bad_lines='skip'),
-                        # Strategy 3: Try tab delimiter
-                        lambda: pd.read_csv(StringIO(response.text), delimiter='\t', encoding='ISO-8859-1', on_bad_lines='skip'),
-                        # Strategy 4: Auto-detect delimiter
-                        lambda: pd.read_csv(StringIO(response.text), encoding='ISO-8859-1', on_bad_lines='skip', engine='python')
-                    ]
-                    
-                    for strategy_idx, strategy in enumerate(parsing_strategies, 1):
-                        try:
-                            df = strategy()
-                            if not df.empty:
-                                logging.info(f"CSV parsing strategy {strategy_idx} successful for week {idx} of process {process_key}.")
-                                break
-                        except Exception as e:
-                            logging.debug(f"CSV parsing strategy {strategy_idx} failed for week {idx} of process {process_key}: {e}")
-                            continue
-                    
-                    if df is not None and not df.empty:
-                        process_df = pd.concat([process_df, df], ignore_index=True)
-                        logging.debug(f"Appended data for week {idx} of process {process_key}.")
-                    else:
-                        logging.warning(f"Empty response for week {idx} of process {process_key}.")
-                else:
-                    logging.error(f"Failed to fetch data for week {idx} of process {process_key}: "
-                                  f"Status Code {response.status_code}")
-            except requests.exceptions.RequestException as e:
-                logging.error(f"Request exception for process {process_key} week {idx}: {e}")
+            df = FCLM_FLIGHTS.do(
+                request_key(url),
+                lambda: self._fetch_week(process_key, idx, url),
+                keep_result=lambda frame: not frame.empty,
+                linger_seconds=window_linger(self.eos_datetime)
+            )
+            if not df.empty:
+                process_df = pd.concat([process_df, df], ignore_index=True)
+                logging.debug(f"Appended data for week {idx} of process {process_key}.")
 
         return process_df
 
+    def _fetch_week(self, process_key: str, idx: int, url: str) -> pd.DataFrame:
+        """
+        Fetches and parses a single weekly report. Shared through the FCLM
+        single-flight registry, so identical concurrent requests hit FCLM once.
+        """
+        try:
+            response = requests.get(url, cookies=self.cookie_jar, verify=False, timeout=30)
+            if response.status_code == 200:
+                logging.info(f"Data fetched successfully for week {idx} of process {process_key}.")
+                
+                # Try multiple CSV parsing strategies
+                df = None
+                parsing_strategies = [
+                    # Strategy 1: Original approach
+                    lambda: pd.read_csv(StringIO(response.text), delimiter=';', encoding='ISO-8859-1', on_bad_lines='skip'),
+                    # Strategy 2: Try comma delimiter
+                    lambda: pd.read_csv(StringIO(response.text), delimiter=',', encoding='ISO-8859-1', on_bad_lines='skip'),
+                    # Strategy 3: Try tab delimiter
+                    lambda: pd.read_csv(StringIO(response.text), delimiter='\t', encoding='ISO-8859-1', on_bad_lines='skip'),
+                    # Strategy 4: Auto-detect delimiter
+                    lambda: pd.read_csv(StringIO(response.text), encoding='ISO-8859-1', on_bad_lines='skip', engine='python')
+                ]
+                
+                for strategy_idx, strategy in enumerate(parsing_strategies, 1):
+                    try:
+                        df = strategy()
+                        if not df.empty:
+                            logging.info(f"CSV parsing strategy {strategy_idx} successful for week {idx} of process {process_key}.")
+                            break
+                    except Exception as e:
+                        logging.debug(f"CSV parsing strategy {strategy_idx} failed for week {idx} of process {process_key}: {e}")
+                        continue
+                
+                if df is not None and not df.empty:
+                    return df
+                logging.warning(f"Empty response for week {idx} of process {process_key}.")
+            else:
+                logging.error(f"Failed to fetch data for week {idx} of process {process_key}: "
+                              f"Status Code {response.status_code}")
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Request exception for process {process_key} week {idx}: {e}")
+
+        return pd.DataFrame()
+
     def fetch_with_ppr_q_fallback(self, process_key: str) -> pd.DataFrame:
         """
         Attempts to fetch data using PPR, and falls back to PPR_Q if PPR fails.
         This implements the hybrid approach mentioned in the action plan.
         """
         logging.info(f"Attempting PPR fetch with PPR_Q fallback for process: {process_key}")
+        start = time.time()
+
+        if self.race_mode and process_key in self.CRITICAL_PROCESSES:
+            return self._race_primary_and_fallback(process_key, start)
         
         # First, try PPR
         ppr_df = self.fetch_process_data(process_key)
         
         if not ppr_df.empty:
             logging.info(f"PPR fetch successful for {process_key} - {len(ppr_df)} rows")
+            self._record_fetch_path(process_key, "primary", start, raced=False)
             return ppr_df
         
         # If PPR failed, try PPR_Q as fallback
         logging.warning(f"PPR fetch failed for {process_key}, trying PPR_Q fallback...")
+        ppr_q_df = self._fetch_fallback(process_key)
+        self._record_fetch_path(process_key, "fallback" if not ppr_q_df.empty else "none", start, raced=False)
+        return ppr_q_df
+
+    def _fetch_fallback(self, process_key: str) -> pd.DataFrame:
+        """
+        Fetches a process through the pooled PPR_Q processor for this window.
+        """
         try:
-            ppr_q_processor = PPRQProcessor(self.site, self.sos_datetime, self.eos_datetime)
+            ppr_q_processor = PPRQProcessor.pooled(self.site, self.sos_datetime, self.eos_datetime)
             ppr_q_df = ppr_q_processor.fetch_process_data(process_key)
             
             if not ppr_q_df.empty:
@@ -324,6 +373,94 @@ class PPRProcessor:
             logging.error(f"PPR_Q fallback failed for {process_key}: {e}")
             return pd.DataFrame()
 
+    def _timed_primary_fetch(self, process_key: str, cancel_event: Event, threshold: float = 0.0) -> pd.DataFrame:
+        """
+        Runs the primary fetch and records its latency when it completes with data.
+        A primary that lost the race is recorded too, with at least the threshold
+        it exceeded, so the learned latency does not only see fast fetches.
+        """
+        start = time.time()
+        df = self.fetch_process_data(process_key, cancel_event=cancel_event)
+        elapsed = time.time() - start
+        if cancel_event.is_set():
+            self.latency_tracker.record(f"{self.site}:{process_key}", max(elapsed, threshold))
+        elif not df.empty:
+            self.latency_tracker.record(f"{self.site}:{process_key}", elapsed)
+        return df
+
+    def _race_primary_and_fallback(self, process_key: str, start: float) -> pd.DataFrame:
+        """
+        Race mode for critical processes: if the primary fetch exceeds its learned
+        latency threshold, start the PPR_Q fallback in parallel and keep the first
+        non-empty result. The losing path is cancelled (primary stops between weeks,
+        a running fallback request is abandoned).
+        """
+        threshold = self.latency_tracker.threshold(
+            f"{self.site}:{process_key}",
+            quantile=self.RACE_LATENCY_QUANTILE,
+            default=self.RACE_DEFAULT_THRESHOLD_SECONDS
+        )
+        cancel_primary = Event()
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"race_{process_key}")
+        try:
+            primary = executor.submit(self._timed_primary_fetch, process_key, cancel_primary, threshold)
+            done, _ = wait([primary], timeout=threshold)
+
+            if done:
+                df = primary.result()
+                if not df.empty:
+                    logging.info(f"PPR fetch successful for {process_key} - {len(df)} rows (within {threshold:.1f}s threshold)")
+                    self._record_fetch_path(process_key, "primary", start, raced=False, threshold=threshold)
+                    return df
+                logging.warning(f"PPR fetch failed for {process_key}, trying PPR_Q fallback...")
+                df = self._fetch_fallback(process_key)
+                self._record_fetch_path(process_key, "fallback" if not df.empty else "none", start,
+                                        raced=False, threshold=threshold)
+                return df
+
+            logging.warning(f"PPR fetch for {process_key} exceeded {threshold:.1f}s, racing PPR_Q fallback...")
+            fallback = executor.submit(self._fetch_fallback, process_key)
+            paths = {primary: "primary", fallback: "fallback"}
+            pending = set(paths)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        df = future.result()
+                    except Exception as e:
+                        logging.error(f"{paths[future]} path for {process_key} raised: {e}")
+                        continue
+                    if not df.empty:
+                        winner = paths[future]
+                        if winner == "fallback":
+                            cancel_primary.set()
+                        for other in pending:
+                            other.cancel()
+                        logging.info(f"Race for {process_key} won by {winner} path - {len(df)} rows")
+                        self._record_fetch_path(process_key, winner, start, raced=True, threshold=threshold)
+                        return df
+
+            logging.error(f"Both PPR and PPR_Q failed for {process_key}")
+            self._record_fetch_path(process_key, "none", start, raced=True, threshold=threshold)
+            return pd.DataFrame()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _record_fetch_path(self, process_key: str, path: str, start: float, raced: bool,
+                           threshold: Optional[float] = None) -> None:
+        """
+        Remembers which source served a process so it can be reported in the Audit.
+        """
+        entry = {
+            "Path": path,
+            "Raced": raced,
+            "Seconds": round(time.time() - start, 3),
+        }
+        if threshold is not None:
+            entry["ThresholdSeconds"] = round(threshold, 3)
+        with self._fetch_audit_lock:
+            self.fetch_audit[process_key] = entry
+
     def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Cleans the raw DataFrame by removing extra quotes and delimiters.
@@ -503,5 +640,8 @@ class PPRProcessor:
         """
         logging.info('Starting PPR processing...')
         self.process_all_processes()
+        if self.fetch_audit:
+            # Picked up by OneFlow and moved into the Audit section
+            self.PPR_JSON["_audit"] = {"FetchPaths": self.fetch_audit, "RaceMode": self.race_mode}
         logging.info('PPR processing completed.')
         return self.PPR_JSON
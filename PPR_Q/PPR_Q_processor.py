@@ -6,8 +6,10 @@ import os
 import json
 import time
 import logging
+import threading
 import pandas as pd
 
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from http.cookiejar import MozillaCookieJar
 from io import StringIO
@@ -35,6 +37,9 @@ from PPR.PPR_Receive_Support import process_PPR_Receive_Support, CONFIG as RCV_S
 from PPR.PPR_Transfer_Out import process_PPR_Transfer_Out, CONFIG as TO_CONFIG
 from PPR.PPR_Transfer_Out_Dock import process_PPR_Transfer_Out_Dock, CONFIG as TO_DOCK_CONFIG
 from PPR.PPR_RSR_Support import process_PPR_RSR_Support, CONFIG as RSR_SUPPORT_CONFIG
+from utils.single_flight import FCLM_FLIGHTS, request_key, window_linger
+from PPR_Q.intraday_store import IntradayStore
+from PPR_Q.hourly_cube import HourlyCube, compose_function_rollup
 
 
 # Configure logging
@@ -44,13 +49,43 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 
+# Fallback processors shared across PPR processes, keyed by (site, sos, eos);
+# the least recently used ones are dropped beyond FALLBACK_POOL_SIZE windows
+FALLBACK_POOL_SIZE = 4
+_FALLBACK_POOL: "OrderedDict[tuple, PPRQProcessor]" = OrderedDict()
+_FALLBACK_POOL_LOCK = threading.Lock()
+
+# Hour-segment requests in flight at once across all processes composed from
+# the cube (each process already runs in the 4-worker process pool)
+CUBE_SEGMENT_REQUESTS = 4
+_CUBE_SEGMENT_SLOTS = threading.BoundedSemaphore(CUBE_SEGMENT_REQUESTS)
+
+
 class PPRQProcessor:
     """
     A processor for handling PPR Quarterly data fetching, cleaning, and processing.
     Uses ALL existing PPR process files but with flexible minute-level time ranges.
     """
 
-    def __init__(self, site: str, sos_datetime: datetime, eos_datetime: datetime):
+    @classmethod
+    def pooled(cls, site: str, sos_datetime: datetime, eos_datetime: datetime) -> "PPRQProcessor":
+        """
+        Returns a shared PPRQProcessor for fetch-only use (e.g. PPR fallbacks),
+        creating it on first request so cookies are loaded once per window.
+        """
+        key = (site, sos_datetime, eos_datetime)
+        with _FALLBACK_POOL_LOCK:
+            processor = _FALLBACK_POOL.get(key)
+            if processor is None:
+                processor = cls(site, sos_datetime, eos_datetime)
+                _FALLBACK_POOL[key] = processor
+                while len(_FALLBACK_POOL) > FALLBACK_POOL_SIZE:
+                    _FALLBACK_POOL.popitem(last=False)
+            else:
+                _FALLBACK_POOL.move_to_end(key)
+            return processor
+
+    def __init__(self, site: str, sos_datetime: datetime, eos_datetime: datetime, hourly_cube: bool = False):
         """
         Initializes the PPRQProcessor with site details and shift datetime range.
 
@@ -58,10 +93,13 @@ class PPRQProcessor:
             site (str): The warehouse site identifier.
             sos_datetime (datetime): Start of shift datetime with minute precision.
             eos_datetime (datetime): End of shift datetime with minute precision.
+            hourly_cube (bool): Compose functionRollup reports from locally cached
+                hour buckets, fetching only missing, open or partial hours.
         """
         self.site = site
         self.sos_datetime = sos_datetime
         self.eos_datetime = eos_datetime
+        self.cube = HourlyCube(site) if hourly_cube else None
         self.cookie_file_path = f'C:/Users/{getuser()}/.midway/cookie'
 
         # Use the EXACT SAME process IDs as PPR
@@ -85,8 +123,8 @@ class PPRQProcessor:
         # Our final PPR_Q data structure
         self.PPR_Q_JSON: Dict[str, Any] = {}
         
-        # Store raw DataFrames for size-specific calculations
-        self.raw_dataframes: Dict[str, pd.DataFrame] = {}
+        # Columnar store (process, size, metric) for size-specific calculations
+        self.intraday_store = IntradayStore(list(self.process_ids.keys()))
 
         # Track overall execution time
         self.start_time = time.time()
@@ -213,22 +251,29 @@ class PPRQProcessor:
         Generates a time range for the exact shift period specified.
         Creates a single intraday URL covering the entire shift duration.
         """
-        time_range = {
-            'start_hour': self.sos_datetime.strftime("%H"),
-            'start_minute': self.sos_datetime.strftime("%M").lstrip('0') or '0',
-            'start_day': self.sos_datetime.strftime("%d"),
-            'start_month': self.sos_datetime.strftime("%m"),
-            'start_year': self.sos_datetime.strftime("%Y"),
-            'end_hour': self.eos_datetime.strftime("%H"),
-            'end_minute': self.eos_datetime.strftime("%M").lstrip('0') or '0',
-            'end_day': self.eos_datetime.strftime("%d"),
-            'end_month': self.eos_datetime.strftime("%m"),
-            'end_year': self.eos_datetime.strftime("%Y")
-        }
+        time_range = self._format_time_range(self.sos_datetime, self.eos_datetime)
         logging.info(f"PPR_Q time range: {self.sos_datetime} to {self.eos_datetime}")
         logging.debug(f"Generated time range: {time_range}")
         return time_range
 
+    @staticmethod
+    def _format_time_range(start: datetime, end: datetime) -> Dict[str, str]:
+        """
+        Formats a start/end pair into the URL fields used by build_url.
+        """
+        return {
+            'start_hour': start.strftime("%H"),
+            'start_minute': start.strftime("%M").lstrip('0') or '0',
+            'start_day': start.strftime("%d"),
+            'start_month': start.strftime("%m"),
+            'start_year': start.strftime("%Y"),
+            'end_hour': end.strftime("%H"),
+            'end_minute': end.strftime("%M").lstrip('0') or '0',
+            'end_day': end.strftime("%d"),
+            'end_month': end.strftime("%m"),
+            'end_year': end.strftime("%Y")
+        }
+
 
 
 
@@ -243,6 +288,10 @@ class PPRQProcessor:
         logging.info(f"Fetching data for process: {process_key}")
         process_id = self.process_ids.get(process_key, "")
 
+        # Hour-bucket cube only applies to functionRollup reports (process_id set)
+        if self.cube is not None and process_id:
+            return self._fetch_from_cube(process_key, process_id)
+
         # Build single intraday URL for exact time range
         time_range = self.get_time_range()
         url = self.build_url(process_key, process_id, time_range)
@@ -259,6 +308,54 @@ class PPRQProcessor:
             logging.warning(f"No data returned for process {process_key}")
             return pd.DataFrame()
 
+    def _fetch_from_cube(self, process_key: str, process_id: str) -> pd.DataFrame:
+        """
+        Composes the requested window from hour buckets. Settled whole hours come
+        from the local cube when present; missing, still-open and partial edge
+        hours are fetched (concurrently, within the shared segment slots) and
+        settled ones are stored.
+
+        Returns:
+            The composed DataFrame, empty if the report cannot be composed.
+        """
+        segments = self.cube.plan(self.sos_datetime, self.eos_datetime)
+        frames: List[Optional[pd.DataFrame]] = [None] * len(segments)
+        to_fetch = []
+        for idx, (seg_start, _, cacheable) in enumerate(segments):
+            cached = self.cube.load(process_key, seg_start) if cacheable else None
+            if cached is not None:
+                frames[idx] = cached
+            else:
+                to_fetch.append(idx)
+
+        logging.info(f"PPR_Q cube for {process_key}: {len(segments) - len(to_fetch)} cached hour(s), "
+                     f"fetching {len(to_fetch)} segment(s)")
+
+        def fetch_segment(idx: int) -> pd.DataFrame:
+            seg_start, seg_end, _ = segments[idx]
+            url = self.build_url(process_key, process_id, self._format_time_range(seg_start, seg_end))
+            with _CUBE_SEGMENT_SLOTS:
+                return self._make_request(process_key, url, window_end=seg_end)
+
+        fetched = []
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=min(CUBE_SEGMENT_REQUESTS, len(to_fetch))) as executor:
+                fetched = list(executor.map(fetch_segment, to_fetch))
+
+        for idx, df in zip(to_fetch, fetched):
+            seg_start, _, cacheable = segments[idx]
+            frames[idx] = df
+            # Empty may mean "request failed" as well as "no activity", so it is not stored
+            if cacheable and not df.empty:
+                self.cube.store(process_key, seg_start, df)
+        self.cube.prune(process_key)
+
+        try:
+            return compose_function_rollup(frames)
+        except ValueError as e:
+            logging.error(f"PPR_Q cube cannot compose {process_key}: {e}")
+            return pd.DataFrame()
+
     def _scale_data_to_time_range(self, df: pd.DataFrame, process_key: str) -> pd.DataFrame:
         """
         DISABLED: No longer scales data to avoid magnitude issues.
@@ -280,9 +377,24 @@ class PPRQProcessor:
 
 
 
-    def _make_request(self, process_key: str, url: str) -> pd.DataFrame:
+    def _make_request(self, process_key: str, url: str, window_end: Optional[datetime] = None) -> pd.DataFrame:
         """
         Makes a single HTTP request and returns the parsed DataFrame.
+        Identical concurrent requests (from PPR_Q itself or from PPR fallbacks)
+        are coalesced through the shared FCLM single-flight registry; the result
+        is only reused for long once its window (EOS by default) has ended.
+        """
+        df = FCLM_FLIGHTS.do(
+            request_key(url),
+            lambda: self._fetch_report(process_key, url),
+            keep_result=lambda frame: not frame.empty,
+            linger_seconds=window_linger(window_end or self.eos_datetime)
+        )
+        return df.copy()
+
+    def _fetch_report(self, process_key: str, url: str) -> pd.DataFrame:
+        """
+        Performs the actual FCLM request and CSV parsing for _make_request.
         """
         try:
             response = requests.get(url, cookies=self.cookie_jar, verify=False, timeout=30)
@@ -398,8 +510,8 @@ class PPRQProcessor:
             logging.warning(f"Cleaned data is empty for process {process_key}. Skipping processing.")
             return
         
-        # Store raw DataFrame for size-specific calculations
-        self.raw_dataframes[process_key] = cleaned_df.copy()
+        # Project size/units/hours into the shared columnar store (no per-process copy)
+        self.intraday_store.add(process_key, cleaned_df)
         
         # 3) run the process-specific function - EXACT SAME as PPR
         process_func = self.process_handlers[process_key]["function"]
@@ -433,7 +545,9 @@ class PPRQProcessor:
             # 1) Extract columns based on config
             for col_key, col_idx in config.get("columns", {}).items():
                 if col_idx < len(df.columns):
-                    process_data[col_key] = df.iloc[:, col_idx].tolist()
+                    # NaN / "NaN" become "" here, vectorized, instead of in a post-walk
+                    column = df.iloc[:, col_idx].astype(object)
+                    process_data[col_key] = column.where(column.notna(), "").replace("NaN", "").tolist()
                     # DEBUG: Show rate-related column data
                     if "Rate" in col_key:
                         sample_values = df.iloc[:5, col_idx].tolist() if len(df) > 0 else []
@@ -614,29 +728,28 @@ class PPRQProcessor:
         # Add all target metrics
         self.PPR_Q_JSON = enhance_ppr_q_with_all_metrics(self.PPR_Q_JSON)
         
-        # Add size-specific metrics using raw DataFrames
-        self.PPR_Q_JSON = add_size_metrics_to_ppr_q(self.PPR_Q_JSON, self.raw_dataframes)
+        # Add size-specific metrics from the columnar intraday store
+        self.PPR_Q_JSON = add_size_metrics_to_ppr_q(self.PPR_Q_JSON, self.intraday_store)
         
         # Clean up NaN values before returning
         self._clean_nan_values()
     
     def _clean_nan_values(self):
         """
-        Recursively clean NaN values from the PPR_Q_JSON, replacing them with empty strings.
+        Clean NaN scalars from the PPR_Q_JSON, replacing them with empty strings.
+        Column lists are already NaN-free (handled vectorized in generic_process),
+        so only dict values are visited here.
         """
         import math
-        import numpy as np
         
         def clean_value(value):
             """Clean a single value, converting NaN to empty string."""
-            if isinstance(value, float) and (math.isnan(value) or np.isnan(value)):
+            if isinstance(value, float) and math.isnan(value):
                 return ""
             elif isinstance(value, str) and value == "NaN":
                 return ""
             elif isinstance(value, dict):
                 return {k: clean_value(v) for k, v in value.items()}
-            elif isinstance(value, list):
-                return [clean_value(item) for item in value]
             else:
                 return value
         
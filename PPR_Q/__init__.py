@@ -1,5 +1,6 @@
 from .PPR_Q_processor import PPRQProcessor
 from .metrics_calculator import PPRQMetricsCalculator, enhance_ppr_q_with_all_metrics
 from .size_calculator import SizeSpecificCalculator, add_size_metrics_to_ppr_q
+from .intraday_store import IntradayStore
 
-__all__ = ['PPRQProcessor', 'PPRQMetricsCalculator', 'SizeSpecificCalculator', 'enhance_ppr_q_with_all_metrics', 'add_size_metrics_to_ppr_q'] 
\ No newline at end of file
+__all__ = ['PPRQProcessor', 'PPRQMetricsCalculator', 'SizeSpecificCalculator', 'enhance_ppr_q_with_all_metrics', 'add_size_metrics_to_ppr_q', 'IntradayStore'] 
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+PPR_Q Hourly Rollup Cube
+Stores functionRollup reports per (site, process, hour) on local disk so any
+intraday window can be composed from hour buckets, fetching only the hours
+that are missing, still open, or partial at the window edges.
+"""
+
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import pandas as pd
+
+from utils.path_utils import get_cache_dir
+from utils.frame_cache import read_frame, write_frame, list_frames, remove_frame
+
+
+HOURS_PREFIX = "Paid Hours-"
+ADDITIVE_COLUMNS = ["Jobs", "Units"]
+RATE_COLUMNS = ["JPH", "UPH"]
+
+
+class HourlyCube:
+    """
+    Local cube of closed hour buckets for one site.
+
+    An hour is only persisted once it ended more than `settle_minutes` ago,
+    so late-arriving labor data in FCLM is picked up by refetching it.
+    """
+
+    def __init__(self, site: str, root: Optional[str] = None,
+                 settle_minutes: int = 60, retention_days: int = 14):
+        self.site = site
+        self.root = root or get_cache_dir('ppr_q_cube', site)
+        self.settle = timedelta(minutes=settle_minutes)
+        self.retention = timedelta(days=retention_days)
+
+    def plan(self, start: datetime, end: datetime,
+             now: Optional[datetime] = None) -> List[Tuple[datetime, datetime, bool]]:
+        """
+        Splits [start, end) into fetch segments.
+
+        Returns:
+            List of (segment_start, segment_end, cacheable) where cacheable is
+            True only for whole, settled clock hours.
+        """
+        now = now or datetime.now()
+        segments = []
+        cursor = start
+        while cursor < end:
+            hour_start = cursor.replace(minute=0, second=0, microsecond=0)
+            hour_end = hour_start + timedelta(hours=1)
+            segment_end = min(hour_end, end)
+            whole_hour = cursor == hour_start and segment_end == hour_end
+            settled = hour_end + self.settle <= now
+            segments.append((cursor, segment_end, whole_hour and settled))
+            cursor = segment_end
+        return segments
+
+    def _path(self, process_key: str, hour_start: datetime) -> str:
+        return os.path.join(self.root, process_key, hour_start.strftime("%Y%m%d%H"))
+
+    def load(self, process_key: str, hour_start: datetime) -> Optional[pd.DataFrame]:
+        """Returns the stored bucket for an hour, or None if it was never stored."""
+        return read_frame(self._path(process_key, hour_start))
+
+    def store(self, process_key: str, hour_start: datetime, df: pd.DataFrame) -> None:
+        """Persists a settled hour bucket."""
+        try:
+            write_frame(self._path(process_key, hour_start), df)
+        except Exception as e:
+            logging.warning(f"Could not store PPR_Q cube bucket {process_key} {hour_start}: {e}")
+
+    def prune(self, process_key: str, now: Optional[datetime] = None) -> None:
+        """Deletes buckets older than the retention period for a process."""
+        cutoff = ((now or datetime.now()) - self.retention).strftime("%Y%m%d%H")
+        for path_base in list_frames(os.path.join(self.root, process_key)):
+            if os.path.basename(path_base) < cutoff:
+                remove_frame(path_base)
+
+
+def compose_function_rollup(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Re-aggregates functionRollup report frames covering adjacent time segments
+    into the report for the whole window.
+
+    FCLM repeats an employee's Paid Hours-Total and Jobs on each of their Size
+    rows, so those are taken once per employee/function and segment, summed over
+    the segments and broadcast back to every Size row of the employee; a Size
+    missing from some segments then still gets the employee's full totals.
+    Size hours and Units are summed per employee/function/size row. JPH and UPH
+    are recomputed from the summed units over the summed (unrounded) hours,
+    i.e. Jobs / Paid Hours-Total and Units / Paid Hours-<Size> as FCLM does.
+
+    Raises:
+        ValueError: if the frames do not have the functionRollup layout.
+    """
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0].copy()
+
+    combined = pd.concat([f.assign(_segment=i) for i, f in enumerate(frames)], ignore_index=True)
+    columns = [c for c in combined.columns if c != "_segment"]
+    hours_columns = [c for c in columns if str(c).startswith(HOURS_PREFIX)]
+    total_column = next((c for c in hours_columns if str(c).startswith(HOURS_PREFIX + "Total")), None)
+    missing = [c for c in ADDITIVE_COLUMNS + RATE_COLUMNS + ["Size"] if c not in columns]
+    if total_column is None or missing:
+        raise ValueError(f"Not a functionRollup layout (missing {missing or 'Paid Hours-Total'})")
+
+    additive = hours_columns + ADDITIVE_COLUMNS
+    for column in additive + RATE_COLUMNS:
+        combined[column] = pd.to_numeric(combined[column], errors='coerce')
+    keys = [c for c in columns if c not in additive and c not in RATE_COLUMNS]
+    employee_keys = [c for c in keys if c != "Size"]
+
+    # Reported hours are rounded to 2 decimals, so derive the unrounded hours
+    # behind each bucket's rate (Jobs / JPH, Units / UPH) and sum those instead.
+    total_hours = combined[total_column]
+    size_hours = _size_hours(combined, hours_columns, total_hours)
+    combined["_jph_hours"] = (combined["Jobs"] / combined["JPH"]).where(combined["JPH"] > 0, total_hours)
+    combined["_uph_hours"] = (combined["Units"] / combined["UPH"]).where(combined["UPH"] > 0, size_hours)
+
+    employee_sums = [total_column, "Jobs", "_jph_hours"]
+    size_sums = [c for c in hours_columns if c != total_column] + ["Units", "_uph_hours"]
+    out = combined.groupby(keys, dropna=False, sort=False, as_index=False)[size_sums].sum()
+    per_segment = combined.groupby(employee_keys + ["_segment"], dropna=False, sort=False,
+                                   as_index=False)[employee_sums].max()
+    employee = per_segment.groupby(employee_keys, dropna=False, sort=False, as_index=False)[employee_sums].sum()
+    out = out.merge(employee, on=employee_keys, how="left")
+    out[hours_columns] = out[hours_columns].round(2)
+
+    out["JPH"] = (out["Jobs"] / out["_jph_hours"].where(out["_jph_hours"] > 0)).round(2).fillna(0)
+    out["UPH"] = (out["Units"] / out["_uph_hours"].where(out["_uph_hours"] > 0)).round(2).fillna(0)
+    return out[columns]
+
+
+def _size_hours(df: pd.DataFrame, hours_columns: List[str], total_hours: pd.Series) -> pd.Series:
+    """Per row, the Paid Hours column matching its Size (Total hours otherwise)."""
+    size_hours = total_hours.copy()
+    sizes = df["Size"].astype(str)
+    for column in hours_columns:
+        size = str(column)[len(HOURS_PREFIX):].split("(")[0]
+        mask = sizes == size
+        size_hours[mask] = df.loc[mask, column]
+    return size_hours
@@ -0,0 +1,125 @@
+"""
+PPR_Q Intraday Store
+Keeps the size-relevant columns of the PPR_Q size processes in one long,
+categorical-typed table instead of a full DataFrame copy per process.
+"""
+
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+# Column indices shared by all functionRollup reports with a size breakdown
+SIZE_COL = 15   # Size column
+UNITS_COL = 16  # Units column
+HOURS_COL = 10  # Paid Hours Total column
+
+METRICS = ["units", "hours"]
+
+# Process key -> metric prefix for every process with a size breakdown
+SIZE_PROCESSES = {
+    "PPR_Each_Receive": "Each_Receive",
+    "PPR_Prep_Recorder": "Prep_Recorder",
+    "PPR_RC_Sort": "RC_Sort",
+}
+
+
+class IntradayStore:
+    """
+    Columnar store with one row per (process, size, metric) observation.
+
+    Columns:
+        process (category), size (category, stripped/lower-cased),
+        metric (category: units/hours), value (float64)
+    """
+
+    def __init__(self, processes: Optional[List[str]] = None):
+        # Category order: the size processes in the caller's order, then any it did not list
+        listed = [p for p in (processes or []) if p in SIZE_PROCESSES]
+        self._processes = listed + [p for p in SIZE_PROCESSES if p not in listed]
+        self._chunks: List[pd.DataFrame] = []
+        self._lock = threading.Lock()
+        self._table: Optional[pd.DataFrame] = None
+        self._contributed = set()
+
+    def add(self, process_key: str, df: pd.DataFrame) -> None:
+        """
+        Projects the size/units/hours columns of a cleaned process DataFrame
+        into the store as categorical columns. Only SIZE_PROCESSES are kept.
+        """
+        if process_key not in SIZE_PROCESSES:
+            return
+        if df.empty or len(df.columns) <= max(SIZE_COL, UNITS_COL, HOURS_COL):
+            return
+
+        sizes = pd.Categorical(df.iloc[:, SIZE_COL].astype(str).str.strip().str.lower())
+        units = pd.to_numeric(df.iloc[:, UNITS_COL], errors='coerce').to_numpy(dtype='float64')
+        hours = pd.to_numeric(df.iloc[:, HOURS_COL], errors='coerce').to_numpy(dtype='float64')
+        n = len(df)
+
+        chunk = pd.DataFrame({
+            "process": pd.Categorical.from_codes(np.full(2 * n, self._processes.index(process_key)),
+                                                 categories=self._processes),
+            "size": pd.Categorical.from_codes(np.concatenate([sizes.codes, sizes.codes]),
+                                              categories=sizes.categories),
+            "metric": pd.Categorical.from_codes(np.repeat(np.arange(len(METRICS)), n), categories=METRICS),
+            "value": np.concatenate([units, hours]),
+        })
+        with self._lock:
+            self._chunks.append(chunk)
+            self._contributed.add(process_key)
+            self._table = None
+
+    def processes(self) -> List[str]:
+        """Returns the processes that contributed rows to the store."""
+        with self._lock:
+            return sorted(self._contributed)
+
+    def table(self) -> pd.DataFrame:
+        """Returns the combined categorical table (built once, then reused)."""
+        with self._lock:
+            if self._table is None:
+                if self._chunks:
+                    table = pd.concat(self._chunks, ignore_index=True)
+                    # Each chunk has its own size categories; union them (codes only)
+                    table["size"] = union_categoricals([chunk["size"] for chunk in self._chunks])
+                    self._chunks = [table]
+                else:
+                    table = pd.DataFrame({
+                        "process": pd.Categorical([], categories=self._processes),
+                        "size": pd.Categorical([]),
+                        "metric": pd.Categorical([], categories=METRICS),
+                        "value": np.array([], dtype='float64'),
+                    })
+                self._table = table
+            return self._table
+
+    def size_totals(self) -> pd.DataFrame:
+        """
+        Single grouped aggregation over (process, size, metric).
+
+        Returns:
+            DataFrame indexed by (process, size) with 'units', 'hours' and 'rate'
+            columns; rate is NaN wherever hours <= 0.
+        """
+        table = self.table()
+        totals = (
+            table.groupby(["process", "size", "metric"], observed=True)["value"]
+            .sum()
+            .unstack("metric", fill_value=0.0)
+            .reindex(columns=METRICS, fill_value=0.0)
+        )
+        totals.columns = list(totals.columns)
+        positive_hours = totals["hours"].where(totals["hours"] > 0)
+        totals["rate"] = totals["units"] / positive_hours
+        return totals
+
+    @classmethod
+    def from_dataframes(cls, dataframes: Dict[str, pd.DataFrame]) -> "IntradayStore":
+        """Builds a store from the legacy {process_key: DataFrame} mapping."""
+        store = cls(list(dataframes.keys()))
+        for process_key, df in dataframes.items():
+            store.add(process_key, df)
+        return store
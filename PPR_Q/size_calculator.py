@@ -4,168 +4,60 @@ Handles size-specific breakdowns (Small, Medium, Large) for various processes.
 """
 
 import logging
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Union
 import pandas as pd
 
+from .intraday_store import IntradayStore, SIZE_PROCESSES
+
 
 class SizeSpecificCalculator:
     """
-    Calculates size-specific metrics by filtering raw DataFrames.
-    Handles Each Receive, Prep Recorder, and RC Sort size breakdowns.
+    Calculates size-specific metrics from the PPR_Q intraday store.
+    Handles Each Receive, Prep Recorder, and RC Sort size breakdowns with one
+    grouped aggregation over (process, size, metric).
     """
     
-    def __init__(self, process_dataframes: Dict[str, pd.DataFrame]):
-        self.dataframes = process_dataframes
+    # Process key -> metric prefix for every process with a size breakdown
+    SIZE_PROCESSES = SIZE_PROCESSES
+    SIZES = ["Small", "Medium", "Large"]
+    
+    def __init__(self, process_data: Union[IntradayStore, Dict[str, pd.DataFrame]]):
+        if isinstance(process_data, IntradayStore):
+            self.store = process_data
+        else:
+            # Legacy {process_key: DataFrame} input
+            self.store = IntradayStore.from_dataframes(process_data)
         self.size_metrics = {}
     
     def calculate_all_size_metrics(self) -> Dict[str, float]:
         """
-        Calculate all size-specific metrics from raw DataFrames.
+        Calculate all size-specific metrics from the intraday store.
         """
         logging.info("Calculating size-specific metrics from raw data...")
         
-        # Each Receive size breakdowns
-        self._calculate_each_receive_by_size()
-        
-        # Prep Recorder size breakdowns
-        self._calculate_prep_recorder_by_size()
-        
-        # RC Sort size breakdowns  
-        self._calculate_rc_sort_by_size()
-        
-        return self.size_metrics
-    
-    def _calculate_each_receive_by_size(self):
-        """Calculate Each Receive rates by size (Small, Medium, Large)."""
-        if "PPR_Each_Receive" not in self.dataframes:
-            logging.warning("PPR_Each_Receive DataFrame not available for size calculations")
-            return
-        
-        df = self.dataframes["PPR_Each_Receive"]
-        
-        if df.empty:
-            logging.warning("PPR_Each_Receive DataFrame is empty")
-            return
-        
-        # Column indices for Each Receive (based on existing config)
-        size_col = 15  # Size column
-        units_col = 16  # Units column  
-        hours_col = 10  # Paid Hours Total column
-        
-        sizes = ["Small", "Medium", "Large"]
-        
-        for size in sizes:
-            try:
-                # Filter by size
-                size_mask = df.iloc[:, size_col].astype(str).str.strip().str.lower() == size.lower()
-                size_df = df[size_mask]
-                
-                if not size_df.empty:
-                    # Sum units and hours for this size
-                    total_units = size_df.iloc[:, units_col].sum()
-                    total_hours = size_df.iloc[:, hours_col].sum()
-                    
-                    if total_hours > 0:
-                        rate = total_units / total_hours
-                        metric_name = f"Each_Receive_{size}"
-                        self.size_metrics[metric_name] = rate
-                        
-                        logging.info(f"[OK] {metric_name}: {total_units:,.0f} units / {total_hours:.2f} hours = {rate:.2f} u/h")
-                    else:
-                        logging.warning(f"[ERROR] Each_Receive_{size}: Zero hours")
-                else:
-                    logging.warning(f"[ERROR] Each_Receive_{size}: No data for size")
-                    
-            except Exception as e:
-                logging.error(f"Error calculating Each_Receive_{size}: {e}")
-    
-    def _calculate_prep_recorder_by_size(self):
-        """Calculate Prep Recorder rates by size (Small, Medium, Large)."""
-        if "PPR_Prep_Recorder" not in self.dataframes:
-            logging.warning("PPR_Prep_Recorder DataFrame not available for size calculations")
-            return
-        
-        df = self.dataframes["PPR_Prep_Recorder"]
-        
-        if df.empty:
-            logging.warning("PPR_Prep_Recorder DataFrame is empty")
-            return
-        
-        # Column indices for Prep Recorder
-        size_col = 15  # Size column
-        units_col = 16  # Units column
-        hours_col = 10  # Paid Hours Total column
+        available = set(self.store.processes())
+        totals = self.store.size_totals()
         
-        sizes = ["Small", "Medium", "Large"]
-        
-        for size in sizes:
-            try:
-                # Filter by size
-                size_mask = df.iloc[:, size_col].astype(str).str.strip().str.lower() == size.lower()
-                size_df = df[size_mask]
+        for process_key, prefix in self.SIZE_PROCESSES.items():
+            if process_key not in available:
+                logging.warning(f"{process_key} data not available for size calculations")
+                continue
+            
+            for size in self.SIZES:
+                metric_name = f"{prefix}_{size}"
+                key = (process_key, size.lower())
+                if key not in totals.index:
+                    logging.warning(f"[ERROR] {metric_name}: No data for size")
+                    continue
                 
-                if not size_df.empty:
-                    # Sum units and hours for this size
-                    total_units = size_df.iloc[:, units_col].sum()
-                    total_hours = size_df.iloc[:, hours_col].sum()
-                    
-                    if total_hours > 0:
-                        rate = total_units / total_hours
-                        metric_name = f"Prep_Recorder_{size}"
-                        self.size_metrics[metric_name] = rate
-                        
-                        logging.info(f"[OK] {metric_name}: {total_units:,.0f} units / {total_hours:.2f} hours = {rate:.2f} u/h")
-                    else:
-                        logging.warning(f"❌ Prep_Recorder_{size}: Zero hours")
+                row = totals.loc[key]
+                if row["hours"] > 0:
+                    self.size_metrics[metric_name] = float(row["rate"])
+                    logging.info(f"[OK] {metric_name}: {row['units']:,.0f} units / {row['hours']:.2f} hours = {row['rate']:.2f} u/h")
                 else:
-                    logging.warning(f"❌ Prep_Recorder_{size}: No data for size")
-                    
-            except Exception as e:
-                logging.error(f"Error calculating Prep_Recorder_{size}: {e}")
-    
-    def _calculate_rc_sort_by_size(self):
-        """Calculate RC Sort rates by size (Small, Medium, Large)."""
-        if "PPR_RC_Sort" not in self.dataframes:
-            logging.warning("PPR_RC_Sort DataFrame not available for size calculations")
-            return
+                    logging.warning(f"[ERROR] {metric_name}: Zero hours")
         
-        df = self.dataframes["PPR_RC_Sort"]
-        
-        if df.empty:
-            logging.warning("PPR_RC_Sort DataFrame is empty")
-            return
-        
-        # Column indices for RC Sort
-        size_col = 15  # Size column
-        units_col = 16  # Units column
-        hours_col = 10  # Paid Hours Total column
-        
-        sizes = ["Small", "Medium", "Large"]
-        
-        for size in sizes:
-            try:
-                # Filter by size
-                size_mask = df.iloc[:, size_col].astype(str).str.strip().str.lower() == size.lower()
-                size_df = df[size_mask]
-                
-                if not size_df.empty:
-                    # Sum units and hours for this size
-                    total_units = size_df.iloc[:, units_col].sum()
-                    total_hours = size_df.iloc[:, hours_col].sum()
-                    
-                    if total_hours > 0:
-                        rate = total_units / total_hours
-                        metric_name = f"RC_Sort_{size}"
-                        self.size_metrics[metric_name] = rate
-                        
-                        logging.info(f"[OK] {metric_name}: {total_units:,.0f} units / {total_hours:.2f} hours = {rate:.2f} u/h")
-                    else:
-                        logging.warning(f"❌ RC_Sort_{size}: Zero hours")
-                else:
-                    logging.warning(f"❌ RC_Sort_{size}: No data for size")
-                    
-            except Exception as e:
-                logging.error(f"Error calculating RC_Sort_{size}: {e}")
+        return self.size_metrics
     
     def get_size_breakdown_summary(self) -> str:
         """Get a summary of all calculated size breakdowns."""
@@ -189,11 +81,13 @@ class SizeSpecificCalculator:
         return summary
 
 
-def add_size_metrics_to_ppr_q(ppr_q_data: Dict[str, Any], raw_dataframes: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+def add_size_metrics_to_ppr_q(ppr_q_data: Dict[str, Any],
+                              intraday_data: Union[IntradayStore, Dict[str, pd.DataFrame]]) -> Dict[str, Any]:
     """
-    Add size-specific metrics to PPR_Q data using raw DataFrames.
+    Add size-specific metrics to PPR_Q data using the intraday store
+    (a legacy dict of raw DataFrames is still accepted).
     """
-    calculator = SizeSpecificCalculator(raw_dataframes)
+    calculator = SizeSpecificCalculator(intraday_data)
     size_metrics = calculator.calculate_all_size_metrics()
     
     # Add size metrics to the target metrics section
@@ -1,99 +1,433 @@
+import io
+import csv
 import logging
+import itertools
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
 
 # Create or retrieve a logger
 logger = logging.getLogger(__name__)
 
-def RODEOfunction(Site):
-    logger.info("RODEO: Importing libraries...")
-    from datetime import datetime, timedelta
-    import requests
-    from http.cookiejar import MozillaCookieJar
-    import getpass
-    import pandas as pd
-    import warnings
-    import io
-    from bs4 import BeautifulSoup
-    from openpyxl import load_workbook
-
-    warnings.filterwarnings('ignore')
-
-    # 1) Load cookies from Midway
-    cookie_file_path = f'C:/Users/{getpass.getuser()}/.midway/cookie'
-    cookie_jar = MozillaCookieJar(cookie_file_path)
-    cookie_jar.load()
+RODEO_BASE_URL = "https://rodeo-dub.amazon.com"
+# (connect, read) seconds per request; the read timeout applies between chunks
+RODEO_TIMEOUT = (10, 120)
+RODEO_SHARD_WORKERS = 4
+# Characters inspected to tell a login page from the CSV export
+RODEO_SNIFF_CHARS = 500
+# Leading columns naming a row (work pool, process path); the others are summed across shards
+RODEO_LABEL_COLUMNS = 2
+# Header words of columns that are not summed across shards
+RODEO_RATE_MARKERS = ("%", "rate", "per hour", "uph")
+# Formats of ExSD column headers, used to check that shards respect their range
+RODEO_EXSD_HEADER_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%m/%d/%Y %H:%M", "%d/%m/%Y %H:%M")
 
-    logger.info("RODEO: Requesting latest data...")
-    # 2) The target URL
-    url = f"https://rodeo-dub.amazon.com/{Site}/CSV/ExSD?Excel=true"
 
+class RodeoExportError(Exception):
+    """The ExSD export could not be fetched or was not in the expected format."""
+
+
+class ExSDTableParser(HTMLParser):
+    """
+    Incremental parser for the HTML table the ExSD export wraps in its
+    '<table>' column. Fragments are fed as they arrive; every completed <tr>
+    with <td> cells is handed to on_row, and <th> texts are collected as headers
+    (passed to on_headers, if given, before the first row).
+    """
+
+    def __init__(self, on_row, on_headers=None):
+        super().__init__(convert_charrefs=True)
+        self.on_row = on_row
+        self.on_headers = on_headers
+        self.headers = []
+        self._cells = []
+        self._cell = None
+        self._cell_tag = None
+
+    def _close_cell(self):
+        if self._cell is not None:
+            text = ''.join(self._cell)
+            if self._cell_tag == 'th':
+                self.headers.append(text)
+            else:
+                self._cells.append(text)
+            self._cell = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._cells:
+            if self.on_headers and self.headers:
+                self.on_headers(self.headers)
+                self.on_headers = None
+            self.on_row(self._cells)
+        self._cells = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('td', 'th'):
+            self._close_cell()
+            self._cell = []
+            self._cell_tag = tag
+        elif tag == 'tr':
+            self._close_row()
+
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th'):
+            self._close_cell()
+        elif tag in ('tr', 'table'):
+            self._close_row()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def close(self):
+        super().close()
+        self._close_row()
+
+
+def _as_number(text):
     try:
-        # 3) Send GET request
-        response = requests.get(url, cookies=cookie_jar, verify=False)
-        status_code = response.status_code
-        logger.info(f"RODEO: HTTP status code: {status_code}")
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_number(value):
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def _is_quantity_column(index, header):
+    """Columns after the labels hold quantities, unless the header names a rate."""
+    if index < RODEO_LABEL_COLUMNS:
+        return False
+    name = str(header).lower()
+    return not any(marker in name for marker in RODEO_RATE_MARKERS)
+
+
+def _exsd_header_time(header):
+    """The ExSD a column header stands for, or None if it is not an ExSD column."""
+    for fmt in RODEO_EXSD_HEADER_FORMATS:
+        try:
+            return datetime.strptime(str(header).strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class ExSDAccumulator:
+    """
+    Collects the ExSD rows of a whole export, as the export lists them, with
+    the <th> texts as headers.
+    """
+
+    def __init__(self):
+        self.headers = None
+        self._rows = []
+
+    def set_headers(self, headers):
+        if headers and not self.headers:
+            self.headers = list(headers)
+
+    def add(self, cells):
+        self._rows.append(cells)
+
+    def rows(self):
+        return self._rows
+
+    def to_frame(self):
+        """Text columns as exported (headers from <th> when present)."""
+        return pd.DataFrame(self.rows(), columns=self.headers if self.headers else None)
+
+
+def _merge_cells(record, values, positions, quantity):
+    """Adds one row's typed cells into a record: quantities summed, other cells kept from the first row."""
+    for value, position, is_quantity in zip(values, positions, quantity):
+        current = record[position]
+        if is_quantity and isinstance(value, float):
+            record[position] = current + value if isinstance(current, float) else value
+        elif current is None:
+            record[position] = value
+
+
+class ExSDShard:
+    """
+    The rows of one ExSD shard, folded by their label columns (work pool,
+    process path) as they stream in. Quantity cells are stored as floats and
+    other cells as text, so a shard holds one record per label and column.
+    """
+
+    def __init__(self):
+        self.headers = None
+        self.records = {}
+        self._width = 0
+        self._quantity = []
+
+    def set_headers(self, headers):
+        if headers and not self.headers:
+            self.headers = list(headers)
+            self._quantity = []
 
-        if status_code != 200:
-            logger.warning(f"RODEO: Error in HTTP request: {status_code}")
-            return None
+    def columns(self):
+        """Column names: the headers, or positions when the export has none."""
+        return self.headers if self.headers else list(range(self._width))
 
-        # 4) Check if the response is HTML (login page) rather than CSV
-        first_chunk = response.text[:500].lower()
+    def quantity_columns(self):
+        return self._quantity
+
+    def add(self, cells):
+        if len(cells) > self._width or not self._quantity:
+            self._width = max(self._width, len(cells))
+            names = list(self.headers or [])
+            names += list(range(len(names), self._width))
+            self._quantity = [_is_quantity_column(i, name) for i, name in enumerate(names)]
+        values = []
+        for cell, is_quantity in zip(cells, self._quantity):
+            number = _as_number(cell) if is_quantity else None
+            values.append(cell if number is None else number)
+        label = tuple(cells[:RODEO_LABEL_COLUMNS])
+        record = self.records.get(label)
+        if record is None:
+            self.records[label] = values
+            return
+        record.extend([None] * (len(values) - len(record)))
+        _merge_cells(record, values, range(len(values)), self._quantity)
+
+
+def check_shard_range(shard, params):
+    """
+    Raises RodeoExportError if a shard holds quantities for an ExSD outside the
+    range it asked for, i.e. RODEO did not apply the range filter.
+    Exports without ExSD columns cannot be checked this way and pass.
+    """
+    start = datetime.fromtimestamp(params["exSDRange.rangeStartMillis"] / 1000)
+    end = datetime.fromtimestamp(params["exSDRange.rangeEndMillis"] / 1000)
+    for index, header in enumerate(shard.columns()):
+        exsd = _exsd_header_time(header)
+        if exsd is None or start <= exsd <= end:
+            continue
+        if any(len(values) > index and isinstance(values[index], float) and values[index]
+               for values in shard.records.values()):
+            raise RodeoExportError(f"ExSD shard {start:%Y-%m-%d %H:%M}..{end:%Y-%m-%d %H:%M} "
+                                   f"holds quantities for ExSD {header}; the range filter was not applied.")
+
+
+class ExSDShardMerge:
+    """
+    Merges shards into one export, one shard at a time in shard order: records
+    are matched by their label columns (work pool, process path) and quantity
+    columns summed; other cells (rates) are kept from the first shard listing
+    the record. Rows keep the order in which the shards first list them.
+    """
+
+    def __init__(self):
+        self.headers = None
+        self.columns = []
+        self.records = {}
+        self.shards = 0
+        self._index = {}
+        self._first = None
+        self._identical = True
+
+    def add(self, shard):
+        shard_columns = shard.columns()
+        if self._first is None:
+            self._first = (list(shard_columns), shard.records)
+        elif self._identical and (list(shard_columns), shard.records) != self._first:
+            self._identical = False
+        self.shards += 1
+        if shard.headers and not self.headers:
+            self.headers = list(shard.headers)
+
+        for column in shard_columns:
+            if column not in self._index:
+                self._index[column] = len(self.columns)
+                self.columns.append(column)
+        positions = [self._index[column] for column in shard_columns]
+        for label, values in shard.records.items():
+            record = self.records.setdefault(label, [])
+            record.extend([None] * (len(self.columns) - len(record)))
+            _merge_cells(record, values, positions, shard.quantity_columns())
+
+    def result(self):
+        """
+        The merged export as an ExSDAccumulator of text rows.
+
+        Raises:
+            RodeoExportError: if every shard returned the same rows, i.e. RODEO
+                served the whole export for each range.
+        """
+        if self.shards > 1 and self._first[1] and self._identical:
+            raise RodeoExportError(f"All {self.shards} ExSD shards returned the same rows; "
+                                   f"the range filter was not applied.")
+        merged = ExSDAccumulator()
+        if self.headers:
+            merged.headers = list(self.columns)
+        for record in self.records.values():
+            record.extend([None] * (len(self.columns) - len(record)))
+            merged.add([_format_number(value) if isinstance(value, float) else ('' if value is None else value)
+                        for value in record])
+        return merged
+
+
+def exsd_time_shards(bucket_hours=6, horizon_hours=48, now=None):
+    """
+    Splits the ExSD axis into disjoint ranges: everything due before now, then
+    bucket_hours buckets up to horizon_hours ahead, then everything after.
+
+    Returns:
+        list of query-parameter dicts, one per shard.
+    """
+    now = (now or datetime.now()).replace(minute=0, second=0, microsecond=0)
+    bounds = [datetime(1970, 1, 2)]
+    bounds += [now + timedelta(hours=h) for h in range(0, horizon_hours + 1, bucket_hours)]
+    bounds.append(now + timedelta(days=3650))
+    shards = []
+    for start, end in zip(bounds, bounds[1:]):
+        shards.append({
+            "exSDRange.quickRange": "CUSTOM",
+            "exSDRange.rangeStartMillis": int(start.timestamp() * 1000),
+            # Ranges are inclusive, so each one stops 1 ms before the next
+            "exSDRange.rangeEndMillis": int(end.timestamp() * 1000) - 1,
+        })
+    return shards
+
+
+class RodeoExSDClient:
+    """
+    Streams the RODEO ExSD export of a site, optionally split into shards
+    fetched concurrently on one shared session.
+    """
+
+    def __init__(self, site, session=None, cookie_jar=None, timeout=RODEO_TIMEOUT, workers=RODEO_SHARD_WORKERS):
+        if session is None:
+            # Standalone use: the shared authentication loads the Midway cookie
+            from utils.authenticate import Authentication
+            session = Authentication().session
+        self.site = site
+        self.session = session
+        self.cookie_jar = cookie_jar
+        self.timeout = timeout
+        self.workers = workers
+        self.url = f"{RODEO_BASE_URL}/{site}/CSV/ExSD"
+
+    def _fragments(self, response):
+        """Yields the '<table>' column of the CSV export line by line."""
+        response.raw.decode_content = True
+        text = io.TextIOWrapper(response.raw, encoding=response.encoding or 'utf-8', errors='replace', newline='')
+        head = []
+        while sum(len(line) for line in head) < RODEO_SNIFF_CHARS:
+            line = text.readline()
+            if not line:
+                break
+            head.append(line)
+        first_chunk = ''.join(head)[:RODEO_SNIFF_CHARS].lower()
         if "<html" in first_chunk or "<!doctype" in first_chunk:
-            logger.error("[ERROR] RODEO returned HTML (likely a login page), not CSV.")
-            logger.debug("[DEBUG] Partial content:\n" + response.text[:500])
-            return None
-
-        # 5) Attempt to parse the CSV
-        logger.info("RODEO: Request successful. Attempting to parse CSV...")
-        df = pd.read_csv(io.StringIO(response.text))
-
-        # 6) Check for expected '<table>' column
-        if '<table>' not in df.columns:
-            logger.error("[ERROR] No '<table>' column in the CSV. Possibly unexpected format.")
-            return None
-
-        # 7) Parse the HTML in the '<table>' column
-        html_content = ''.join(df['<table>'].astype(str))
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        headers = [header.get_text() for header in soup.find_all('th')]
-        rows = []
-        for row in soup.find_all('tr'):
-            cells = row.find_all('td')
-            if cells:
-                rows.append([cell.get_text() for cell in cells])
-
-        if not headers:
-            logger.warning("[WARNING] No <th> elements found. The table might be empty or unstructured.")
+            logger.debug("[DEBUG] Partial content:\n" + ''.join(head)[:RODEO_SNIFF_CHARS])
+            raise RodeoExportError("RODEO returned HTML (likely a login page), not CSV.")
+
+        reader = csv.reader(itertools.chain(head, text))
+        header = next(reader, None)
+        if not header or '<table>' not in header:
+            raise RodeoExportError("No '<table>' column in the CSV. Possibly unexpected format.")
+        position = header.index('<table>')
+        for row in reader:
+            if len(row) > position and row[position]:
+                yield row[position]
+
+    def fetch_shard(self, params, accumulator):
+        """Streams one export (optionally filtered by params) into accumulator."""
+        query = {"Excel": "true", **(params or {})}
+        with self.session.get(self.url, params=query, cookies=self.cookie_jar, verify=False,
+                              stream=True, timeout=self.timeout) as response:
+            logger.info(f"RODEO: HTTP status code: {response.status_code}")
+            if response.status_code != 200:
+                raise RodeoExportError(f"Error in HTTP request: {response.status_code}")
+            parser = ExSDTableParser(accumulator.add, accumulator.set_headers)
+            for fragment in self._fragments(response):
+                parser.feed(fragment)
+            parser.close()
+        accumulator.set_headers(parser.headers)
+
+    def fetch(self, shards=None):
+        """
+        Fetches the export, whole or as shards (list of query-parameter dicts).
+        Each shard is folded by work pool and process path as it streams in,
+        checked against its ExSD range and merged in shard order as soon as
+        the shards before it are merged, then dropped.
+
+        Returns:
+            ExSDAccumulator holding the rows.
+
+        Raises:
+            RodeoExportError: if a shard does not respect its range.
+        """
+        if not shards:
+            accumulator = ExSDAccumulator()
+            self.fetch_shard(None, accumulator)
+            return accumulator
+
+        pending = [ExSDShard() for _ in shards]
+        merged = ExSDShardMerge()
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(shards))) as executor:
+            futures = [executor.submit(self.fetch_shard, params, shard)
+                       for params, shard in zip(shards, pending)]
+            for index, (params, future) in enumerate(zip(shards, futures)):
+                future.result()
+                check_shard_range(pending[index], params)
+                merged.add(pending[index])
+                pending[index] = None
+        return merged.result()
 
-        # 8) Create a new DataFrame from parsed HTML
-        cleaned_data = pd.DataFrame(rows, columns=headers if headers else None)
 
-    except requests.RequestException as RODEO_data_request_error:
-        logger.error(f"RODEO: Error RODOE_data_request_error: {RODEO_data_request_error}")
+def RODEOfunction(Site, session=None, cookie_jar=None, shard_hours=None, horizon_hours=48):
+    """
+    Pulls the RODEO ExSD work pool summary for a site.
+
+    Args:
+        Site (str): Site code.
+        session (requests.Session, optional): Authenticated session shared by the run.
+        cookie_jar (MozillaCookieJar, optional): Midway cookies for the session.
+        shard_hours (int, optional): Split the export into ExSD buckets of this
+            many hours, fetched concurrently and merged by work pool and process
+            path (refused if RODEO ignores the range). None pulls
+            the whole export in one request.
+        horizon_hours (int): ExSD range covered by buckets (beyond it: one shard).
+
+    Returns:
+        dict: Work pools, quantities and Crossdock/Palletized/Loaded totals, or None.
+    """
+    logger.info("RODEO: Requesting latest data...")
+    shards = exsd_time_shards(shard_hours, horizon_hours) if shard_hours else None
+    if shards:
+        logger.info(f"RODEO: Fetching {len(shards)} ExSD shards of {shard_hours}h concurrently")
+
+    try:
+        accumulator = RodeoExSDClient(Site, session=session, cookie_jar=cookie_jar).fetch(shards)
+        if not accumulator.headers:
+            logger.warning("[WARNING] No <th> elements found. The table might be empty or unstructured.")
+        cleaned_data = accumulator.to_frame()
+    except RodeoExportError as export_error:
+        logger.error(f"[ERROR] RODEO: {export_error}")
         return None
     except Exception as general_error:
-        logger.error(f"[ERROR] Some other error while parsing RODEO data: {general_error}")
+        # requests exceptions (timeouts included) end up here as well
+        logger.error(f"[ERROR] Some other error while fetching/parsing RODEO data: {general_error}")
         return None
 
-    # 9) Validate the resulting DataFrame
+    # Validate the resulting DataFrame
     if cleaned_data.empty or cleaned_data.shape[1] < 3:
         logger.error("[ERROR] The extracted 'cleaned_data' is empty or missing columns. Cannot proceed.")
         return None
 
     RodeoPull_WorkPool = cleaned_data.iloc[:, 0]
     RodeoPull_Quantity = cleaned_data.iloc[:, 2]
+    quantities = pd.to_numeric(RodeoPull_Quantity, errors='coerce')
 
-    Crossdock = 0.0
-    Palletized = 0.0
-    Loaded = 0.0
-
-    try:
-        Crossdock = cleaned_data[cleaned_data.iloc[:, 0] == "Crossdock"].iloc[:, 2].astype(float).sum()
-        Palletized = cleaned_data[cleaned_data.iloc[:, 0] == "Palletized"].iloc[:, 2].astype(float).sum()
-        Loaded = cleaned_data[cleaned_data.iloc[:, 0] == "Loaded"].iloc[:, 2].astype(float).sum()
-    except Exception as parse_error:
-        logger.error(f"[ERROR] Could not parse numeric columns for Crossdock/Palletized/Loaded: {parse_error}")
+    Crossdock = float(quantities[RodeoPull_WorkPool == "Crossdock"].sum())
+    Palletized = float(quantities[RodeoPull_WorkPool == "Palletized"].sum())
+    Loaded = float(quantities[RodeoPull_WorkPool == "Loaded"].sum())
 
     logger.info(f"RODEO: Total 'Crossdock' sum: {Crossdock}")
     logger.info(f"RODEO: Total 'Palletized' sum: {Palletized}")
@@ -43,3 +43,25 @@ EXTERNAL_LINKS = {
     "HAJ1": "SHRT-HAJ1-1",
     "WRO5": "YWRO"
 }
+
+# Readiness polling after switch_yard (seconds). The yard state is probed with
+# exponentially growing delays until it reports the requested site with data.
+YARD_READY_INITIAL_DELAY = 0.5
+YARD_READY_MAX_DELAY = 8.0
+YARD_READY_DEADLINE = 60.0
+# A reused session is already on its yard; fail over to a fresh one quickly
+YARD_READY_REUSED_DEADLINE = 10.0
+
+# Back-off between full-cycle retries (seconds): base * 2^(attempt-1), capped
+CYCLE_RETRY_BASE_DELAY = 2.0
+CYCLE_RETRY_MAX_DELAY = 15.0
+
+# Authenticated YMS sessions/tokens are reused per yard for this long (seconds)
+YMS_SESSION_TTL = 1800
+
+# Incremental runs: the last normalized yard per site is kept locally so only
+# records that changed since the previous pull are re-enriched against FMC,
+# and the differences are emitted as a yard-movement feed.
+YARD_DIFF_ENABLED = True
+# A stored yard older than this (seconds) is not used as the diff baseline
+YARD_STATE_MAX_AGE = 12 * 3600
@@ -7,8 +7,8 @@ logger = logging.getLogger(__name__)
 
 def load_fmc_data(site: str) -> pd.DataFrame:
     try:
-        from FMC import FMCfunction  # Adjust module name/path as needed
-        fmc_json = FMCfunction(site)
+        from FMC import get_fmc_snapshot  # Shared with the FMC module for this run
+        fmc_json = get_fmc_snapshot(site, consumer="YMS")
         if isinstance(fmc_json, pd.DataFrame):
             if fmc_json.empty:
                 return pd.DataFrame()
@@ -1,20 +1,65 @@
 import re
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import requests
 from requests_negotiate_sspi import HttpNegotiateAuth
 
 # Import functions from our transform module.
-from YMS.yms_network import switch_yard, get_yard_state
-from YMS.yms_validation import validate_yard_state
+from YMS.yms_network import switch_yard, wait_for_yard_state, YARD_SESSIONS
 from YMS.yms_fmc import load_fmc_data
-from YMS.yms_config import EXTERNAL_LINKS
+from YMS.yms_config import (EXTERNAL_LINKS, CYCLE_RETRY_BASE_DELAY, CYCLE_RETRY_MAX_DELAY,
+                            YARD_READY_INITIAL_DELAY, YARD_READY_DEADLINE, YARD_READY_REUSED_DEADLINE,
+                            YARD_DIFF_ENABLED)
 from YMS.yms_transform import transform_yard_data, _post_process_and_crosscheck, _final_json
+from YMS.yms_yard_diff import enrich_incrementally
 
 logger = logging.getLogger(__name__)
 
-def process_yms_data(site_code: str, max_cycle_retries: int = 7) -> dict:
+def _retry_delay(attempt: int) -> float:
+    """Back-off before the next full cycle (attempt is the number of failed cycles so far)."""
+    return min(CYCLE_RETRY_BASE_DELAY * (2 ** (attempt - 1)), CYCLE_RETRY_MAX_DELAY)
+
+def _open_session(headers: dict) -> tuple:
+    """
+    Opens a Negotiate-authenticated session and scrapes the YMS security token.
+
+    Returns:
+        (session, token), or (None, None) if the page or token is unavailable.
+    """
+    session = requests.Session()
+    session.auth = HttpNegotiateAuth()
+    yms_url = "https://trans-logistics-eu.amazon.com/yms/shipclerk/#/yard"
+    try:
+        response = session.get(yms_url, headers=headers, allow_redirects=True, timeout=30, verify=False)
+    except Exception as e:
+        logger.error("Exception during initial YMS GET: %s", str(e))
+        session.close()
+        return None, None
+
+    logger.info("Initial YMS page returned status code %s", response.status_code)
+    if response.status_code != 200:
+        logger.error("Initial YMS GET failed with status %s", response.status_code)
+        session.close()
+        return None, None
+
+    token_match = re.search(r'window\.ymsSecurityToken\s*=\s*"([^"]+)"', response.text)
+    if not token_match:
+        logger.error("Security token not found in initial response")
+        session.close()
+        return None, None
+    logger.info("Extracted security token: Successful")
+    return session, token_match.group(1)
+
+def process_yms_data(site_code: str, max_cycle_retries: int = 7, shadow: bool = False) -> dict:
+    """
+    Pulls and enriches the yard state of one yard.
+
+    A shadow run (shadow=True) leaves the shared state of the serving runs
+    alone: it opens its own session instead of leasing one from YARD_SESSIONS
+    and closes it afterwards, and reads the yard-diff state without saving it.
+    """
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0",
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
@@ -24,57 +69,55 @@ def process_yms_data(site_code: str, max_cycle_retries: int = 7) -> dict:
     }
     attempt = 0
     final_raw_json = None
+    readiness_log = []
     while attempt < max_cycle_retries:
         logger.info("Cycle attempt %s/%s for site %s", attempt + 1, max_cycle_retries, site_code)
-        session = requests.Session()
-        session.auth = HttpNegotiateAuth()
-        yms_url = "https://trans-logistics-eu.amazon.com/yms/shipclerk/#/yard"
-        try:
-            response = session.get(yms_url, headers=headers, allow_redirects=True, timeout=30, verify=False)
-        except Exception as e:
-            logger.error("Exception during initial YMS GET: %s", str(e))
-            attempt += 1
-            time.sleep(15)
-            continue
-
-        logger.info("Initial YMS page returned status code %s", response.status_code)
-        if response.status_code != 200:
-            logger.error("Initial YMS GET failed with status %s", response.status_code)
-            attempt += 1
-            time.sleep(15)
-            continue
-
-        token_match = re.search(r'window\.ymsSecurityToken\s*=\s*"([^"]+)"', response.text)
-        if token_match:
-            security_token = token_match.group(1)
-            logger.info("Extracted security token: Successful")
+        lease = None if shadow else YARD_SESSIONS.checkout(site_code)
+        if lease:
+            # Reuse the session already authenticated and switched to this yard
+            logger.info("Reusing authenticated YMS session for site %s", site_code)
+            session, security_token, created = lease["session"], lease["token"], lease["created"]
         else:
-            logger.error("Security token not found in initial response")
-            attempt += 1
-            time.sleep(15)
-            continue
-
-        switch_yard(site_code, session, headers)
-        time.sleep(15)
+            session, security_token = _open_session(headers)
+            created = None
+            if not session:
+                attempt += 1
+                time.sleep(_retry_delay(attempt))
+                continue
+            switch_yard(site_code, session, headers)
 
-        raw_json = get_yard_state(session, security_token)
-        if raw_json:
-            logger.info("Yard state retrieved successfully")
+        # Poll until the switched yard is actually served instead of a fixed wait
+        if lease:
+            raw_json, probe = wait_for_yard_state(session, security_token, site_code,
+                                                  deadline=YARD_READY_REUSED_DEADLINE, initial_delay=0.0)
         else:
-            logger.error("Failed to retrieve yard state")
+            raw_json, probe = wait_for_yard_state(session, security_token, site_code,
+                                                  deadline=YARD_READY_DEADLINE,
+                                                  initial_delay=YARD_READY_INITIAL_DELAY)
+        probe["reused_session"] = bool(lease)
+        readiness_log.append(probe)
 
-        if raw_json and validate_yard_state(raw_json, site_code):
+        if raw_json:
             final_raw_json = raw_json
+            if shadow:
+                session.close()
+            else:
+                YARD_SESSIONS.checkin(site_code, session, security_token, created)
             logger.info("Yard state validated for expected site %s", site_code)
             break
         else:
             logger.error("Yard state did not validate for expected value '%s'", site_code)
+            session.close()
             attempt += 1
-            time.sleep(15)
+            if not lease:
+                time.sleep(_retry_delay(attempt))
+
+    readiness = {"cycles": attempt + 1 if final_raw_json else attempt, "attempts": readiness_log}
 
     if not final_raw_json:
         logger.error("Failed after %s full-cycle attempts for site %s", max_cycle_retries, site_code)
-        return {"error": f"Failed after {max_cycle_retries} attempts for site {site_code}"}
+        return {"error": f"Failed after {max_cycle_retries} attempts for site {site_code}",
+                "_readiness": readiness}
 
     records = transform_yard_data(final_raw_json)
     if not records:
@@ -96,8 +139,16 @@ def process_yms_data(site_code: str, max_cycle_retries: int = 7) -> dict:
         total_fmc_entries = 0
         fmc_nonempty_vrid = 0
 
-    # Apply cross-checking and VRID enhancements.
-    filtered_df = _post_process_and_crosscheck(df, fmc_df, site_code)
+    # Apply cross-checking and VRID enhancements (only to records that changed since the last run).
+    movements = yard_diff = None
+    if YARD_DIFF_ENABLED:
+        try:
+            filtered_df, movements, yard_diff = enrich_incrementally(df, fmc_df, site_code, save=not shadow)
+        except Exception as exc:
+            logger.warning("Incremental enrichment failed for site %s (%s); enriching all records", site_code, exc)
+            filtered_df = _post_process_and_crosscheck(df, fmc_df, site_code)
+    else:
+        filtered_df = _post_process_and_crosscheck(df, fmc_df, site_code)
 
     # Rename columns to their final names.
     try:
@@ -135,6 +186,9 @@ def process_yms_data(site_code: str, max_cycle_retries: int = 7) -> dict:
     final_json["YMS_VRID_count_unfiltered"] = yms_nonempty_vrid
     final_json["YMS_VRID_count_filtered"] = yms_filtered_nonempty_vrid
     final_json["YMS_VRID_filled_from_FMC"] = yms_vrid_filled
+    final_json["_readiness"] = readiness
+    final_json["_movements"] = movements
+    final_json["_yard_diff"] = yard_diff
 
     return final_json
 
@@ -200,22 +254,43 @@ def merge_final_json(main_json: dict, ext_json: dict) -> dict:
     return merged
 
 
-def YMSfunction(site: str) -> dict:
+def YMSfunction(site: str, shadow: bool = False) -> dict:
     """
     Aggregator function to pull YMS data.
-    If the site has an external yard (per configuration), it also pulls external yard data
+    If the site has an external yard (per configuration), it pulls both yards concurrently
     and merges its fields into the main data while preserving key order.
-    Returns a combined JSON with a single "Main" key.
+    Returns a combined JSON with a "Main" key, plus the yard-movement feed of
+    each yard under "Movements". shadow=True pulls without touching the
+    session pool or the saved yard-diff state (see process_yms_data).
     """
     logger.info("Starting YMSfunction for site = %s", site)
-    main_result = process_yms_data(site)
-    if site in EXTERNAL_LINKS:
-        ext_site = EXTERNAL_LINKS[site]
-        logger.info("%s also has external yard => %s", site, ext_site)
-        ext_result = process_yms_data(ext_site)
-        # Merge the external JSON into the main JSON while preserving key order.
-        main_result = merge_final_json(main_result, ext_result)
-    else:
+    if site not in EXTERNAL_LINKS:
         logger.info("No external yard for %s; skipping external pull...", site)
-    return {"Main": main_result}
+        main_result = process_yms_data(site, shadow=shadow)
+        readiness = {site: main_result.pop("_readiness", None)}
+        movements = {site: main_result.pop("_movements", None)}
+        yard_diff = {site: main_result.pop("_yard_diff", None)}
+        return {"Main": main_result, "Movements": movements,
+                "_audit": {"YardReadiness": readiness, "YardDiff": yard_diff}}
+
+    # Main and external yards run concurrently, each on its own session
+    ext_site = EXTERNAL_LINKS[site]
+    logger.info("%s also has external yard => %s (fetching concurrently)", site, ext_site)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        main_future = executor.submit(process_yms_data, site, shadow=shadow)
+        ext_future = executor.submit(process_yms_data, ext_site, shadow=shadow)
+        main_result = main_future.result()
+        ext_result = ext_future.result()
 
+    readiness = {site: main_result.pop("_readiness", None),
+                 ext_site: ext_result.pop("_readiness", None)}
+    movements = {site: main_result.pop("_movements", None),
+                 ext_site: ext_result.pop("_movements", None)}
+    yard_diff = {site: main_result.pop("_yard_diff", None),
+                 ext_site: ext_result.pop("_yard_diff", None)}
+    # Merge the external JSON into the main JSON while preserving key order.
+    main_result = merge_final_json(main_result, ext_result)
+    # Observed yard readiness and diff statistics are reported in the run Audit, not in the data;
+    # the yard-movement feed of each yard is returned next to the merged data
+    return {"Main": main_result, "Movements": movements,
+            "_audit": {"YardReadiness": readiness, "YardDiff": yard_diff}}
@@ -2,14 +2,58 @@
 
 import time
 import logging
+import threading
 import requests
 import urllib3
 
-from YMS.yms_config import FC_URL_MAP, EXTERNAL_YARD_MAP
+from YMS.yms_config import (FC_URL_MAP, EXTERNAL_YARD_MAP, YARD_READY_INITIAL_DELAY,
+                             YARD_READY_MAX_DELAY, YARD_READY_DEADLINE, YMS_SESSION_TTL)
+from YMS.yms_validation import is_yard_ready
 
 logger = logging.getLogger(__name__)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+class YardSessionPool:
+    """
+    Keeps authenticated YMS sessions (with their security token) per yard so
+    later cycles and runs in the same process skip the Negotiate handshake,
+    token scrape and yard switch. Each yard has its own session because the
+    active yard is bound to the session; a session is leased to one caller at
+    a time and dropped once older than the TTL or after it fails.
+    """
+
+    def __init__(self, ttl: float = YMS_SESSION_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def checkout(self, yard_code: str):
+        """Returns a live {"session", "token", "created"} entry for the yard, or None."""
+        with self._lock:
+            entry = self._entries.pop(yard_code, None)
+        if entry and time.time() - entry["created"] < self.ttl:
+            return entry
+        if entry:
+            entry["session"].close()
+        return None
+
+    def checkin(self, yard_code: str, session: requests.Session, token: str, created: float = None) -> None:
+        """Returns a working session to the pool."""
+        with self._lock:
+            previous = self._entries.pop(yard_code, None)
+            self._entries[yard_code] = {"session": session, "token": token, "created": created or time.time()}
+        if previous and previous["session"] is not session:
+            previous["session"].close()
+
+    def clear(self) -> None:
+        with self._lock:
+            entries, self._entries = self._entries, {}
+        for entry in entries.values():
+            entry["session"].close()
+
+
+YARD_SESSIONS = YardSessionPool()
+
 def switch_yard(yard_code: str, session: requests.Session, headers: dict) -> dict:
     if yard_code in FC_URL_MAP:
         base_url = FC_URL_MAP[yard_code]
@@ -71,3 +115,34 @@ def get_yard_state(session: requests.Session, security_token: str) -> dict:
     except Exception as e:
         logger.error("Exception during get_yard_state: %s", str(e))
         return {}
+
+def wait_for_yard_state(session: requests.Session, security_token: str, site_code: str,
+                        deadline: float = YARD_READY_DEADLINE,
+                        initial_delay: float = YARD_READY_INITIAL_DELAY,
+                        max_delay: float = YARD_READY_MAX_DELAY) -> tuple:
+    """
+    Probes the yard state after switch_yard with exponentially growing delays
+    until it reports the requested site with data, or the deadline passes.
+    An initial_delay of 0 probes at once (reused session); later probes still
+    wait at least YARD_READY_INITIAL_DELAY.
+
+    Returns:
+        (yard_state, readiness) where yard_state is {} if the yard never became
+        ready and readiness is {"ready", "seconds", "probes"}.
+    """
+    start = time.monotonic()
+    delay = initial_delay
+    probes = 0
+    while True:
+        remaining = deadline - (time.monotonic() - start)
+        time.sleep(max(0.0, min(delay, remaining)))
+        probes += 1
+        yard_state = get_yard_state(session, security_token)
+        elapsed = time.monotonic() - start
+        if is_yard_ready(yard_state, site_code):
+            logger.info("Yard %s ready after %.1fs (%s probes)", site_code, elapsed, probes)
+            return yard_state, {"ready": True, "seconds": round(elapsed, 2), "probes": probes}
+        if elapsed >= deadline:
+            logger.error("Yard %s not ready within %.1fs (%s probes)", site_code, deadline, probes)
+            return {}, {"ready": False, "seconds": round(elapsed, 2), "probes": probes}
+        delay = min(max(delay * 2, YARD_READY_INITIAL_DELAY), max_delay)
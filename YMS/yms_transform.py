@@ -2,9 +2,13 @@
 # Transform Module Functions
 # -------------------------------
 
+import re
+import bisect
 import logging
 import pandas as pd
 
+from FMC import frame_fingerprint
+
 logger = logging.getLogger(__name__)
 
 def recursive_find_lane(obj):
@@ -60,6 +64,78 @@ def recursive_find_status(obj):
             statuses.extend(recursive_find_status(item))
     return statuses
 
+MAX_TRAVERSAL_DEPTH = 100
+
+def extract_location_attributes(location, max_depth=MAX_TRAVERSAL_DEPTH):
+    """
+    Walks a yard location once and collects what the recursive_find_* helpers
+    return, in the same order:
+      - "lanes": recursive_find_lane(location)
+      - "shipper_accounts": recursive_find_shipper_accounts(location)
+      - "asset_statuses": [recursive_find_status(asset) for asset in location["yardAssets"]]
+    Containers already on the current path (cycles) and anything deeper than
+    max_depth are skipped instead of recursing without bound.
+    """
+    lanes = []
+    accounts = []
+    assets = location.get("yardAssets", []) if isinstance(location, dict) else []
+    asset_statuses = [[] for _ in assets] if isinstance(assets, list) else []
+    on_path = set()
+    truncated = []
+
+    def visit(obj, depth, statuses, collect_accounts):
+        # statuses: the current asset's status list (None outside assets)
+        if depth > max_depth:
+            truncated.append(depth)
+            return
+        if isinstance(obj, dict):
+            items = obj.items()
+        elif isinstance(obj, list):
+            items = None
+        else:
+            return
+        if id(obj) in on_path:
+            logger.warning("Cycle detected in yard data; skipping repeated container")
+            return
+        on_path.add(id(obj))
+        try:
+            if items is None:
+                for item in obj:
+                    visit(item, depth + 1, statuses, collect_accounts)
+                return
+            for key, value in items:
+                lowered = key.lower()
+                if lowered == "lane" and isinstance(value, str):
+                    lanes.append(value)
+                    continue
+                if statuses is not None and lowered == "status":
+                    statuses.append(value)
+                child_collects = collect_accounts
+                if lowered == "shipperaccounts":
+                    if collect_accounts:
+                        if isinstance(value, list):
+                            accounts.extend([str(item) for item in value if isinstance(item, str)])
+                        elif isinstance(value, str):
+                            accounts.append(value)
+                    # recursive_find_shipper_accounts does not descend into matched values
+                    child_collects = False
+                if obj is location and key == "yardAssets" and value is assets and asset_statuses:
+                    on_path.add(id(value))
+                    try:
+                        for asset, asset_status in zip(value, asset_statuses):
+                            visit(asset, depth + 2, asset_status, child_collects)
+                    finally:
+                        on_path.discard(id(value))
+                    continue
+                visit(value, depth + 1, statuses, child_collects)
+        finally:
+            on_path.discard(id(obj))
+
+    visit(location, 0, None, True)
+    if truncated:
+        logger.warning("Yard data nested deeper than %s levels; deeper values were ignored", max_depth)
+    return {"lanes": lanes, "shipper_accounts": accounts, "asset_statuses": asset_statuses}
+
 def transform_yard_data(raw_data):
     """
     Transforms raw YMS data into a list of records.
@@ -72,12 +148,13 @@ def transform_yard_data(raw_data):
     summaries = raw_data.get("locationsSummaries", [])
     for summary in summaries:
         for location in summary.get("locations", []):
-            # Extract lane information recursively.
-            lane_list = recursive_find_lane(location)
+            # Lanes, shipper accounts and per-asset statuses in a single walk.
+            attributes = extract_location_attributes(location)
+            lane_list = attributes["lanes"]
             normalized_lanes = [lane.replace("->", "_") for lane in lane_list if isinstance(lane, str)]
             complete_lane = ", ".join(normalized_lanes) if normalized_lanes else "NaN"
             
-            for asset in location.get("yardAssets", []):
+            for asset_pos, asset in enumerate(location.get("yardAssets", [])):
                 load_obj = asset.get("load") or {}
 
                 # --- VRID Extraction ---
@@ -95,7 +172,7 @@ def transform_yard_data(raw_data):
 
                 # --- Status Extraction ---
                 # Simply take the last found status value (or "NaN" if none found).
-                status_list = recursive_find_status(asset)
+                status_list = attributes["asset_statuses"][asset_pos]
                 final_status = status_list[-1] if status_list else "NaN"
                 # --- End Status Extraction ---
                 
@@ -108,7 +185,7 @@ def transform_yard_data(raw_data):
                 if load_obj and "shipperAccounts" in load_obj and isinstance(load_obj["shipperAccounts"], list) and len(load_obj["shipperAccounts"]) > 0:
                     load_value = load_obj["shipperAccounts"][0]
                 else:
-                    shipper_accounts_list = recursive_find_shipper_accounts(location)
+                    shipper_accounts_list = attributes["shipper_accounts"]
                     load_value = ", ".join(shipper_accounts_list) if shipper_accounts_list else "NaN"
                 
                 # Process unavailableReason - convert HEALTHY to NaN since healthy equipment has no unavailable reason
@@ -134,11 +211,85 @@ def transform_yard_data(raw_data):
                 all_transformed.append(record)
     return all_transformed
 
-def _enhanced_fill_vrid(filtered_df, fmc_df, site_code):
+class FMCIndex:
+    """
+    Lookup structures built once per FMC snapshot:
+      - VR ID -> first FMC row (exact hash map, used by the cross-check join)
+      - Facility Sequences sorted for prefix (building code) range lookups
+    String forms match the previous pandas filters (astype(str), regex
+    contains), so lookups return exactly the rows those filters selected.
+    """
+
+    def __init__(self, fmc_df):
+        columns = fmc_df.columns
+        self.sequences = fmc_df['Facility Sequence'].astype(str).tolist() if 'Facility Sequence' in columns else []
+        self.shippers = fmc_df['Shipper Accounts'].astype(str).tolist() if 'Shipper Accounts' in columns else None
+        self.carriers = fmc_df['Carrier'].astype(str).tolist() if 'Carrier' in columns else None
+        self.vrids = fmc_df['VR ID'].tolist() if 'VR ID' in columns else None
+
+        # Missing sequences never match a prefix (str.startswith(..., na=False))
+        order = sorted((i for i, seq in enumerate(self.sequences) if isinstance(seq, str)),
+                       key=self.sequences.__getitem__)
+        self._sorted_sequences = [self.sequences[i] for i in order]
+        self._sorted_positions = order
+
+        self.first_row_by_vrid = {}
+        for pos, vrid in enumerate(self.vrids or []):
+            if pd.notna(vrid) and vrid not in self.first_row_by_vrid:
+                self.first_row_by_vrid[vrid] = pos
+
+    def prefix_positions(self, prefix):
+        """Row positions whose Facility Sequence starts with prefix (in row order)."""
+        if not isinstance(prefix, str):
+            return []
+        keys = self._sorted_sequences
+        i = bisect.bisect_left(keys, prefix)
+        positions = []
+        while i < len(keys) and keys[i].startswith(prefix):
+            positions.append(self._sorted_positions[i])
+            i += 1
+        return sorted(positions)
+
+    def candidates(self, building_code, destination=None, owner=None):
+        """Row positions matching the building code prefix, destination and owner filters."""
+        positions = self.prefix_positions(building_code)
+        if destination:
+            pattern = re.compile("_" + destination)
+            positions = [p for p in positions if _search(pattern, self.sequences[p])]
+        if owner:
+            if self.shippers is None or self.carriers is None:
+                return []
+            pattern = re.compile(owner, flags=re.IGNORECASE)
+            positions = [p for p in positions
+                         if _search(pattern, self.shippers[p]) or _search(pattern, self.carriers[p])]
+        return positions
+
+
+def _search(pattern, value):
+    """Regex search that treats missing values as no match (str.contains(..., na=False))."""
+    return isinstance(value, str) and pattern.search(value) is not None
+
+
+_FMC_INDEX_CACHE = {}
+_FMC_INDEX_CACHE_SIZE = 4
+
+def get_fmc_index(fmc_df):
+    """Returns the FMCIndex for an FMC table, building it only once per snapshot content."""
+    key = frame_fingerprint(fmc_df)
+    index = _FMC_INDEX_CACHE.get(key)
+    if index is None:
+        index = FMCIndex(fmc_df)
+        if len(_FMC_INDEX_CACHE) >= _FMC_INDEX_CACHE_SIZE:
+            _FMC_INDEX_CACHE.pop(next(iter(_FMC_INDEX_CACHE)))
+        _FMC_INDEX_CACHE[key] = index
+    return index
+
+def _enhanced_fill_vrid(filtered_df, fmc_df, site_code, fmc_index=None):
     """
     Fills missing VRIDs by matching YMS records with FMC data.
     """
     logger = logging.getLogger(__name__)
+    fmc_index = fmc_index or get_fmc_index(fmc_df)
     filled_count = 0
     missing_mask = filtered_df['vrid'].isna() | (filtered_df['vrid'].astype(str).str.strip() == "") | (filtered_df['vrid'].astype(str) == "NaN")
     missing_indices = filtered_df[missing_mask].index
@@ -157,18 +308,10 @@ def _enhanced_fill_vrid(filtered_df, fmc_df, site_code):
         else:
             building_code = yms_name
 
-        candidates = fmc_df[fmc_df['Facility Sequence'].astype(str).str.startswith(building_code, na=False)]
-        if destination:
-            candidates = candidates[candidates['Facility Sequence'].astype(str).str.contains("_" + destination, na=False)]
-        
-        if owner:
-            candidates = candidates[
-                candidates['Shipper Accounts'].astype(str).str.contains(owner, case=False, na=False) |
-                candidates['Carrier'].astype(str).str.contains(owner, case=False, na=False)
-            ]
+        candidates = fmc_index.candidates(building_code, destination, owner)
         
         if len(candidates) == 1:
-            new_vrid = candidates.iloc[0].get("VR ID", "NaN")
+            new_vrid = fmc_index.vrids[candidates[0]] if fmc_index.vrids is not None else "NaN"
             if new_vrid and new_vrid != "NaN":
                 filtered_df.at[idx, 'vrid'] = new_vrid
                 filled_count += 1
@@ -202,19 +345,20 @@ def _post_process_and_crosscheck(df, fmc_df, site_code):
 
     if not fmc_df.empty and 'VR ID' in fmc_df.columns:
         logger.info(f"[{site_code}] Cross-checking VRIDs with FMC data...")
-        fmc_vr_ids = set(fmc_df['VR ID'].dropna())
-        yms_vr_ids = set(filtered_df['vrid'].dropna())
-        shared_vrids = fmc_vr_ids.intersection(yms_vr_ids)
-        for vrid in shared_vrids:
-            row_fmc = fmc_df[fmc_df['VR ID'] == vrid]
-            if not row_fmc.empty:
-                load_val = row_fmc.iloc[0].get('Shipper Accounts', '')
-                lane_val = row_fmc.iloc[0].get('Facility Sequence', '').replace('->', '_')
-                idx = filtered_df[filtered_df['vrid'] == vrid].index
-                if not idx.empty:
-                    filtered_df.loc[idx, 'isdrop'] = load_val
-                    filtered_df.loc[idx, 'isunderdocksystemcontrol'] = lane_val
-        filtered_df, _ = _enhanced_fill_vrid(filtered_df, fmc_df, site_code)
+        fmc_index = get_fmc_index(fmc_df)
+
+        # One join of YMS VRIDs against the first FMC row per VR ID
+        first_rows = fmc_index.first_row_by_vrid
+        matched = filtered_df['vrid'].map(lambda v: v in first_rows if pd.notna(v) else False).astype(bool)
+        if matched.any():
+            positions = filtered_df.loc[matched, 'vrid'].map(first_rows)
+            fmc_rows = fmc_df.iloc[positions.tolist()]
+            load_vals = fmc_rows['Shipper Accounts'].tolist() if 'Shipper Accounts' in fmc_df.columns else [''] * len(positions)
+            lane_vals = (fmc_rows['Facility Sequence'].str.replace('->', '_', regex=False).fillna('').tolist()
+                         if 'Facility Sequence' in fmc_df.columns else [''] * len(positions))
+            filtered_df.loc[matched, 'isdrop'] = pd.Series(load_vals, index=positions.index)
+            filtered_df.loc[matched, 'isunderdocksystemcontrol'] = pd.Series(lane_vals, index=positions.index)
+        filtered_df, _ = _enhanced_fill_vrid(filtered_df, fmc_df, site_code, fmc_index)
     return filtered_df
 
 def _final_json(filtered_df, unfiltered_json, site_code):
@@ -29,3 +29,12 @@ def validate_yard_state(yard_state: dict, expected_value: str) -> bool:
     except Exception as e:
         logger.error("Exception during validate_yard_state: %s", str(e))
         return False
+
+def is_yard_ready(yard_state: dict, expected_value: str) -> bool:
+    """
+    True once the yard state has locations and belongs to the expected site,
+    i.e. the preceding switch_yard has taken effect.
+    """
+    if not yard_state or not yard_state.get("locationsSummaries"):
+        return False
+    return validate_yard_state(yard_state, expected_value)
@@ -0,0 +1,200 @@
+# yms_yard_diff.py
+
+"""
+Incremental yard-state diffing between consecutive YMS runs.
+
+The last normalized yard of each site (transform_yard_data records plus the
+columns FMC enrichment wrote) is persisted locally. A new pull is diffed
+against it by record key: records that are unchanged since the last run and
+were enriched against the same FMC data reuse their enrichment, everything
+else goes through _post_process_and_crosscheck. The differences (arrivals,
+departures, status and lane changes) are returned as a yard-movement feed.
+"""
+
+import os
+import time
+import logging
+import threading
+import pandas as pd
+
+from FMC import frame_fingerprint
+from utils.path_utils import get_cache_dir
+from utils.frame_cache import read_frame, write_frame
+from YMS.yms_config import YARD_STATE_MAX_AGE
+from YMS.yms_transform import _post_process_and_crosscheck
+
+logger = logging.getLogger(__name__)
+
+# Fields identifying a yard record between pulls (plus an ordinal for repeats)
+KEY_FIELDS = ['name', 'equipment_type', 'ownercode', 'vrid']
+# Fields reported in the movement feed
+FEED_FIELDS = ['name', 'equipment_type', 'ownercode', 'vrid', 'isempty', 'lane']
+# Columns _post_process_and_crosscheck writes from FMC
+ENRICHED_FIELDS = ['vrid', 'isdrop', 'isunderdocksystemcontrol']
+# FMC columns the enrichment reads; other FMC changes do not invalidate it
+FMC_ENRICHMENT_COLUMNS = ['VR ID', 'Facility Sequence', 'Shipper Accounts', 'Carrier']
+
+
+def record_keys(df):
+    """'name|type|owner|vrid|n' per record, n counting repeats of the same identity."""
+    base = ['|'.join(str(value) for value in values)
+            for values in zip(*(df[field].tolist() for field in KEY_FIELDS))]
+    ordinals = pd.Series(base).groupby(base).cumcount().tolist()
+    return [f"{key}|{n}" for key, n in zip(base, ordinals)]
+
+
+def record_digests(df):
+    """Content hash per record over every transformed field."""
+    return pd.util.hash_pandas_object(df, index=False).tolist()
+
+
+def fmc_enrichment_key(fmc_df):
+    """Fingerprint of the FMC data the enrichment depends on ('none' when it would not run)."""
+    if fmc_df.empty or 'VR ID' not in fmc_df.columns:
+        return "none"
+    columns = [column for column in FMC_ENRICHMENT_COLUMNS if column in fmc_df.columns]
+    return frame_fingerprint(fmc_df[columns])
+
+
+class YardStateStore:
+    """Last normalized yard per site, stored with utils.frame_cache."""
+
+    def __init__(self, root=None, max_age_seconds=YARD_STATE_MAX_AGE):
+        self._root = root
+        self.max_age = max_age_seconds
+        self._lock = threading.Lock()
+
+    def _path(self, site):
+        root = self._root or get_cache_dir('yms_yard_state')
+        return os.path.join(root, site)
+
+    def load(self, site, now=None):
+        """Returns the stored state frame, or None if missing or older than max_age."""
+        with self._lock:
+            state = read_frame(self._path(site))
+        if state is None or state.empty or 'saved_at' not in state.columns:
+            return None
+        age = (now or time.time()) - float(state['saved_at'].iloc[0])
+        if age > self.max_age:
+            logger.info("[%s] Stored yard state is %.0f s old; starting a new baseline", site, age)
+            return None
+        return state
+
+    def save(self, site, state):
+        try:
+            with self._lock:
+                write_frame(self._path(site), state)
+        except Exception as e:
+            logger.warning("[%s] Could not store yard state: %s", site, e)
+
+
+YARD_STATES = YardStateStore()
+
+
+def _feed_record(values):
+    return {field: (None if pd.isna(value) else value) for field, value in zip(FEED_FIELDS, values)}
+
+
+def diff_yard(previous, current):
+    """
+    Keyed diff of two state frames (columns 'key' and FEED_FIELDS).
+
+    Returns:
+        list of events {"event": ARRIVAL | DEPARTURE | STATUS_CHANGE | LANE_CHANGE, ...}
+    """
+    prev_rows = dict(zip(previous['key'], zip(*(previous[f].tolist() for f in FEED_FIELDS))))
+    events = []
+    current_keys = set()
+    for key, values in zip(current['key'], zip(*(current[f].tolist() for f in FEED_FIELDS))):
+        current_keys.add(key)
+        before = prev_rows.get(key)
+        if before is None:
+            events.append({"event": "ARRIVAL", **_feed_record(values)})
+            continue
+        record = _feed_record(values)
+        old = _feed_record(before)
+        if old['isempty'] != record['isempty']:
+            events.append({"event": "STATUS_CHANGE", **record, "from": old['isempty'], "to": record['isempty']})
+        if old['lane'] != record['lane']:
+            events.append({"event": "LANE_CHANGE", **record, "from": old['lane'], "to": record['lane']})
+    for key, values in prev_rows.items():
+        if key not in current_keys:
+            events.append({"event": "DEPARTURE", **_feed_record(values)})
+    return events
+
+
+def enrich_incrementally(df, fmc_df, site_code, store=None, now=None, save=True):
+    """
+    Drop-in for _post_process_and_crosscheck(df, fmc_df, site_code) that only
+    enriches records which changed since the previous run of the site.
+
+    Args:
+        df: DataFrame of transform_yard_data records (default RangeIndex)
+        fmc_df: FMC data used for enrichment
+        site_code: Yard site code
+        store: YardStateStore (defaults to YARD_STATES)
+        save: False reads the saved state without replacing it (shadow runs),
+            so the next regular run still diffs against its own previous run
+
+    Returns:
+        (filtered_df, movements, stats) where movements is the feed
+        {"baseline", "since", "events", "counts"} and stats counts reused and
+        re-enriched records.
+    """
+    store = store or YARD_STATES
+    now = now or time.time()
+    keys = record_keys(df)
+    digests = record_digests(df)
+    fmc_key = fmc_enrichment_key(fmc_df)
+    previous = store.load(site_code, now=now)
+
+    same_fmc = previous is not None and bool((previous['fmc_key'] == fmc_key).all())
+    reuse = [False] * len(df)
+    if same_fmc:
+        cached = dict(zip(previous['key'], previous['digest']))
+        reuse = [cached.get(key) == digest for key, digest in zip(keys, digests)]
+    changed = [pos for pos, hit in enumerate(reuse) if not hit]
+    reused = [pos for pos, hit in enumerate(reuse) if hit]
+
+    # Column selection for every record, FMC enrichment only for changed ones
+    filtered_df = _post_process_and_crosscheck(df, pd.DataFrame(), site_code)
+    if changed:
+        enriched = _post_process_and_crosscheck(df.iloc[changed], fmc_df, site_code)
+        for field in ENRICHED_FIELDS:
+            if field in enriched.columns:
+                filtered_df.loc[enriched.index, field] = enriched[field]
+    if reused:
+        rows = previous.set_index('key').loc[[keys[pos] for pos in reused]]
+        labels = df.index[reused]
+        for field in ENRICHED_FIELDS:
+            column = f"enriched_{field}"
+            if column in rows.columns and (field in filtered_df.columns or rows[column].notna().any()):
+                filtered_df.loc[labels, field] = rows[column].tolist()
+
+    state = pd.DataFrame({"key": keys, "digest": digests})
+    for field in FEED_FIELDS:
+        state[field] = df[field].tolist()
+    for field in ENRICHED_FIELDS:
+        if field in filtered_df.columns:
+            state[f"enriched_{field}"] = filtered_df[field].tolist()
+    state["fmc_key"] = fmc_key
+    state["saved_at"] = now
+
+    if previous is None:
+        events = []
+        since = None
+    else:
+        events = diff_yard(previous, state)
+        since = float(previous['saved_at'].iloc[0])
+    if save:
+        store.save(site_code, state)
+
+    counts = {}
+    for event in events:
+        counts[event["event"]] = counts.get(event["event"], 0) + 1
+    movements = {"baseline": previous is None, "since": since, "events": events, "counts": counts}
+    stats = {"records": len(df), "reused": len(reused), "enriched": len(changed),
+             "fmc_changed": previous is not None and not same_fmc}
+    logger.info("[%s] Yard diff: %d records, %d reused, %d enriched, movements %s",
+                site_code, len(df), len(reused), len(changed), counts or "none")
+    return filtered_df, movements, stats
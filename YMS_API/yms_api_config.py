@@ -141,6 +141,22 @@ QUALITY_THRESHOLDS = {
 }
 
 
+# ============================================================================
+# VALIDATION CONFIGURATION
+# ============================================================================
+
+# Synthetic-data validation mode for production runs:
+#   'full'    - validate every record
+#   'sampled' - validate a random sample of VALIDATION_SAMPLE_SIZE records
+#   'off'     - skip validation (quality metrics are still computed every run)
+VALIDATION_MODE = 'full'
+VALIDATION_SAMPLE_SIZE = 2000
+VALIDATION_SAMPLE_SEED = 38
+
+# Run validation after the module output has been written instead of inline
+VALIDATION_DEFERRED = True
+
+
 # ============================================================================
 # FMC CONFIGURATION
 # ============================================================================
@@ -70,9 +70,12 @@ class YMSValidator:
             return
         
         # Count different value types
-        site_code_count = sum(1 for lane in lanes if lane == f'{self.site}_{self.site}')
-        business_name_count = sum(1 for lane in lanes if lane and '_' in lane and not lane.startswith(self.site))
-        empty_count = sum(1 for lane in lanes if lane in ['', 'NaN'])
+        lane_values = pd.Series(lanes, dtype=object)
+        site_code_count = int((lane_values == f'{self.site}_{self.site}').sum())
+        lane_text = lane_values.where(lane_values.map(type) == str)
+        business_name_count = int((lane_text.str.contains('_', regex=False, na=False) &
+                                   ~lane_text.str.startswith(self.site, na=True)).sum())
+        empty_count = int(lane_values.isin(['', 'NaN']).sum())
         valid_count = len(lanes) - site_code_count - empty_count
         
         # Calculate percentage
@@ -106,9 +109,10 @@ class YMSValidator:
         from .yms_api_config import STANDARD_LOAD_TYPES
         
         # Count different value types
-        site_code_count = sum(1 for load in loads if load == self.site or load == f'{self.site}_{self.site}')
-        standard_type_count = sum(1 for load in loads if load in STANDARD_LOAD_TYPES)
-        empty_count = sum(1 for load in loads if load in ['', 'NaN'])
+        load_values = pd.Series(loads, dtype=object)
+        site_code_count = int(load_values.isin([self.site, f'{self.site}_{self.site}']).sum())
+        standard_type_count = int(load_values.isin(STANDARD_LOAD_TYPES).sum())
+        empty_count = int(load_values.isin(['', 'NaN']).sum())
         
         # Calculate percentages
         standard_pct = (standard_type_count / len(loads)) * 100 if loads else 0
@@ -166,8 +170,9 @@ class YMSValidator:
             return
         
         # Check consistency between unavailable flags and reasons
-        unavail_count = sum(1 for u in unavailable if u == 1)
-        valid_reasons_count = sum(1 for r in reasons if r and r != 'NaN' and r != 'UNKNOWN_REASON')
+        unavail_count = int((pd.Series(unavailable, dtype=object) == 1).sum())
+        reason_values = pd.Series(reasons, dtype=object)
+        valid_reasons_count = int((reason_values.astype(bool) & ~reason_values.isin(['NaN', 'UNKNOWN_REASON'])).sum())
         
         # Validation logic
         if abs(unavail_count - valid_reasons_count) > 5:
@@ -188,9 +193,11 @@ class YMSValidator:
             return
         
         # Count different VRID types
-        site_code_count = sum(1 for vrid in vrids if str(vrid) == self.site)
-        valid_format_count = sum(1 for vrid in vrids if self._is_valid_vrid_format(str(vrid)))
-        empty_count = sum(1 for vrid in vrids if vrid in ['NaN', '0', '', None])
+        vrid_values = pd.Series(vrids, dtype=object)
+        vrid_text = vrid_values.map(str)
+        site_code_count = int((vrid_text == self.site).sum())
+        valid_format_count = int(self._valid_vrid_format_mask(vrid_text).sum())
+        empty_count = int(vrid_values.isin(['NaN', '0', '', None]).sum())
         
         # Validation logic
         if site_code_count > 0:
@@ -246,13 +253,13 @@ class YMSValidator:
                 value = metrics[metric]
                 
                 # Special handling for percentage-based metrics
-            if metric == 'in_progress_pct':
+                if metric == 'in_progress_pct':
                     # Expect ~6%, normalize to 100 scale
                     normalized_value = min(value / 6 * 100, 100)
-            elif metric == 'unavailable_pct':
+                elif metric == 'unavailable_pct':
                     # Expect ~9%, normalize to 100 scale
                     normalized_value = min(value / 9 * 100, 100)
-            else:
+                else:
                     normalized_value = value
                 
                 score += normalized_value * weight
@@ -272,6 +279,12 @@ class YMSValidator:
         # Basic validation - longer than site code and contains numbers
         return len(vrid_str) > 5 and any(c.isdigit() for c in vrid_str)
     
+    def _valid_vrid_format_mask(self, vrid_text: pd.Series) -> pd.Series:
+        """Vectorized _is_valid_vrid_format over VRIDs already converted with str()."""
+        return (~vrid_text.isin(['NaN', '0', '', 'None']) &
+                (vrid_text.str.len() > 5) &
+                vrid_text.str.contains(r'\d', regex=True))
+    
     def _add_success(self, message: str):
         """Add success message."""
         self.validation_results['passed'].append(f"✓ {message}")
@@ -305,14 +318,14 @@ PASSED CHECKS ({len(validation_results['passed'])})
         report += f"{check}\n"
     
     if validation_results['failed']:
-    report += f"\nFAILED CHECKS ({len(validation_results['failed'])})\n{'-'*30}\n"
-    for check in validation_results['failed']:
-        report += f"{check}\n"
+        report += f"\nFAILED CHECKS ({len(validation_results['failed'])})\n{'-'*30}\n"
+        for check in validation_results['failed']:
+            report += f"{check}\n"
     
     if validation_results['warnings']:
-    report += f"\nWARNINGS ({len(validation_results['warnings'])})\n{'-'*30}\n"
-    for warning in validation_results['warnings']:
-        report += f"{warning}\n"
+        report += f"\nWARNINGS ({len(validation_results['warnings'])})\n{'-'*30}\n"
+        for warning in validation_results['warnings']:
+            report += f"{warning}\n"
     
     report += f"\nDETAILED METRICS\n{'-'*30}\n"
     for metric, value in validation_results['metrics'].items():
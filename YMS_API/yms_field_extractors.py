@@ -17,28 +17,7 @@ def extract_equipment_type(item: Dict[str, Any]) -> str:
     
     Fixes Equipment Type gap by using enhanced extraction.
     """
-    # Strategy 1: Direct API field (same as YMS Traditional)
-    equipment_type = item.get("type", "")
-    if equipment_type and str(equipment_type).strip() and str(equipment_type) != 'NaN':
-        return str(equipment_type)
-    
-    # Strategy 2: Backup API field  
-    equipment_type = item.get("equipment_type", "")
-    if equipment_type and str(equipment_type).strip() and str(equipment_type) != 'NaN':
-        return str(equipment_type)
-    
-    # Strategy 3: Extract from vehicle type field
-    vehicle_type = item.get("vehicletype", "")
-    if vehicle_type and str(vehicle_type).strip():
-        return str(vehicle_type)
-    
-    # Strategy 4: Extract from classification
-    classification = item.get("classification", "")
-    if classification and str(classification).strip():
-        return str(classification)
-    
-    # Strategy 5: Default fallback (removed location-based assumptions)
-    return "TRAILER"  # Most common type, but only as last resort
+    return extract_field(item, "equipment_type")
 
 
 def extract_carrier(item: Dict[str, Any]) -> str:
@@ -47,39 +26,7 @@ def extract_carrier(item: Dict[str, Any]) -> str:
     
     Fixes SCAC gap (-26.9%) by using multi-source carrier extraction.
     """
-    # Strategy 1: Direct ownercode field
-    ownercode = item.get("ownercode", "")
-    if ownercode and str(ownercode).strip() and str(ownercode) != 'NaN':
-        return str(ownercode)
-    
-    # Strategy 2: Extract from carrier field
-    carrier = item.get("carrier", "")
-    if carrier and str(carrier).strip():
-        return str(carrier)
-    
-    # Strategy 3: Extract from fleet owner
-    fleet_owner = item.get("fleetowner", "")
-    if fleet_owner and str(fleet_owner).strip():
-        return str(fleet_owner)
-    
-    # Strategy 4: Extract from shipping company
-    shipping_company = item.get("shippingcompany", "")
-    if shipping_company and str(shipping_company).strip():
-        return str(shipping_company)
-    
-    # Strategy 5: Extract from owner information
-    owner = item.get("owner", "")
-    if owner and str(owner).strip():
-        return str(owner)
-    
-    # Strategy 6: Parse from nested structures
-    shipper_accounts = item.get("shipperaccounts", "")
-    if shipper_accounts and isinstance(shipper_accounts, str):
-        # Extract carrier codes from shipper accounts
-        if "ATS" in shipper_accounts:
-            return "ATSUK"  # Common ATS carrier
-    
-    return "NaN"  # Only return NaN if all strategies fail
+    return extract_field(item, "ownercode")
 
 
 def extract_load_basic(item: Dict[str, Any]) -> str:
@@ -170,36 +117,7 @@ def extract_vrid(item: Dict[str, Any]) -> str:
     
     NEVER uses equipment numbers, license plates, vehicle IDs as VRIDs!
     """
-    # Strategy 1: Direct VRID field (highest priority)
-    vrid = item.get("vrid", "")
-    if vrid and str(vrid).strip() and str(vrid) != 'NaN':
-        return str(vrid).strip()
-    
-    # Strategy 2: ISA ID conversion - this is a valid VRID alternative
-    isaid = item.get("isaid", "")
-    if isaid and str(isaid).strip() and str(isaid) != 'NaN':
-        return str(isaid).strip()
-    
-    # Strategy 3: Parse from nested identifier structures (Traditional YMS logic)
-    # Look for VR_ID and ISA types only - matching traditional behavior
-    identifiers = item.get("identifiers", {})
-    if isinstance(identifiers, dict):
-        # Priority 1: VR_ID type (exact match to Traditional YMS)
-        for id_item in identifiers:
-            if isinstance(id_item, dict) and id_item.get("type") == "VR_ID":
-                vr_id = id_item.get("identifier")
-                if vr_id and str(vr_id).strip():
-                    return str(vr_id).strip()
-        
-        # Priority 2: ISA type (exact match to Traditional YMS)  
-        for id_item in identifiers:
-            if isinstance(id_item, dict) and id_item.get("type") == "ISA":
-                isa_id = id_item.get("identifier")
-                if isa_id and str(isa_id).strip():
-                    return str(isa_id).strip()
-    
-    # No valid VRID found - will be handled by FMC lookup later
-    return "NaN"
+    return extract_field(item, "vrid")
 
 
 def is_valid_vrid_format(candidate: str) -> bool:
@@ -345,21 +263,7 @@ def extract_load_traditional_style(item: Dict[str, Any]) -> str:
     1. Primary: shipperAccounts from load object (first element)
     2. Fallback: recursive search for shipper accounts
     """
-    # Strategy 1: Direct shipperAccounts from load object (YMS Traditional primary method)
-    load_obj = item.get("load", {})
-    if load_obj and "shipperAccounts" in load_obj:
-        shipper_accounts = load_obj["shipperAccounts"]
-        if isinstance(shipper_accounts, list) and len(shipper_accounts) > 0:
-            return str(shipper_accounts[0])
-    
-    # Strategy 2: Fallback - recursive search (YMS Traditional fallback)
-    # This would require implementing recursive_find_shipper_accounts logic
-    # For now, check top-level shipperaccounts field
-    shipper_accounts = item.get("shipperaccounts", "")
-    if shipper_accounts and str(shipper_accounts).strip() and str(shipper_accounts) != 'NaN':
-        return str(shipper_accounts)
-    
-    return "NaN"
+    return extract_field(item, "load")
 
 
 def extract_lane_traditional_style(item: Dict[str, Any]) -> str:
@@ -369,21 +273,7 @@ def extract_lane_traditional_style(item: Dict[str, Any]) -> str:
     Matches YMS Traditional's approach:
     Direct extraction from load object with -> to _ normalization
     """
-    # Strategy 1: Direct lane from load object (YMS Traditional method)
-    load_obj = item.get("load", {})
-    if load_obj:
-        lane_value = load_obj.get("lane")
-        if lane_value and isinstance(lane_value, str):
-            # YMS Traditional normalization: replace -> with _
-            normalized_lane = lane_value.replace("->", "_")
-            return normalized_lane
-    
-    # Strategy 2: Check top-level lane field
-    lane = item.get("lane", "")
-    if lane and str(lane).strip() and str(lane) != 'NaN':
-        return str(lane).replace("->", "_")
-    
-    return "NaN" 
+    return extract_field(item, "lane")
 
 
 def extract_status_hybrid(item: Dict[str, Any]) -> str:
@@ -421,4 +311,135 @@ def extract_status_hybrid(item: Dict[str, Any]) -> str:
     if is_empty:
         return "EMPTY"
     else:
-        return "FULL" 
\ No newline at end of file
+        return "FULL" 
+
+# ---------------------------------------------------------------------------
+# Value rules: the per-value checks applied to each fallback field, as plain
+# functions. Each returns the converted value, or None when the value is not
+# accepted (the next fallback is then tried).
+# ---------------------------------------------------------------------------
+
+def rule_text(value: Any) -> Optional[str]:
+    """Any non-blank value, as text (e.g. vehicletype, carrier)."""
+    if value:
+        text = str(value)
+        if text.strip():
+            return text
+    return None
+
+
+def rule_text_not_nan(value: Any) -> Optional[str]:
+    """Non-blank text other than 'NaN' (e.g. type, ownercode)."""
+    if value:
+        text = str(value)
+        if text.strip() and text != 'NaN':
+            return text
+    return None
+
+
+def rule_text_not_nan_stripped(value: Any) -> Optional[str]:
+    """As rule_text_not_nan, stripped (vrid, isaid)."""
+    if value:
+        text = str(value)
+        if text.strip() and text != 'NaN':
+            return text.strip()
+    return None
+
+
+def rule_lane(value: Any) -> Optional[str]:
+    """Top-level lane: non-NaN text with '->' normalised to '_'."""
+    if value:
+        text = str(value)
+        if text.strip() and text != 'NaN':
+            return text.replace("->", "_")
+    return None
+
+
+def rule_lane_str(value: Any) -> Optional[str]:
+    """load.lane: a non-empty string with '->' normalised to '_'."""
+    if value and isinstance(value, str):
+        return value.replace("->", "_")
+    return None
+
+
+def rule_first_item(value: Any) -> Optional[str]:
+    """load.shipperAccounts: the first element of a non-empty list."""
+    if isinstance(value, list) and len(value) > 0:
+        return str(value[0])
+    return None
+
+
+def rule_ats_account(value: Any) -> Optional[str]:
+    """shipperaccounts naming an ATS account stand for the ATSUK carrier."""
+    if value and isinstance(value, str) and "ATS" in value:
+        return "ATSUK"
+    return None
+
+
+FIELD_RULES = {
+    "text": rule_text,
+    "text_not_nan": rule_text_not_nan,
+    "text_not_nan_stripped": rule_text_not_nan_stripped,
+    "lane": rule_lane,
+    "lane_str": rule_lane_str,
+    "first_item": rule_first_item,
+    "ats_account": rule_ats_account,
+}
+
+
+# ---------------------------------------------------------------------------
+# Fallback fields: ordered (dotted path, FIELD_RULES name) pairs into the API
+# record; the first accepted value wins, else the default. The extract_*
+# functions above read these declarations.
+# ---------------------------------------------------------------------------
+
+FIELD_FALLBACKS = {
+    "equipment_type": {"default": "TRAILER", "paths": [
+        ("type", "text_not_nan"),            # Direct API field (same as YMS Traditional)
+        ("equipment_type", "text_not_nan"),  # Backup API field
+        ("vehicletype", "text"),
+        ("classification", "text"),
+    ]},
+    "ownercode": {"default": "NaN", "paths": [
+        ("ownercode", "text_not_nan"),
+        ("carrier", "text"),
+        ("fleetowner", "text"),
+        ("shippingcompany", "text"),
+        ("owner", "text"),
+        ("shipperaccounts", "ats_account"),  # ATS shipper accounts => ATSUK
+    ]},
+    # The 'identifiers' structure never yielded a VRID (it was iterated by key), so it is not declared;
+    # a missing VRID is filled from FMC later
+    "vrid": {"default": "NaN", "paths": [
+        ("vrid", "text_not_nan_stripped"),
+        ("isaid", "text_not_nan_stripped"),  # ISA ID is a valid VRID alternative
+    ]},
+    "load": {"default": "NaN", "paths": [
+        ("load.shipperAccounts", "first_item"),  # YMS Traditional primary method
+        ("shipperaccounts", "text_not_nan"),
+    ]},
+    "lane": {"default": "NaN", "paths": [
+        ("load.lane", "lane_str"),  # YMS Traditional method
+        ("lane", "lane"),
+    ]},
+}
+
+
+def get_path(item: Dict[str, Any], path: str) -> Any:
+    """Value at a dotted path of a record (None if absent)."""
+    node = item
+    for key in path.split("."):
+        node = node.get(key) if isinstance(node, dict) else None
+    return node
+
+
+def extract_field(item: Dict[str, Any], field: str) -> Any:
+    """First accepted value of a FIELD_FALLBACKS field, or its default."""
+    fallback = FIELD_FALLBACKS[field]
+    for path, rule in fallback["paths"]:
+        value = get_path(item, path)
+        if value:
+            value = FIELD_RULES[rule](value)
+            if value is not None:
+                return value
+    return fallback["default"]
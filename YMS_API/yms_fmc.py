@@ -29,10 +29,11 @@ def load_fmc_data(site: str) -> Tuple[pd.DataFrame, dict]:
     }
     
     try:
-        from FMC import FMCfunction
+        from FMC import get_fmc_snapshot
         logger.info(f"Loading FMC data for site {site}")
         
-        fmc_json = FMCfunction(site)
+        # Same run-scoped snapshot the FMC module and YMS use
+        fmc_json = get_fmc_snapshot(site, consumer="YMS_API")
         if isinstance(fmc_json, pd.DataFrame):
             df = fmc_json
         else:
@@ -8,12 +8,20 @@ from typing import Dict, Any, List, Optional, Tuple
 import pandas as pd
 import logging
 
+from FMC import frame_fingerprint
+
 logger = logging.getLogger(__name__)
 
+# Generic European/UK carrier codes that FMC Subcarrier may replace
+GENERIC_SCAC_CODES = ['ATSES', 'ATSIT', 'ATSEX', 'DPDUK']
+
 
 def build_fmc_lookup_tables(fmc_df: pd.DataFrame, site: str) -> Dict[str, Any]:
     """
     Build comprehensive FMC lookup tables for faster matching.
+
+    Record-level API kept for callers matching single records with
+    find_fmc_match; the enhancement steps use FMCLookupIndex instead.
     
     Args:
         fmc_df: FMC DataFrame
@@ -144,7 +152,160 @@ def calculate_location_similarity(api_location: str, fmc_location: str) -> float
     return common / total if total > 0 else 0.0
 
 
-def enhance_vrid_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) -> Tuple[pd.DataFrame, int]:
+def _has_value(value) -> bool:
+    """True for values the enhancement steps treat as already filled."""
+    return bool(value and str(value).strip() and str(value) != 'NaN')
+
+
+def _usable_lane(facility_sequence) -> bool:
+    # Only use facility sequence if it looks real (minimum length check)
+    return (isinstance(facility_sequence, str) and
+            bool(facility_sequence.strip()) and
+            facility_sequence not in ['', 'NaN', 'NULL', 'UNKNOWN'] and
+            len(facility_sequence.strip()) > 2)
+
+
+def _usable_load(shipper_accounts) -> bool:
+    # Only use shipper accounts if they look real; the generic
+    # TransfersInitialPlacement load type is never used to fill
+    return (isinstance(shipper_accounts, str) and
+            bool(shipper_accounts.strip()) and
+            shipper_accounts not in ['', 'NaN', 'NULL', 'UNKNOWN', 'TransfersInitialPlacement'] and
+            len(shipper_accounts.strip()) > 3)
+
+
+def _usable_subcarrier(subcarrier) -> bool:
+    return isinstance(subcarrier, str) and bool(subcarrier.strip()) and subcarrier not in ['', '_____']
+
+
+class FMCLookupIndex:
+    """
+    Exact-match lookup tables over one FMC snapshot.
+
+    Holds the same VRID and Facility Sequence tables find_fmc_match uses
+    (rows with an empty VR ID skipped, last row wins per key), mapped to row
+    positions, plus the FMC columns the enhancement steps read.
+    """
+
+    def __init__(self, fmc_df: pd.DataFrame):
+        self.by_vrid: Dict[str, int] = {}
+        self.by_location: Dict[Any, int] = {}
+        size = len(fmc_df)
+
+        def column(name):
+            return fmc_df[name].tolist() if name in fmc_df.columns else [''] * size
+
+        self.vr_id = column('VR ID')
+        self.facility_sequence = column('Facility Sequence')
+        self.shipper_accounts = column('Shipper Accounts')
+        self.subcarrier = column('Subcarrier')
+
+        if size == 0 or 'VR ID' not in fmc_df.columns:
+            return
+
+        positions = [pos for pos, vr_id in enumerate(self.vr_id) if vr_id]
+        self.by_vrid = dict(zip((str(self.vr_id[pos]) for pos in positions), positions))
+        located = [pos for pos in positions if self.facility_sequence[pos]]
+        self.by_location = dict(zip((self.facility_sequence[pos] for pos in located), located))
+
+    def match(self, vrids: List[Any], names: List[Any]) -> List[Optional[int]]:
+        """
+        FMC row position per yard record (None when unmatched): exact VRID
+        first, then exact location name, as find_fmc_match does.
+        """
+        by_vrid, by_location = self.by_vrid, self.by_location
+        positions = []
+        for vrid, name in zip(vrids, names):
+            pos = by_vrid.get(str(vrid).strip()) if _has_value(vrid) else None
+            if pos is None and name:
+                pos = by_location.get(name)
+            positions.append(pos)
+        return positions
+
+
+_LOOKUP_INDEX_CACHE = {}
+_LOOKUP_INDEX_CACHE_SIZE = 4
+
+def get_fmc_lookup_index(fmc_df: pd.DataFrame) -> FMCLookupIndex:
+    """Returns the FMCLookupIndex for an FMC table, building it only once per snapshot content."""
+    key = frame_fingerprint(fmc_df)
+    index = _LOOKUP_INDEX_CACHE.get(key)
+    if index is None:
+        index = FMCLookupIndex(fmc_df)
+        if len(_LOOKUP_INDEX_CACHE) >= _LOOKUP_INDEX_CACHE_SIZE:
+            _LOOKUP_INDEX_CACHE.pop(next(iter(_LOOKUP_INDEX_CACHE)))
+        _LOOKUP_INDEX_CACHE[key] = index
+    return index
+
+
+def _match_positions(df: pd.DataFrame, lookup_index: FMCLookupIndex) -> List[Optional[int]]:
+    return lookup_index.match(df['vrid'].tolist(), df['name'].tolist())
+
+
+def _assign(df: pd.DataFrame, columns: List[str], rows: List[int], values: List[Any]) -> None:
+    """Writes values at the given row positions in one assignment per column."""
+    if rows:
+        labels = df.index[rows]
+        for column in columns:
+            df.loc[labels, column] = values
+
+
+def _fill_vrid(df: pd.DataFrame, lookup_index: FMCLookupIndex, positions: List[Optional[int]]) -> List[int]:
+    rows, values = [], []
+    for row, (current, pos) in enumerate(zip(df['vrid'].tolist(), positions)):
+        if pos is None or _has_value(current):
+            continue
+        enhanced_vrid = lookup_index.vr_id[pos]
+        if enhanced_vrid:
+            rows.append(row)
+            values.append(str(enhanced_vrid))
+    _assign(df, ['vrid'], rows, values)
+    return rows
+
+
+def _fill_from_fmc(df: pd.DataFrame, columns: List[str], fmc_values: List[Any], usable, positions: List[Optional[int]],
+                   skip=_has_value, convert=None) -> int:
+    """Fills records `skip` rejects from the matched FMC value when `usable` accepts it."""
+    rows, values = [], []
+    for row, (current, pos) in enumerate(zip(df[columns[0]].tolist(), positions)):
+        if pos is None or skip(current):
+            continue
+        value = fmc_values[pos]
+        if usable(value):
+            rows.append(row)
+            values.append(convert(value) if convert else value)
+    _assign(df, columns, rows, values)
+    return len(rows)
+
+
+def _has_specific_scac(value) -> bool:
+    # Generic European/UK codes stay eligible for enhancement
+    return _has_value(value) and value not in GENERIC_SCAC_CODES
+
+
+def _log_rate(label: str, enhanced_count: int, total_records: int) -> None:
+    success_rate = (enhanced_count / total_records) * 100 if total_records > 0 else 0
+    logger.info(f"{label}: {enhanced_count}/{total_records} ({success_rate:.1f}%)")
+
+
+def _enhance_lane(df, lookup_index, positions):
+    enhanced_count = _fill_from_fmc(df, ['lane', 'complete_lane'], lookup_index.facility_sequence, _usable_lane, positions)
+    _log_rate("CONSERVATIVE lane enhancement", enhanced_count, len(df))
+
+
+def _enhance_load(df, lookup_index, positions):
+    enhanced_count = _fill_from_fmc(df, ['load'], lookup_index.shipper_accounts, _usable_load, positions)
+    _log_rate("CONSERVATIVE load enhancement", enhanced_count, len(df))
+
+
+def _enhance_scac(df, lookup_index, positions):
+    enhanced_count = _fill_from_fmc(df, ['ownercode'], lookup_index.subcarrier, _usable_subcarrier, positions,
+                                    skip=_has_specific_scac, convert=str.strip)
+    _log_rate("Enhanced SCAC enhancement", enhanced_count, len(df))
+
+
+def enhance_vrid_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str,
+                          lookup_index: Optional[FMCLookupIndex] = None) -> Tuple[pd.DataFrame, int]:
     """
     Enhance VRID field using FMC data.
     
@@ -152,6 +313,7 @@ def enhance_vrid_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) ->
         df: YMS DataFrame
         fmc_df: FMC DataFrame
         site: Site code
+        lookup_index: Prebuilt FMCLookupIndex (built from fmc_df if omitted)
         
     Returns:
         Tuple of enhanced DataFrame and count of filled VRIDs
@@ -160,31 +322,15 @@ def enhance_vrid_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) ->
         logger.warning("No FMC data available for VRID enhancement")
         return df, 0
     
-    # Build lookup tables
-    fmc_lookups = build_fmc_lookup_tables(fmc_df, site)
-    
-    filled_count = 0
-    for idx in df.index:
-        current_vrid = df.at[idx, 'vrid']
-        
-        # Skip if already has valid VRID
-        if current_vrid and str(current_vrid).strip() and str(current_vrid) != 'NaN':
-            continue
-        
-        # Find FMC match
-        fmc_match = find_fmc_match(df.iloc[idx], fmc_lookups, site)
-        
-        if fmc_match:
-            enhanced_vrid = fmc_match.get('VR ID', '')
-            if enhanced_vrid:
-                df.at[idx, 'vrid'] = str(enhanced_vrid)
-                filled_count += 1
+    lookup_index = lookup_index or get_fmc_lookup_index(fmc_df)
+    filled_count = len(_fill_vrid(df, lookup_index, _match_positions(df, lookup_index)))
     
     logger.info(f"Enhanced FMC VRID enhancement: +{filled_count} VRIDs")
     return df, filled_count
 
 
-def enhance_lane_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) -> pd.DataFrame:
+def enhance_lane_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str,
+                          lookup_index: Optional[FMCLookupIndex] = None) -> pd.DataFrame:
     """
     Enhance lane field using FMC data - CONSERVATIVE approach.
     
@@ -194,6 +340,7 @@ def enhance_lane_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) ->
         df: YMS DataFrame
         fmc_df: FMC DataFrame
         site: Site code
+        lookup_index: Prebuilt FMCLookupIndex (built from fmc_df if omitted)
         
     Returns:
         Enhanced DataFrame
@@ -201,41 +348,13 @@ def enhance_lane_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) ->
     if fmc_df.empty:
         return df
     
-    # Build lookup tables
-    fmc_lookups = build_fmc_lookup_tables(fmc_df, site)
-    
-    enhanced_count = 0
-    total_records = len(df)
-    
-    for idx in df.index:
-        current_lane = df.at[idx, 'lane']
-        
-        # Skip if already has lane (from API extraction)
-        if current_lane and str(current_lane).strip() and str(current_lane) not in ['', 'NaN']:
-            continue
-        
-        # Find FMC match using CONSERVATIVE matching only
-        fmc_match = find_fmc_match(df.iloc[idx], fmc_lookups, site)
-        
-        if fmc_match:
-            facility_sequence = fmc_match.get('Facility Sequence', '')
-            # ✅ ENHANCED VALIDATION: Only use facility sequence if it looks real
-            if (facility_sequence and 
-                facility_sequence.strip() and
-                facility_sequence not in ['', 'NaN', 'NULL', 'UNKNOWN'] and
-                len(facility_sequence.strip()) > 2):  # Minimum length check
-                
-                df.at[idx, 'lane'] = facility_sequence
-                df.at[idx, 'complete_lane'] = facility_sequence
-                enhanced_count += 1
-    
-    success_rate = (enhanced_count / total_records) * 100 if total_records > 0 else 0
-    logger.info(f"CONSERVATIVE lane enhancement: {enhanced_count}/{total_records} ({success_rate:.1f}%)")
-    
+    lookup_index = lookup_index or get_fmc_lookup_index(fmc_df)
+    _enhance_lane(df, lookup_index, _match_positions(df, lookup_index))
     return df
 
 
-def enhance_load_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) -> pd.DataFrame:
+def enhance_load_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str,
+                          lookup_index: Optional[FMCLookupIndex] = None) -> pd.DataFrame:
     """
     Enhance load field using FMC data - CONSERVATIVE approach.
     
@@ -245,6 +364,7 @@ def enhance_load_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) ->
         df: YMS DataFrame
         fmc_df: FMC DataFrame
         site: Site code
+        lookup_index: Prebuilt FMCLookupIndex (built from fmc_df if omitted)
         
     Returns:
         Enhanced DataFrame
@@ -252,48 +372,13 @@ def enhance_load_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) ->
     if fmc_df.empty:
         return df
     
-    # Build lookup tables
-    fmc_lookups = build_fmc_lookup_tables(fmc_df, site)
-    
-    enhanced_count = 0
-    total_records = len(df)
-    
-    for idx in df.index:
-        current_load = df.at[idx, 'load']
-        
-        # Skip if already has load (from API extraction)
-        if current_load and str(current_load).strip() and str(current_load) not in ['', 'NaN']:
-            continue
-        
-        # Find FMC match using CONSERVATIVE matching only
-        fmc_match = find_fmc_match(df.iloc[idx], fmc_lookups, site)
-        
-        if fmc_match:
-            shipper_accounts = fmc_match.get('Shipper Accounts', '')
-            # ✅ ENHANCED VALIDATION: Only use shipper accounts if they look real
-            if (shipper_accounts and 
-                shipper_accounts.strip() and
-                shipper_accounts not in ['', 'NaN', 'NULL', 'UNKNOWN', 'TransfersInitialPlacement'] and
-                len(shipper_accounts.strip()) > 3):  # Minimum length check
-                
-                # 🚫 BLOCK OVER-STANDARDIZATION: Don't fill with generic load types
-                # Prevent mass-filling with TransfersInitialPlacement unless it's specific
-                if shipper_accounts == 'TransfersInitialPlacement':
-                    # Only allow if we have very high confidence (exact VRID match)
-                    vrid = df.at[idx, 'vrid']
-                    if not (vrid and str(vrid).strip() and str(vrid) != 'NaN'):
-                        continue  # Skip generic load type without exact VRID match
-                
-                df.at[idx, 'load'] = shipper_accounts
-                enhanced_count += 1
-    
-    success_rate = (enhanced_count / total_records) * 100 if total_records > 0 else 0
-    logger.info(f"CONSERVATIVE load enhancement: {enhanced_count}/{total_records} ({success_rate:.1f}%)")
-    
+    lookup_index = lookup_index or get_fmc_lookup_index(fmc_df)
+    _enhance_load(df, lookup_index, _match_positions(df, lookup_index))
     return df
 
 
-def enhance_scac_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) -> pd.DataFrame:
+def enhance_scac_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str,
+                          lookup_index: Optional[FMCLookupIndex] = None) -> pd.DataFrame:
     """
     Enhance SCAC field using FMC Subcarrier data.
     
@@ -301,6 +386,7 @@ def enhance_scac_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) ->
         df: YMS DataFrame
         fmc_df: FMC DataFrame
         site: Site code
+        lookup_index: Prebuilt FMCLookupIndex (built from fmc_df if omitted)
         
     Returns:
         Enhanced DataFrame
@@ -308,44 +394,19 @@ def enhance_scac_with_fmc(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) ->
     if fmc_df.empty:
         return df
     
-    # Build lookup tables
-    fmc_lookups = build_fmc_lookup_tables(fmc_df, site)
-    
-    enhanced_count = 0
-    total_records = len(df)
-    
-    for idx in df.index:
-        current_scac = df.at[idx, 'ownercode']
-        
-        # Skip if already has valid SCAC (only enhance empty or generic ones)
-        skip_enhancement = (current_scac and 
-                          str(current_scac).strip() and 
-                          str(current_scac) != 'NaN' and
-                          # Allow enhancement of generic European/UK codes
-                          current_scac not in ['ATSES', 'ATSIT', 'ATSEX', 'DPDUK'])
-        
-        if skip_enhancement:
-            continue
-        
-        # Find FMC match
-        fmc_match = find_fmc_match(df.iloc[idx], fmc_lookups, site)
-        
-        if fmc_match:
-            subcarrier = fmc_match.get('Subcarrier', '')
-            if subcarrier and subcarrier.strip() and subcarrier not in ['', '_____']:
-                # Use FMC Subcarrier as SCAC enhancement
-                df.at[idx, 'ownercode'] = subcarrier.strip()
-                enhanced_count += 1
-    
-    success_rate = (enhanced_count / total_records) * 100 if total_records > 0 else 0
-    logger.info(f"Enhanced SCAC enhancement: {enhanced_count}/{total_records} ({success_rate:.1f}%)")
-    
+    lookup_index = lookup_index or get_fmc_lookup_index(fmc_df)
+    _enhance_scac(df, lookup_index, _match_positions(df, lookup_index))
     return df
 
 
 def apply_all_fmc_enhancements(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str) -> Tuple[pd.DataFrame, int]:
     """
     Apply all FMC enhancements to the DataFrame.
+
+    The FMC lookup index is built once per snapshot and every yard record is
+    matched once; only records that received a VRID are matched again, so
+    lane, load and SCAC see the same matches as when each step ran its own
+    lookup after the VRID fill.
     
     Args:
         df: YMS DataFrame
@@ -361,11 +422,25 @@ def apply_all_fmc_enhancements(df: pd.DataFrame, fmc_df: pd.DataFrame, site: str
     
     logger.info(f"Applying FMC enhancements for {site} with {len(fmc_df)} FMC records")
     
+    lookup_index = get_fmc_lookup_index(fmc_df)
+    positions = _match_positions(df, lookup_index)
+    
     # Apply enhancements in order of priority
-    df, vrid_filled_count = enhance_vrid_with_fmc(df, fmc_df, site)
-    df = enhance_lane_with_fmc(df, fmc_df, site)
-    df = enhance_load_with_fmc(df, fmc_df, site)
-    df = enhance_scac_with_fmc(df, fmc_df, site)
+    if 'VR ID' in fmc_df.columns:
+        filled_rows = _fill_vrid(df, lookup_index, positions)
+        if filled_rows:
+            refreshed = lookup_index.match(df['vrid'].iloc[filled_rows].tolist(), df['name'].iloc[filled_rows].tolist())
+            for row, pos in zip(filled_rows, refreshed):
+                positions[row] = pos
+        vrid_filled_count = len(filled_rows)
+        logger.info(f"Enhanced FMC VRID enhancement: +{vrid_filled_count} VRIDs")
+    else:
+        logger.warning("No FMC data available for VRID enhancement")
+        vrid_filled_count = 0
+    
+    _enhance_lane(df, lookup_index, positions)
+    _enhance_load(df, lookup_index, positions)
+    _enhance_scac(df, lookup_index, positions)
     
     logger.info(f"FMC enhancements completed for {site}")
-    return df, vrid_filled_count 
\ No newline at end of file
+    return df, vrid_filled_count
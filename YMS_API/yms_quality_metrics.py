@@ -28,7 +28,7 @@ def calculate_field_completeness(df: pd.DataFrame) -> Dict[str, Dict[str, float]
     def calc_completeness(series, invalid_values=None):
         if invalid_values is None:
             invalid_values = ['NaN', '', None]
-        valid = series[~series.isin(invalid_values)].count()
+        valid = int((series.notna() & ~series.isin(invalid_values)).sum())
         return (valid / total_records * 100) if total_records > 0 else 0
     
     return {
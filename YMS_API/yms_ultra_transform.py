@@ -27,7 +27,7 @@ from .yms_quality_metrics import (
     calculate_quality_metrics, validate_quality_improvements, 
     log_quality_summary, filter_unknown_reason_entries
 )
-from .yms_validation_framework import validate_yms_transformation
+from .yms_validation_framework import schedule_yms_validation
 
 logger = logging.getLogger(__name__)
 
@@ -66,21 +66,14 @@ def ultra_yms_api_transform(api_records: List[Dict[str, Any]], fmc_df: pd.DataFr
     df, vrid_filled_count = apply_all_fmc_enhancements(df, fmc_df, site)
     
     # Step 5: ✅ VALIDATION CHECKPOINT - Validate transformation integrity
-    validation_report = validate_yms_transformation(
+    # (mode and deferral from yms_api_config; deferred runs happen after the output is written)
+    validation_report = schedule_yms_validation(
         original_data=api_records,
         transformed_df=df,
         site=site,
         pre_fmc_df=pre_fmc_df
     )
     
-    # Log validation results
-    if validation_report['overall_passed']:
-        logger.info(f"✅ VALIDATION PASSED for {site}")
-    else:
-        logger.warning(f"⚠️ VALIDATION ISSUES detected for {site}")
-        for rec in validation_report['recommendations']:
-            logger.warning(f"  - {rec}")
-    
     # Step 6: Filter out UNKNOWN_REASON entries to match YMS Old behavior
     df, filtered_count = filter_unknown_reason_entries(df)
     
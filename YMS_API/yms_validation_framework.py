@@ -10,14 +10,26 @@ This framework validates:
 - Field completeness patterns
 - FMC enhancement quality
 - Transformation integrity
+
+Checks run as vectorized string/regex operations over whole columns. In
+production the mode (full / sampled / off) and deferral come from
+yms_api_config; deferred validations run once the output has been written
+(see run_deferred_validations).
 """
 
+import atexit
 import logging
+import random
+import threading
 import pandas as pd
-from typing import Dict, List, Any, Tuple, Set, Optional
+from typing import Callable, Dict, List, Any, Tuple, Set, Optional
 from collections import defaultdict
 import re
 
+from .yms_api_config import (
+    VALIDATION_MODE, VALIDATION_SAMPLE_SIZE, VALIDATION_SAMPLE_SEED, VALIDATION_DEFERRED
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,6 +57,11 @@ class YMSValidationFramework:
     
     def __init__(self):
         self.synthetic_patterns = self._init_synthetic_patterns()
+        # One alternation per category: re.match on it equals "any pattern matches"
+        self.synthetic_regex = {
+            category: re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+            for category, patterns in self.synthetic_patterns.items()
+        }
         self.validation_results = []
         
     def _init_synthetic_patterns(self) -> Dict[str, List[str]]:
@@ -242,30 +259,14 @@ class YMSValidationFramework:
         """Count synthetic data patterns in DataFrame"""
         synthetic_count = {'lanes': 0, 'loads': 0, 'vrids': 0, 'total': 0}
         
-        for _, row in df.iterrows():
-            # Check lanes
-            lane = str(row.get('lane', ''))
-            if lane and lane != 'NaN':
-                for pattern in self.synthetic_patterns['synthetic_lanes']:
-                    if re.match(pattern, lane):
-                        synthetic_count['lanes'] += 1
-                        break
-            
-            # Check loads
-            load = str(row.get('load', ''))
-            if load and load != 'NaN':
-                for pattern in self.synthetic_patterns['over_standardized_loads']:
-                    if re.match(pattern, load):
-                        synthetic_count['loads'] += 1
-                        break
-            
-            # Check VRIDs
-            vrid = str(row.get('vrid', ''))
-            if vrid and vrid != 'NaN':
-                for pattern in self.synthetic_patterns['synthetic_vrids']:
-                    if re.match(pattern, vrid):
-                        synthetic_count['vrids'] += 1
-                        break
+        for key, field, category in (('lanes', 'lane', 'synthetic_lanes'),
+                                     ('loads', 'load', 'over_standardized_loads'),
+                                     ('vrids', 'vrid', 'synthetic_vrids')):
+            if field not in df.columns:
+                continue
+            values = df[field].astype(str)
+            matched = values.str.match(self.synthetic_regex[category], na=False) & (values != 'NaN')
+            synthetic_count[key] = int(matched.sum())
         
         synthetic_count['total'] = synthetic_count['lanes'] + synthetic_count['loads'] + synthetic_count['vrids']
         return synthetic_count
@@ -438,6 +439,140 @@ def validate_yms_transformation(original_data: List[Dict[str, Any]],
     return framework.generate_validation_report(original_data, transformed_df, site, pre_fmc_df)
 
 
+def sample_validation_inputs(original_data: List[Dict[str, Any]],
+                             transformed_df: pd.DataFrame,
+                             pre_fmc_df: Optional[pd.DataFrame],
+                             sample_size: int,
+                             seed: int = VALIDATION_SAMPLE_SEED) -> Tuple[List[Dict[str, Any]], pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Draws the same random record positions from the API data and the pre/post
+    FMC frames (all aligned before filtering), keeping their original order.
+    """
+    total = len(transformed_df)
+    if total <= sample_size:
+        return original_data, transformed_df, pre_fmc_df
+    
+    positions = sorted(random.Random(seed).sample(range(total), sample_size))
+    sampled_original = [original_data[pos] for pos in positions] if len(original_data) == total else original_data
+    sampled_pre = pre_fmc_df.iloc[positions] if pre_fmc_df is not None and len(pre_fmc_df) == total else pre_fmc_df
+    return sampled_original, transformed_df.iloc[positions], sampled_pre
+
+
+def log_validation_report(report: Dict[str, Any]) -> None:
+    """Logs the outcome and recommendations of a validation report."""
+    site = report.get('site')
+    if report['overall_passed']:
+        logger.info(f"✅ VALIDATION PASSED for {site}")
+    else:
+        logger.warning(f"⚠️ VALIDATION ISSUES detected for {site}")
+        for rec in report['recommendations']:
+            logger.warning(f"  - {rec}")
+
+
+class DeferredValidations:
+    """
+    Validations queued during a run and executed once the output is written,
+    so they never delay it. Anything still pending at interpreter exit is
+    dropped (with a log line) rather than run, so it never delays shutdown.
+    """
+    
+    def __init__(self):
+        self._pending: List[Tuple[str, Callable[[], Dict[str, Any]]]] = []
+        self._lock = threading.Lock()
+    
+    def submit(self, site: str, job: Callable[[], Dict[str, Any]]) -> None:
+        with self._lock:
+            self._pending.append((site, job))
+    
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+    
+    def run_pending(self) -> List[Dict[str, Any]]:
+        """Runs and clears all queued validations; returns their reports."""
+        with self._lock:
+            jobs, self._pending = self._pending, []
+        
+        reports = []
+        for site, job in jobs:
+            try:
+                report = job()
+                log_validation_report(report)
+                reports.append(report)
+            except Exception as e:
+                logger.error(f"Deferred validation failed for {site}: {e}", exc_info=True)
+        return reports
+    
+    def discard_pending(self) -> int:
+        """Drops all queued validations without running them; returns how many were dropped."""
+        with self._lock:
+            jobs, self._pending = self._pending, []
+        if jobs:
+            sites = sorted({site for site, _ in jobs})
+            logger.warning(f"Dropped {len(jobs)} pending deferred validation(s) for {', '.join(sites)}")
+        return len(jobs)
+
+
+DEFERRED_VALIDATIONS = DeferredValidations()
+atexit.register(DEFERRED_VALIDATIONS.discard_pending)
+
+
+def run_deferred_validations() -> List[Dict[str, Any]]:
+    """Runs the validations deferred until the run's output was written."""
+    return DEFERRED_VALIDATIONS.run_pending()
+
+
+def schedule_yms_validation(original_data: List[Dict[str, Any]],
+                            transformed_df: pd.DataFrame,
+                            site: str,
+                            pre_fmc_df: Optional[pd.DataFrame] = None,
+                            mode: str = VALIDATION_MODE,
+                            deferred: bool = VALIDATION_DEFERRED,
+                            sample_size: int = VALIDATION_SAMPLE_SIZE) -> Dict[str, Any]:
+    """
+    Validates a YMS transformation according to the production mode.
+    
+    Args:
+        original_data: Original API data
+        transformed_df: Final transformed DataFrame (not modified afterwards)
+        site: Site code
+        pre_fmc_df: Optional pre-FMC DataFrame
+        mode: 'full', 'sampled' or 'off'
+        deferred: Queue the validation for run_deferred_validations instead of running it now
+        sample_size: Records validated in 'sampled' mode
+        
+    Returns:
+        The validation report when run inline, otherwise a status entry
+        ('skipped' or 'deferred') describing what will be validated
+    """
+    total_records = len(transformed_df)
+    if mode == 'off':
+        return {'site': site, 'mode': mode, 'status': 'skipped', 'total_records': total_records}
+    if mode not in ('full', 'sampled'):
+        logger.warning(f"Unknown validation mode '{mode}' - validating all records")
+        mode = 'full'
+    
+    if mode == 'sampled':
+        original_data, transformed_df, pre_fmc_df = sample_validation_inputs(
+            original_data, transformed_df, pre_fmc_df, sample_size
+        )
+    sample_info = {'mode': mode, 'records_validated': len(transformed_df), 'total_records': total_records}
+    
+    def job():
+        report = validate_yms_transformation(original_data, transformed_df, site, pre_fmc_df)
+        report.update(sample_info)
+        return report
+    
+    if deferred:
+        DEFERRED_VALIDATIONS.submit(site, job)
+        logger.info(f"Validation for {site} deferred until output is written ({mode}, {sample_info['records_validated']} records)")
+        return {'site': site, 'status': 'deferred', **sample_info}
+    
+    report = job()
+    log_validation_report(report)
+    return report
+
+
 def validate_site_consistency(site_results: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
     """
     Convenience function to validate site consistency
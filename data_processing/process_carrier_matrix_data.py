@@ -3,23 +3,27 @@ import logging
 import pandas as pd
 import os
 
+from utils.handoff import Handoff
+
 logger = logging.getLogger(__name__)
 
-def process_carrier_matrix_data(csv_path):
+def process_carrier_matrix_data(matrix_data):
     """
     Processes the Carrier Matrix CSV data for FlexSim.
     
     Args:
-        csv_path (str): Path to the CSV file containing the filtered carrier matrix data
+        matrix_data (Handoff or str): In-memory filtered carrier matrix from
+            pull_carrier_matrix, or the path to a CSV file with it (removed afterwards)
         
     Returns:
         dict: Dictionary containing carrier matrix data and metadata
     """
-    logger.info(f"[CARRIER_MATRIX PROCESS] Processing carrier matrix from: {csv_path}")
+    csv_path = None if isinstance(matrix_data, Handoff) else matrix_data
+    logger.info(f"[CARRIER_MATRIX PROCESS] Processing carrier matrix from: {csv_path or 'memory'}")
     
     try:
         # Read the CSV file
-        df = pd.read_csv(csv_path)
+        df = matrix_data.load() if csv_path is None else pd.read_csv(csv_path)
         logger.info(f"[CARRIER_MATRIX PROCESS] Read {len(df)} rows from carrier matrix CSV")
         
         # Extract metadata
@@ -42,11 +46,12 @@ def process_carrier_matrix_data(csv_path):
         }
         
         # Delete the temporary CSV file
-        try:
-            os.remove(csv_path)
-            logger.info(f"[CARRIER_MATRIX PROCESS] Removed temporary file: {csv_path}")
-        except Exception as e:
-            logger.warning(f"[CARRIER_MATRIX PROCESS] Failed to remove temporary file {csv_path}: {e}")
+        if csv_path is not None:
+            try:
+                os.remove(csv_path)
+                logger.info(f"[CARRIER_MATRIX PROCESS] Removed temporary file: {csv_path}")
+            except Exception as e:
+                logger.warning(f"[CARRIER_MATRIX PROCESS] Failed to remove temporary file {csv_path}: {e}")
         
         return result
         
@@ -58,6 +63,8 @@ def process_carrier_matrix_data(csv_path):
             if csv_path and os.path.exists(csv_path):
                 os.remove(csv_path)
                 logger.info(f"[CARRIER_MATRIX PROCESS] Removed temporary file after error: {csv_path}")
+            elif csv_path is None:
+                matrix_data.release()
         except Exception as rm_error:
             logger.warning(f"[CARRIER_MATRIX PROCESS] Failed to remove temporary file: {rm_error}")
             
@@ -3,42 +3,49 @@ import logging
 import pandas as pd
 import os
 
+from utils.handoff import Handoff
+
 logger = logging.getLogger(__name__)
 
-def process_ibbt_data(csv_path):
+def process_ibbt_data(ibbt_data):
     """
     Processes the IBBT CSV data for FlexSim.
     
     Args:
-        csv_path (str): Path to the CSV file containing the IBBT data
+        ibbt_data (Handoff or str): In-memory IBBT data from pull_ibbt_data,
+            or the path to a CSV file containing the IBBT data (removed afterwards)
         
     Returns:
         dict: Dictionary containing IBBT data and metadata
     """
-    logger.info(f"[IBBT PROCESS] Processing IBBT data from: {csv_path}")
+    csv_path = None if isinstance(ibbt_data, Handoff) else ibbt_data
+    filename = ibbt_data.meta.get("filename", "unknown") if csv_path is None else os.path.basename(csv_path)
+    logger.info(f"[IBBT PROCESS] Processing IBBT data from: {filename if csv_path is None else csv_path}")
+    
+    # FC from the handoff metadata, or from the filename below - so we have it even if processing fails
+    fc = ibbt_data.meta.get("fc", "UNKNOWN") if csv_path is None else "UNKNOWN"
     
     try:
-        # Extract FC from filename before processing the CSV - so we have it even if processing fails
-        fc = "UNKNOWN"
-        filename = os.path.basename(csv_path)
-        
-        # Check for the specific pattern in our temp filename: temp_ibbt_FC_timestamp.csv
-        if "temp_ibbt_" in filename and "_" in filename:
-            # Extract FC from temp_ibbt_FC_timestamp.csv format
-            parts = filename.split('_')
-            if len(parts) >= 3:
-                fc_part = parts[2]  # The FC should be the third part
-                # Verify it's actually an FC code (should contain letters and numbers)
+        if csv_path is not None:
+            # Check for the specific pattern in our temp filename: temp_ibbt_FC_timestamp.csv
+            if "temp_ibbt_" in filename and "_" in filename:
+                # Extract FC from temp_ibbt_FC_timestamp.csv format
+                parts = filename.split('_')
+                if len(parts) >= 3:
+                    fc_part = parts[2]  # The FC should be the third part
+                    # Verify it's actually an FC code (should contain letters and numbers)
+                    if any(c.isalpha() for c in fc_part) and any(c.isdigit() for c in fc_part):
+                        fc = fc_part
+            # Also check for direct FC_IBBT.csv format as fallback
+            elif "_IBBT" in filename:
+                fc_part = filename.split('_IBBT')[0]
                 if any(c.isalpha() for c in fc_part) and any(c.isdigit() for c in fc_part):
                     fc = fc_part
-        # Also check for direct FC_IBBT.csv format as fallback
-        elif "_IBBT" in filename:
-            fc_part = filename.split('_IBBT')[0]
-            if any(c.isalpha() for c in fc_part) and any(c.isdigit() for c in fc_part):
-                fc = fc_part
-        
-        # Read the CSV file - use the pandas low_memory option to ensure we detect all columns
-        df = pd.read_csv(csv_path, low_memory=False)
+            
+            # Read the CSV file - use the pandas low_memory option to ensure we detect all columns
+            df = pd.read_csv(csv_path, low_memory=False)
+        else:
+            df = ibbt_data.load()
         logger.info(f"[IBBT PROCESS] Read {len(df)} rows from IBBT CSV with columns: {list(df.columns)}")
         
         # If the DataFrame is empty but has headers, we still want to include structure
@@ -64,16 +71,17 @@ def process_ibbt_data(csv_path):
                 "timestamp": pd.Timestamp.now().isoformat(),
                 "row_count": len(df),
                 "columns": column_list,
-                "filename": os.path.basename(csv_path)
+                "filename": filename
             }
         }
         
         # Delete the temporary CSV file
-        try:
-            os.remove(csv_path)
-            logger.info(f"[IBBT PROCESS] Removed temporary file: {csv_path}")
-        except Exception as e:
-            logger.warning(f"[IBBT PROCESS] Failed to remove temporary file {csv_path}: {e}")
+        if csv_path is not None:
+            try:
+                os.remove(csv_path)
+                logger.info(f"[IBBT PROCESS] Removed temporary file: {csv_path}")
+            except Exception as e:
+                logger.warning(f"[IBBT PROCESS] Failed to remove temporary file {csv_path}: {e}")
         
         return result
         
@@ -85,6 +93,8 @@ def process_ibbt_data(csv_path):
             if csv_path and os.path.exists(csv_path):
                 os.remove(csv_path)
                 logger.info(f"[IBBT PROCESS] Removed temporary file after error: {csv_path}")
+            elif csv_path is None:
+                ibbt_data.release()
         except Exception as rm_error:
             logger.warning(f"[IBBT PROCESS] Failed to remove temporary file: {rm_error}")
             
@@ -105,6 +115,6 @@ def process_ibbt_data(csv_path):
                 "error": str(e),
                 "row_count": 0,
                 "columns": ["arc", "date", "shift", "vol"], 
-                "filename": os.path.basename(csv_path) if csv_path else "unknown"
+                "filename": filename
             }
         }
\ No newline at end of file
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 import logging
 import pandas as pd
+import numpy as np
 import os
 
+from utils.handoff import Handoff
+
 logger = logging.getLogger(__name__)
 
 def _fix_nan_in_dict(d):
@@ -23,26 +26,75 @@ def _fix_nan_in_summary(summary_dict):
     """Apply _fix_nan_in_dict to a single summary dict (if present)."""
     return _fix_nan_in_dict(summary_dict) if summary_dict else {}
 
-def process_icqa_data(csv_path):
+# Output key -> ICQA column of the unaggregated records
+UNAGGREGATED_COLUMNS = {
+    "source_warehouse":       "source_warehouse_id",
+    "destination_warehouse":  "destination_warehouse_id",
+    # If c1_container_type is consistently NaN, you may switch to "container_type"
+    "container_type":         "container_type",
+    "sum_units":              "sum_units",
+    "container_count":        "container_count",
+    "c1_container_count":     "c1_container_count",
+}
+
+def _unaggregated_records(df):
+    """
+    One record per row with the UNAGGREGATED_COLUMNS (None for missing columns).
+    Values come from the frame's common-dtype array, exactly as row iteration
+    returned them (Python objects, or numpy scalars for an all-numeric frame).
     """
-    Processes the ICQA CSV data in three ways:
+    values = df.to_numpy()
+    positions = {column: pos for pos, column in enumerate(df.columns)}
+
+    def column_values(column):
+        if column not in positions:
+            return [None] * len(df)
+        array = values[:, positions[column]]
+        return array.tolist() if values.dtype == object else list(array)
+
+    columns = [column_values(column) for column in UNAGGREGATED_COLUMNS.values()]
+    keys = list(UNAGGREGATED_COLUMNS)
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
+def _pivot_column(pivot, container_type):
+    """Values of one container type per warehouse (0.0 if the type never occurs)."""
+    if container_type in pivot.columns:
+        return pivot[container_type].to_numpy(dtype=float)
+    return np.zeros(len(pivot))
+
+def _safe_ratio(numerator, denominator):
+    """numerator / denominator element-wise, 0.0 where the denominator is 0."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / np.where(denominator != 0, denominator, 1), 0.0)
+
+def process_icqa_data(icqa_data):
+    """
+    Processes the ICQA data in three ways:
       1) Unaggregated data (row-by-row).
       2) Aggregated data by destination_warehouse (icqa_aggregated).
          - Summations by container_type => UPC, UPT, UPP.
       3) A summary dictionary (global sums, global ratios, row-by-row averages).
 
+    icqa_data is the Handoff returned by pull_icqa, a DataFrame, or the path of
+    an ICQA CSV file (which is removed after reading).
+
     Returns a tuple: (icqa_unaggregated, icqa_aggregated, icqa_summary).
 
     Debugging enhancements:
-      - Print CSV columns, row count, and sample data to the logs.
-      - Write the full DataFrame to 'icqa_data.txt' for deeper inspection.
+      - Print columns, row count, and sample data to the logs.
       - Log unique values for c1_container_type.
       - Log shape info after group/pivot operations.
     """
-    # --- 1) Read the CSV
+    csv_path = None if isinstance(icqa_data, (Handoff, pd.DataFrame)) else icqa_data
+
+    # --- 1) Read the data
     try:
-        df = pd.read_csv(csv_path)
-        logger.info(f"[ICQA PROCESS] Successfully read CSV from: {csv_path}")
+        if csv_path is None:
+            df = icqa_data.load() if isinstance(icqa_data, Handoff) else icqa_data
+            logger.info("[ICQA PROCESS] Using in-memory ICQA data")
+        else:
+            df = pd.read_csv(csv_path)
+            logger.info(f"[ICQA PROCESS] Successfully read CSV from: {csv_path}")
         logger.info(f"[ICQA PROCESS] Row count: {len(df)}")
         logger.debug(f"[ICQA PROCESS] Columns: {df.columns.tolist()}")
 
@@ -54,11 +106,7 @@ def process_icqa_data(csv_path):
             unique_ctypes = df["c1_container_type"].unique()
             logger.debug(f"[ICQA PROCESS] Unique c1_container_type values: {unique_ctypes}")
         else:
-            logger.debug("[ICQA PROCESS] 'c1_container_type' column not found in CSV.")
-
-        # Write entire DataFrame to a text file for offline inspection
-        ##with open('icqa_data.txt', 'w', encoding='utf-8') as file:
-        ##    file.write(df.to_string())
+            logger.debug("[ICQA PROCESS] 'c1_container_type' column not found in data.")
 
     except Exception as e:
         logger.error(f"[ICQA PROCESS] Error reading CSV data: {e}", exc_info=True)
@@ -68,16 +116,7 @@ def process_icqa_data(csv_path):
     # --- PART A: Build unaggregated data
     icqa_unaggregated = []
     try:
-        for _, row in df.iterrows():
-            icqa_unaggregated.append({
-                "source_warehouse":       row.get("source_warehouse_id", None),
-                "destination_warehouse":  row.get("destination_warehouse_id", None),
-                # If c1_container_type is consistently NaN, you may switch to "container_type"
-                "container_type":         row.get("container_type", None),
-                "sum_units":              row.get("sum_units", None),
-                "container_count":        row.get("container_count", None),
-                "c1_container_count":     row.get("c1_container_count", None)
-            })
+        icqa_unaggregated = _unaggregated_records(df)
 
         logger.info(f"[ICQA PROCESS] Unaggregated data built. Record count = {len(icqa_unaggregated)}")
     except Exception as e:
@@ -111,40 +150,33 @@ def process_icqa_data(csv_path):
         logger.debug(f"[ICQA PROCESS] pivot_units shape = {pivot_units.shape}")
         logger.debug(f"[ICQA PROCESS] pivot_counts shape = {pivot_counts.shape}")
 
-        # Build aggregator rows
-        for wh in pivot_units.index:
-            row_dict = {}
-            row_dict["destination_warehouse"] = wh
+        # Container counts and units per known container_type, one value per warehouse
+        cases_count = _pivot_column(pivot_counts, "CASE")
+        totes_count = _pivot_column(pivot_counts, "TOTE")
+        pax_count   = _pivot_column(pivot_counts, "PAX")
+        units_in_cases = _pivot_column(pivot_units, "CASE")
+        units_in_totes = _pivot_column(pivot_units, "TOTE")
+        units_in_pax   = _pivot_column(pivot_units, "PAX")
 
+        columns = {
+            "destination_warehouse": pivot_units.index.tolist(),
             # total_units = sum of all container types
-            total_units = pivot_units.loc[wh].sum()
-            row_dict["units"] = float(total_units)
-
-            # container counts by known container_type
-            cases_count = pivot_counts.loc[wh].get("CASE", 0.0)
-            totes_count = pivot_counts.loc[wh].get("TOTE", 0.0)
-            pax_count   = pivot_counts.loc[wh].get("PAX",  0.0)
-            row_dict["cases"] = float(cases_count)
-            row_dict["Totes"] = float(totes_count)
-            row_dict["PAX"]   = float(pax_count)
-
+            "units":          pivot_units.sum(axis=1).to_numpy(dtype=float).tolist(),
+            "cases":          cases_count.tolist(),
+            "Totes":          totes_count.tolist(),
+            "PAX":            pax_count.tolist(),
             # total containers
-            row_dict["containers"] = float(pivot_counts.loc[wh].sum())
-
-            # units in each container type
-            units_in_cases = pivot_units.loc[wh].get("CASE", 0.0)
-            units_in_totes = pivot_units.loc[wh].get("TOTE", 0.0)
-            units_in_pax   = pivot_units.loc[wh].get("PAX",  0.0)
-            row_dict["Units_in_Cases"] = float(units_in_cases)
-            row_dict["Units_in_Totes"] = float(units_in_totes)
-            row_dict["Units_in_Pax"]   = float(units_in_pax)
-
+            "containers":     pivot_counts.sum(axis=1).to_numpy(dtype=float).tolist(),
+            "Units_in_Cases": units_in_cases.tolist(),
+            "Units_in_Totes": units_in_totes.tolist(),
+            "Units_in_Pax":   units_in_pax.tolist(),
             # metrics: UPC, UPT, UPP
-            row_dict["UPC"] = float(units_in_cases / cases_count if cases_count else 0.0)
-            row_dict["UPT"] = float(units_in_totes / totes_count if totes_count else 0.0)
-            row_dict["UPP"] = float(units_in_pax   / pax_count   if pax_count   else 0.0)
-
-            icqa_aggregated.append(row_dict)
+            "UPC": _safe_ratio(units_in_cases, cases_count).tolist(),
+            "UPT": _safe_ratio(units_in_totes, totes_count).tolist(),
+            "UPP": _safe_ratio(units_in_pax, pax_count).tolist(),
+        }
+        keys = list(columns)
+        icqa_aggregated = [dict(zip(keys, row)) for row in zip(*columns.values())]
 
         logger.info(f"[ICQA PROCESS] Aggregated data built. Row count = {len(icqa_aggregated)}")
 
@@ -193,11 +225,12 @@ def process_icqa_data(csv_path):
         logger.error(f"[ICQA PROCESS] Error building summary: {e}", exc_info=True)
 
     # --- Remove the CSV if you no longer need it
-    try:
-        os.remove(csv_path)
-        logger.info(f"[ICQA PROCESS] Removed temp file: {csv_path}")
-    except Exception as e:
-        logger.error(f"[ICQA PROCESS] Error removing temp file: {e}", exc_info=True)
+    if csv_path is not None:
+        try:
+            os.remove(csv_path)
+            logger.info(f"[ICQA PROCESS] Removed temp file: {csv_path}")
+        except Exception as e:
+            logger.error(f"[ICQA PROCESS] Error removing temp file: {e}", exc_info=True)
 
     # --- Replace NaN with "NaN" for JSON serialization
     icqa_unaggregated  = _fix_nan_in_list_of_dicts(icqa_unaggregated)
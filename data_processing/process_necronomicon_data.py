@@ -29,6 +29,22 @@ def handle_nan_for_json(obj):
     else:
         return obj
 
+def _sum_comp_hours(df_full, paths):
+    """
+    Sum of 'Comp Hours' over the rows of the given paths, adding path by path in
+    list order and row order within a path (so the float result does not depend
+    on how the rows are laid out in df_full).
+    """
+    if 'Comp Hours' not in df_full.columns:
+        return 0
+    rows = df_full[df_full['Paths'].isin(paths)]
+    order = rows['Paths'].map({path: pos for pos, path in enumerate(paths)})
+    hours = rows['Comp Hours'].iloc[order.argsort(kind='stable')].dropna()
+    total = 0
+    for value in hours.tolist():
+        total += float(value)
+    return total
+
 def process_necronomicon_data(df_full, fc_name):
     """
     Processes the Necronomicon data, performing calculations and preparing data for output.
@@ -139,24 +155,12 @@ def process_necronomicon_data(df_full, fc_name):
         ]
 
         # Calculate the total Inbound hours by summing the hours for all Inbound paths
-        total_inbound_hours = 0
-        for path in inbound_paths:
-            path_df = df_full[df_full['Paths'] == path]
-            if not path_df.empty:
-                for _, row in path_df.iterrows():
-                    if 'Comp Hours' in row and pd.notna(row['Comp Hours']):
-                        total_inbound_hours += float(row['Comp Hours'])
+        total_inbound_hours = _sum_comp_hours(df_full, inbound_paths)
         
         logger.info(f"[NECRO] Calculated total Inbound hours: {total_inbound_hours}")
 
         # Calculate the total DA hours by summing the hours for all DA paths
-        total_da_hours = 0
-        for path in da_paths:
-            path_df = df_full[df_full['Paths'] == path]
-            if not path_df.empty:
-                for _, row in path_df.iterrows():
-                    if 'Comp Hours' in row and pd.notna(row['Comp Hours']):
-                        total_da_hours += float(row['Comp Hours'])
+        total_da_hours = _sum_comp_hours(df_full, da_paths)
         
         logger.info(f"[NECRO] Calculated total DA hours: {total_da_hours}")
 
@@ -169,30 +173,23 @@ def process_necronomicon_data(df_full, fc_name):
         receive_dock_row = None
         transfer_out_row = None
         
-        for _, record in df_full.iterrows():
-            path_name = record.get('Paths')
+        spec_records = df_full[df_full['Paths'].isin(list(extraction_spec))].to_dict(orient='records')
+        for record in spec_records:
+            path_name = record['Paths']
             
-            # Capture raw data for summary calculations
+            # Capture raw data for summary calculations (the last row of each path wins)
             if path_name == 'Receive Dock':
                 receive_dock_row = record
             elif path_name == 'Transfer Out':
                 transfer_out_row = record
                 
             # Extract data for all paths in extraction_spec
-            if path_name in extraction_spec:
-                # Initialize the extracted record with 'Paths'
-                extracted_record = {'Paths': path_name}
-                for field in extraction_spec[path_name]:
-                    if field in record:
-                        value = record.get(field)
-                        if pd.notna(value):
-                            extracted_record[field] = value
-                # Append only if there are additional fields beyond 'Paths'
-                if len(extracted_record) > 1:
-                    custom_data.append(extracted_record)
-                else:
-                    # Optionally, include 'Paths' even if no additional fields
-                    custom_data.append(extracted_record)
+            extracted_record = {'Paths': path_name}
+            for field in extraction_spec[path_name]:
+                value = record.get(field)
+                if field in record and pd.notna(value):
+                    extracted_record[field] = value
+            custom_data.append(extracted_record)
 
         # Fill in missing fields in custom_data with zeros
         for item in custom_data:
@@ -317,14 +314,20 @@ def process_necronomicon_data(df_full, fc_name):
                     'Comp TPH': fallback_volume / total_da_hours if total_da_hours > 0 else 0
                 })
 
+        # First row of every group path, looked up once instead of filtering per path
+        group_paths = [path for paths in groups.values() for path in paths]
+        first_rows = {
+            record['Paths']: record
+            for record in df_full[df_full['Paths'].isin(group_paths)]
+            .drop_duplicates('Paths').to_dict(orient='records')
+        }
+
         # Perform calculations and rates extraction
         for group_name, paths in groups.items():
             group_data = []
             for path in paths:
-                # Filter the DataFrame for the current path
-                df_path = df_full[df_full['Paths'] == path]
-                if not df_path.empty:
-                    record = df_path.iloc[0]
+                record = first_rows.get(path)
+                if record is not None:
                     extracted_record = {
                         'Group': group_name,
                         'Paths': path,
@@ -4,24 +4,31 @@ import os
 from datetime import datetime
 import re
 
+from utils.handoff import Handoff
+
 logger = logging.getLogger(__name__)
 
-def process_vip_data(file_path):
+def process_vip_data(vip_data):
     """
-    Processes the VIP data from a text file.
+    Processes the VIP data.
     
     Args:
-        file_path (str): Path to the text file containing VIP data
+        vip_data (Handoff or str): In-memory VIP text from pull_vip_data, or the
+            path to a text file containing VIP data (removed afterwards)
         
     Returns:
         dict: Dictionary containing VIP data and metadata
     """
-    logger.info(f"[VIP PROCESS] Processing VIP data from: {file_path}")
+    file_path = None if isinstance(vip_data, Handoff) else vip_data
+    logger.info(f"[VIP PROCESS] Processing VIP data from: {file_path or 'memory'}")
     
     try:
-        # Read the text file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        # Read the text
+        if file_path is None:
+            lines = vip_data.load().splitlines(keepends=True)
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
         
         if not lines:
             logger.warning("[VIP PROCESS] Empty file")
@@ -85,11 +92,12 @@ def process_vip_data(file_path):
         }
         
         # Delete the temporary file
-        try:
-            os.remove(file_path)
-            logger.info(f"[VIP PROCESS] Removed temporary file: {file_path}")
-        except Exception as e:
-            logger.warning(f"[VIP PROCESS] Failed to remove temporary file {file_path}: {e}")
+        if file_path is not None:
+            try:
+                os.remove(file_path)
+                logger.info(f"[VIP PROCESS] Removed temporary file: {file_path}")
+            except Exception as e:
+                logger.warning(f"[VIP PROCESS] Failed to remove temporary file {file_path}: {e}")
         
         return result
         
@@ -101,6 +109,8 @@ def process_vip_data(file_path):
             if file_path and os.path.exists(file_path):
                 os.remove(file_path)
                 logger.info(f"[VIP PROCESS] Removed temporary file after error: {file_path}")
+            elif file_path is None:
+                vip_data.release()
         except Exception as rm_error:
             logger.warning(f"[VIP PROCESS] Failed to remove temporary file: {rm_error}")
             
@@ -68,7 +68,7 @@ def retrieve_data(func_name, fc, start_date, end_date, midway_session, cookie_ja
         #   - start_date is a datetime object (parsed_sos).
         func_mapping = {
             'DockMaster': lambda: pull_dock_master(fc, start_date, end_date, midway_session, cookie_jar),
-            'DockMaster2': lambda: pull_dock_master_2(fc, midway_session, cookie_jar),
+            'DockMaster2': lambda: pull_dock_master_2(fc, midway_session, cookie_jar, start_date, end_date),
             'Galaxy': lambda: pull_galaxy(session, fc, start_date),
             'Galaxy2': lambda: pull_galaxy2(session, fc, start_date),
             'ICQA': lambda: pull_icqa(fc, 
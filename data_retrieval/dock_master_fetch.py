@@ -0,0 +1,238 @@
+# data_retrieval/dock_master_fetch.py
+
+"""
+One DockMaster retrieval per run, shared by the DockMaster and DockMaster2
+modules.
+
+DockMaster lists the appointments starting in the (SOS-1 .. EOS+1) window and
+DockMaster2 the appointments with status ARRIVED. Both come from the same
+bySearchParams endpoint, so they are fetched together: the window is split
+into day (or hour) shards and the ARRIVED search is one more shard, all
+requested concurrently with a transport timeout and retried shard by shard.
+Appointments listed by more than one shard are de-duplicated by id, and each
+module reads its own view of the combined fetch.
+"""
+
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DOCKMASTER_URL = (
+    "https://fc-inbound-dock-execution-service-eu-eug1-dub.dub.proxy.amazon.com/"
+    "appointment/bySearchParams"
+)
+# (connect, read) seconds per shard request
+DOCKMASTER_TIMEOUT = (10, 60)
+# Window shard size; must divide 24 (24 = one shard per day)
+DOCKMASTER_SHARD_HOURS = 24
+DOCKMASTER_SHARD_WORKERS = 4
+# Extra attempts for a failed shard (only that shard is requested again)
+DOCKMASTER_SHARD_RETRIES = 2
+DOCKMASTER_RETRY_BACKOFF_SECONDS = 1.0
+
+DOCKMASTER_VIEWS = ("DockMaster", "DockMaster2")
+ARRIVED_SEARCH = {"searchCriteriaName": "STATUS", "searchCriteriaValue": "ARRIVED"}
+
+
+class DockMasterShardError(Exception):
+    """A shard could not be fetched, retries included."""
+
+
+def ensure_ymd_string(d):
+    """Converts a datetime to "YYYY-MM-DD"; strings are passed through."""
+    if isinstance(d, datetime):
+        return d.strftime("%Y-%m-%d")
+    elif isinstance(d, str):
+        return d
+    else:
+        # Fallback if something unexpected is passed in
+        return str(d)
+
+
+def window_shards(start_date, end_date, shard_hours=DOCKMASTER_SHARD_HOURS):
+    """
+    Splits the days start_date..end_date (inclusive) into disjoint search ranges.
+
+    Returns:
+        list of query-parameter dicts, one per shard, in chronological order.
+    """
+    if shard_hours not in (1, 2, 3, 4, 6, 8, 12, 24):
+        logger.warning(f"DockMaster shard size of {shard_hours}h does not divide a day, using 24h")
+        shard_hours = 24
+    day = datetime.strptime(ensure_ymd_string(start_date)[:10], "%Y-%m-%d")
+    last_day = datetime.strptime(ensure_ymd_string(end_date)[:10], "%Y-%m-%d")
+    shards = []
+    while day <= last_day:
+        for hour in range(0, 24, shard_hours):
+            start = day + timedelta(hours=hour)
+            # Ranges are inclusive to the second, so each one stops 1 s before the next
+            end = start + timedelta(hours=shard_hours, seconds=-1)
+            shards.append({
+                "localStartDate": start.strftime("%Y-%m-%dT%H:%M:%S"),
+                "localEndDate": end.strftime("%Y-%m-%dT%H:%M:%S"),
+                "isStartInRange": "True",
+            })
+        day += timedelta(days=1)
+    return shards
+
+
+def appointment_key(appointment):
+    """Record key of an appointment: its ISA id (the full record when it has none)."""
+    key = appointment.get("inboundShipmentAppointmentId")
+    if key:
+        return str(key)
+    return json.dumps(appointment, sort_keys=True, default=str)
+
+
+def fetch_shard(fc, search, cookie_jar, timeout=DOCKMASTER_TIMEOUT, retries=DOCKMASTER_SHARD_RETRIES):
+    """
+    Fetches the appointments of one shard (search parameters), retrying it on
+    transport errors, HTTP errors and invalid JSON.
+
+    Returns:
+        list of appointment dicts.
+    """
+    params = {
+        "warehouseId": fc,
+        "searchResultLevel": "FULL",
+        "clientId": "dockmaster",
+        **search,
+    }
+    last_error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(DOCKMASTER_RETRY_BACKOFF_SECONDS * attempt)
+        try:
+            response = requests.get(DOCKMASTER_URL, params=params, cookies=cookie_jar, verify=False, timeout=timeout)
+            response.raise_for_status()
+            data = response.json()
+            return data.get("AppointmentList", []) or []
+        except (requests.exceptions.RequestException, ValueError, AttributeError) as e:
+            last_error = e
+            logger.warning(f"DockMaster shard {search} failed (attempt {attempt + 1}/{retries + 1}): {e}")
+    raise DockMasterShardError(f"DockMaster shard {search} failed after {retries + 1} attempts: {last_error}")
+
+
+def fetch_dock_master(fc, start_date, end_date, cookie_jar, views=DOCKMASTER_VIEWS,
+                      shard_hours=DOCKMASTER_SHARD_HOURS, workers=DOCKMASTER_SHARD_WORKERS):
+    """
+    Fetches the requested DockMaster views in one concurrent, sharded retrieval.
+
+    Args:
+        fc (str): Warehouse id
+        start_date, end_date: Window of the DockMaster view (days, inclusive)
+        cookie_jar: Cookie jar with authentication cookies
+        views (iterable): "DockMaster" (window) and/or "DockMaster2" (ARRIVED)
+
+    Returns:
+        dict: view -> {"AppointmentList": [...]} as the endpoint returns it, or
+        None for a view whose shards could not all be fetched.
+    """
+    shards = []
+    result = {}
+    for view in views:
+        if view == "DockMaster":
+            if start_date is None or end_date is None:
+                logger.error("DockMaster needs a date window")
+                result[view] = None
+                continue
+            shards += [(view, search) for search in window_shards(start_date, end_date, shard_hours)]
+        elif view == "DockMaster2":
+            shards.append((view, ARRIVED_SEARCH))
+    if not shards:
+        return result
+
+    logger.info(f"DockMaster: fetching {len(shards)} shard(s) for FC={fc} ({', '.join(views)})")
+    fetched = [None] * len(shards)
+    failed = set()
+    with ThreadPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+        futures = {executor.submit(fetch_shard, fc, search, cookie_jar): i
+                   for i, (view, search) in enumerate(shards)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                fetched[i] = future.result()
+            except DockMasterShardError as e:
+                logger.error(str(e))
+                failed.add(shards[i][0])
+
+    # Merge in shard order, so the window stays chronological; an appointment
+    # listed by several shards of a view is kept once
+    records = {view: {} for view, _ in shards}
+    listed = {view: 0 for view, _ in shards}
+    for (view, _), appointments in zip(shards, fetched):
+        for appointment in appointments or []:
+            records[view].setdefault(appointment_key(appointment), appointment)
+            listed[view] += 1
+
+    for view, appointments in records.items():
+        if view in failed:
+            result[view] = None
+            continue
+        result[view] = {"AppointmentList": list(appointments.values())}
+        logger.info(f"Data retrieved from {view} for FC={fc}: {len(appointments)} appointments "
+                    f"({listed[view] - len(appointments)} duplicates dropped)")
+    return result
+
+
+class DockMasterFetchProvider:
+    """
+    Run-scoped DockMaster retrievals: the first of the DockMaster/DockMaster2
+    modules to run fetches every view the run needs, the other one reads its
+    view from the same fetch.
+    """
+
+    def __init__(self, fetch_func=None, max_age_seconds=900):
+        self.fetch_func = fetch_func or fetch_dock_master
+        # Bounds reuse when no run boundary is signalled (standalone callers)
+        self.max_age_seconds = max_age_seconds
+        self.views = DOCKMASTER_VIEWS
+        self._fetches = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def begin_run(self, views=DOCKMASTER_VIEWS):
+        """Drops all fetches; call once at the start of every OneFlow run with the views it needs."""
+        with self._lock:
+            self._fetches = {}
+            self.views = tuple(views) or DOCKMASTER_VIEWS
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, view, fc, start_date, end_date, cookie_jar):
+        """
+        Returns the raw DockMaster JSON ({"AppointmentList": [...]}) of a view,
+        fetching it on first use, or None if it could not be fetched.
+        A fetch where every view failed is not kept, so a later consumer retries it.
+        """
+        dates = (None, None) if start_date is None or end_date is None else \
+            (ensure_ymd_string(start_date), ensure_ymd_string(end_date))
+        key = (fc, *dates)
+        with self._key_lock(key):
+            entry = self._fetches.get(key)
+            if entry and time.monotonic() - entry["created"] > self.max_age_seconds:
+                entry = None
+            if entry is None or view not in entry["views"]:
+                views = self.views if view in self.views and dates[0] is not None else (view,)
+                fetched = self.fetch_func(fc, dates[0], dates[1], cookie_jar, views=views)
+                if entry is None:
+                    entry = {"views": {}, "created": time.monotonic()}
+                entry["views"].update(fetched)
+                if any(data is not None for data in entry["views"].values()):
+                    self._fetches[key] = entry
+            else:
+                logger.info(f"{view} for FC={fc} served from this run's DockMaster fetch")
+            data = entry["views"].get(view)
+            return None if data is None else {"AppointmentList": list(data["AppointmentList"])}
+
+
+DOCK_MASTER_FETCHES = DockMasterFetchProvider()
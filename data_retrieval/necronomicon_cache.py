@@ -0,0 +1,164 @@
+# data_retrieval/necronomicon_cache.py
+
+"""
+Local copy of the network-wide OP2 Necronomicon dataset, partitioned per
+warehouse.
+
+The source CSV covers every warehouse of the network, while a run only needs
+one. It is parsed once per source version and written as one typed frame per
+warehouse (utils.frame_cache), so a run reads a single partition with only the
+columns it uses. The source is revalidated at most every `revalidate_seconds`
+with a conditional request (ETag / Last-Modified); when the server ignores
+those, an unchanged content hash still skips the re-parse.
+"""
+
+import io
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+import pandas as pd
+
+from utils.path_utils import get_cache_dir
+from utils.frame_cache import read_frame, write_frame
+
+logger = logging.getLogger(__name__)
+
+OP2_HEADERS = [
+    "Scenario", "year_week_date", "RegionLevel1", "RegionLevel2", "Country",
+    "WarehouseReportingType", "Warehouse", "MainProcess", "CoreProcess",
+    "LineItem", "Size", "PprLineItemName", "TrackingType", "Volume",
+    "Hours", "UndilutedHours"
+]
+# The source is checked for a new version at most this often (seconds)
+NECRO_REVALIDATE_SECONDS = 3600
+
+
+def parse_op2_csv(csv_content):
+    """Parses the OP2 CSV with the expected headers and typed Volume/Hours/date columns."""
+    df = pd.read_csv(io.StringIO(csv_content), names=OP2_HEADERS, header=0)
+    df['Volume'] = pd.to_numeric(df['Volume'], errors='coerce')
+    df['Hours'] = pd.to_numeric(df['Hours'], errors='coerce')
+    df['year_week_date'] = pd.to_datetime(df['year_week_date'], errors='coerce')
+    return df
+
+
+class OP2PartitionCache:
+    """
+    Per-warehouse partitions of one source CSV plus a manifest:
+
+        <root>/manifest.json         source version, check time, partition names
+        <root>/v_<sha>/p<n>.<ext>    rows of one warehouse (upper-cased key)
+    """
+
+    def __init__(self, source_path, root=None, revalidate_seconds=NECRO_REVALIDATE_SECONDS):
+        self.source_path = source_path
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        self._root = root
+        self._name = name
+        self.revalidate_seconds = revalidate_seconds
+        self._lock = threading.Lock()
+
+    @property
+    def root(self):
+        return self._root or get_cache_dir('necronomicon', self._name)
+
+    def _manifest_path(self):
+        return os.path.join(self.root, "manifest.json")
+
+    def load_manifest(self):
+        try:
+            with open(self._manifest_path(), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"[NECRO] Could not read OP2 cache manifest: {e}")
+            return None
+
+    def _save_manifest(self, manifest):
+        path = self._manifest_path()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, default=str)
+        os.replace(tmp_path, path)
+
+    def refresh(self, fetch, now=None):
+        """
+        Makes sure the partitions reflect the current source version.
+
+        Args:
+            fetch: callable(etag, last_modified) -> (status_code, text, headers);
+                status 304 means unchanged, a falsy text means the fetch failed.
+
+        Returns:
+            dict: the manifest in use, or None if there is neither a cached
+            copy nor a downloadable source.
+        """
+        now = now or time.time()
+        with self._lock:
+            manifest = self.load_manifest()
+            if manifest and now - manifest.get("checked_at", 0) < self.revalidate_seconds:
+                return manifest
+
+            status, text, headers = fetch(manifest and manifest.get("etag"),
+                                          manifest and manifest.get("last_modified"))
+            if manifest and status == 304:
+                logger.info("[NECRO] OP2 source unchanged (304); using cached partitions")
+                manifest["checked_at"] = now
+                self._save_manifest(manifest)
+                return manifest
+            if not text:
+                if manifest:
+                    logger.warning("[NECRO] OP2 source not reachable; using cached partitions")
+                return manifest
+
+            version = {"etag": (headers or {}).get("ETag"),
+                       "last_modified": (headers or {}).get("Last-Modified"),
+                       "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest()}
+            if manifest and manifest.get("sha256") == version["sha256"]:
+                logger.info("[NECRO] OP2 source content unchanged; using cached partitions")
+                manifest.update(version, checked_at=now)
+                self._save_manifest(manifest)
+                return manifest
+
+            new_manifest = self._write_partitions(parse_op2_csv(text), version, now)
+            if manifest and manifest.get("partition_dir") != new_manifest["partition_dir"]:
+                shutil.rmtree(os.path.join(self.root, manifest["partition_dir"]), ignore_errors=True)
+            return new_manifest
+
+    def _write_partitions(self, df, version, now):
+        partition_dir = f"v_{version['sha256'][:16]}"
+        target = os.path.join(self.root, partition_dir)
+        warehouses = df['Warehouse'].dropna().unique().tolist()
+        keys = df['Warehouse'].map(lambda w: str(w).upper(), na_action='ignore')
+        partitions = {}
+        for key, part in df.groupby(keys, sort=False):
+            name = f"p{len(partitions)}"
+            write_frame(os.path.join(target, name), part.reset_index(drop=True))
+            partitions[key] = name
+
+        manifest = {
+            "source": self.source_path,
+            **version,
+            "checked_at": now,
+            "partition_dir": partition_dir,
+            "partitions": partitions,
+            "warehouses": [str(w) for w in warehouses],
+            "rows": len(df),
+            "date_min": df['year_week_date'].min(),
+            "date_max": df['year_week_date'].max(),
+        }
+        self._save_manifest(manifest)
+        logger.info(f"[NECRO] Cached OP2 dataset: {len(df)} rows in {len(partitions)} warehouse partitions")
+        return manifest
+
+    def read(self, manifest, warehouse, columns=None):
+        """Rows of one warehouse (matched case-insensitively), or None if it has none."""
+        name = manifest.get("partitions", {}).get(str(warehouse).upper())
+        if not name:
+            return None
+        return read_frame(os.path.join(self.root, manifest["partition_dir"], name), columns=columns)
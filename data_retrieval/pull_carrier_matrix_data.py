@@ -3,16 +3,15 @@ import logging
 import pandas as pd
 import io
 import requests
-import os
-import shutil
-from datetime import datetime
-from io import StringIO
-import json
+from functools import partial
 from requests_kerberos import HTTPKerberosAuth, OPTIONAL
 import urllib3
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from utils.handoff import Handoff
+from data_retrieval.source_race import SourceCandidate, race_sources, http_freshness, fetch_url, fetch_file
+
 # Suppress SSL warnings since we're using verify=False
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -56,6 +55,18 @@ class CustomS3Client:
         Returns:
             str: Text content of the file
         """
+        return self.getObjectWithFreshness(path_to_file)[0]
+        
+    def getObjectWithFreshness(self, path_to_file):
+        """
+        Retrieve an object from S3 via the ECFT API, with its Last-Modified time.
+        
+        Args:
+            path_to_file (str): Path to the file in S3
+            
+        Returns:
+            tuple: (text content or None, epoch seconds or None)
+        """
         url = f"{self.base}s3/getObject?bucket={self.bucket}&prefix={path_to_file}"
         logger.info(f"[CARRIER_MATRIX S3] Retrieving object from: {url}")
         
@@ -72,19 +83,70 @@ class CustomS3Client:
                 
             if resp.status_code == 200:
                 logger.info(f"[CARRIER_MATRIX S3] Successfully retrieved object (status {resp.status_code})")
-                return resp.text
+                return resp.text, http_freshness(resp.headers)
             else:
                 logger.warning(f"[CARRIER_MATRIX S3] Failed to retrieve object: status {resp.status_code}")
-                return None
+                return None, None
                 
         except Exception as e:
             logger.error(f"[CARRIER_MATRIX S3] Error retrieving object: {e}", exc_info=True)
-            return None
+            return None, None
+
+# S3 key of the network-wide carrier matrix
+CARRIER_MATRIX_PATH = "IXD/Arc_allocation/Carrier_matrix.csv"
+# Columns a downloaded carrier matrix must have to be accepted
+CARRIER_MATRIX_KEY_COLUMNS = ['origin', 'destination']
+
+def read_carrier_matrix_csv(content):
+    """
+    Parses downloaded carrier matrix CSV content (str or bytes) in memory.
+    Raises on empty or invalid content, so the source race tries another location.
+    """
+    buffer = io.BytesIO(content) if isinstance(content, bytes) else io.StringIO(content)
+    df = pd.read_csv(buffer)
+    missing = [col for col in CARRIER_MATRIX_KEY_COLUMNS if col not in df.columns]
+    if missing:
+        # e.g. a Midway login page, which read_csv parses without error
+        raise ValueError(f"not a carrier matrix CSV, missing columns {missing}")
+    return df
+
+def carrier_matrix_candidates(cookie_jar):
+    """
+    The locations of the carrier matrix, in priority tiers: the ECFT S3 client (0),
+    the production S3/Diver URLs (1), the non-production bucket (2) and the
+    network paths (3).
+    """
+    s3_client = CustomS3Client(cookie_jar)
+    candidates = [SourceCandidate("s3:ecft-json-cache", lambda: s3_client.getObjectWithFreshness(CARRIER_MATRIX_PATH), tier=0)]
+    
+    # Alternative URLs as fallbacks (the direct ecft-json-cache URL is what the S3 client asks):
+    # the production buckets first, the non-production one only after them
+    urls_to_try = [
+        f"https://diver.qts.amazon.dev/api/download?s3_bucket=ixd-s3-prod&s3_key={CARRIER_MATRIX_PATH}",
+        f"https://ecft.fulfillment.a2z.com/api/s3/getObject?bucket=ixd-s3-prod&prefix={CARRIER_MATRIX_PATH}",
+        f"https://diver.qts.amazon.dev/api/download?s3_bucket=ixd-s3&s3_key={CARRIER_MATRIX_PATH}"
+    ]
+    for url, tier in zip(urls_to_try, (1, 1, 2)):
+        # Use Kerberos authentication if URL is using ecft.fulfillment.a2z.com
+        auth = HTTPKerberosAuth(mutual_authentication=OPTIONAL) if "ecft.fulfillment.a2z.com" in url else None
+        candidates.append(SourceCandidate(url, partial(fetch_url, url, cookie_jar, auth), tier=tier))
+    
+    network_paths = [
+        r"\\ant\dept-eu\BCN1\ECFT\IXD\OnePyFlow\Data\Carrier_matrix.csv",
+        r"\\ant\dept-eu\BCN1\Public\ECFT\IXD\OnePyFlow\Data\Carrier_matrix.csv",
+        r"\\ant\dept-eu\BCN1\Public\ECFT\IXD\Data\Carrier_matrix.csv",
+        r"\\ant\dept-eu\BCN1\Public\ECFT\IXD\OnePyFlow\Outputs\Carrier_matrix.csv"
+    ]
+    for path in network_paths:
+        candidates.append(SourceCandidate(path, partial(fetch_file, path), tier=3))
+    return candidates
 
 def pull_carrier_matrix(fc, midway_session, cookie_jar):
     """
     Retrieves the Carrier Matrix CSV and filters it for the specified FC.
-    Uses multiple methods to access the data with fallbacks.
+    All known locations are asked concurrently (data_retrieval.source_race); a
+    lower-priority location only wins once the higher ones failed, and never
+    with a copy older than one already seen.
     
     Args:
         fc (str): Fulfillment Center code to filter by (as origin)
@@ -92,109 +154,22 @@ def pull_carrier_matrix(fc, midway_session, cookie_jar):
         cookie_jar: Cookie jar with authentication cookies
     
     Returns:
-        str: Path to a temporary CSV file with filtered carrier matrix data
+        Handoff: The filtered carrier matrix DataFrame for process_carrier_matrix_data
     """
     logger.info(f"[CARRIER_MATRIX PULL] Starting pull for FC={fc}")
     
-    # Timestamp for generating unique filenames
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    temp_download_path = f"temp_carrier_matrix_download_{timestamp}.csv"
-    temp_filtered_path = f"temp_carrier_matrix_{fc}_{timestamp}.csv"
-    csv_file_obtained = False
-    
-    # Method 1: Use custom S3 client implementation based on the provided S3 class
-    try:
-        logger.info("[CARRIER_MATRIX PULL] Trying CustomS3Client method")
-        s3_client = CustomS3Client(cookie_jar)
-        carrier_matrix_path = "IXD/Arc_allocation/Carrier_matrix.csv"
-        
-        csv_content = s3_client.getObject(carrier_matrix_path)
-        if csv_content:
-            # Write the content to a temporary file
-            with open(temp_download_path, 'w', encoding='utf-8') as f:
-                f.write(csv_content)
-            
-            logger.info(f"[CARRIER_MATRIX PULL] Successfully downloaded using CustomS3Client: {temp_download_path}")
-            csv_file_obtained = True
-        else:
-            logger.warning("[CARRIER_MATRIX PULL] CustomS3Client returned no content")
-    except Exception as e:
-        logger.warning(f"[CARRIER_MATRIX PULL] CustomS3Client method failed: {e}")
-    
-    # Method 2: Try direct API requests if CustomS3Client failed
-    if not csv_file_obtained:
-        # Define URL endpoints to try in order of preference
-        urls_to_try = [
-            # 1. Same endpoint used by CustomS3Client but direct approach
-            "https://ecft.fulfillment.a2z.com/api/s3/getObject?bucket=ecft-json-cache&prefix=IXD/Arc_allocation/Carrier_matrix.csv",
-            
-            # 2. Alternative URLs as fallbacks
-            "https://diver.qts.amazon.dev/api/download?s3_bucket=ixd-s3-prod&s3_key=IXD/Arc_allocation/Carrier_matrix.csv",
-            "https://ecft.fulfillment.a2z.com/api/s3/getObject?bucket=ixd-s3-prod&prefix=IXD/Arc_allocation/Carrier_matrix.csv",
-            "https://diver.qts.amazon.dev/api/download?s3_bucket=ixd-s3&s3_key=IXD/Arc_allocation/Carrier_matrix.csv"
-        ]
-        
-        # Try each URL in order
-        for url in urls_to_try:
-            try:
-                logger.info(f"[CARRIER_MATRIX PULL] Trying URL: {url}")
-                
-                # Use Kerberos authentication if URL is using ecft.fulfillment.a2z.com
-                if "ecft.fulfillment.a2z.com" in url:
-                    response = requests.get(
-                        url,
-                        cookies=cookie_jar,
-                        auth=HTTPKerberosAuth(mutual_authentication=OPTIONAL),
-                        verify=False,
-                        allow_redirects=True,
-                        timeout=30
-                    )
-                else:
-                    response = requests.get(url, cookies=cookie_jar, verify=False)
-                
-                response.raise_for_status()  # Raise exception for HTTP errors
-                
-                # Save the downloaded content
-                with open(temp_download_path, 'wb') as f:
-                    f.write(response.content)
-                    
-                logger.info(f"[CARRIER_MATRIX PULL] Successfully downloaded to: {temp_download_path}")
-                csv_file_obtained = True
-                break
-                
-            except Exception as e:
-                logger.warning(f"[CARRIER_MATRIX PULL] Failed with URL {url}: {e}")
-        
-    # Method 3: Try network paths if all API methods failed
-    if not csv_file_obtained:
-        try:
-            logger.info("[CARRIER_MATRIX PULL] Trying network paths...")
-            network_paths = [
-                r"\\ant\dept-eu\BCN1\ECFT\IXD\OnePyFlow\Data\Carrier_matrix.csv",
-                r"\\ant\dept-eu\BCN1\Public\ECFT\IXD\OnePyFlow\Data\Carrier_matrix.csv",
-                r"\\ant\dept-eu\BCN1\Public\ECFT\IXD\Data\Carrier_matrix.csv",
-                r"\\ant\dept-eu\BCN1\Public\ECFT\IXD\OnePyFlow\Outputs\Carrier_matrix.csv"
-            ]
-            
-            for path in network_paths:
-                if os.path.exists(path):
-                    logger.info(f"[CARRIER_MATRIX PULL] Found file at network path: {path}")
-                    shutil.copy2(path, temp_download_path)
-                    logger.info(f"[CARRIER_MATRIX PULL] Copied to: {temp_download_path}")
-                    csv_file_obtained = True
-                    break
-        except Exception as e:
-            logger.warning(f"[CARRIER_MATRIX PULL] Network path access failed: {e}")
-    
-    # Method 4: Create a fallback file if all methods failed
-    if not csv_file_obtained:
-        logger.warning("[CARRIER_MATRIX PULL] All download attempts failed, creating fallback data")
-        create_dummy_carrier_matrix(fc, temp_download_path)
+    win = race_sources(f"carrier_matrix/{fc}", carrier_matrix_candidates(cookie_jar), read_carrier_matrix_csv)
+    if win is not None:
+        logger.info(f"[CARRIER_MATRIX PULL] Successfully downloaded from: {win.source}")
     
     # Process the CSV to filter by FC
     try:
-        # Load the CSV file
-        df = pd.read_csv(temp_download_path)
+        # Use fallback data if all locations failed
+        if win is None:
+            logger.warning("[CARRIER_MATRIX PULL] All download attempts failed, creating fallback data")
+            df = dummy_carrier_matrix(fc)
+        else:
+            df = win.data
         logger.info(f"[CARRIER_MATRIX PULL] Loaded CSV with {len(df)} rows")
         
         # Check for required columns and add them if missing
@@ -205,37 +180,25 @@ def pull_carrier_matrix(fc, midway_session, cookie_jar):
                 df[col] = ""
         
         # Filter by origin FC
-        filtered_df = df[df['origin'] == fc]
+        filtered_df = df[df['origin'] == fc].reset_index(drop=True)
         logger.info(f"[CARRIER_MATRIX PULL] Filtered {len(filtered_df)} rows for FC {fc}")
         
         # If no rows found, create dummy data for this FC
         if filtered_df.empty:
             logger.warning(f"[CARRIER_MATRIX PULL] No data found for FC {fc}, creating dummy data")
-            create_dummy_carrier_matrix(fc, temp_filtered_path)
-        else:
-            # Save filtered data
-            filtered_df.to_csv(temp_filtered_path, index=False)
-            logger.info(f"[CARRIER_MATRIX PULL] Saved filtered data to: {temp_filtered_path}")
+            filtered_df = dummy_carrier_matrix(fc)
         
-        # Clean up the download file
-        try:
-            os.remove(temp_download_path)
-            logger.info(f"[CARRIER_MATRIX PULL] Cleaned up temporary download: {temp_download_path}")
-        except Exception as e:
-            logger.warning(f"[CARRIER_MATRIX PULL] Failed to remove temporary file: {e}")
-        
-        return temp_filtered_path
+        return Handoff.from_frame("carrier_matrix", filtered_df, meta={"fc": fc, "source": win.source if win else None})
             
     except Exception as e:
         logger.error(f"[CARRIER_MATRIX PULL] Error processing CSV: {e}", exc_info=True)
         
-        # Create a fallback file if processing fails
-        create_dummy_carrier_matrix(fc, temp_filtered_path)
-        return temp_filtered_path
+        # Use fallback data if processing fails
+        return Handoff.from_frame("carrier_matrix", dummy_carrier_matrix(fc), meta={"fc": fc})
 
-def create_dummy_carrier_matrix(fc, output_path):
+def dummy_carrier_matrix(fc):
     """
-    Creates a dummy carrier matrix file with typical destination FCs.
+    Creates a dummy carrier matrix with typical destination FCs.
     """
     # Common destination FCs
     typical_destinations = ['MAD4', 'BCN1', 'SVQ1', 'BRU8', 'MXP5', 'MUC3', 'LTN4']
@@ -251,10 +214,7 @@ def create_dummy_carrier_matrix(fc, output_path):
             })
     
     # Create DataFrame
-    df = pd.DataFrame(rows)
-    
-    # Save to CSV
-    df.to_csv(output_path, index=False)
+    df = pd.DataFrame(rows, columns=['origin', 'destination', 'arc_name', 'carrier'])
     logger.info(f"[CARRIER_MATRIX PULL] Created fallback carrier matrix with {len(rows)} rows")
     
-    return True
\ No newline at end of file
+    return df
@@ -1,30 +1,20 @@
-import requests
 import logging
 
+from data_retrieval.dock_master_fetch import DOCK_MASTER_FETCHES
+
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
-def pull_dock_master_2(fc, midway_session, cookie_jar):
+def pull_dock_master_2(fc, midway_session, cookie_jar, start_date=None, end_date=None):
     """
     Retrieves data from DockMaster for appointments with status 'ARRIVED'.
-    """
-    url = "https://fc-inbound-dock-execution-service-eu-eug1-dub.dub.proxy.amazon.com/appointment/bySearchParams"
-    params = {
-        "warehouseId": fc,
-        "clientId": "dockmaster",
-        "searchResultLevel": "FULL",
-        "searchCriteriaName": "STATUS",
-        "searchCriteriaValue": "ARRIVED"
-    }
 
-    try:
-        response = requests.get(url, params=params, cookies=cookie_jar, verify=False)
-        response.raise_for_status()
-        data = response.json()
-        logger.info(f"Data retrieved from DockMaster2 for FC: {fc}")
-        return data
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error retrieving data from DockMaster2: {e}")
-        return None
\ No newline at end of file
+    With the run's DockMaster window (start_date/end_date), the search is part of
+    the same combined DockMaster fetch (data_retrieval.dock_master_fetch).
+    """
+    data = DOCK_MASTER_FETCHES.get("DockMaster2", fc, start_date, end_date, cookie_jar)
+    if data is None:
+        logger.error(f"Error retrieving data from DockMaster2 for FC: {fc}")
+    return data
@@ -5,93 +5,78 @@ import pandas as pd
 import os
 from datetime import datetime
 
+from data_retrieval.share_mirror import ShareFileMirror, arc_origin_key
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+F2P_FILE_PATH = r'\\ant\dept-eu\BCN1\Public\ECFT\IXD\Weekly_ARC\F2P_DICE.txt'
+F2P_MIRROR = ShareFileMirror(F2P_FILE_PATH, partition_column='arc', key=arc_origin_key)
+
 def pull_f2p_data(session, fc, mp, cookie_jar):
     """
     Retrieves F2P data from the F2P_DICE.txt local file source.
-    Reads the tab-separated file generated by an ETL job.
+    Reads the tab-separated file generated by an ETL job (through the local
+    mirror, which re-copies it only when it changed).
 
     Returns a DataFrame pivoted with 'Arc' as index and dates as columns,
     filtered for the specified FC.
     """
     try:
-        # --- REVERTED FILE PATH BACK TO F2P_DICE.txt ---
-        file_path = r'\\ant\dept-eu\BCN1\Public\ECFT\IXD\Weekly_ARC\F2P_DICE.txt'  # Reverted from F2P.txt
+        file_path = F2P_FILE_PATH
         logger.info(f"Attempting to read F2P data from: {file_path}")
 
-        if not os.path.exists(file_path):
+        # Bring the local mirror up to date (copies the share file only when it changed)
+        manifest = F2P_MIRROR.sync()
+        if manifest is None:
             logger.error(f"F2P data file not found at: {file_path}")
             return None
 
-        # Add file size logging for better diagnostics
-        try:
-            file_size = os.path.getsize(file_path)
-            logger.info(f"Found F2P file. Size: {file_size} bytes")
-            if file_size == 0:
-                logger.error(f"F2P data file is empty: {file_path}")
-                return None
-        except Exception as size_err:
-            logger.error(f"Could not get file size for {file_path}: {size_err}")
-            # Continue attempting to read, but log the error
-
-        # Read the tab-separated file
-        # Use error_bad_lines=False or on_bad_lines='skip' if file might have formatting issues
-        raw_df = pd.read_csv(file_path, sep='\t', on_bad_lines='warn')
-        logger.info(f"Successfully read F2P_DICE.txt with {len(raw_df)} initial rows")
+        logger.info(f"Found F2P file. Size: {manifest['size']} bytes")
+        if manifest['size'] == 0:
+            logger.error(f"F2P data file is empty: {file_path}")
+            return None
+        logger.info(f"Successfully read F2P_DICE.txt with {manifest['rows']} initial rows")
 
-        if raw_df.empty:
+        if manifest['rows'] == 0:
              logger.error("Pandas read 0 rows from F2P_DICE.txt. Check file content and separator.")
              return None
 
-        # --- Filtering Logic (Seems okay, but added logging) ---
+        # --- Filtering Logic (a read of the partition of arcs starting at this FC) ---
         filtered_df = pd.DataFrame() # Initialize empty DataFrame
         if fc:
             logger.info(f"Filtering F2P data for FC: {fc}")
             # Ensure 'arc' column exists before filtering
-            if 'arc' not in raw_df.columns:
-                logger.error(f"'arc' column not found in F2P_DICE.txt. Columns are: {raw_df.columns.tolist()}")
+            if 'arc' not in manifest['columns']:
+                logger.error(f"'arc' column not found in F2P_DICE.txt. Columns are: {manifest['columns']}")
                 return None
 
-            # Approach 1: arc starts with FC_
-            fc_prefix_filter = raw_df['arc'].str.startswith(f"{fc}_", na=False)
-
-            # Approach 2: arc exactly matches FC (less common for F2P arcs)
-            fc_exact_filter = raw_df['arc'] == fc
-
-            # Combine filters
-            combined_filter = fc_prefix_filter | fc_exact_filter
-            filtered_df = raw_df[combined_filter]
+            # arc starts with FC_ or exactly matches FC: both are the rows whose arc origin is FC
+            filtered_df = F2P_MIRROR.read(manifest, fc)
 
             if not filtered_df.empty:
                 logger.info(f"Filtered to {len(filtered_df)} rows for FC {fc} using prefix/exact match.")
             else:
                 # Fallback: Try matching based on the first part of the arc
                 logger.info(f"No direct prefix/exact match for {fc}. Trying partial match on arc start.")
-                # Extract potential FC codes (part before first '_')
-                # Handle potential errors if split doesn't work
-                try:
-                    potential_fcs = raw_df['arc'].str.split('_', n=1).str[0].unique()
-                    logger.debug(f"Potential FC codes found in 'arc' column: {potential_fcs}")
-                    # Case-insensitive match
-                    fc_lower = fc.lower()
-                    matched_fc = next((code for code in potential_fcs if isinstance(code, str) and code.lower() == fc_lower), None)
-
-                    if matched_fc:
-                        logger.info(f"Found partial match for '{fc}' as '{matched_fc}'. Filtering based on '{matched_fc}_'.")
-                        filtered_df = raw_df[raw_df['arc'].str.startswith(f"{matched_fc}_", na=False)]
-                        logger.info(f"Filtered to {len(filtered_df)} rows using partial match.")
-                    else:
-                        logger.warning(f"No matching data found for FC: {fc} after all filtering attempts.")
-                except Exception as split_err:
-                    logger.error(f"Error during fallback FC matching: {split_err}", exc_info=True)
-                    # filtered_df remains empty
+                potential_fcs = manifest['keys']
+                logger.debug(f"Potential FC codes found in 'arc' column: {potential_fcs}")
+                # Case-insensitive match
+                fc_lower = fc.lower()
+                matched_fc = next((code for code in potential_fcs if code.lower() == fc_lower), None)
+
+                if matched_fc:
+                    logger.info(f"Found partial match for '{fc}' as '{matched_fc}'. Filtering based on '{matched_fc}_'.")
+                    filtered_df = F2P_MIRROR.read(manifest, matched_fc)
+                    filtered_df = filtered_df[filtered_df['arc'].str.startswith(f"{matched_fc}_", na=False)]
+                    logger.info(f"Filtered to {len(filtered_df)} rows using partial match.")
+                else:
+                    logger.warning(f"No matching data found for FC: {fc} after all filtering attempts.")
 
         else:
              # If no FC provided, use the whole dataset (might be large)
              logger.warning("No FC provided for filtering F2P data. Using all data.")
-             filtered_df = raw_df # Use the original DataFrame
+             filtered_df = F2P_MIRROR.read_all()
 
 
         # Check if filtering resulted in an empty DataFrame
@@ -3,16 +3,15 @@ import logging
 import pandas as pd
 import io
 import requests
-import os
-import shutil
-from datetime import datetime
-from io import StringIO
-import json
+from functools import partial
 from requests_kerberos import HTTPKerberosAuth, OPTIONAL
 import urllib3
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from utils.handoff import Handoff
+from data_retrieval.source_race import SourceCandidate, race_sources, http_freshness, fetch_url, fetch_file
+
 # Suppress SSL warnings since we're using verify=False
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -56,6 +55,18 @@ class CustomS3Client:
         Returns:
             str: Text content of the file
         """
+        return self.getObjectWithFreshness(path_to_file)[0]
+        
+    def getObjectWithFreshness(self, path_to_file):
+        """
+        Retrieve an object from S3 via the ECFT API, with its Last-Modified time.
+        
+        Args:
+            path_to_file (str): Path to the file in S3
+            
+        Returns:
+            tuple: (text content or None, epoch seconds or None)
+        """
         url = f"{self.base}s3/getObject?bucket={self.bucket}&prefix={path_to_file}"
         logger.info(f"[IBBT S3] Retrieving object from: {url}")
         
@@ -72,47 +83,83 @@ class CustomS3Client:
                 
             if resp.status_code == 200:
                 logger.info(f"[IBBT S3] Successfully retrieved object (status {resp.status_code})")
-                return resp.text
+                return resp.text, http_freshness(resp.headers)
             else:
                 logger.warning(f"[IBBT S3] Failed to retrieve object: status {resp.status_code}")
-                return None
+                return None, None
                 
         except Exception as e:
             logger.error(f"[IBBT S3] Error retrieving object: {e}", exc_info=True)
-            return None
+            return None, None
 
-def create_empty_ibbt_file(fc, output_path):
+# Default headers for IBBT data based on the actual structure
+IBBT_HEADERS = [
+    "arc",
+    "date",
+    "shift",
+    "vol"
+]
+
+def empty_ibbt_frame():
     """
-    Creates an empty IBBT file with headers as a fallback.
+    Creates an empty IBBT frame with headers as a fallback.
     """
-    # Create default headers for IBBT file based on the actual structure shown
-    headers = [
-        "arc",
-        "date",
-        "shift",
-        "vol"
-    ]
-    
-    # Create an empty DataFrame with headers
-    df = pd.DataFrame(columns=headers)
-    
-    # Save to CSV - ensure we don't write an index column
-    df.to_csv(output_path, index=False)
-    logger.info(f"[IBBT PULL] Created empty IBBT file with headers: {headers}")
+    logger.info(f"[IBBT PULL] Created empty IBBT data with headers: {IBBT_HEADERS}")
+    return pd.DataFrame(columns=IBBT_HEADERS)
+
+def parse_ibbt_csv(content):
+    """
+    Parses downloaded IBBT CSV content (str or bytes) in memory.
+    Raises on empty or invalid content, so the source race tries another location.
+    """
+    buffer = io.BytesIO(content) if isinstance(content, bytes) else io.StringIO(content)
+    df = pd.read_csv(buffer, low_memory=False)
+    missing = [col for col in IBBT_HEADERS if col not in df.columns]
+    if missing:
+        # e.g. a Midway login page, which read_csv parses without error
+        raise ValueError(f"not an IBBT CSV, missing columns {missing}")
+    logger.info(f"[IBBT PULL] CSV verified with {len(df)} rows and columns: {list(df.columns)}")
+    return df
+
+def ibbt_candidates(fc, cookie_jar):
+    """
+    The locations of an FC's IBBT file, in priority tiers: the ECFT S3 client (0),
+    the production S3/Diver URLs (1), the non-production bucket (2) and the
+    legacy network paths (3).
+    """
+    ibbt_filename = f"{fc}_IBBT.csv"
+    # New S3 path for IBBT files
+    ibbt_path = f"IXD/Arc_Alloc_Weekly/IBBT_to_FlexSim/{ibbt_filename}"
+    s3_client = CustomS3Client(cookie_jar)
+    candidates = [SourceCandidate("s3:ecft-json-cache", lambda: s3_client.getObjectWithFreshness(ibbt_path), tier=0)]
     
-    # Extra verification - read back the file to make sure headers were written correctly
-    try:
-        verify_df = pd.read_csv(output_path)
-        logger.info(f"[IBBT PULL] Verified headers in empty file: {list(verify_df.columns)}")
-    except Exception as e:
-        logger.warning(f"[IBBT PULL] Could not verify headers: {e}")
+    # Alternative URLs as fallbacks (the direct ecft-json-cache URL is what the S3 client asks):
+    # the production buckets first, the non-production one only after them
+    urls_to_try = [
+        f"https://diver.qts.amazon.dev/api/download?s3_bucket=ixd-s3-prod&s3_key={ibbt_path}",
+        f"https://ecft.fulfillment.a2z.com/api/s3/getObject?bucket=ixd-s3-prod&prefix={ibbt_path}",
+        f"https://diver.qts.amazon.dev/api/download?s3_bucket=ixd-s3&s3_key={ibbt_path}"
+    ]
+    for url, tier in zip(urls_to_try, (1, 1, 2)):
+        # Use Kerberos authentication if URL is using ecft.fulfillment.a2z.com
+        auth = HTTPKerberosAuth(mutual_authentication=OPTIONAL) if "ecft.fulfillment.a2z.com" in url else None
+        candidates.append(SourceCandidate(url, partial(fetch_url, url, cookie_jar, auth), tier=tier))
     
-    return True
+    # Legacy network paths
+    network_paths = [
+        f"\\\\ant\\dept-eu\\BCN1\\ECFT\\IXD\\05.Configuration Changes\\IBBT\\{ibbt_filename}",
+        f"\\\\ant\\dept-eu\\BCN1\\Public\\ECFT\\IXD\\05.Configuration Changes\\IBBT\\{ibbt_filename}"
+    ]
+    for path in network_paths:
+        candidates.append(SourceCandidate(path, partial(fetch_file, path), tier=3))
+    return candidates
 
 def pull_ibbt_data(fc, midway_session, cookie_jar):
     """
     Retrieves the IBBT CSV for the specified FC from S3.
-    Uses multiple methods to access the data with fallbacks.
+    All known locations are asked concurrently (data_retrieval.source_race); a
+    lower-priority location only wins once the higher ones failed, and never
+    with a copy older than one already seen.
     
     Args:
         fc (str): Fulfillment Center code
@@ -120,153 +167,24 @@ def pull_ibbt_data(fc, midway_session, cookie_jar):
         cookie_jar: Cookie jar with authentication cookies
     
     Returns:
-        str: Path to a temporary CSV file with IBBT data
+        Handoff: The IBBT DataFrame (meta: fc, filename, source) for process_ibbt_data
     """
     logger.info(f"[IBBT PULL] Starting pull for FC={fc}")
     
     # Standardize FC to uppercase for consistency
     fc = fc.upper() if fc else "UNKNOWN"
     
-    # Timestamp for generating unique filenames
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    temp_ibbt_path = f"temp_ibbt_{fc}_{timestamp}.csv"
-    csv_file_obtained = False
-    
     # Create the filename based on FC
     ibbt_filename = f"{fc}_IBBT.csv"
     
-    # Method 1: Use custom S3 client implementation based on the provided S3 class
-    try:
-        logger.info("[IBBT PULL] Trying CustomS3Client method")
-        s3_client = CustomS3Client(cookie_jar)
-        
-        # New S3 path for IBBT files
-        ibbt_path = f"IXD/Arc_Alloc_Weekly/IBBT_to_FlexSim/{ibbt_filename}"
-        
-        csv_content = s3_client.getObject(ibbt_path)
-        if csv_content:
-            # Write the content to a temporary file
-            with open(temp_ibbt_path, 'w', encoding='utf-8') as f:
-                f.write(csv_content)
-            
-            # Verify the file has content and is a valid CSV
-            if os.path.getsize(temp_ibbt_path) == 0:
-                logger.warning(f"[IBBT PULL] Downloaded file is empty, generating default headers")
-                create_empty_ibbt_file(fc, temp_ibbt_path)
-            else:
-                try:
-                    verify_df = pd.read_csv(temp_ibbt_path)
-                    logger.info(f"[IBBT PULL] CSV verified with {len(verify_df)} rows and columns: {list(verify_df.columns)}")
-                except Exception as csv_err:
-                    logger.warning(f"[IBBT PULL] Downloaded file is not a valid CSV: {csv_err}. Generating default headers.")
-                    create_empty_ibbt_file(fc, temp_ibbt_path)
-                    
-            logger.info(f"[IBBT PULL] Successfully downloaded using CustomS3Client: {temp_ibbt_path}")
-            csv_file_obtained = True
-        else:
-            logger.warning("[IBBT PULL] CustomS3Client returned no content")
-    except Exception as e:
-        logger.warning(f"[IBBT PULL] CustomS3Client method failed: {e}")
-    
-    # Method 2: Try direct API requests if CustomS3Client failed
-    if not csv_file_obtained:
-        # Define URL endpoints to try in order of preference
-        ibbt_path = f"IXD/Arc_Alloc_Weekly/IBBT_to_FlexSim/{ibbt_filename}"
-        urls_to_try = [
-            # 1. Same endpoint used by CustomS3Client but direct approach
-            f"https://ecft.fulfillment.a2z.com/api/s3/getObject?bucket=ecft-json-cache&prefix={ibbt_path}",
-            
-            # 2. Alternative URLs as fallbacks
-            f"https://diver.qts.amazon.dev/api/download?s3_bucket=ixd-s3-prod&s3_key={ibbt_path}",
-            f"https://ecft.fulfillment.a2z.com/api/s3/getObject?bucket=ixd-s3-prod&prefix={ibbt_path}",
-            f"https://diver.qts.amazon.dev/api/download?s3_bucket=ixd-s3&s3_key={ibbt_path}"
-        ]
-        
-        # Try each URL in order
-        for url in urls_to_try:
-            try:
-                logger.info(f"[IBBT PULL] Trying URL: {url}")
-                
-                # Use Kerberos authentication if URL is using ecft.fulfillment.a2z.com
-                if "ecft.fulfillment.a2z.com" in url:
-                    response = requests.get(
-                        url,
-                        cookies=cookie_jar,
-                        auth=HTTPKerberosAuth(mutual_authentication=OPTIONAL),
-                        verify=False,
-                        allow_redirects=True,
-                        timeout=30
-                    )
-                else:
-                    response = requests.get(url, cookies=cookie_jar, verify=False)
-                
-                response.raise_for_status()  # Raise exception for HTTP errors
-                
-                # Save the downloaded content
-                with open(temp_ibbt_path, 'wb') as f:
-                    f.write(response.content)
-                
-                # Verify the file has content and is a valid CSV
-                if os.path.getsize(temp_ibbt_path) == 0:
-                    logger.warning(f"[IBBT PULL] Downloaded file is empty, generating default headers")
-                    create_empty_ibbt_file(fc, temp_ibbt_path)
-                else:
-                    try:
-                        verify_df = pd.read_csv(temp_ibbt_path)
-                        logger.info(f"[IBBT PULL] CSV verified with {len(verify_df)} rows and columns: {list(verify_df.columns)}")
-                    except Exception as csv_err:
-                        logger.warning(f"[IBBT PULL] Downloaded file is not a valid CSV: {csv_err}. Generating default headers.")
-                        create_empty_ibbt_file(fc, temp_ibbt_path)
-                    
-                logger.info(f"[IBBT PULL] Successfully downloaded to: {temp_ibbt_path}")
-                csv_file_obtained = True
-                break
-                
-            except Exception as e:
-                logger.warning(f"[IBBT PULL] Failed with URL {url}: {e}")
-    
-    # Method 3: Try legacy network paths as a last resort
-    if not csv_file_obtained:
-        try:
-            logger.info("[IBBT PULL] Trying network paths...")
-            network_paths = [
-                f"\\\\ant\\dept-eu\\BCN1\\ECFT\\IXD\\05.Configuration Changes\\IBBT\\{ibbt_filename}",
-                f"\\\\ant\\dept-eu\\BCN1\\Public\\ECFT\\IXD\\05.Configuration Changes\\IBBT\\{ibbt_filename}"
-            ]
-            
-            for path in network_paths:
-                if os.path.exists(path):
-                    logger.info(f"[IBBT PULL] Found file at network path: {path}")
-                    shutil.copy2(path, temp_ibbt_path)
-                    
-                    # Verify the copied file
-                    if os.path.getsize(temp_ibbt_path) == 0:
-                        logger.warning(f"[IBBT PULL] Copied file is empty, generating default headers")
-                        create_empty_ibbt_file(fc, temp_ibbt_path)
-                    else:
-                        try:
-                            verify_df = pd.read_csv(temp_ibbt_path)
-                            logger.info(f"[IBBT PULL] CSV verified with {len(verify_df)} rows and columns: {list(verify_df.columns)}")
-                        except Exception as csv_err:
-                            logger.warning(f"[IBBT PULL] Copied file is not a valid CSV: {csv_err}. Generating default headers.")
-                            create_empty_ibbt_file(fc, temp_ibbt_path)
-                    
-                    logger.info(f"[IBBT PULL] Copied to: {temp_ibbt_path}")
-                    csv_file_obtained = True
-                    break
-        except Exception as e:
-            logger.warning(f"[IBBT PULL] Network path access failed: {e}")
+    win = race_sources(f"ibbt/{fc}", ibbt_candidates(fc, cookie_jar), parse_ibbt_csv)
     
-    # Method 4: Create a fallback empty CSV if all methods failed
-    if not csv_file_obtained:
-        logger.warning(f"[IBBT PULL] All download attempts failed, creating empty IBBT file for {fc}")
-        create_empty_ibbt_file(fc, temp_ibbt_path)
-        csv_file_obtained = True
-    
-    if csv_file_obtained:
-        return temp_ibbt_path
+    if win is None:
+        # Use empty IBBT data if all locations failed
+        logger.warning(f"[IBBT PULL] All download attempts failed, creating empty IBBT data for {fc}")
+        df, source = empty_ibbt_frame(), None
     else:
-        logger.error(f"[IBBT PULL] Failed to retrieve IBBT data for {fc}")
-        # Return path to an empty file as last resort
-        create_empty_ibbt_file(fc, temp_ibbt_path)
-        return temp_ibbt_path
\ No newline at end of file
+        logger.info(f"[IBBT PULL] Successfully downloaded from: {win.source}")
+        df, source = win.data, win.source
+    
+    return Handoff.from_frame("ibbt", df, meta={"fc": fc, "filename": ibbt_filename, "source": source})
@@ -1,53 +1,85 @@
 #!/usr/bin/env python3
+import io
 import logging
 import requests
 import pandas as pd
 import os
-import sys
-import tempfile
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from utils.utils import get_fiscal_week
+from utils.path_utils import get_cache_dir
+from utils.frame_cache import read_frame, write_frame, list_frames, remove_frame
+from utils.handoff import Handoff
 
 logger = logging.getLogger(__name__)
 
-# Add a function to get a proper temp directory
-def get_temp_directory():
+# Fiscal weeks downloaded concurrently
+ICQA_WEEK_WORKERS = 2
+
+
+# Hours after a week ended before its report is taken as final (late data still lands)
+ICQA_CLOSED_WEEK_GRACE_HOURS = 36
+# Cached weeks are kept this long after they were downloaded
+ICQA_CACHE_RETENTION_DAYS = 14
+
+
+# Weeks older than the latest one are closed: once they ended more than the
+# grace period ago their report no longer changes, so they are cached per
+# (FC, fiscal year, week) and not downloaded again.
+def _week_cache_path(fc, fiscal_year, fiscal_week, root=None):
+    return os.path.join(root or get_cache_dir('icqa', fc), f"{fiscal_year}_W{fiscal_week}")
+
+
+def _fetched_at(path_base):
+    """Download time of a cached week (its file modification time), or None."""
+    mtimes = [os.path.getmtime(path_base + ext) for ext in ('.parquet', '.pkl') if os.path.exists(path_base + ext)]
+    return max(mtimes) if mtimes else None
+
+
+def load_cached_week(fc, fiscal_year, fiscal_week, settled_at=None, root=None):
     """
-    Returns a valid temporary directory that's accessible from either C: or D: drive.
-    First tries to use the executable's directory, then falls back to the system temp directory.
+    Returns the cached frame of a closed fiscal week, or None if it is not
+    cached or was downloaded before settled_at (epoch seconds).
     """
+    path_base = _week_cache_path(fc, fiscal_year, fiscal_week, root)
+    fetched_at = _fetched_at(path_base)
+    if fetched_at is None or (settled_at is not None and fetched_at < settled_at):
+        return None
+    return read_frame(path_base)
+
+
+def store_week(fc, fiscal_year, fiscal_week, df, root=None):
     try:
-        # First try to get executable's directory
-        if getattr(sys, 'frozen', False):
-            # Running as compiled executable
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            # Running as a script
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            
-        # Create a 'temp' subdirectory if it doesn't exist
-        temp_dir = os.path.join(base_dir, 'temp')
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        # Verify we can write to this directory
-        test_file = os.path.join(temp_dir, 'test_write.tmp')
-        with open(test_file, 'w') as f:
-            f.write('test')
-        os.remove(test_file)
-        
-        logger.info(f"Using temporary directory: {temp_dir}")
-        return temp_dir
-        
+        write_frame(_week_cache_path(fc, fiscal_year, fiscal_week, root), df)
     except Exception as e:
-        # If there's any issue with the above approach, use the system temp directory
-        system_temp = tempfile.gettempdir()
-        logger.warning(f"Using system temp directory due to error: {e}")
-        logger.info(f"System temp directory: {system_temp}")
-        return system_temp
+        logger.warning(f"[ICQA PULL] Could not cache FY{fiscal_year}-W{fiscal_week} for {fc}: {e}")
+
+
+def prune_week_cache(fc, retention_days=ICQA_CACHE_RETENTION_DAYS, root=None, now=None):
+    """Deletes cached weeks of an FC downloaded more than the retention period ago."""
+    cutoff = (now or time.time()) - retention_days * 86400
+    for path_base in list_frames(root or get_cache_dir('icqa', fc)):
+        fetched_at = _fetched_at(path_base)
+        if fetched_at is not None and fetched_at < cutoff:
+            remove_frame(path_base)
+
+
+def _week_start(date):
+    """Midnight of the first day in date's fiscal week (the end of the previous week)."""
+    week = get_fiscal_week(date)
+    day = datetime(date.year, date.month, date.day)
+    for _ in range(7):
+        if get_fiscal_week(day - timedelta(days=1)) != week:
+            break
+        day -= timedelta(days=1)
+    return day
+
 
 def _download_icqa_for_week(fc, fiscal_year, fiscal_week, midway_session, cookie_jar):
     """
     Helper function to download ICQA data for a specific fiscal week.
-    Returns the path to the temporary CSV file or None if download fails.
+    Returns the week's rows as a DataFrame (parsed in memory) or None if the download fails.
     """
     # No zero-padding for the week
     week_str = str(fiscal_week)
@@ -78,19 +110,14 @@ def _download_icqa_for_week(fc, fiscal_year, fiscal_week, midway_session, cookie
         logger.error(f"[ICQA PULL] Error downloading ICQA data for FY{fiscal_year}-W{week_str}: {e}")
         return None
     
-    # Write CSV to local file using the temp directory
-    temp_dir = get_temp_directory()
-    temp_csv_path = os.path.join(temp_dir, f"temp_{file_name}")
-    
     try:
-        with open(temp_csv_path, 'wb') as f:
-            f.write(response.content)
-        logger.info(f"[ICQA PULL] Downloaded ICQA CSV to: {temp_csv_path}")
+        df = pd.read_csv(io.BytesIO(response.content))
+        logger.info(f"[ICQA PULL] Read {len(df)} rows for FY{fiscal_year}-W{week_str}")
     except Exception as e:
-        logger.error(f"[ICQA PULL] Error writing CSV file for FY{fiscal_year}-W{week_str}: {e}")
+        logger.error(f"[ICQA PULL] Error reading CSV for FY{fiscal_year}-W{week_str}: {e}")
         return None
     
-    return temp_csv_path
+    return df
 
 def _get_previous_fiscal_week(fiscal_year, fiscal_week):
     """
@@ -109,53 +136,47 @@ def _get_previous_fiscal_week(fiscal_year, fiscal_week):
         # For simplicity, assume 52 weeks in a fiscal year
         return fiscal_year - 1, 52
 
-def _combine_csv_files(file_paths):
+def _combine_weeks(frames):
     """
-    Combine multiple CSV files into a single DataFrame.
-    Skip any None paths (failed downloads).
+    Concatenates the weekly frames in order, skipping failed downloads (None).
     
     Returns:
-        tuple: (combined_csv_path, success) where success is True if at least one file was processed
+        pd.DataFrame or None if no week produced any rows
     """
-    combined_df = pd.DataFrame()
-    valid_paths = [p for p in file_paths if p is not None]
-    
-    if not valid_paths:
-        logger.error("[ICQA PULL] No valid CSV files to combine")
-        return None, False
+    valid_frames = [df for df in frames if df is not None]
     
-    for path in valid_paths:
-        try:
-            df = pd.read_csv(path)
-            logger.info(f"[ICQA PULL] Read {len(df)} rows from {path}")
-            combined_df = pd.concat([combined_df, df], ignore_index=True)
-        except Exception as e:
-            logger.error(f"[ICQA PULL] Error reading CSV {path}: {e}")
+    if not valid_frames:
+        logger.error("[ICQA PULL] No ICQA weeks to combine")
+        return None
     
+    combined_df = pd.concat(valid_frames, ignore_index=True)
     if combined_df.empty:
-        logger.error("[ICQA PULL] Combined DataFrame is empty after processing all files")
-        return None, False
-    
-    # Save combined DataFrame to a new CSV in the temp directory
-    temp_dir = get_temp_directory()
-    combined_path = os.path.join(temp_dir, "temp_combined_icqa_data.csv")
+        logger.error("[ICQA PULL] Combined DataFrame is empty after processing all weeks")
+        return None
     
-    try:
-        combined_df.to_csv(combined_path, index=False)
-        logger.info(f"[ICQA PULL] Combined {len(combined_df)} rows into {combined_path}")
-        
-        # Clean up individual files after successful combination
-        for path in valid_paths:
-            try:
-                os.remove(path)
-                logger.info(f"[ICQA PULL] Removed temporary file: {path}")
-            except Exception as e:
-                logger.warning(f"[ICQA PULL] Failed to remove temporary file {path}: {e}")
-                
-        return combined_path, True
-    except Exception as e:
-        logger.error(f"[ICQA PULL] Error saving combined CSV: {e}")
-        return None, False
+    logger.info(f"[ICQA PULL] Combined {len(combined_df)} rows from {len(valid_frames)} weeks")
+    return combined_df
+
+def _get_week(fc, fiscal_year, fiscal_week, settled_at, midway_session, cookie_jar):
+    """
+    Rows of one fiscal week. A week with settled_at (epoch seconds its report
+    becomes final) is served from a copy downloaded after that point when
+    there is one, and cached once that point has passed; other weeks are
+    always downloaded.
+    """
+    if settled_at is not None:
+        df = load_cached_week(fc, fiscal_year, fiscal_week, settled_at)
+        if df is not None:
+            logger.info(f"[ICQA PULL] Using cached FY{fiscal_year}-W{fiscal_week} ({len(df)} rows)")
+            return df
+    df = _download_icqa_for_week(fc, fiscal_year, fiscal_week, midway_session, cookie_jar)
+    if settled_at is not None and df is not None:
+        if time.time() >= settled_at:
+            store_week(fc, fiscal_year, fiscal_week, df)
+        else:
+            logger.info(f"[ICQA PULL] FY{fiscal_year}-W{fiscal_week} ended less than "
+                        f"{ICQA_CLOSED_WEEK_GRACE_HOURS}h ago, not cached yet")
+    return df
 
 def pull_icqa(fc, current_date, midway_session, cookie_jar):
     """
@@ -165,12 +186,14 @@ def pull_icqa(fc, current_date, midway_session, cookie_jar):
     to minimize issues with Diver portal showing only 1 transfer item for some lanes.
     
     1) Gets fiscal years and weeks for current and previous weeks
-    2) Downloads data for both weeks
-    3) Combines the data into a single CSV file
-    4) Returns the path to the combined CSV file
+    2) Downloads both weeks concurrently (the previous week comes from the
+       local cache once it was downloaded more than ICQA_CLOSED_WEEK_GRACE_HOURS
+       after it ended)
+    3) Combines the data into a single DataFrame
     
     Returns:
-        str: Path to the combined CSV file, or None if all downloads failed
+        Handoff: Combined rows of both weeks (DataFrame) for process_icqa_data,
+        or None if all downloads failed
     """
     
     logger.info(f"[ICQA PULL] Starting pull for FC={fc}, current_date={current_date} (pulling 2 weeks of data)")
@@ -183,15 +206,23 @@ def pull_icqa(fc, current_date, midway_session, cookie_jar):
     
     logger.info(f"[ICQA PULL] Pulling data for current week (FY{current_fiscal_year}-W{current_fiscal_week}) and previous week (FY{prev_fiscal_year}-W{prev_fiscal_week})")
     
-    # 3) Download data for both weeks
-    current_week_csv = _download_icqa_for_week(fc, current_fiscal_year, current_fiscal_week, midway_session, cookie_jar)
-    prev_week_csv = _download_icqa_for_week(fc, prev_fiscal_year, prev_fiscal_week, midway_session, cookie_jar)
-    
-    # 4) Combine the downloaded CSVs
-    combined_csv_path, success = _combine_csv_files([current_week_csv, prev_week_csv])
-    
-    if not success:
+    # 3) Get both weeks; the current week's report can still be refreshed, so it is never cached
+    settled_at = (_week_start(current_date) + timedelta(hours=ICQA_CLOSED_WEEK_GRACE_HOURS)).timestamp()
+    weeks = [
+        (current_fiscal_year, current_fiscal_week, None),
+        (prev_fiscal_year, prev_fiscal_week, settled_at),
+    ]
+    with ThreadPoolExecutor(max_workers=ICQA_WEEK_WORKERS) as executor:
+        futures = [executor.submit(_get_week, fc, year, week, settled, midway_session, cookie_jar)
+                   for year, week, settled in weeks]
+        frames = [future.result() for future in futures]
+    prune_week_cache(fc)
+    
+    # 4) Combine the weeks in memory
+    combined_df = _combine_weeks(frames)
+    
+    if combined_df is None:
         logger.error("[ICQA PULL] Failed to retrieve and combine ICQA data for both weeks")
         return None
     
-    return combined_csv_path
\ No newline at end of file
+    return Handoff.from_frame("icqa", combined_df, meta={"fc": fc})
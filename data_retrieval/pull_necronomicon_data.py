@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import os
 import logging
 import pandas as pd
 import io
@@ -13,9 +14,19 @@ import numpy as np
 # Suppress SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+from data_retrieval.necronomicon_cache import OP2PartitionCache
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+OP2_CSV_PATH = "IXD/Total_Hours_volumes_OP2_2025_IXD.csv"
+# Columns a run reads from its warehouse partition
+OP2_READ_COLUMNS = ["Warehouse", "year_week_date", "LineItem", "Size", "Volume", "Hours"]
+# Write each downloaded OP2 CSV to debug_data/ (ONEPYFLOW_NECRO_DEBUG=1)
+NECRO_DEBUG_DUMP = os.environ.get('ONEPYFLOW_NECRO_DEBUG') == '1'
+
+OP2_CACHE = OP2PartitionCache(OP2_CSV_PATH)
+
 class S3Accessor:
     """
     A lightweight S3 accessor class for retrieving files from the ecft-json-cache bucket.
@@ -42,13 +53,30 @@ class S3Accessor:
         
     def get_object(self, path_to_file):
         """Retrieve an object from S3 via the ECFT API."""
+        status, text, _ = self.get_object_if_changed(path_to_file)
+        return text if status == 200 else None
+
+    def get_object_if_changed(self, path_to_file, etag=None, last_modified=None):
+        """
+        Conditional variant of get_object.
+
+        Returns:
+            (status_code, text, headers): status 304 (no text) when the object
+            still matches etag/last_modified, (None, None, {}) on errors.
+        """
         url = f"{self.base}s3/getObject?bucket={self.bucket}&prefix={path_to_file}"
         logger.info(f"[S3ACCESSOR] Retrieving object from: {url}")
-        
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
         try:
             with self.requests_retry_session() as req:
                 resp = req.get(
                     url,
+                    headers=headers,
                     cookies=self.cookie_jar,
                     auth=HTTPKerberosAuth(mutual_authentication=OPTIONAL),
                     verify=False,
@@ -58,14 +86,17 @@ class S3Accessor:
                 
             if resp.status_code == 200:
                 logger.info(f"[S3ACCESSOR] Successfully retrieved object")
-                return resp.text
+                return 200, resp.text, dict(resp.headers)
+            elif resp.status_code == 304:
+                logger.info(f"[S3ACCESSOR] Object not modified")
+                return 304, None, dict(resp.headers)
             else:
                 logger.warning(f"[S3ACCESSOR] Failed to retrieve object: status {resp.status_code}")
-                return None
+                return resp.status_code, None, {}
                 
         except Exception as e:
             logger.error(f"[S3ACCESSOR] Error retrieving object: {e}", exc_info=True)
-            return None
+            return None, None, {}
 
 def pull_necronomicon_data(fc, current_date, session, cookie_jar):
     """
@@ -95,67 +126,47 @@ def pull_necronomicon_data(fc, current_date, session, cookie_jar):
         
         # Initialize S3 accessor
         s3_accessor = S3Accessor(cookie_jar)
-        
-        # Define path to CSV file in S3
-        csv_path = "IXD/Total_Hours_volumes_OP2_2025_IXD.csv"
-        
-        # Retrieve CSV from S3
-        csv_content = s3_accessor.get_object(csv_path)
-        if not csv_content:
-            logger.error(f"[NECRO] Failed to retrieve OP2 2025 data from S3 for FC={fc}")
-            return None
-        
-        # Save the raw CSV to inspect it (for debugging)
-        import os
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        debug_dir = os.path.join(os.getcwd(), "debug_data")
-        os.makedirs(debug_dir, exist_ok=True)
-        debug_csv_path = os.path.join(debug_dir, f"OP2_2025_raw_{timestamp}.csv")
-        
-        with open(debug_csv_path, "w", encoding="utf-8") as f:
-            f.write(csv_content)
-        logger.info(f"[NECRO] Saved raw CSV for inspection to: {debug_csv_path}")
-            
-        # Convert CSV to DataFrame with proper headers
+
+        def fetch(etag, last_modified):
+            status, text, headers = s3_accessor.get_object_if_changed(OP2_CSV_PATH, etag, last_modified)
+            if text and NECRO_DEBUG_DUMP:
+                # Save the raw CSV to inspect it (for debugging)
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                debug_dir = os.path.join(os.getcwd(), "debug_data")
+                os.makedirs(debug_dir, exist_ok=True)
+                debug_csv_path = os.path.join(debug_dir, f"OP2_2025_raw_{timestamp}.csv")
+                with open(debug_csv_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                logger.info(f"[NECRO] Saved raw CSV for inspection to: {debug_csv_path}")
+            return status, text, headers
+
+        # Refresh the local per-warehouse copy (network only when revalidation is due)
         try:
-            # Expected headers from the sample
-            expected_headers = [
-                "Scenario", "year_week_date", "RegionLevel1", "RegionLevel2", "Country", 
-                "WarehouseReportingType", "Warehouse", "MainProcess", "CoreProcess", 
-                "LineItem", "Size", "PprLineItemName", "TrackingType", "Volume", 
-                "Hours", "UndilutedHours"
-            ]
-            
-            # Read the CSV with headers
-            df_raw = pd.read_csv(io.StringIO(csv_content), names=expected_headers, header=0)
-            
-            # Ensure correct data types
-            df_raw['Volume'] = pd.to_numeric(df_raw['Volume'], errors='coerce')
-            df_raw['Hours'] = pd.to_numeric(df_raw['Hours'], errors='coerce')
-            df_raw['year_week_date'] = pd.to_datetime(df_raw['year_week_date'], errors='coerce')
-            
-            # Log info about the raw data
-            logger.info(f"[NECRO] CSV loaded with {len(df_raw)} rows, columns: {df_raw.columns.tolist()}")
-            logger.info(f"[NECRO] Date range: {df_raw['year_week_date'].min()} to {df_raw['year_week_date'].max()}")
-            logger.info(f"[NECRO] Warehouses: {df_raw['Warehouse'].nunique()} unique values")
-            
+            manifest = OP2_CACHE.refresh(fetch)
         except Exception as e:
             logger.error(f"[NECRO] Error parsing CSV data: {e}", exc_info=True)
             return None
-            
-        # 1. Filter by FC/Warehouse
-        df_fc = df_raw[df_raw['Warehouse'].str.upper() == fc.upper()]
-        if len(df_fc) == 0:
+        if not manifest:
+            logger.error(f"[NECRO] Failed to retrieve OP2 2025 data from S3 for FC={fc}")
+            return None
+
+        logger.info(f"[NECRO] OP2 dataset has {manifest['rows']} rows, "
+                    f"date range: {manifest['date_min']} to {manifest['date_max']}")
+        logger.info(f"[NECRO] Warehouses: {len(manifest['warehouses'])} unique values")
+
+        # 1. Filter by FC/Warehouse (a read of that warehouse's partition)
+        df_fc = OP2_CACHE.read(manifest, fc, columns=OP2_READ_COLUMNS)
+        if df_fc is None or len(df_fc) == 0:
             logger.warning(f"[NECRO] No data found for FC={fc}. Trying alternative matches...")
             
             # Try partial match if no exact match
-            possible_matches = [w for w in df_raw['Warehouse'].unique() 
+            possible_matches = [w for w in manifest['warehouses']
                                if str(fc).upper() in str(w).upper() or str(w).upper() in str(fc).upper()]
             if possible_matches:
                 logger.info(f"[NECRO] Found possible match: {possible_matches[0]}")
                 best_match = possible_matches[0]  # Take the first match
-                df_fc = df_raw[df_raw['Warehouse'] == best_match]
+                df_fc = OP2_CACHE.read(manifest, best_match, columns=OP2_READ_COLUMNS)
+                df_fc = df_fc[df_fc['Warehouse'] == best_match]
                 logger.info(f"[NECRO] Using {best_match} with {len(df_fc)} rows")
             else:
                 logger.error(f"[NECRO] No matching data found for FC={fc}")
@@ -3,6 +3,7 @@
 import logging
 import pandas as pd
 import os
+from data_retrieval.share_mirror import ShareFileMirror
 from datetime import datetime
 
 # Configure logging
@@ -10,6 +11,7 @@ logger = logging.getLogger(__name__)
 
 # Define the path to the SCACs mapping file
 SCACS_FILE_PATH = r'\\ant\dept-eu\BCN1\Public\ECFT\IXD\SCACs Mapping\SCACs_Mapping.txt'
+SCACS_MIRROR = ShareFileMirror(SCACS_FILE_PATH, partition_column='fc')
 
 def pull_scacs_mapping_data(fc, start_date, end_date, session, cookie_jar):
     """
@@ -29,54 +31,46 @@ def pull_scacs_mapping_data(fc, start_date, end_date, session, cookie_jar):
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         logger.info(f"[SCACs] Attempting to read SCACs Mapping data for FC '{fc}' from: {SCACS_FILE_PATH}")
 
-        # --- 1. Check if file exists ---
-        if not os.path.exists(SCACS_FILE_PATH):
-            logger.error(f"[SCACs] SCACs Mapping file not found at: {SCACS_FILE_PATH}")
-            return None
-
-        # --- 2. Check file size (optional but helpful) ---
-        try:
-            file_size = os.path.getsize(SCACS_FILE_PATH)
-            logger.info(f"[SCACs] Found SCACs Mapping file. Size: {file_size} bytes")
-            if file_size < 50:  # Check if file seems too small
-                logger.warning(f"[SCACs] SCACs Mapping file size is very small ({file_size} bytes). May be empty or header-only.")
-        except Exception as size_err:
-            logger.error(f"[SCACs] Could not get file size for {SCACS_FILE_PATH}: {size_err}")
-
-        # --- 3. Read the tab-separated file ---
+        # --- 1. Bring the local mirror up to date (copies the share file only when it changed) ---
         try:
-            df = pd.read_csv(SCACS_FILE_PATH, sep='\t', on_bad_lines='warn')
-            logger.info(f"[SCACs] Successfully read {len(df)} total rows from SCACs_Mapping.txt.")
+            manifest = SCACS_MIRROR.sync()
         except pd.errors.EmptyDataError:
             logger.error(f"[SCACs] SCACs Mapping file is empty or contains no columns: {SCACS_FILE_PATH}")
             return None
         except Exception as read_err:
-            logger.error(f"[SCACs] Error reading SCACs Mapping file using pandas: {read_err}", exc_info=True)
+            logger.error(f"[SCACs] Error mirroring SCACs Mapping file: {read_err}", exc_info=True)
+            return None
+
+        if manifest is None:
+            logger.error(f"[SCACs] SCACs Mapping file not found at: {SCACS_FILE_PATH}")
             return None
 
-        if df.empty:
+        logger.info(f"[SCACs] SCACs Mapping file has {manifest['rows']} total rows ({manifest['size']} bytes).")
+        if manifest['size'] < 50:  # Check if file seems too small
+            logger.warning(f"[SCACs] SCACs Mapping file size is very small ({manifest['size']} bytes). May be empty or header-only.")
+        if manifest['rows'] == 0:
             logger.warning("[SCACs] SCACs Mapping file was read but resulted in an empty DataFrame.")
 
-        # --- 4. Verify 'fc' column exists ---
-        if 'fc' not in df.columns:
-            logger.error(f"[SCACs] 'fc' column not found in SCACs_Mapping.txt. Columns available: {df.columns.tolist()}")
+        # --- 2. Verify 'fc' column exists ---
+        if 'fc' not in manifest['columns']:
+            logger.error(f"[SCACs] 'fc' column not found in SCACs_Mapping.txt. Columns available: {manifest['columns']}")
             return None
 
-        # --- 5. Filter by FC ---
+        # --- 3. Filter by FC (a read of that FC's partition) ---
         if fc:
             logger.info(f"[SCACs] Filtering SCACs Mapping data for FC: {fc}")
-            filtered_df = df[df['fc'].str.upper() == fc.upper()].copy()
+            filtered_df = SCACS_MIRROR.read(manifest, fc.upper())
             logger.info(f"[SCACs] Filtered down to {len(filtered_df)} rows for FC {fc}.")
 
             if filtered_df.empty:
                 logger.warning(f"[SCACs] No rows found for FC '{fc}' in SCACs_Mapping.txt.")
                 # Unlike SSPOT, return an empty dataframe instead of None since FlexSim might need to know there are no mappings
-                filtered_df = pd.DataFrame(columns=df.columns)
+                filtered_df = pd.DataFrame(columns=manifest['columns'])
         else:
             logger.warning("[SCACs] No FC provided to filter SCACs Mapping data. Returning full dataset.")
-            filtered_df = df.copy()
+            filtered_df = SCACS_MIRROR.read_all()
 
-        # --- 6. Prepare return data ---
+        # --- 4. Prepare return data ---
         retrieval_result = {
             'dataframe': filtered_df,
             'timestamp': timestamp
@@ -3,6 +3,7 @@
 import logging
 import pandas as pd
 import os
+from data_retrieval.share_mirror import ShareFileMirror
 from datetime import datetime
 
 # Configure logging
@@ -10,6 +11,7 @@ logger = logging.getLogger(__name__)
 
 # Define the path to the SSPOT file
 SSPOT_FILE_PATH = r'\\ant\dept-eu\BCN1\Public\ECFT\IXD\SSPOT\SSPOT.txt'
+SSPOT_MIRROR = ShareFileMirror(SSPOT_FILE_PATH, partition_column='fc')
 
 def pull_sspot_data(fc, start_date, end_date, session, cookie_jar):
     """
@@ -29,43 +31,35 @@ def pull_sspot_data(fc, start_date, end_date, session, cookie_jar):
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         logger.info(f"[SSPOT] Attempting to read SSPOT data for FC '{fc}' from: {SSPOT_FILE_PATH}")
 
-        # --- 1. Check if file exists ---
-        if not os.path.exists(SSPOT_FILE_PATH):
-            logger.error(f"[SSPOT] SSPOT data file not found at: {SSPOT_FILE_PATH}")
-            return None
-
-        # --- 2. Check file size (optional but helpful) ---
-        try:
-            file_size = os.path.getsize(SSPOT_FILE_PATH)
-            logger.info(f"[SSPOT] Found SSPOT file. Size: {file_size} bytes")
-            if file_size < 50: # Check if file seems too small
-                 logger.warning(f"[SSPOT] SSPOT file size is very small ({file_size} bytes). May be empty or header-only.")
-        except Exception as size_err:
-            logger.error(f"[SSPOT] Could not get file size for {SSPOT_FILE_PATH}: {size_err}")
-
-        # --- 3. Read the tab-separated file ---
+        # --- 1. Bring the local mirror up to date (copies the share file only when it changed) ---
         try:
-            df = pd.read_csv(SSPOT_FILE_PATH, sep='\t', on_bad_lines='warn')
-            logger.info(f"[SSPOT] Successfully read {len(df)} total rows from SSPOT.txt.")
+            manifest = SSPOT_MIRROR.sync()
         except pd.errors.EmptyDataError:
-             logger.error(f"[SSPOT] SSPOT file is empty or contains no columns: {SSPOT_FILE_PATH}")
-             return None
+            logger.error(f"[SSPOT] SSPOT file is empty or contains no columns: {SSPOT_FILE_PATH}")
+            return None
         except Exception as read_err:
-            logger.error(f"[SSPOT] Error reading SSPOT file using pandas: {read_err}", exc_info=True)
+            logger.error(f"[SSPOT] Error mirroring SSPOT file: {read_err}", exc_info=True)
+            return None
+
+        if manifest is None:
+            logger.error(f"[SSPOT] SSPOT file not found at: {SSPOT_FILE_PATH}")
             return None
 
-        if df.empty:
-             logger.warning("[SSPOT] SSPOT file was read but resulted in an empty DataFrame.")
+        logger.info(f"[SSPOT] SSPOT file has {manifest['rows']} total rows ({manifest['size']} bytes).")
+        if manifest['size'] < 50:  # Check if file seems too small
+            logger.warning(f"[SSPOT] SSPOT file size is very small ({manifest['size']} bytes). May be empty or header-only.")
+        if manifest['rows'] == 0:
+            logger.warning("[SSPOT] SSPOT file was read but resulted in an empty DataFrame.")
 
-        # --- 4. Verify 'fc' column exists ---
-        if 'fc' not in df.columns:
-            logger.error(f"[SSPOT] 'fc' column not found in SSPOT.txt. Columns available: {df.columns.tolist()}")
+        # --- 2. Verify 'fc' column exists ---
+        if 'fc' not in manifest['columns']:
+            logger.error(f"[SSPOT] 'fc' column not found in SSPOT.txt. Columns available: {manifest['columns']}")
             return None
 
-        # --- 5. Filter by FC ---
+        # --- 3. Filter by FC (a read of that FC's partition) ---
         if fc:
             logger.info(f"[SSPOT] Filtering SSPOT data for FC: {fc}")
-            filtered_df = df[df['fc'].str.upper() == fc.upper()].copy()
+            filtered_df = SSPOT_MIRROR.read(manifest, fc.upper())
             logger.info(f"[SSPOT] Filtered down to {len(filtered_df)} rows for FC {fc}.")
 
             if filtered_df.empty:
@@ -75,7 +69,7 @@ def pull_sspot_data(fc, start_date, end_date, session, cookie_jar):
             logger.error("[SSPOT] No FC provided to filter SSPOT data. This module requires an FC.")
             return None
 
-        # --- 6. Prepare return data ---
+        # --- 4. Prepare return data ---
         retrieval_result = {
             'dataframe': filtered_df,
             'timestamp': timestamp
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 import logging
 import os
-import shutil
-from datetime import datetime
+
+from utils.handoff import Handoff
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -17,15 +17,11 @@ def pull_vip_data(fc, midway_session=None, cookie_jar=None):
         cookie_jar: Cookie jar with authentication cookies (not used but kept for API consistency)
     
     Returns:
-        str: Path to a temporary file with VIP data
+        Handoff: The filtered tab-separated VIP lines (text) for process_vip_data
     """
     logger.info(f"[VIP PULL] Starting pull for FC={fc}")
     
-    # Timestamp for generating unique filenames
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    temp_download_path = f"temp_vip_download_{timestamp}.txt"
-    temp_filtered_path = f"temp_vip_{fc}_{timestamp}.txt"
-    file_obtained = False
+    lines = None
     
     # Primary file path
     primary_path = r"\\ant\dept-eu\BCN1\Public\ECFT\IXD\ALPS\VIP.txt"
@@ -34,16 +30,15 @@ def pull_vip_data(fc, midway_session=None, cookie_jar=None):
     try:
         logger.info(f"[VIP PULL] Trying to read from primary path: {primary_path}")
         if os.path.exists(primary_path):
-            shutil.copy2(primary_path, temp_download_path)
-            logger.info(f"[VIP PULL] Successfully copied from primary path to: {temp_download_path}")
-            file_obtained = True
+            lines = _read_lines(primary_path)
+            logger.info(f"[VIP PULL] Successfully read from primary path")
         else:
             logger.warning(f"[VIP PULL] Primary path not found: {primary_path}")
     except Exception as e:
         logger.warning(f"[VIP PULL] Failed to read from primary path: {e}")
     
     # If primary path failed, try alternative paths
-    if not file_obtained:
+    if lines is None:
         alternative_paths = [
             r"\\ant\dept-eu\BCN1\ECFT\IXD\ALPS\VIP.txt",
             r"\\ant\dept-eu\BCN1\Public\ECFT\IXD\Data\VIP.txt",
@@ -54,31 +49,24 @@ def pull_vip_data(fc, midway_session=None, cookie_jar=None):
             try:
                 logger.info(f"[VIP PULL] Trying alternative path: {path}")
                 if os.path.exists(path):
-                    shutil.copy2(path, temp_download_path)
-                    logger.info(f"[VIP PULL] Successfully copied from alternative path to: {temp_download_path}")
-                    file_obtained = True
+                    lines = _read_lines(path)
+                    logger.info(f"[VIP PULL] Successfully read from alternative path")
                     break
                 else:
                     logger.warning(f"[VIP PULL] Alternative path not found: {path}")
             except Exception as e:
                 logger.warning(f"[VIP PULL] Failed to read from alternative path {path}: {e}")
     
-    # If all paths failed, create a dummy file
-    if not file_obtained:
+    # If all paths failed, use dummy data
+    if lines is None:
         logger.warning("[VIP PULL] All paths failed, creating dummy data")
-        create_dummy_vip_data(fc, temp_download_path)
-        file_obtained = True
+        lines = dummy_vip_data(fc).splitlines(keepends=True)
     
-    # Process the file to filter by FC if needed
+    # Filter the lines by FC if needed
     try:
-        # Read the data
-        with open(temp_download_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
         if not lines:
             logger.warning("[VIP PULL] Empty file, creating dummy data")
-            create_dummy_vip_data(fc, temp_filtered_path)
-            return temp_filtered_path
+            return Handoff.from_text("vip", dummy_vip_data(fc))
         
         # Parse headers
         headers = lines[0].strip().split('\t')
@@ -93,40 +81,28 @@ def pull_vip_data(fc, midway_session=None, cookie_jar=None):
                 if fc == 'ALL' or site == fc:
                     filtered_lines.append(line)
         
-        # Write filtered data
-        with open(temp_filtered_path, 'w', encoding='utf-8') as f:
-            f.writelines(filtered_lines)
-        
-        logger.info(f"[VIP PULL] Saved filtered data with {len(filtered_lines)-1} rows to: {temp_filtered_path}")
-        
-        # Clean up the download file
-        try:
-            os.remove(temp_download_path)
-            logger.info(f"[VIP PULL] Cleaned up temporary download: {temp_download_path}")
-        except Exception as e:
-            logger.warning(f"[VIP PULL] Failed to remove temporary file: {e}")
-        
-        return temp_filtered_path
+        logger.info(f"[VIP PULL] Filtered data to {len(filtered_lines)-1} rows")
+        return Handoff.from_text("vip", ''.join(filtered_lines))
             
     except Exception as e:
         logger.error(f"[VIP PULL] Error processing file: {e}", exc_info=True)
         
-        # Create a fallback file if processing fails
-        create_dummy_vip_data(fc, temp_filtered_path)
-        return temp_filtered_path
+        # Use fallback data if processing fails
+        return Handoff.from_text("vip", dummy_vip_data(fc))
+
+def _read_lines(path):
+    """Reads a text file into lines (universal newlines, like the old copied temp file)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.readlines()
 
-def create_dummy_vip_data(fc, output_path):
+def dummy_vip_data(fc):
     """
-    Creates a dummy VIP data file.
+    Creates dummy VIP data (tab-separated text).
     """
     # Sample data based on the observed format in paste.txt
     dummy_data = f"""site\tparcelforecastunit\tfixedslotunit\tpallet\tnextslot\tsnapshot_year\tsnapshot_month\tsnapshot_day\tsnapshot_hour\tinsert_timestamp_utc\tparcelappointmentcount\tappointmentcount\toffsitebl\toceancount\tbacklogicc\tbacklog
 {fc}\t[{{value=0, day=2025-04-10}}]\t[{{value=0, day=2025-04-10}}]\t[{{value=0, day=2025-04-10}}]\t[{{value=2025-04-11, day=2025-04-10}}]\t2025\t04\t10\t20\t2025-04-10 21:05:41.379473\t[{{value=0, day=2025-04-10}}]\t[{{value=0, day=2025-04-10}}]\t[{{value=0, day=2025-04-10}}]\t[{{value=0, day=2025-04-10}}]\t[{{value=0, day=2025-04-10}}]\t[{{value=0, day=2025-04-10}}]"""
     
-    # Save to file
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(dummy_data)
-    
     logger.info(f"[VIP PULL] Created fallback VIP data for FC {fc}")
     
-    return True
\ No newline at end of file
+    return dummy_data
@@ -0,0 +1,168 @@
+# data_retrieval/share_mirror.py
+
+"""
+Local mirror of tab-separated files on the \\\\ant network share.
+
+F2P, SPARK, SCACs and SSPOT each read a network-wide TSV over SMB and keep
+one FC's rows. The mirror compares the share file's size and modification
+time with the last copy and only copies and re-parses it when they differ.
+The parsed file is stored as one typed frame per FC (utils.frame_cache), so a
+run reads a single partition instead of the whole file.
+
+    <root>/manifest.json       source size/mtime, columns, partition names
+    <root>/<file name>         local copy of the share file
+    <root>/v_<n>/p<i>.<ext>    rows of one partition key
+
+The source may be any path, so a local directory can stand in for the share.
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+import pandas as pd
+
+from utils.path_utils import get_cache_dir
+from utils.frame_cache import read_frame, write_frame
+
+logger = logging.getLogger(__name__)
+
+
+def upper_key(values):
+    """Partition key: the upper-cased value (FC codes are matched case-insensitively)."""
+    return values.map(lambda v: v.upper() if isinstance(v, str) else None)
+
+
+def arc_origin_key(values):
+    """Partition key of an F2P arc ('ZAZ1_MAD4' -> 'ZAZ1'), matched case-sensitively."""
+    return values.map(lambda v: v.split('_', 1)[0] if isinstance(v, str) else None)
+
+
+def read_share_tsv(path):
+    """Reads a share TSV the way the pull modules always have."""
+    return pd.read_csv(path, sep='\t', on_bad_lines='warn')
+
+
+class ShareFileMirror:
+    """
+    Mirror of one share file, partitioned by key(df[partition_column]).
+
+    Files without the partition column are still mirrored; they just have no
+    partitions (manifest["partitions"] is empty) and `columns` tells the caller
+    why.
+    """
+
+    def __init__(self, source_path, partition_column, key=upper_key, root=None):
+        self.source_path = source_path
+        self.partition_column = partition_column
+        self.key = key
+        self._root = root
+        self._lock = threading.Lock()
+
+    @property
+    def root(self):
+        name = os.path.splitext(os.path.basename(self.source_path.replace('\\', '/')))[0]
+        return self._root or get_cache_dir('share_mirror', name)
+
+    @property
+    def local_copy(self):
+        return os.path.join(self.root, os.path.basename(self.source_path.replace('\\', '/')))
+
+    def _manifest_path(self):
+        return os.path.join(self.root, "manifest.json")
+
+    def load_manifest(self):
+        try:
+            with open(self._manifest_path(), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read share mirror manifest for {self.source_path}: {e}")
+            return None
+
+    def _save_manifest(self, manifest):
+        path = self._manifest_path()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def sync(self):
+        """
+        Brings the mirror up to date with the share file.
+
+        Returns:
+            dict: the manifest in use, or None if the share file is not
+            reachable and was never mirrored.
+
+        Raises:
+            pd.errors.EmptyDataError: the share file has no columns.
+        """
+        with self._lock:
+            manifest = self.load_manifest()
+            try:
+                stat = os.stat(self.source_path)
+            except OSError as e:
+                if manifest:
+                    logger.warning(f"Share file {self.source_path} not reachable ({e}); "
+                                   f"using the copy mirrored at {time.ctime(manifest['copied_at'])}")
+                return manifest
+
+            if manifest and manifest["size"] == stat.st_size and manifest["mtime_ns"] == stat.st_mtime_ns:
+                logger.info(f"Share file {self.source_path} unchanged; using local mirror")
+                return manifest
+
+            logger.info(f"Copying share file {self.source_path} ({stat.st_size} bytes) to local mirror")
+            os.makedirs(self.root, exist_ok=True)
+            tmp_copy = self.local_copy + '.tmp'
+            shutil.copyfile(self.source_path, tmp_copy)
+            os.replace(tmp_copy, self.local_copy)
+
+            # The stat taken before the copy is recorded, so a change during the copy is picked up next time
+            new_manifest = self._write_partitions(read_share_tsv(self.local_copy), stat, manifest)
+            if manifest and manifest.get("partition_dir") != new_manifest["partition_dir"]:
+                shutil.rmtree(os.path.join(self.root, manifest["partition_dir"]), ignore_errors=True)
+            return new_manifest
+
+    def _write_partitions(self, df, stat, previous):
+        version = (previous or {}).get("version", 0) + 1
+        partition_dir = f"v_{version}"
+        partitions = {}
+        keys = []
+        if self.partition_column in df.columns:
+            key_values = self.key(df[self.partition_column])
+            keys = key_values.dropna().unique().tolist()
+            for key, part in df.groupby(key_values, sort=False):
+                name = f"p{len(partitions)}"
+                write_frame(os.path.join(self.root, partition_dir, name), part.reset_index(drop=True))
+                partitions[key] = name
+
+        manifest = {
+            "source": self.source_path,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "copied_at": time.time(),
+            "version": version,
+            "partition_dir": partition_dir,
+            "columns": [str(c) for c in df.columns],
+            "rows": len(df),
+            "keys": keys,
+            "partitions": partitions,
+        }
+        self._save_manifest(manifest)
+        logger.info(f"Mirrored {self.source_path}: {len(df)} rows in {len(partitions)} partitions")
+        return manifest
+
+    def read(self, manifest, key, columns=None):
+        """Rows whose partition key equals key (an empty frame if there are none)."""
+        name = manifest["partitions"].get(key)
+        if name is None:
+            return pd.DataFrame(columns=manifest["columns"])
+        return read_frame(os.path.join(self.root, manifest["partition_dir"], name), columns=columns)
+
+    def read_all(self):
+        """The whole file, parsed from the local copy."""
+        return read_share_tsv(self.local_copy)
@@ -0,0 +1,287 @@
+# data_retrieval/source_race.py
+
+"""
+Concurrent racing of candidate locations for a file (S3 via ECFT, Diver, the
+network share) instead of trying them one by one.
+
+Every candidate is fetched and parsed in its own thread, but the old order
+of preference is kept as priority tiers (production S3 before the
+alternative buckets, before the network share): a lower tier only wins once
+every higher tier has failed or timed out. The remaining candidates are then
+cancelled (running requests are abandoned). The winning location is
+remembered per site in a small JSON store; a top-tier winner gets a head
+start next time, so a healthy location is usually the only one asked.
+
+Freshness (the Last-Modified header or the file modification time) is
+compared between the answers of a tier that arrive within a short grace
+window, and remembered with the winner. A copy older than the freshest one
+already seen for the site never wins; it is only used when nothing newer
+answers.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import namedtuple
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+from utils.path_utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Seconds the last-known-good location gets before the other candidates start
+PREFERRED_HEAD_START_SECONDS = 3.0
+# Overall time to wait for a valid response
+SOURCE_RACE_TIMEOUT_SECONDS = 90.0
+# Seconds a lower-tier answer waits for the higher tiers to answer or fail
+HIGHER_TIER_WAIT_SECONDS = 35.0
+# Seconds answers of the same tier are collected, so the freshest of them wins
+FRESHNESS_GRACE_SECONDS = 0.5
+
+# A candidate location: fetch() returns (content, freshness), content empty/None for no data.
+# tier is its priority (0 first): a lower tier only wins when every higher one failed.
+SourceCandidate = namedtuple('SourceCandidate', ['name', 'fetch', 'tier'], defaults=(0,))
+# The race result: parsed data of the winning candidate
+SourceWin = namedtuple('SourceWin', ['source', 'data', 'freshness'])
+
+
+def http_freshness(headers):
+    """Epoch seconds of a response's Last-Modified header, or None."""
+    value = headers.get('Last-Modified') if headers else None
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_url(url, cookie_jar=None, auth=None, timeout=30):
+    """Candidate fetch for a URL: (content bytes, Last-Modified freshness)."""
+    response = requests.get(url, cookies=cookie_jar, auth=auth, verify=False,
+                            allow_redirects=True, timeout=timeout)
+    response.raise_for_status()
+    return response.content, http_freshness(response.headers)
+
+
+def fetch_file(path):
+    """Candidate fetch for a (network) file: (content bytes, modification time)."""
+    if not os.path.exists(path):
+        return None, None
+    with open(path, 'rb') as f:
+        content = f.read()
+    return content, os.path.getmtime(path)
+
+
+class LastGoodSources:
+    """
+    Remembers, per key (e.g. 'ibbt/ZAZ1'), the location that last won a race
+    and the freshest copy seen, in a small JSON file.
+    """
+
+    def __init__(self, name="last_good_sources", path=None):
+        self.path = path or os.path.join(get_cache_dir('sources'), f"{name}.json")
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return {k: v for k, v in data.items() if isinstance(v, dict)}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Could not read source store {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not write source store {self.path}: {e}")
+
+    def get(self, key):
+        with self._lock:
+            return dict(self._entries.get(key, {}))
+
+    def record(self, key, source, freshness):
+        """Stores the winning location; the remembered freshness never goes back."""
+        with self._lock:
+            entry = self._entries.get(key, {})
+            newest = entry.get('freshness')
+            if freshness is not None and (newest is None or freshness > newest):
+                newest = freshness
+            self._entries[key] = {'source': source, 'freshness': newest, 'updated': time.time()}
+            self._save()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def default_store():
+    """The process-wide store in the cache directory, created on first use."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = LastGoodSources()
+        return _default_store
+
+
+def _attempt(candidate, parse):
+    content, freshness = candidate.fetch()
+    if not content:
+        raise ValueError("no content")
+    return parse(content), freshness
+
+
+def race_sources(key, candidates, parse, store=None,
+                 head_start=PREFERRED_HEAD_START_SECONDS, timeout=SOURCE_RACE_TIMEOUT_SECONDS,
+                 tier_wait=HIGHER_TIER_WAIT_SECONDS, grace=FRESHNESS_GRACE_SECONDS):
+    """
+    Fetches candidates concurrently and returns the best valid one.
+
+    All candidates are asked at once, but the priority tiers are kept: a valid
+    answer of a lower tier only wins once every higher-tier candidate has
+    failed, or after tier_wait seconds. Within a tier, the answers arriving
+    within `grace` seconds of the first one compete on freshness.
+
+    Args:
+        key (str): Store key, e.g. 'ibbt/ZAZ1'
+        candidates (list[SourceCandidate]): Locations in order of preference
+        parse (callable): content -> parsed data; raising marks the content invalid
+        store (LastGoodSources): Last-known-good store (defaults to the cache one)
+        head_start (float): Seconds the last-known-good location runs alone
+            (only when it is in the top tier)
+        timeout (float): Overall seconds to wait for a valid response
+        tier_wait (float): Seconds a lower tier waits for higher tiers
+        grace (float): Seconds same-tier answers are collected before picking
+
+    Returns:
+        SourceWin or None if no candidate gave valid content
+    """
+    if not candidates:
+        return None
+    store = store or default_store()
+    remembered = store.get(key)
+    newest_seen = remembered.get('freshness')
+
+    order = list(candidates)
+    top_tier = min(c.tier for c in order)
+    preferred = next((c for c in order if c.name == remembered.get('source')), None)
+    if preferred is not None and preferred.tier != top_tier:
+        # A lower-tier location never skips the higher tiers
+        preferred = None
+    if preferred is not None:
+        order.remove(preferred)
+        order.insert(0, preferred)
+    rank = {c.name: i for i, c in enumerate(order)}
+    tiers = {c.name: c.tier for c in order}
+
+    start = time.time()
+    deadline = start + timeout
+    valid = []
+    stale = []
+    first_answer = {}
+    executor = ThreadPoolExecutor(max_workers=len(order), thread_name_prefix=f"race_{key.replace('/', '_')}")
+    try:
+        futures = {}
+
+        def submit(candidate):
+            future = executor.submit(_attempt, candidate, parse)
+            futures[future] = candidate
+            return future
+
+        def collect(done):
+            """Sorts completed futures into valid, stale (older than already seen) and failed."""
+            for future in done:
+                candidate = futures[future]
+                try:
+                    data, freshness = future.result()
+                except Exception as e:
+                    logger.info(f"[SOURCE RACE] {key}: {candidate.name} gave no valid data: {e}")
+                    continue
+                win = SourceWin(candidate.name, data, freshness)
+                if newest_seen is not None and freshness is not None and freshness < newest_seen:
+                    logger.warning(f"[SOURCE RACE] {key}: {candidate.name} has an older copy "
+                                   f"({time.ctime(freshness)}) than already seen ({time.ctime(newest_seen)})")
+                    stale.append(win)
+                    continue
+                valid.append(win)
+                first_answer.setdefault(candidate.tier, time.time())
+
+        def freshest(wins):
+            return max(wins, key=lambda w: (w.freshness if w.freshness is not None else float('-inf'),
+                                            -rank[w.source]))
+
+        def decide(pending, final=False):
+            """The winner if one can be chosen now, else None."""
+            now = time.time()
+            pending_tiers = [futures[f].tier for f in pending]
+            for tier in sorted(set(tiers.values())):
+                tier_wins = [w for w in valid if tiers[w.source] == tier]
+                if not tier_wins:
+                    continue
+                if not final:
+                    if any(t < tier for t in pending_tiers) and now - start < tier_wait:
+                        return None
+                    if tier in pending_tiers and now - first_answer[tier] < grace:
+                        return None
+                return freshest(tier_wins)
+            return None
+
+        pending = set()
+        if preferred is not None:
+            submit(preferred)
+            done, pending = wait(set(futures), timeout=head_start)
+            collect(done)
+            if valid:
+                return _won(store, key, valid[0], len(futures))
+            logger.info(f"[SOURCE RACE] {key}: last-known-good {preferred.name} not answered in time, "
+                        f"racing all {len(order)} locations")
+
+        for candidate in order:
+            if candidate is not preferred:
+                pending.add(submit(candidate))
+
+        while pending:
+            now = time.time()
+            if now >= deadline:
+                logger.warning(f"[SOURCE RACE] {key}: no decision within {timeout:.0f}s")
+                break
+            # Wake up on the next answer, or when a tier wait / grace window ends
+            wake = [deadline, start + tier_wait] + [t + grace for t in first_answer.values()]
+            wake = min(t for t in wake if t > now) if any(t > now for t in wake) else deadline
+            done, pending = wait(pending, timeout=max(wake - now, 0.01), return_when=FIRST_COMPLETED)
+            collect(done)
+            win = decide(pending)
+            if win is not None:
+                for other in pending:
+                    other.cancel()
+                return _won(store, key, win, len(futures))
+
+        win = decide(set(), final=True)
+        if win is not None:
+            return _won(store, key, win, len(futures))
+        if stale:
+            win = freshest(stale)
+            logger.warning(f"[SOURCE RACE] {key}: only older copies available, using {win.source}")
+            return _won(store, key, win, len(futures))
+        return None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _won(store, key, win, asked):
+    logger.info(f"[SOURCE RACE] {key}: {win.source} won ({asked} location(s) asked)")
+    store.record(key, win.source, win.freshness)
+    return win
@@ -635,12 +635,12 @@ def run_oneflow_with_json_return(Site, SOSdatetime, EOSdatetime, plan_type, shif
             - module_timestamps: Dictionary mapping module names to ISO timestamps
             - module_exec_times: Dictionary mapping module names to execution times
     """
-    from OneFlow.oneflow import OneFlow_MainFunction
+    from OneFlow.oneflow import OneFlow_MainFunction, run_deferred_validations
     from OneFlow.oneflow_config import FC_TO_COUNTRY
     from OneFlow.oneflow_utils import get_parameters, parse_datetime
     from OneFlow.oneflow_data_sources import build_data_sources
     from OneFlow.oneflow_concurrency import run_all_tasks
-    from OneFlow.oneflow_audit import build_audit_block
+    from OneFlow.oneflow_audit import build_audit_block, extract_module_audit
     from threading import Lock
     import pandas as pd
     import time
@@ -807,7 +807,8 @@ def run_oneflow_with_json_return(Site, SOSdatetime, EOSdatetime, plan_type, shif
         modules,
         error_list,
         module_exec_times,  # Pass execution times for modules
-        previous_history
+        previous_history,
+        module_audit=extract_module_audit(outputJSON)
     )
     
     # PROMINENTLY ADD MODULE EXECUTION TIMES TO THE AUDIT
@@ -840,6 +841,9 @@ def run_oneflow_with_json_return(Site, SOSdatetime, EOSdatetime, plan_type, shif
     # Add the audit block to the output
     outputJSON["Audit"] = audit_info
     
+    # Validations deferred during the run (YMS_API) run now, off the caller's path
+    run_deferred_validations(background=True)
+    
     return outputJSON, module_timestamps, module_exec_times
 
 
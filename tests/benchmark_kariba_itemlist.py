@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark for KARIBA ItemList extraction on the saved ItemList fixture,
+scaled synthetically to peak-day item counts.
+
+Compares the previous BeautifulSoup extraction (kept here as the reference)
+with the streaming KARIBA.parse_itemlist, checks that both give the same units
+and prints timings and peak traced memory. The page is generated chunk by
+chunk, so the streaming path never holds it whole, like a streamed response.
+
+Usage:
+    python tests/benchmark_kariba_itemlist.py               # 20k items
+    python tests/benchmark_kariba_itemlist.py --items 100000
+"""
+
+import sys
+import os
+import re
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from KARIBA import parse_itemlist, ITEMLIST_CHUNK_SIZE
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "kariba", "itemlist_kar1.html")
+
+
+def legacy_extract(html):
+    """Units as the previous KARIBAPuller extracted them (None where it failed)."""
+    soup = BeautifulSoup(html, 'html.parser')
+    data_table = None
+    for table in soup.find_all('table'):
+        headers = [th.get_text().strip().lower() for th in table.find_all('th')]
+        if any('quantity' in header for header in headers):
+            data_table = table
+            break
+    if not data_table:
+        for table in soup.find_all('table'):
+            if table.find_all('tr'):
+                data_table = table
+                break
+    if not data_table:
+        return None
+    headers = [header.get_text().strip() for header in data_table.find_all('th')]
+    rows = [[cell.get_text().strip() for cell in row.find_all('td')]
+            for row in data_table.find_all('tr') if row.find_all('td')]
+    if not rows:
+        return []
+    try:
+        df = pd.DataFrame(rows, columns=headers if len(headers) == len(rows[0]) else None)
+        quantity_column = next((col for col in df.columns if 'quantity' in col.lower()), None)
+        if not quantity_column:
+            if len(df.columns) >= 11:
+                quantity_column = df.columns[10]
+            elif len(df.columns) > 2:
+                quantity_column = next((col for col in df.columns
+                                        if pd.to_numeric(df[col], errors='coerce').notna().any()), None)
+    except Exception:
+        return None
+    if not quantity_column:
+        return None
+    values = pd.to_numeric(df[quantity_column], errors='coerce')
+    return [int(u) if not pd.isna(u) else 0 for u in values.fillna(0).tolist()]
+
+
+def streaming_extract(chunks):
+    """Units as the streaming KARIBAPuller extracts them (None where it fails)."""
+    table = parse_itemlist(chunks).data_table()
+    if not table:
+        return None
+    if not table.rows:
+        return []
+    try:
+        values = table.quantity_values()
+    except ValueError:
+        return None
+    if values is None:
+        return None
+    return [0 if u != u else int(u) for u in values]
+
+
+def scaled_page(items, chunk_size=ITEMLIST_CHUNK_SIZE):
+    """Yields the fixture page with its item rows repeated up to `items`, in chunks."""
+    with open(FIXTURE, encoding="utf-8") as f:
+        page = f.read()
+    head, rest = page.split("<tbody>", 1)
+    body, tail = rest.split("</tbody>", 1)
+    rows = re.findall(r"<tr.*?</tr>", body, flags=re.S)
+
+    buffer = [head, "<tbody>"]
+    size = sum(map(len, buffer))
+    for i in range(items):
+        row = rows[i % len(rows)]
+        buffer.append(row)
+        size += len(row)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    buffer.append("</tbody>" + tail)
+    yield "".join(buffer)
+
+
+def _measure(func):
+    """(result, seconds, peak traced bytes); timing and memory come from separate runs."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KARIBA ItemList extraction benchmark")
+    parser.add_argument("--items", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"KARIBA ItemList benchmark: {args.items:,} items")
+    legacy, legacy_time, legacy_peak = _measure(lambda: legacy_extract("".join(scaled_page(args.items))))
+    streamed, stream_time, stream_peak = _measure(lambda: streaming_extract(scaled_page(args.items)))
+
+    assert legacy == streamed, "streaming extraction differs from the BeautifulSoup reference"
+    print(f"  BeautifulSoup (whole page) : {legacy_time * 1000:9.1f} ms  peak {legacy_peak / 2**20:8.1f} MiB")
+    print(f"  streaming parse_itemlist   : {stream_time * 1000:9.1f} ms  peak {stream_peak / 2**20:8.1f} MiB"
+          f"  ({legacy_time / stream_time:.1f}x, {legacy_peak / stream_peak:.0f}x less memory)")
+    print(f"  ✅ outputs identical ({len(streamed):,} items, {sum(streamed):,} units)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for PPR and PPR_Q processing.
+
+Replays the recorded FCLM functionRollup CSVs in debug_data/ (optionally
+scaled synthetically to 10x/100x rows) through PPRProcessor and PPRQProcessor
+without any network access, checks the outputs against golden JSON digests and
+reports time and peak memory per stage. Every run is appended to
+tests/benchmark_results/ppr_benchmark_history.jsonl so regressions are visible
+between versions.
+
+Usage:
+    python tests/benchmark_ppr_processing.py                 # 1x, 10x, 100x
+    python tests/benchmark_ppr_processing.py --scales 1,10
+    python tests/benchmark_ppr_processing.py --update-golden # after intended output changes
+"""
+
+import sys
+import os
+import json
+import time
+import hashlib
+import logging
+import platform
+import argparse
+import subprocess
+import tracemalloc
+from datetime import datetime
+from unittest import mock
+from urllib.parse import urlsplit, parse_qs
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import pandas as pd
+
+from PPR.PPR_processor import PPRProcessor
+from PPR_Q.PPR_Q_processor import PPRQProcessor
+try:
+    from utils.single_flight import FCLM_FLIGHTS
+except ImportError:  # revisions before FCLM request coalescing (baseline runs)
+    FCLM_FLIGHTS = None
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(TESTS_DIR, "golden")
+RESULTS_FILE = os.path.join(TESTS_DIR, "benchmark_results", "ppr_benchmark_history.jsonl")
+DEBUG_DATA_DIR = os.path.join(ROOT_DIR, "debug_data")
+
+# Recorded reports and the process they answer (keyed by processId without leading zeros)
+FIXTURES = {
+    "1003027": ("PPR_Each_Receive",
+                "functionRollupReport-ZAZ1-Each-Receive-Intraday-20250825040000-20250825120000.csv"),
+    "1003002": ("PPR_Prep_Recorder",
+                "functionRollupReport-ZAZ1-Prep Recorder-Intraday-20250825040000-20250825120000.csv"),
+}
+
+SITE = "ZAZ1"
+SOS = datetime(2025, 8, 25, 4, 0)
+EOS = datetime(2025, 8, 25, 12, 0)
+FLOAT_TOLERANCE = 1e-9
+REGRESSION_THRESHOLD = 0.20
+
+
+class _ReplayResponse:
+    def __init__(self, text):
+        self.status_code = 200
+        self.text = text
+
+
+def load_fixtures(scale):
+    """
+    Returns {process_id: csv_text}. Rows are replicated `scale` times with
+    shifted Employee Ids so scaled reports keep distinct employees.
+    """
+    payloads = {}
+    for process_id, (_, filename) in FIXTURES.items():
+        df = pd.read_csv(os.path.join(DEBUG_DATA_DIR, filename), encoding='ISO-8859-1')
+        if scale > 1:
+            copies = []
+            for k in range(scale):
+                copy = df.copy()
+                copy["Employee Id"] = copy["Employee Id"] + k * 1_000_000_000
+                copies.append(copy)
+            df = pd.concat(copies, ignore_index=True)
+        payloads[process_id] = df.to_csv(index=False)
+    return payloads
+
+
+def replay_get(payloads):
+    """Builds a requests.get replacement serving recorded CSVs by processId."""
+    def fake_get(url, *args, **kwargs):
+        process_id = parse_qs(urlsplit(url).query).get("processId", [""])[0].lstrip("0")
+        return _ReplayResponse(payloads.get(process_id, ""))
+    return fake_get
+
+
+class StageRecorder:
+    """Wraps processor methods to accumulate time (and optionally peak memory) per stage."""
+
+    def __init__(self, track_memory):
+        self.track_memory = track_memory
+        self.seconds = {}
+        self.peak_mb = {}
+
+    def wrap(self, obj, method_name, stage):
+        original = getattr(obj, method_name)
+
+        def wrapped(*args, **kwargs):
+            if self.track_memory:
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - start
+                if self.track_memory:
+                    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                    self.peak_mb[stage] = max(self.peak_mb.get(stage, 0.0), peak)
+
+        setattr(obj, method_name, wrapped)
+
+
+def run_processor(kind, track_memory):
+    """
+    Runs one processor end-to-end over the fixture processes (sequentially, so
+    stage measurements are not interleaved) and returns (output, recorder).
+    """
+    if FCLM_FLIGHTS is not None:
+        FCLM_FLIGHTS.clear()
+    recorder = StageRecorder(track_memory)
+    if kind == "PPR":
+        processor = PPRProcessor(SITE, SOS, EOS)
+        output = processor.PPR_JSON
+    else:
+        processor = PPRQProcessor(SITE, SOS, EOS)
+        output = None
+
+    process_keys = [key for key, _ in FIXTURES.values()]
+    recorder.wrap(processor, "fetch_process_data", "fetch_parse")
+    recorder.wrap(processor, "clean_data", "clean")
+    recorder.wrap(processor, "handle_process", "total_per_process")
+
+    for process_key in process_keys:
+        processor.handle_process(process_key)
+
+    if kind == "PPR_Q":
+        recorder.wrap(processor, "_calculate_comprehensive_metrics", "metrics")
+        processor._calculate_comprehensive_metrics()
+        output = processor.PPR_Q_JSON
+
+    # Processing = everything in handle_process that is not fetch/parse or cleaning
+    recorder.seconds["process"] = (recorder.seconds.pop("total_per_process")
+                                   - recorder.seconds.get("fetch_parse", 0.0)
+                                   - recorder.seconds.get("clean", 0.0))
+    if track_memory:
+        recorder.peak_mb["process"] = recorder.peak_mb.pop("total_per_process")
+    return output, recorder
+
+
+def digest(value):
+    """Reduces an output to scalars plus (length, sha1) for lists, so goldens stay small."""
+    if isinstance(value, dict):
+        return {str(k): digest(v) for k, v in value.items() if not str(k).startswith("_size_breakdown")}
+    if isinstance(value, list):
+        blob = json.dumps(value, default=str, sort_keys=True).encode("utf-8")
+        return {"len": len(value), "sha1": hashlib.sha1(blob).hexdigest()}
+    if isinstance(value, float):
+        return round(value, 9)
+    if hasattr(value, "item"):
+        return digest(value.item())
+    return value
+
+
+def compare(expected, actual, path=""):
+    """Returns a list of human-readable differences between two digests."""
+    diffs = []
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual)):
+            if key not in actual:
+                diffs.append(f"{path}/{key}: missing")
+            elif key not in expected:
+                diffs.append(f"{path}/{key}: unexpected")
+            else:
+                diffs.extend(compare(expected[key], actual[key], f"{path}/{key}"))
+    elif isinstance(expected, float) and isinstance(actual, (int, float)):
+        if abs(expected - actual) > FLOAT_TOLERANCE * max(1.0, abs(expected)):
+            diffs.append(f"{path}: {expected} != {actual}")
+    elif expected != actual:
+        diffs.append(f"{path}: {expected!r} != {actual!r}")
+    return diffs
+
+
+def check_golden(kind, scale, output, update):
+    path = os.path.join(GOLDEN_DIR, f"{kind.lower()}_{scale}x.json")
+    actual = digest(output)
+    if update or not os.path.exists(path):
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(actual, f, indent=2, sort_keys=True)
+        return "written"
+    with open(path) as f:
+        expected = json.load(f)
+    diffs = compare(expected, actual)
+    for diff in diffs[:20]:
+        print(f"      golden mismatch {diff}")
+    return "ok" if not diffs else f"MISMATCH ({len(diffs)})"
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def previous_results():
+    """Returns the last stored {(kind, scale): stages} for regression comparison."""
+    if not os.path.exists(RESULTS_FILE):
+        return {}
+    with open(RESULTS_FILE) as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        return {}
+    last = json.loads(lines[-1])
+    return {(r["processor"], r["scale"]): r["stages"] for r in last.get("results", [])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline PPR/PPR_Q processing benchmark")
+    parser.add_argument("--scales", default="1,10,100", help="Comma-separated row multipliers")
+    parser.add_argument("--update-golden", action="store_true", help="Rewrite golden digests")
+    parser.add_argument("--no-store", action="store_true", help="Do not append to the results history")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    baseline = previous_results()
+    results = []
+    failed = False
+
+    print(f"PPR/PPR_Q offline benchmark @ {git_revision()} (pandas {pd.__version__})")
+    for scale in scales:
+        payloads = load_fixtures(scale)
+        with mock.patch("requests.get", replay_get(payloads)):
+            for kind in ("PPR", "PPR_Q"):
+                output, timing = run_processor(kind, track_memory=False)
+                tracemalloc.start()
+                try:
+                    _, memory = run_processor(kind, track_memory=True)
+                finally:
+                    tracemalloc.stop()
+
+                golden = check_golden(kind, scale, output, args.update_golden)
+                failed = failed or golden.startswith("MISMATCH")
+                stages = {
+                    stage: {"seconds": round(seconds, 4), "peak_mb": round(memory.peak_mb.get(stage, 0.0), 2)}
+                    for stage, seconds in timing.seconds.items()
+                }
+                results.append({"processor": kind, "scale": scale, "golden": golden, "stages": stages})
+
+                print(f"\n  {kind} @ {scale}x  golden={golden}")
+                for stage, values in stages.items():
+                    note = ""
+                    before = baseline.get((kind, scale), {}).get(stage)
+                    if before and before["seconds"] > 0:
+                        change = values["seconds"] / before["seconds"] - 1
+                        note = f"  ({change:+.0%} vs last run)"
+                        if change > REGRESSION_THRESHOLD:
+                            note += "  <-- REGRESSION"
+                    print(f"    {stage:<12} {values['seconds']:>9.4f}s  peak {values['peak_mb']:>9.2f} MB{note}")
+
+    if not args.no_store:
+        os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "results": results,
+        }
+        with open(RESULTS_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"\nResults appended to {RESULTS_FILE}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
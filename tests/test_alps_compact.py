@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Checks the dictionary/run-length column encoding used for compact ALPS output
+(utils.compact_columns) and the TTL of the ALPS densities cache.
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compact_columns import encode_column, decode_column, encode_columns, decode_columns
+
+
+def _alps_ib(days=7, hours=24):
+    """Columns shaped like ALPS_IB: pools and dates repeat in long runs, values vary."""
+    pools = ["PPR_DETAIL_INBOUND_RECEIVE_LP_RECEIVE", "PPR_DETAIL_INBOUND_RECEIVE_PALLET_RECEIVE", "NaN"]
+    columns = {"ALPS_IB_Labor Pool 1": [], "ALPS_IB_Labor Pool 2": [], "ALPS_IB_Date": [], "ALPS_IB_Value": []}
+    for pool in pools:
+        for day in range(days):
+            for hour in range(hours):
+                columns["ALPS_IB_Labor Pool 1"].append(pool)
+                columns["ALPS_IB_Labor Pool 2"].append("INBOUND")
+                columns["ALPS_IB_Date"].append(f"2025-07-{10 + day:02d}")
+                columns["ALPS_IB_Value"].append(round(day * 10.5 + hour * 0.25, 2))
+    return columns
+
+
+def test_round_trip_and_size():
+    columns = _alps_ib()
+    encoded = encode_columns(columns)
+    assert decode_columns(encoded) == columns
+    assert isinstance(encoded["ALPS_IB_Date"], dict)
+    assert isinstance(encoded["ALPS_IB_Value"], list)
+    assert len(json.dumps(encoded)) < len(json.dumps(columns)) / 2
+
+
+def test_types_and_short_columns_are_kept():
+    values = [1, 1, 1.0, 1.0, True, "1", "1", "1"]
+    assert decode_column(encode_column(values * 5)) == values * 5
+    assert [type(v) for v in decode_column(encode_column(values * 5))] == [type(v) for v in values * 5]
+    assert encode_column(["a", "b", "c"]) == ["a", "b", "c"]
+    assert decode_column(["a"]) == ["a"]
+
+
+def test_densities_cache_ttl():
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["ONEPYFLOW_CACHE_DIR"] = root
+        try:
+            import ALPS
+            densities = {"ALPS_Densitites_LPReceive": 12.5, "ALPS_Densitites_PalletReceive": 240.0}
+            ALPS._store_densities("ZAZ1", "2025-07-13", densities, now=1000.0)
+            assert ALPS._load_cached_densities("ZAZ1", "2025-07-13", now=1000.0 + 60) == densities
+            assert ALPS._load_cached_densities("ZAZ1", "2025-07-20", now=1000.0 + 60) is None
+            assert ALPS._load_cached_densities("ZAZ1", "2025-07-13", now=1000.0 + ALPS.ALPS_DENSITIES_TTL + 1) is None
+            assert ALPS._load_cached_densities("LBA4", "2025-07-13", now=1000.0) is None
+        finally:
+            del os.environ["ONEPYFLOW_CACHE_DIR"]
+
+
+if __name__ == "__main__":
+    for test in (test_round_trip_and_size, test_types_and_short_columns_are_kept, test_densities_cache_ttl):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Checks that ALPSRosterFunction downloads the roster TSV once per
+(site, Roster Upload Id) and afterwards only looks up the latest upload id,
+and that unused cached rosters expire after the retention period.
+"""
+
+import sys
+import os
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+LATEST_PAGE = "<html><body><p><b>Roster Upload Id:</b> {upload_id}, <b>Scenario:</b> BASE</p></body></html>"
+ROSTER_TSV = "Employee ID\tLogin\tDepartment\tShift\n101\tanna\tInbound\tES\n102\tbruno\tOutbound\tNS\n"
+
+
+class _Response:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+
+
+class _Session:
+    def __init__(self, upload_id):
+        self.upload_id = upload_id
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        if "/latest" in url:
+            return _Response(LATEST_PAGE.format(upload_id=self.upload_id))
+        return _Response(ROSTER_TSV)
+
+
+def test_roster_downloaded_once_per_upload_id():
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["ONEPYFLOW_CACHE_DIR"] = root
+        try:
+            from ALPSRoster import ALPSRosterFunction
+            session = _Session("4242")
+            first = ALPSRosterFunction("ZAZ1", session=session)
+            second = ALPSRosterFunction("ZAZ1", session=session)
+            assert [url.endswith("4242.tsv") for url in session.urls] == [False, True, False]
+            assert not first["Metadata"]["FromCache"] and second["Metadata"]["FromCache"]
+            pd.testing.assert_frame_equal(first["RosterData"], second["RosterData"])
+
+            session.upload_id = "4243"
+            third = ALPSRosterFunction("ZAZ1", session=session)
+            assert session.urls[-1].endswith("4243.tsv") and not third["Metadata"]["FromCache"]
+        finally:
+            del os.environ["ONEPYFLOW_CACHE_DIR"]
+
+
+def test_unused_rosters_expire():
+    from ALPSRoster import store_roster, load_cached_roster, prune_roster_cache
+    with tempfile.TemporaryDirectory() as root:
+        df = pd.DataFrame({"Login": ["anna"]})
+        store_roster("ZAZ1", "1", df, root=root)
+        store_roster("ZAZ1", "2", df, root=root)
+        now = time.time() + 20 * 86400
+        # Using an entry keeps it past the retention period measured from its last use
+        for name in os.listdir(root):
+            if name.startswith("1."):
+                os.utime(os.path.join(root, name), (now, now))
+        prune_roster_cache("ZAZ1", retention_days=14, root=root, now=now)
+        assert load_cached_roster("ZAZ1", "1", root=root) is not None
+        assert load_cached_roster("ZAZ1", "2", root=root) is None
+
+
+if __name__ == "__main__":
+    for test in (test_roster_downloaded_once_per_upload_id, test_unused_rosters_expire):
+        test()
+        print(f"✅ {test.__name__}")
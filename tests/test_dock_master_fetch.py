@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Checks the combined DockMaster fetch (data_retrieval.dock_master_fetch) with a
+fake bySearchParams endpoint: the window is requested as day shards with a
+timeout, a failing shard is retried on its own, appointments listed twice are
+kept once, and DockMaster and DockMaster2 are served from a single fetch.
+"""
+
+import sys
+import os
+import threading
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from data_retrieval import dock_master_fetch
+from data_retrieval.dock_master_fetch import DockMasterFetchProvider, fetch_dock_master, window_shards
+
+
+def _appointment(isa, start, status="SCHEDULED"):
+    return {
+        "inboundShipmentAppointmentId": isa,
+        "status": status,
+        "appointmentScheduleDates": {"localStartDate": {"timeDateWithTimezone": f"{start} GMT"}},
+    }
+
+
+APPOINTMENTS = [
+    _appointment("ISA1", "2025/07/08 22:00:00"),
+    _appointment("ISA2", "2025/07/09 06:30:00", "ARRIVED"),
+    _appointment("ISA3", "2025/07/10 14:00:00"),
+    _appointment("ISA4", "2025/07/11 23:59:59"),
+]
+# Arrived days before the window, only found by the ARRIVED search
+ARRIVED_EARLIER = _appointment("ISA0", "2025/07/01 08:00:00", "ARRIVED")
+
+
+class _Response:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class _DockMaster:
+    def __init__(self, fail_once=()):
+        self.calls = []
+        self.fail_once = set(fail_once)
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, cookies=None, verify=None, timeout=None):
+        assert timeout is not None
+        with self._lock:
+            self.calls.append(dict(params))
+            start = params.get("localStartDate")
+            if start in self.fail_once:
+                self.fail_once.discard(start)
+                raise requests.exceptions.ReadTimeout("read timed out")
+        if params.get("searchCriteriaValue") == "ARRIVED":
+            return _Response({"AppointmentList": [ARRIVED_EARLIER, APPOINTMENTS[1]]})
+        listed = []
+        for appointment in APPOINTMENTS:
+            when = appointment["appointmentScheduleDates"]["localStartDate"]["timeDateWithTimezone"]
+            when = when.replace(" GMT", "").replace("/", "-").replace(" ", "T")
+            if params["localStartDate"] <= when <= params["localEndDate"]:
+                listed.append(appointment)
+        if start.startswith("2025-07-10"):
+            # The endpoint also lists an appointment of the previous day
+            listed.insert(0, APPOINTMENTS[1])
+        return _Response({"AppointmentList": listed})
+
+
+def test_window_shards():
+    days = window_shards("2025-07-08", "2025-07-11")
+    assert [s["localStartDate"] for s in days][::3] == ["2025-07-08T00:00:00", "2025-07-11T00:00:00"]
+    assert days[0]["localEndDate"] == "2025-07-08T23:59:59" and len(days) == 4
+    hours = window_shards("2025-07-08", "2025-07-08", shard_hours=6)
+    assert [s["localEndDate"][11:] for s in hours] == ["05:59:59", "11:59:59", "17:59:59", "23:59:59"]
+
+
+def test_sharded_fetch_with_retry():
+    endpoint = _DockMaster(fail_once={"2025-07-10T00:00:00"})
+    with mock.patch.object(dock_master_fetch.requests, "get", endpoint.get), \
+            mock.patch.object(dock_master_fetch, "DOCKMASTER_RETRY_BACKOFF_SECONDS", 0):
+        views = fetch_dock_master("ZAZ1", "2025-07-08", "2025-07-11", None)
+    window = [a["inboundShipmentAppointmentId"] for a in views["DockMaster"]["AppointmentList"]]
+    arrived = [a["inboundShipmentAppointmentId"] for a in views["DockMaster2"]["AppointmentList"]]
+    assert window == ["ISA1", "ISA2", "ISA3", "ISA4"]
+    assert arrived == ["ISA0", "ISA2"]
+    # 4 day shards + the ARRIVED search + one retry of the failed shard
+    assert len(endpoint.calls) == 6
+    assert all(call["warehouseId"] == "ZAZ1" and call["clientId"] == "dockmaster" for call in endpoint.calls)
+
+    # A shard failing on every attempt fails its view, not the other one
+    with mock.patch.object(dock_master_fetch, "fetch_shard",
+                           mock.Mock(side_effect=dock_master_fetch.DockMasterShardError("down"))):
+        views = fetch_dock_master("ZAZ1", "2025-07-08", "2025-07-11", None, views=("DockMaster",))
+    assert views == {"DockMaster": None}
+
+
+def test_one_fetch_serves_both_modules():
+    endpoint = _DockMaster()
+    provider = DockMasterFetchProvider()
+    provider.begin_run(["DockMaster", "DockMaster2"])
+    from data_retrieval import pull_dock_master, pull_dock_master_2
+    with mock.patch.object(dock_master_fetch.requests, "get", endpoint.get), \
+            mock.patch.object(pull_dock_master, "DOCK_MASTER_FETCHES", provider), \
+            mock.patch.object(pull_dock_master_2, "DOCK_MASTER_FETCHES", provider):
+        dock_master = pull_dock_master.pull_dock_master("ZAZ1", "2025-07-08", "2025-07-11", None, None)
+        calls = len(endpoint.calls)
+        dock_master_2 = pull_dock_master_2.pull_dock_master_2("ZAZ1", None, None, "2025-07-08", "2025-07-11")
+    assert len(endpoint.calls) == calls == 5
+    assert len(dock_master["AppointmentList"]) == 4 and len(dock_master_2["AppointmentList"]) == 2
+
+    from data_processing.process_dock_master_data import process_dock_master_data
+    from data_processing.process_dock_master2_data import process_dock_master2_data
+    assert [a["ISA"] for a in process_dock_master_data(dock_master)["DockMaster"]] == ["ISA1", "ISA2", "ISA3", "ISA4"]
+    assert [a["Status"] for a in process_dock_master2_data(dock_master_2)["DockMaster2"]] == ["ARRIVED", "ARRIVED"]
+
+
+if __name__ == "__main__":
+    for test in (test_window_shards, test_sharded_fetch_with_retry, test_one_fetch_serves_both_modules):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Checks the run-scoped FMC snapshots (FMC.FMCSnapshotProvider) with a fake
+scrape: consumers share one snapshot, and the Audit flags consumers that
+were served different data after an empty scrape or a max_age re-fetch.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from FMC import FMCSnapshotProvider
+
+
+class _Scrape:
+    def __init__(self, *frames):
+        self.frames = list(frames)
+        self.calls = 0
+
+    def __call__(self, site):
+        self.calls += 1
+        return self.frames.pop(0)
+
+
+def _fmc(*vrids):
+    return pd.DataFrame({"VR ID": list(vrids), "Facility Sequence": ["ZAZ1->LBA4"] * len(vrids)})
+
+
+def test_consumers_share_one_snapshot():
+    scrape = _Scrape(_fmc("111", "112"))
+    provider = FMCSnapshotProvider(fetch_func=scrape)
+    first = provider.get("ZAZ1", "FMC")
+    first.loc[0, "VR ID"] = "changed by consumer"
+    assert provider.get("ZAZ1", "YMS")["VR ID"].tolist() == ["111", "112"]
+    report = provider.audit()["ZAZ1"]
+    assert scrape.calls == 1 and report["Consistent"] and report["Rows"] == 2
+    assert [c["Consumer"] for c in report["Consumers"]] == ["FMC", "YMS"]
+
+
+def test_different_snapshots_are_flagged():
+    # The first scrape came back empty: YMS retried and got data
+    provider = FMCSnapshotProvider(fetch_func=_Scrape(pd.DataFrame(), _fmc("111")))
+    provider.get("ZAZ1", "FMC")
+    provider.get("ZAZ1", "YMS")
+    provider.get("ZAZ1", "YMS_API")
+    report = provider.audit()["ZAZ1"]
+    assert not report["Consistent"] and report["InconsistentConsumers"] == ["FMC"]
+
+    # A re-fetch past max_age that changed the data
+    provider = FMCSnapshotProvider(fetch_func=_Scrape(_fmc("111"), _fmc("111", "112")), max_age_seconds=-1)
+    provider.get("ZAZ1", "FMC")
+    provider.get("ZAZ1", "YMS")
+    report = provider.audit()["ZAZ1"]
+    assert not report["Consistent"] and report["InconsistentConsumers"] == ["FMC"]
+
+    provider.begin_run()
+    assert provider.audit() == {}
+
+
+if __name__ == "__main__":
+    for test in (test_consumers_share_one_snapshot, test_different_snapshots_are_flagged):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Checks the in-memory handoff between pull modules and processors
+(utils.handoff): data stays in memory under the budget, is spilled to the
+cache above it and read back once, and the processors give the same result
+for a Handoff as for the temp file they used to receive.
+"""
+
+import sys
+import os
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.handoff import Handoff
+
+VIP_TEXT = (
+    "site\tpallet\tsnapshot_year\tbacklog\n"
+    "ZAZ1\t[{value=3, day=2025-07-10}, {value=4, day=2025-07-11}]\t2025\t[{value=0, day=2025-07-10}]\n"
+    "MAD4\t[{value=1, day=2025-07-10}]\t2025\t[{value=2, day=2025-07-10}]\n"
+)
+CARRIER_FRAME = pd.DataFrame({
+    "origin": ["ZAZ1", "ZAZ1", "ZAZ1"],
+    "destination": ["MAD4", "BCN1", "MAD4"],
+    "arc_name": ["ZAZ1-MAD4", "ZAZ1-BCN1", "ZAZ1-MAD4"],
+    "carrier": ["DHL", "SEUR", "UPS"],
+})
+
+
+def test_spills_over_budget():
+    with tempfile.TemporaryDirectory() as cache, \
+            mock.patch.dict(os.environ, {"ONEPYFLOW_CACHE_DIR": cache}):
+        in_memory = Handoff.from_frame("carrier_matrix", CARRIER_FRAME, meta={"fc": "ZAZ1"})
+        assert not in_memory.spilled and in_memory.load() is CARRIER_FRAME
+
+        frame = Handoff.from_frame("carrier_matrix", CARRIER_FRAME, budget_mb=0)
+        text = Handoff.from_text("vip", VIP_TEXT, budget_mb=0)
+        assert frame.spilled and text.spilled
+        pd.testing.assert_frame_equal(frame.load(), CARRIER_FRAME)
+        assert text.load() == VIP_TEXT
+        # Spilled copies are removed once loaded, and load() can be repeated
+        assert os.listdir(os.path.join(cache, "handoff")) == []
+        assert text.load() == VIP_TEXT
+
+        released = Handoff.from_text("vip", VIP_TEXT, budget_mb=0)
+        released.release()
+        assert os.listdir(os.path.join(cache, "handoff")) == []
+
+
+def test_vip_handoff_matches_file():
+    from data_processing.process_vip_data import process_vip_data
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vip.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(VIP_TEXT)
+        from_file = process_vip_data(path)
+        assert not os.path.exists(path)
+    from_memory = process_vip_data(Handoff.from_text("vip", VIP_TEXT))
+    for result in (from_file, from_memory):
+        result["metadata"].pop("timestamp")
+    assert from_memory == from_file
+    assert from_memory["vip_data"]["ZAZ1"]["pallet"][1] == {"value": "4", "day": "2025-07-11"}
+
+
+def test_frame_processors():
+    from data_processing.process_carrier_matrix_data import process_carrier_matrix_data
+    from data_processing.process_ibbt_data import process_ibbt_data
+    carrier = process_carrier_matrix_data(Handoff.from_frame("carrier_matrix", CARRIER_FRAME))
+    assert carrier["metadata"]["fc"] == "ZAZ1" and carrier["metadata"]["destinations_count"] == 2
+    assert carrier["matrix"][1] == {"origin": "ZAZ1", "destination": "BCN1", "arc_name": "ZAZ1-BCN1", "carrier": "SEUR"}
+
+    ibbt_frame = pd.DataFrame({"arc": ["ZAZ1_MAD4"], "date": ["2025-07-10"], "shift": ["ES"], "vol": [120]})
+    handoff = Handoff.from_frame("ibbt", ibbt_frame, meta={"fc": "ZAZ1", "filename": "ZAZ1_IBBT.csv"})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ZAZ1_IBBT.csv")
+        ibbt_frame.to_csv(path, index=False)
+        from_file = process_ibbt_data(path)
+    from_memory = process_ibbt_data(handoff)
+    for result in (from_file, from_memory):
+        result["metadata"].pop("timestamp", None)
+    assert from_memory == from_file
+
+
+if __name__ == "__main__":
+    for test in (test_spills_over_budget, test_vip_handoff_matches_file, test_frame_processors):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Checks that pull_icqa combines both fiscal weeks in memory, downloads the
+closed previous week only once (afterwards it comes from the local cache),
+caches it only once it ended more than the grace period ago, prunes old
+weeks, and that process_icqa_data gives the same result for the in-memory frame as
+for the CSV file path it used to receive.
+"""
+
+import sys
+import os
+import time
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+HEADER = "source_warehouse_id,destination_warehouse_id,container_type,sum_units,container_count,c1_container_count\n"
+WEEKS = {
+    "week_27.csv": HEADER + "ZAZ1,MAD4,CASE,120,10,\nZAZ1,MAD4,TOTE,45,3,2\nZAZ1,BCN1,PAX,300,4,1\n",
+    "week_26.csv": HEADER + "ZAZ1,MAD4,CASE,80,8,\nZAZ1,XOR3,TOTE,12.5,1,\n",
+}
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content.encode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+
+class _Diver:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        for suffix, content in WEEKS.items():
+            if url.split("&file_name=")[0].endswith(suffix):
+                return _Response(content)
+        raise AssertionError(f"unexpected url {url}")
+
+
+def test_weeks_combined_and_closed_week_cached():
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["ONEPYFLOW_CACHE_DIR"] = root
+        try:
+            from data_retrieval import pull_icqa
+            diver = _Diver()
+            with mock.patch.object(pull_icqa.requests, "get", diver.get), \
+                    mock.patch.object(pull_icqa, "get_fiscal_week", lambda date: (2025, 27)):
+                first = pull_icqa.pull_icqa("ZAZ1", datetime(2025, 7, 9), None, None).load()
+                second = pull_icqa.pull_icqa("ZAZ1", datetime(2025, 7, 9), None, None).load()
+            assert len(first) == 5 and first["destination_warehouse_id"].tolist()[:3] == ["MAD4", "MAD4", "BCN1"]
+            pd.testing.assert_frame_equal(first, second)
+            # The previous (closed) week is downloaded once, the current week every time
+            assert sum("week_26" in url for url in diver.urls) == 1
+            assert sum("week_27" in url for url in diver.urls) == 2
+        finally:
+            del os.environ["ONEPYFLOW_CACHE_DIR"]
+
+
+def test_week_cached_only_after_grace():
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["ONEPYFLOW_CACHE_DIR"] = root
+        try:
+            from data_retrieval import pull_icqa
+            diver = _Diver()
+            # Just after the rollover: week 26 ended an hour ago
+            just_ended = datetime.now() - timedelta(hours=1)
+            with mock.patch.object(pull_icqa.requests, "get", diver.get), \
+                    mock.patch.object(pull_icqa, "get_fiscal_week", lambda date: (2025, 27)), \
+                    mock.patch.object(pull_icqa, "_week_start", lambda date: just_ended):
+                pull_icqa.pull_icqa("ZAZ1", datetime.now(), None, None)
+                pull_icqa.pull_icqa("ZAZ1", datetime.now(), None, None)
+                assert sum("week_26" in url for url in diver.urls) == 2
+                assert pull_icqa.load_cached_week("ZAZ1", 2025, 26) is None
+
+                # A copy downloaded before the grace point is downloaded again
+                pull_icqa.store_week("ZAZ1", 2025, 26, pd.DataFrame({"stale": [1]}))
+                settled = just_ended + timedelta(hours=pull_icqa.ICQA_CLOSED_WEEK_GRACE_HOURS)
+                with mock.patch.object(pull_icqa.time, "time", lambda: settled.timestamp() + 60):
+                    combined = pull_icqa.pull_icqa("ZAZ1", datetime.now(), None, None).load()
+                assert "stale" not in combined.columns and len(combined) == 5
+                assert sum("week_26" in url for url in diver.urls) == 3
+
+            week_dir = os.path.join(root, "icqa", "ZAZ1")
+            pull_icqa.store_week("ZAZ1", 2025, 20, pd.DataFrame({"x": [1]}))
+            pull_icqa.prune_week_cache("ZAZ1", now=time.time() + 15 * 86400)
+            assert os.listdir(week_dir) == []
+        finally:
+            del os.environ["ONEPYFLOW_CACHE_DIR"]
+
+
+def test_processing_frame_matches_csv_path():
+    from data_processing.process_icqa_data import process_icqa_data
+    with tempfile.TemporaryDirectory() as root:
+        csv_path = os.path.join(root, "combined.csv")
+        with open(csv_path, "w") as f:
+            f.write(WEEKS["week_27.csv"] + WEEKS["week_26.csv"][len(HEADER):])
+        df = pd.read_csv(csv_path)
+        from_frame = process_icqa_data(df)
+        from_path = process_icqa_data(csv_path)
+        assert repr(from_frame) == repr(from_path)
+        assert not os.path.exists(csv_path)
+
+    unaggregated, aggregated, summary = from_frame
+    assert unaggregated[0] == {"source_warehouse": "ZAZ1", "destination_warehouse": "MAD4", "container_type": "CASE",
+                               "sum_units": 120.0, "container_count": 10, "c1_container_count": "NaN"}
+    mad4 = next(row for row in aggregated if row["destination_warehouse"] == "MAD4")
+    assert mad4["units"] == 245.0 and mad4["cases"] == 18.0 and mad4["UPC"] == 200.0 / 18.0
+    assert mad4["UPP"] == 0.0
+    assert summary["Units"] == 557.5 and summary["UPP"] == 75.0
+
+
+if __name__ == "__main__":
+    for test in (test_weeks_combined_and_closed_week_cached, test_week_cached_only_after_grace,
+                 test_processing_frame_matches_csv_path):
+        test()
+        print(f"✅ {test.__name__}")
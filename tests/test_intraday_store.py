@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Checks the PPR_Q intraday store (PPR_Q.IntradayStore): only the size processes
+are projected, columns are categorical from add() on, and the size totals
+match a plain sum over the cleaned frames.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from PPR_Q import IntradayStore
+
+
+def _cleaned(sizes, units, hours):
+    """A cleaned functionRollup frame: size, units and paid hours at their report columns."""
+    df = pd.DataFrame({i: [""] * len(sizes) for i in range(17)})
+    df[15], df[16], df[10] = sizes, units, hours
+    return df
+
+
+def test_only_size_processes_are_projected():
+    store = IntradayStore(["PPR_Case_Receive", "PPR_RC_Sort", "PPR_Each_Receive"])
+    store.add("PPR_Case_Receive", _cleaned(["Small"], ["5"], ["1"]))
+    store.add("PPR_RC_Sort", _cleaned([" Small", "LARGE", "small"], ["4", "6", "2"], ["1", "2", "1"]))
+    store.add("PPR_Each_Receive", _cleaned(["medium", "xl"], ["3", "1"], ["0", "1"]))
+    assert store.processes() == ["PPR_Each_Receive", "PPR_RC_Sort"]
+
+    # Every add() chunk is already categorical; the table keeps it that way
+    for chunk in store._chunks:
+        assert all(isinstance(chunk[c].dtype, pd.CategoricalDtype) for c in ("process", "size", "metric"))
+    table = store.table()
+    assert all(isinstance(table[c].dtype, pd.CategoricalDtype) for c in ("process", "size", "metric"))
+    assert "PPR_Case_Receive" not in table["process"].cat.categories
+    assert sorted(table["size"].cat.categories) == ["large", "medium", "small", "xl"]
+
+    totals = store.size_totals()
+    assert totals.loc[("PPR_RC_Sort", "small"), "units"] == 6.0
+    assert totals.loc[("PPR_RC_Sort", "small"), "rate"] == 3.0
+    assert totals.loc[("PPR_RC_Sort", "large"), "rate"] == 3.0
+    assert pd.isna(totals.loc[("PPR_Each_Receive", "medium"), "rate"])
+
+
+def test_empty_store_has_typed_columns():
+    table = IntradayStore().table()
+    assert table.empty and table["value"].dtype == "float64"
+    assert list(table["metric"].cat.categories) == ["units", "hours"]
+
+
+if __name__ == "__main__":
+    for test in (test_only_size_processes_are_projected, test_empty_store_has_typed_columns):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Checks the streaming KARIBA ItemList extraction against the previous
+BeautifulSoup extraction on the saved fixture and on table layouts that take
+the fallback paths.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_kariba_itemlist import FIXTURE, legacy_extract, streaming_extract, scaled_page
+
+
+def _chunks(html, size):
+    return (html[i:i + size] for i in range(0, len(html), size))
+
+
+def _page(*tables):
+    return "<html><body>" + "".join(tables) + "</body></html>"
+
+
+def _table(headers, rows):
+    head = "<tr>" + "".join(f"<th>{h}</th>" for h in headers) + "</tr>" if headers else ""
+    body = "".join("<tr>" + "".join(f"<td> {c} </td>" for c in row) + "</tr>" for row in rows)
+    return f"<table>{head}{body}</table>"
+
+
+def test_fixture_matches_legacy_for_any_chunking():
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+    expected = legacy_extract(html)
+    assert expected and len(expected) == 24
+    for size in (7, 100, 4096, len(html)):
+        assert streaming_extract(_chunks(html, size)) == expected
+
+
+def test_scaled_fixture_matches_legacy():
+    html = "".join(scaled_page(3000, chunk_size=1000))
+    assert streaming_extract(_chunks(html, 1000)) == legacy_extract(html)
+
+
+def test_fallback_layouts_match_legacy():
+    pages = [
+        # No quantity header: 11th column, then the first numeric column
+        _page(_table(["c%d" % i for i in range(12)], [[str(i * j) for j in range(12)] for i in range(5)])),
+        _page(_table(["id", "name", "units"], [["a", "b", "3"], ["x", "y", "n/a"]])),
+        # Headers not matching the rows, too few columns, no data rows, no table
+        _page(_table(["Quantity"], [["1", "2"]])),
+        _page(_table(["a", "b"], [["1", "2"]])),
+        _page(_table(["Quantity"], [])),
+        _page("<p>no table</p>"),
+        # A quantity table after a layout table with rows
+        _page(_table(None, [["menu"]]), _table(["Item", "Quantity"], [["a", "4"], ["b", "1,000"], ["c", ""]])),
+    ]
+    for html in pages:
+        assert streaming_extract(_chunks(html, 5)) == legacy_extract(html), html
+
+
+if __name__ == "__main__":
+    for test in (test_fixture_matches_legacy_for_any_chunking, test_scaled_fixture_matches_legacy,
+                 test_fallback_layouts_match_legacy):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Checks the per-warehouse OP2 cache (data_retrieval.necronomicon_cache): the
+source is only re-parsed when a new version is served, reads return one
+warehouse with the requested columns, and the Necronomicon processing keeps
+its totals and FCSummary values.
+"""
+
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from data_retrieval.necronomicon_cache import OP2_HEADERS, OP2PartitionCache
+
+SOURCE = "IXD/Total_Hours_volumes_OP2_2025_IXD.csv"
+
+
+def _op2_csv(rows):
+    lines = [",".join(OP2_HEADERS)]
+    for warehouse, date, line_item, volume, hours in rows:
+        lines.append(f"OP2,{date},EU,DE,DE,IXD,{warehouse},IB,RCV,{line_item},Small,{line_item},T,{volume},{hours},{hours}")
+    return "\n".join(lines) + "\n"
+
+
+V1 = _op2_csv([("ZAZ1", "2025-07-07", "Each Receive", 100, 2.5),
+               ("ZAZ1", "2025-07-14", "Each Receive", 120, 3.0),
+               ("lba4", "2025-07-07", "Pallet Receive", 40, 1.0)])
+V2 = V1 + "OP2,2025-07-21,EU,DE,DE,IXD,ZAZ1,IB,RCV,Cubiscan,Small,Cubiscan,T,10,0.5,0.5\n"
+
+
+class _Source:
+    """Fake conditional fetch that serves 304 for a matching ETag."""
+
+    def __init__(self, text, etag="v1", honours_etag=True):
+        self.text = text
+        self.etag = etag
+        self.honours_etag = honours_etag
+        self.calls = []
+
+    def __call__(self, etag, last_modified):
+        self.calls.append(etag)
+        if self.honours_etag and etag == self.etag:
+            return 304, None, {}
+        return 200, self.text, {"ETag": self.etag}
+
+
+def test_partitions_and_projected_reads():
+    with tempfile.TemporaryDirectory() as root:
+        cache = OP2PartitionCache(SOURCE, root=root)
+        manifest = cache.refresh(_Source(V1), now=1000.0)
+        assert manifest["rows"] == 3 and manifest["warehouses"] == ["ZAZ1", "lba4"]
+        df = cache.read(manifest, "zaz1", columns=["Warehouse", "Volume", "Hours"])
+        assert list(df.columns) == ["Warehouse", "Volume", "Hours"]
+        assert df["Volume"].tolist() == [100, 120] and df["Hours"].tolist() == [2.5, 3.0]
+        assert cache.read(manifest, "LBA4")["Warehouse"].tolist() == ["lba4"]
+        assert cache.read(manifest, "XXX1") is None
+
+
+def test_revalidation():
+    with tempfile.TemporaryDirectory() as root:
+        cache = OP2PartitionCache(SOURCE, root=root, revalidate_seconds=3600)
+        source = _Source(V1)
+        first = cache.refresh(source, now=1000.0)
+        # Inside the revalidation window the source is not contacted
+        cache.refresh(source, now=2000.0)
+        assert source.calls == [None]
+        # Afterwards a 304 keeps the partitions
+        assert cache.refresh(source, now=5000.0)["partition_dir"] == first["partition_dir"]
+        assert source.calls == [None, "v1"]
+
+        # A server ignoring the ETag serving the same content: no re-parse
+        same = _Source(V1, etag="v1b", honours_etag=False)
+        assert cache.refresh(same, now=9000.0)["partition_dir"] == first["partition_dir"]
+
+        # A new version replaces the partitions
+        second = cache.refresh(_Source(V2, etag="v2"), now=13000.0)
+        assert second["partition_dir"] != first["partition_dir"] and second["rows"] == 4
+        assert not os.path.exists(os.path.join(root, first["partition_dir"]))
+        assert len(cache.read(second, "ZAZ1")) == 3
+
+        # An unreachable source falls back to the cached copy
+        failed = cache.refresh(lambda etag, last_modified: (None, None, {}), now=20000.0)
+        assert failed["partition_dir"] == second["partition_dir"]
+
+
+def test_processing_totals():
+    from data_processing.process_necronomicon_data import process_necronomicon_data
+    df = pd.DataFrame({
+        "Paths": ["Each Receive - Small", "Receive Dock", "Each Receive - Small", "Transfer Out",
+                  "RC Sort - Small", "Receive Dock", "Cubiscan"],
+        "Base Volume": [10.0, 500.0, 12.0, 300.0, 40.0, 600.0, None],
+        "Base Hours": [1.0, 5.0, 1.5, 3.0, 2.0, 6.0, None],
+        "Comp Volume": [11.0, 550.0, 13.0, 330.0, 44.0, 660.0, None],
+        "Comp Hours": [1.25, 4.0, 2.0, 3.0, 2.5, 5.0, None],
+        "Comp TPH": [8.8, 137.5, 6.5, 110.0, 17.6, 132.0, 20.0],
+    })
+    result = process_necronomicon_data(df, "ZAZ1")
+    custom = {item["Paths"]: item for item in result["custom_data"]}
+    # The last Receive Dock row provides the volume; hours add up over all inbound rows
+    assert custom["FCSummary - Inbound"]["Comp Volume"] == 660.0
+    assert custom["FCSummary - Inbound"]["Comp Hours"] == 1.25 + 4.0 + 2.0 + 5.0
+    assert custom["FCSummary - DA"]["Comp Hours"] == 3.0 + 2.5
+    assert custom["Cubiscan"] == {"Paths": "Cubiscan", "Comp TPH": 20.0}
+    assert [item["Paths"] for item in result["custom_data"]][:2] == ["Each Receive - Small", "Receive Dock"]
+    # The group tables use the first row of a path and zeros for missing paths
+    extracted = {(row["Group"], row["Paths"]): row for row in result["extracted_data"]}
+    assert extracted[("Each Receive", "Each Receive - Small")]["units op2"] == 11.0
+    assert extracted[("Each Receive", "Each Receive - Large")]["h op2"] == 0.0
+    assert result["rates_data"][0] == {"Rates": "Each Receive", "LP": 10.0, "OP2": 11.0 / 1.25}
+
+
+if __name__ == "__main__":
+    for test in (test_partitions_and_projected_reads, test_revalidation, test_processing_totals):
+        test()
+        print(f"✅ {test.__name__}")
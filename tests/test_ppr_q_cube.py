@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Checks the PPR_Q hourly rollup cube (PPR_Q.hourly_cube): an employee's
+Paid Hours-Total and Jobs, repeated by FCLM on each of their Size rows, are
+summed once per hour and broadcast back to every Size row (also a Size
+missing from one hour), and segment requests stay within the shared slots.
+"""
+
+import sys
+import os
+import time
+import tempfile
+import threading
+from datetime import datetime
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from PPR_Q.hourly_cube import HourlyCube, compose_function_rollup
+
+COLUMNS = ["Function Name", "Employee Id", "Size", "Paid Hours-Total", "Paid Hours-Small",
+           "Paid Hours-Medium", "Jobs", "JPH", "Units", "UPH"]
+
+
+def _hour(rows):
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+# 06:00-07:00: E1 handled Small and Medium, 07:00-08:00 only Small
+HOUR_6 = _hour([
+    ["Receive", "E1", "Small", 1.0, 0.6, 0.4, 100, 100.0, 60, 100.0],
+    ["Receive", "E1", "Medium", 1.0, 0.6, 0.4, 100, 100.0, 80, 200.0],
+])
+HOUR_7 = _hour([
+    ["Receive", "E1", "Small", 1.0, 1.0, 0.0, 50, 50.0, 120, 120.0],
+])
+
+
+def test_size_missing_from_one_hour():
+    out = compose_function_rollup([HOUR_6, HOUR_7])
+    assert list(out.columns) == COLUMNS
+    out = out.set_index("Size")
+    # Employee totals are the same on every Size row, the Medium row included
+    assert out["Paid Hours-Total"].tolist() == [2.0, 2.0]
+    assert out["Jobs"].tolist() == [150, 150] and out["JPH"].tolist() == [75.0, 75.0]
+    assert out.loc["Small", "Paid Hours-Small"] == 1.6 and out.loc["Small", "Units"] == 180
+    assert out.loc["Small", "UPH"] == 112.5
+    assert out.loc["Medium", "Units"] == 80 and out.loc["Medium", "UPH"] == 200.0
+
+
+def test_segments_share_request_slots():
+    from PPR_Q import PPR_Q_processor
+    from PPR_Q.PPR_Q_processor import PPRQProcessor
+
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_request(self, process_key, url, window_end=None):
+        with lock:
+            in_flight.append(url)
+            peak.append(len(in_flight))
+        time.sleep(0.05)
+        with lock:
+            in_flight.remove(url)
+        return HOUR_7.copy()
+
+    with tempfile.TemporaryDirectory() as root, \
+            mock.patch.object(PPRQProcessor, "load_cookies", lambda self: None), \
+            mock.patch.object(PPRQProcessor, "_make_request", fake_request), \
+            mock.patch.object(PPR_Q_processor, "_CUBE_SEGMENT_SLOTS", threading.BoundedSemaphore(2)):
+        processor = PPRQProcessor("ZAZ1", datetime(2025, 7, 9, 6), datetime(2025, 7, 9, 14), hourly_cube=True)
+        processor.cube = HourlyCube("ZAZ1", root=root)
+        keys = ["PPR_Case_Receive", "PPR_Cubiscan", "PPR_LP_Receive"]
+        with PPR_Q_processor.ThreadPoolExecutor(max_workers=3) as executor:
+            frames = list(executor.map(processor.fetch_process_data, keys))
+    assert max(peak) <= 2 and len(peak) == 3 * 8
+    assert all(frame["Paid Hours-Total"].tolist() == [8.0] for frame in frames)
+
+    # A report that cannot be composed is not requested again for the full window
+    calls = []
+    with mock.patch.object(PPRQProcessor, "load_cookies", lambda self: None), \
+            mock.patch.object(PPRQProcessor, "_make_request",
+                              lambda self, key, url, window_end=None: calls.append(url) or pd.DataFrame({"x": [1]})), \
+            tempfile.TemporaryDirectory() as root:
+        processor = PPRQProcessor("ZAZ1", datetime(2025, 7, 9, 6), datetime(2025, 7, 9, 8), hourly_cube=True)
+        processor.cube = HourlyCube("ZAZ1", root=root)
+        assert processor.fetch_process_data("PPR_Case_Receive").empty
+    assert len(calls) == 2
+
+
+if __name__ == "__main__":
+    for test in (test_size_missing_from_one_hour, test_segments_share_request_slots):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Checks the streaming RODEO ExSD client against the previous read_csv +
+BeautifulSoup parse on a synthetic export, and the merge of sharded pulls:
+in shard order, rates not summed, and refused when RODEO ignores the range.
+"""
+
+import sys
+import os
+import io
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from datetime import datetime, timedelta
+
+from RODEO import RODEOfunction, RodeoExSDClient, RodeoExportError, ExSDShard, ExSDShardMerge, exsd_time_shards
+
+WORK_POOLS = ["Crossdock", "Palletized", "Loaded", "PickingNotYetPicked", "Sorted"]
+
+
+def _export(quantities, extra_headers=(), extra_cells=()):
+    """CSV export shaped like /CSV/ExSD?Excel=true: HTML fragments in a '<table>' column."""
+    headers = "".join(f"<th>{h}</th>" for h in ("Work Pool", "Process Path", "Total", *extra_headers))
+    lines = ['<table>', f'"<table border=1><tr>{headers}</tr>"']
+    for pool, quantity in quantities:
+        cells = "".join(f"<td>{c}</td>" for c in extra_cells)
+        lines.append(f'"<tr><td>{pool}</td><td>PPTrans &amp; Case</td><td>{quantity}</td>{cells}</tr>"')
+    lines.append('"</table>"')
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _Raw(io.BytesIO):
+    decode_content = False
+
+
+class _Response:
+    def __init__(self, body, status_code=200):
+        self.raw = _Raw(body)
+        self.status_code = status_code
+        self.encoding = "utf-8"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Session:
+    """Serves one export per call; shards are told apart by their range start."""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.calls = []
+
+    def get(self, url, params=None, **kwargs):
+        self.calls.append(params)
+        assert kwargs.get("stream") and kwargs.get("timeout")
+        body = self.bodies.get(params.get("exSDRange.rangeStartMillis"), self.bodies.get(None))
+        return _Response(body)
+
+
+def _legacy(body):
+    """The previous RODEOfunction parse, kept as reference."""
+    df = pd.read_csv(io.StringIO(body.decode("utf-8")))
+    soup = BeautifulSoup(''.join(df['<table>'].astype(str)), 'html.parser')
+    headers = [header.get_text() for header in soup.find_all('th')]
+    rows = [[cell.get_text() for cell in row.find_all('td')] for row in soup.find_all('tr') if row.find_all('td')]
+    cleaned = pd.DataFrame(rows, columns=headers)
+    return {
+        "RodeoPull_WorkPool": cleaned.iloc[:, 0].tolist(),
+        "RodeoPull_Quantity": cleaned.iloc[:, 2].tolist(),
+        **{pool: cleaned[cleaned.iloc[:, 0] == pool].iloc[:, 2].astype(float).sum()
+           for pool in ("Crossdock", "Palletized", "Loaded")},
+    }
+
+
+def test_stream_matches_legacy_parse():
+    body = _export([(pool, (i * 37) % 500) for i, pool in enumerate(WORK_POOLS * 20)])
+    result = RODEOfunction("ZAZ1", session=_Session({None: body}))
+    assert result == _legacy(body)
+
+
+def test_login_page_is_rejected():
+    body = b"<!DOCTYPE html><html><body>Midway sign in</body></html>\n"
+    assert RODEOfunction("ZAZ1", session=_Session({None: body})) is None
+
+
+def test_shards_merge_by_work_pool():
+    shards = exsd_time_shards(bucket_hours=12, horizon_hours=24)
+    starts = [shard["exSDRange.rangeStartMillis"] for shard in shards]
+    assert len(shards) == 4 and all(a["exSDRange.rangeEndMillis"] < b for a, b in zip(shards, starts[1:]))
+
+    bodies = {start: _export([(pool, n + 1) for pool in WORK_POOLS]) for n, start in enumerate(starts)}
+    session = _Session(bodies)
+    result = RODEOfunction("ZAZ1", session=session, shard_hours=12, horizon_hours=24)
+    assert len(session.calls) == 4
+    assert sorted(result["RodeoPull_WorkPool"]) == sorted(WORK_POOLS)
+    assert set(result["RodeoPull_Quantity"]) == {"10"}
+    assert result["Crossdock"] == result["Palletized"] == result["Loaded"] == 10.0
+
+
+def test_shards_merge_in_order_without_rates():
+    shards = exsd_time_shards(bucket_hours=12, horizon_hours=24)
+    starts = [shard["exSDRange.rangeStartMillis"] for shard in shards]
+    bodies = {}
+    for n, start in enumerate(starts):
+        pools = WORK_POOLS[n:] + WORK_POOLS[:n]
+        bodies[start] = _export([(pool, 2) for pool in pools], ["Rate %"], [f"{n + 1}.5"])
+    accumulator = RodeoExSDClient("ZAZ1", session=_Session(bodies)).fetch(shards)
+    # Rows in the order the first shard lists them; totals summed, the rate kept from that shard
+    assert [row[0] for row in accumulator.rows()] == WORK_POOLS
+    assert all(row[2:] == ["8", "1.5"] for row in accumulator.rows())
+    assert accumulator.headers == ["Work Pool", "Process Path", "Total", "Rate %"]
+
+
+def test_ignored_range_is_refused():
+    # Every shard gets the whole export
+    session = _Session({None: _export([(pool, 5) for pool in WORK_POOLS])})
+    assert RODEOfunction("ZAZ1", session=session, shard_hours=12, horizon_hours=24) is None
+    assert len(session.calls) == 4
+
+    # A shard with quantities for an ExSD outside its range
+    shards = exsd_time_shards(bucket_hours=12, horizon_hours=24)
+    later = datetime.fromtimestamp(shards[2]["exSDRange.rangeStartMillis"] / 1000) + timedelta(hours=1)
+    bodies = {shard["exSDRange.rangeStartMillis"]: _export([("Crossdock", n)]) for n, shard in enumerate(shards)}
+    bodies[shards[1]["exSDRange.rangeStartMillis"]] = _export([("Crossdock", 3)], [f"{later:%Y-%m-%d %H:%M}"], ["3"])
+    try:
+        RodeoExSDClient("ZAZ1", session=_Session(bodies)).fetch(shards)
+        assert False, "out-of-range shard was merged"
+    except RodeoExportError:
+        pass
+    # The same column in its own shard is fine
+    bodies[shards[1]["exSDRange.rangeStartMillis"]] = _export([("Crossdock", 3)])
+    bodies[shards[2]["exSDRange.rangeStartMillis"]] = _export([("Crossdock", 3)], [f"{later:%Y-%m-%d %H:%M}"], ["3"])
+    rows = RodeoExSDClient("ZAZ1", session=_Session(bodies)).fetch(shards).rows()
+    assert rows == [["Crossdock", "PPTrans & Case", "9", "3"]]
+
+
+def test_shards_fold_rows_into_typed_records():
+    shard = ExSDShard()
+    parser_rows = [("Crossdock", n) for n in range(100)] + [("Sorted", 2)]
+    client = RodeoExSDClient("ZAZ1", session=_Session({None: _export(parser_rows, ["Rate %"], ["0.5"])}))
+    client.fetch_shard(exsd_time_shards(bucket_hours=12, horizon_hours=24)[0], shard)
+    # One record per work pool and process path; quantities held as numbers
+    assert shard.records == {("Crossdock", "PPTrans & Case"): ["Crossdock", "PPTrans & Case", 4950.0, "0.5"],
+                             ("Sorted", "PPTrans & Case"): ["Sorted", "PPTrans & Case", 2.0, "0.5"]}
+
+    merged = ExSDShardMerge()
+    merged.add(shard)
+    other = ExSDShard()
+    other.set_headers(["Work Pool", "Process Path", "Total"])
+    other.add(["Loaded", "PPTrans & Case", "1"])
+    other.add(["Crossdock", "PPTrans & Case", "0.25"])
+    merged.add(other)
+    assert merged.result().rows() == [["Crossdock", "PPTrans & Case", "4950.25", "0.5"],
+                                      ["Sorted", "PPTrans & Case", "2", "0.5"],
+                                      ["Loaded", "PPTrans & Case", "1", ""]]
+
+
+if __name__ == "__main__":
+    for test in (test_stream_matches_legacy_parse, test_login_page_is_rejected, test_shards_merge_by_work_pool,
+                 test_shards_merge_in_order_without_rates, test_ignored_range_is_refused,
+                 test_shards_fold_rows_into_typed_records):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Checks the local mirror of network-share TSVs (data_retrieval.share_mirror)
+with a local directory standing in for the share: the file is copied and
+re-partitioned only when its size or modification time changes, and the pull
+modules read the same rows from their FC's partition as from the full file.
+"""
+
+import sys
+import os
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from data_retrieval.share_mirror import ShareFileMirror, arc_origin_key
+
+SPARK_TSV = (
+    "warehouse\tfmccarrier\tfmcoriginfc\tvolume\n"
+    "ZAZ1\tDHL\tMAD4\t10\n"
+    "mad4\tUPS\tZAZ1\t5\n"
+    "zaz1\tSEUR\tBCN1\t7\n"
+    "\tDHL\tBCN1\t1\n"
+)
+F2P_TSV = (
+    "arc\tday\tf2p\n"
+    "ZAZ1_MAD4\t2025-07-10\t100\n"
+    "ZAZ1_MAD4\t2025-07-11\t120\n"
+    "ZAZ1\t2025-07-11\t5\n"
+    "ZAZ10_BCN1\t2025-07-11\t9\n"
+    "Lba4_XOR3\t2025-07-11\t40\n"
+)
+
+
+def _write(path, content, mtime=None):
+    with open(path, "w") as f:
+        f.write(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_copies_only_when_changed():
+    with tempfile.TemporaryDirectory() as share, tempfile.TemporaryDirectory() as root:
+        source = os.path.join(share, "SPARK_IXD.txt")
+        _write(source, SPARK_TSV, mtime=1_700_000_000)
+        mirror = ShareFileMirror(source, partition_column="warehouse", root=root)
+
+        first = mirror.sync()
+        with mock.patch("shutil.copyfile") as copyfile:
+            assert mirror.sync()["version"] == first["version"]
+            assert not copyfile.called
+        assert first["keys"] == ["ZAZ1", "MAD4"] and first["rows"] == 4
+
+        # Same size, newer mtime: copied again
+        _write(source, SPARK_TSV.replace("DHL", "GLS"), mtime=1_700_000_100)
+        second = mirror.sync()
+        assert second["version"] == first["version"] + 1
+        assert not os.path.exists(os.path.join(root, first["partition_dir"]))
+        assert mirror.read(second, "ZAZ1")["fmccarrier"].tolist() == ["GLS", "SEUR"]
+
+        # Share not reachable: the mirrored copy is used
+        os.remove(source)
+        assert mirror.sync()["version"] == second["version"]
+        assert len(mirror.read_all()) == 4
+
+
+def test_partition_matches_full_file_filter():
+    with tempfile.TemporaryDirectory() as share, tempfile.TemporaryDirectory() as root:
+        source = os.path.join(share, "SPARK_IXD.txt")
+        _write(source, SPARK_TSV)
+        from data_retrieval import pull_spark_snapshot_data as spark
+        with mock.patch.object(spark, "SPARK_MIRROR", ShareFileMirror(source, "warehouse", root=root)):
+            result = spark.pull_spark_snapshot_data("zaz1", None, None, None, None)
+            missing = spark.pull_spark_snapshot_data("XOR3", None, None, None, None)
+        df = pd.read_csv(source, sep="\t")
+        expected = df[df["warehouse"].str.upper() == "ZAZ1"].reset_index(drop=True)
+        pd.testing.assert_frame_equal(result["dataframe"], expected)
+        assert missing["dataframe"].empty and list(missing["dataframe"].columns) == list(df.columns)
+
+
+def test_f2p_arc_partitions():
+    with tempfile.TemporaryDirectory() as share, tempfile.TemporaryDirectory() as root:
+        source = os.path.join(share, "F2P_DICE.txt")
+        _write(source, F2P_TSV)
+        from data_retrieval import pull_f2p_data as f2p
+        mirror = ShareFileMirror(source, partition_column="arc", key=arc_origin_key, root=root)
+        with mock.patch.object(f2p, "F2P_MIRROR", mirror):
+            zaz1 = f2p.pull_f2p_data(None, "ZAZ1", None, None)
+            # No exact origin 'LBA4': falls back to the case-insensitive origin match
+            lba4 = f2p.pull_f2p_data(None, "LBA4", None, None)
+        assert zaz1["Arc"].tolist() == ["ZAZ1_MAD4", "ZAZ1"]
+        assert zaz1.loc[zaz1["Arc"] == "ZAZ1_MAD4", "2025-07-10"].item() == 100
+        assert lba4["Arc"].tolist() == ["Lba4_XOR3"]
+
+
+if __name__ == "__main__":
+    for test in (test_copies_only_when_changed, test_partition_matches_full_file_filter, test_f2p_arc_partitions):
+        test()
+        print(f"✅ {test.__name__}")
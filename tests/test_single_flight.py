@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Checks the FCLM single-flight registry (utils.single_flight): results of a
+window still open are only reused for a few seconds, results of an ended
+window for longer, expired flights are dropped as calls complete, and the
+pooled PPR_Q fallback processors stay bounded.
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import single_flight
+from utils.single_flight import SingleFlight, window_linger, CLOSED_WINDOW_LINGER_SECONDS
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def test_linger_follows_window():
+    now = datetime(2025, 7, 9, 12)
+    assert window_linger(now - timedelta(minutes=1), now) == CLOSED_WINDOW_LINGER_SECONDS
+    assert window_linger(now + timedelta(hours=1), now) is None
+
+    clock = _Clock()
+    calls = []
+    flights = SingleFlight("test", linger_seconds=5)
+    with mock.patch.object(single_flight.time, "time", clock.time):
+        def fetch(name):
+            return lambda: calls.append(name) or name
+
+        flights.do("intraday", fetch("intraday"))
+        flights.do("closed", fetch("closed"), linger_seconds=CLOSED_WINDOW_LINGER_SECONDS)
+        clock.now += 3
+        flights.do("intraday", fetch("intraday"))
+        assert calls == ["intraday", "closed"]
+
+        # Past the default linger the open window is fetched again, the closed one is not
+        clock.now += 10
+        flights.do("intraday", fetch("intraday"))
+        flights.do("closed", fetch("closed"))
+        assert calls == ["intraday", "closed", "intraday"]
+
+        # Expired flights are dropped when a call completes, not only on a later lookup
+        clock.now += CLOSED_WINDOW_LINGER_SECONDS + 1
+        flights.do("other", fetch("other"))
+        assert set(flights._flights) == {"other"}
+
+
+def test_fallback_pool_is_bounded():
+    from PPR_Q import PPR_Q_processor
+    from PPR_Q.PPR_Q_processor import PPRQProcessor
+    start = datetime(2025, 7, 9, 6)
+    with mock.patch.object(PPRQProcessor, "load_cookies", lambda self: None), \
+            mock.patch.object(PPR_Q_processor, "_FALLBACK_POOL", PPR_Q_processor.OrderedDict()):
+        first = PPRQProcessor.pooled("ZAZ1", start, start + timedelta(hours=8))
+        for hours in range(1, PPR_Q_processor.FALLBACK_POOL_SIZE + 3):
+            PPRQProcessor.pooled("ZAZ1", start + timedelta(hours=hours), start + timedelta(hours=hours + 8))
+            # The first window is kept while it is in use
+            assert PPRQProcessor.pooled("ZAZ1", start, start + timedelta(hours=8)) is first
+        assert len(PPR_Q_processor._FALLBACK_POOL) == PPR_Q_processor.FALLBACK_POOL_SIZE
+
+
+if __name__ == "__main__":
+    for test in (test_linger_follows_window, test_fallback_pool_is_bounded):
+        test()
+        print(f"✅ {test.__name__}")
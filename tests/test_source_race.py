@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Checks the concurrent source race (data_retrieval.source_race) with fake
+locations: a dead location no longer costs a full timeout, a lower tier only
+wins once the higher ones failed, a top-tier last-known-good location is
+asked first, and an older copy never wins over a newer one.
+"""
+
+import sys
+import os
+import time
+import tempfile
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_retrieval.source_race import LastGoodSources, SourceCandidate, race_sources, http_freshness
+
+
+class _Location:
+    def __init__(self, content, freshness=None, delay=0.0, fails=False):
+        self.content = content
+        self.freshness = freshness
+        self.delay = delay
+        self.fails = fails
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def fetch(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fails:
+            raise ConnectionError("unreachable")
+        return self.content, self.freshness
+
+
+def _parse(content):
+    if not content.startswith("arc,"):
+        raise ValueError("not a CSV")
+    return content.splitlines()
+
+
+def _candidates(**locations):
+    return [SourceCandidate(name, location.fetch, tier) for name, (location, tier) in locations.items()]
+
+
+def test_tiers_keep_priority():
+    with tempfile.TemporaryDirectory() as root:
+        store = LastGoodSources(path=os.path.join(root, "sources.json"))
+        locations = dict(
+            s3=(_Location(None, delay=0.3, fails=True), 0),
+            diver=(_Location("<html>login</html>", delay=0.05), 1),
+            share=(_Location("arc,vol\nZAZ1_MAD4,3", freshness=100.0), 3),
+        )
+        start = time.time()
+        win = race_sources("ibbt/ZAZ1", _candidates(**locations), _parse, store=store)
+        # The share answers first but only wins once the higher tiers have failed
+        assert 0.3 <= time.time() - start < 0.9
+        assert win.source == "share" and win.data == ["arc,vol", "ZAZ1_MAD4,3"]
+        assert store.get("ibbt/ZAZ1")["source"] == "share"
+
+        # A remembered lower-tier location gets no head start: production is asked and wins
+        s3 = _Location("arc,vol\nZAZ1_MAD4,4", delay=0.2)
+        locations = dict(s3=(s3, 0), share=(_Location("arc,vol\nZAZ1_MAD4,3"), 3))
+        win = race_sources("ibbt/ZAZ1", _candidates(**locations), _parse, store=store)
+        assert win.source == "s3" and s3.calls == 1
+
+        # A hanging higher tier is only waited for tier_wait seconds
+        locations = dict(s3=(_Location(None, delay=2.0, fails=True), 0), share=(_Location("arc,vol\nx"), 3))
+        start = time.time()
+        win = race_sources("ibbt/ZAZ1", _candidates(**locations), _parse, store=store,
+                           head_start=0.1, tier_wait=0.2)
+        assert win.source == "share" and time.time() - start < 1.0
+
+        # Nothing valid
+        assert race_sources("ibbt/ZAZ1", _candidates(s3=(_Location(None, fails=True), 0)), _parse,
+                            store=store, head_start=0.1) is None
+
+
+def test_head_start_for_top_tier():
+    with tempfile.TemporaryDirectory() as root:
+        store = LastGoodSources(path=os.path.join(root, "sources.json"))
+        store.record("ibbt/ZAZ1", "s3", 100.0)
+        diver = _Location("arc,vol\nZAZ1_MAD4,4", freshness=100.0)
+        locations = dict(s3=(_Location("arc,vol\nZAZ1_MAD4,4", freshness=100.0), 0), diver=(diver, 1))
+        win = race_sources("ibbt/ZAZ1", _candidates(**locations), _parse, store=store)
+        assert win.source == "s3" and diver.calls == 0
+
+        # An older copy from the head start is not accepted: the others are asked
+        locations = dict(s3=(_Location("arc,vol\nold", freshness=50.0), 0), diver=(diver, 1))
+        win = race_sources("ibbt/ZAZ1", _candidates(**locations), _parse, store=store)
+        assert win.source == "diver" and diver.calls == 1
+
+
+def test_older_copy_never_wins():
+    with tempfile.TemporaryDirectory() as root:
+        store = LastGoodSources(path=os.path.join(root, "sources.json"))
+        # Same tier, no freshness known yet: the answers within the grace window compete
+        locations = dict(
+            diver=(_Location("arc,vol\nold", freshness=100.0), 1),
+            ecft=(_Location("arc,vol\nnew", freshness=300.0, delay=0.2), 1),
+        )
+        win = race_sources("carrier_matrix/ZAZ1", _candidates(**locations), _parse, store=store)
+        assert win.source == "ecft" and win.freshness == 300.0
+        remembered = store.get("carrier_matrix/ZAZ1")
+        assert remembered["source"] == "ecft" and remembered["freshness"] == 300.0
+
+        # Only older copies: the freshest of them is used, the remembered freshness stays
+        locations = dict(
+            share=(_Location("arc,vol\nold", freshness=100.0), 3),
+            s3=(_Location("arc,vol\nolder", freshness=50.0), 0),
+        )
+        win = race_sources("carrier_matrix/ZAZ1", _candidates(**locations), _parse, store=store)
+        assert win.source == "share"
+        assert store.get("carrier_matrix/ZAZ1")["freshness"] == 300.0
+
+        reloaded = LastGoodSources(path=os.path.join(root, "sources.json"))
+        assert reloaded.get("carrier_matrix/ZAZ1")["source"] == "share"
+
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Midway</title></head>
+<body><form action="/login">Sign in</form></body>
+</html>
+"""
+
+
+def test_login_page_does_not_win():
+    # The real parsers; their modules need requests_kerberos
+    ibbt = pytest.importorskip("data_retrieval.pull_ibbt_data")
+    carrier_matrix = pytest.importorskip("data_retrieval.pull_carrier_matrix_data")
+    files = [
+        (ibbt.parse_ibbt_csv, "arc,date,shift,vol\nZAZ1_MAD4,2025-07-09,ES,3"),
+        (carrier_matrix.read_carrier_matrix_csv, "origin,destination,arc_name,carrier\nZAZ1,MAD4,ZAZ1_MAD4,GEFC"),
+    ]
+    for parse, csv in files:
+        with pytest.raises(ValueError):
+            parse(LOGIN_PAGE)
+        with tempfile.TemporaryDirectory() as root:
+            store = LastGoodSources(path=os.path.join(root, "sources.json"))
+            # The top-tier S3 client redirected to login loses to a lower tier with the file
+            locations = dict(s3=(_Location(LOGIN_PAGE), 0), diver=(_Location(csv, delay=0.05), 1))
+            win = race_sources("file/ZAZ1", _candidates(**locations), parse, store=store)
+            assert win.source == "diver" and len(win.data) == 1
+            assert store.get("file/ZAZ1")["source"] == "diver"
+
+
+def test_http_freshness():
+    assert http_freshness({"Last-Modified": "Wed, 09 Jul 2025 06:00:00 GMT"}) == 1752040800.0
+    assert http_freshness({}) is None and http_freshness({"Last-Modified": "garbage"}) is None
+
+
+if __name__ == "__main__":
+    for test in (test_tiers_keep_priority, test_head_start_for_top_tier, test_older_copy_never_wins,
+                 test_login_page_does_not_win, test_http_freshness):
+        test()
+        print(f"✅ {test.__name__}")
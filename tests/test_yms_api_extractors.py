@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Checks the YMS_API fallback extractors (YMS_API.yms_field_extractors), which
+read the FIELD_FALLBACKS declarations: the first accepted path wins, blank
+and 'NaN' values fall through, and the default is used last.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from YMS_API.yms_field_extractors import (
+    extract_equipment_type, extract_carrier, extract_vrid,
+    extract_load_traditional_style, extract_lane_traditional_style,
+)
+
+
+def test_fallbacks_in_order():
+    assert extract_equipment_type({"type": "TRACTOR", "vehicletype": "BOX_TRUCK"}) == "TRACTOR"
+    assert extract_equipment_type({"type": "NaN", "equipment_type": " ", "vehicletype": "BOX_TRUCK"}) == "BOX_TRUCK"
+    assert extract_equipment_type({}) == "TRAILER"
+
+    assert extract_carrier({"ownercode": "NaN", "carrier": "XPOE"}) == "XPOE"
+    assert extract_carrier({"ownercode": " ", "shipperaccounts": "ATS_EU_FLEET"}) == "ATSUK"
+    assert extract_carrier({"shipperaccounts": "AMZN_UK"}) == "NaN"
+
+    assert extract_vrid({"vrid": " 1129DGV3C ", "isaid": "ISA1"}) == "1129DGV3C"
+    assert extract_vrid({"vrid": "NaN", "isaid": "ISA1"}) == "ISA1"
+    assert extract_vrid({"identifiers": {"VR_ID": "1129DGV3C"}}) == "NaN"
+
+
+def test_nested_load_paths():
+    load = {"lane": "ZAZ1->LBA4", "shipperAccounts": ["AMZN_UK", "SECOND"]}
+    assert extract_load_traditional_style({"load": load, "shipperaccounts": "OTHER"}) == "AMZN_UK"
+    assert extract_load_traditional_style({"load": {"shipperAccounts": []}, "shipperaccounts": "OTHER"}) == "OTHER"
+    assert extract_lane_traditional_style({"load": load, "lane": "ZAZ1->MAN1"}) == "ZAZ1_LBA4"
+    assert extract_lane_traditional_style({"load": {"lane": ""}, "lane": "ZAZ1->MAN1"}) == "ZAZ1_MAN1"
+    assert extract_lane_traditional_style({"load": "not a dict", "lane": "NaN"}) == "NaN"
+
+
+if __name__ == "__main__":
+    for test in (test_fallbacks_in_order, test_nested_load_paths):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Checks the YMS / YMS_API shadow runner (OneFlow.oneflow_yms_shadow): result
+normalization, the field-by-field diff, and automatic backend selection once
+agreement is established.
+"""
+
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.latency_tracker import LatencyTracker
+from OneFlow.oneflow_yms_shadow import (ShadowComparisonStore, YMSShadowRunner,
+                                        compare_results, normalize_result)
+
+
+def _main(names, lanes, unavailable=None):
+    count = len(names)
+    return {"Main": {
+        "YMS_name": names,
+        "YMS_type": ["TRAILER"] * count,
+        "YMS_SCAC": ["GEFC"] * count,
+        "YMS_status": ["Full"] * count,
+        "YMS_Unavailable": unavailable or [0] * count,
+        "YMS_UnavailableReason": ["NaN"] * count,
+        "YMS_Lane": lanes,
+        "YMS_Load": ["NaN"] * count,
+        "YMS_VRID": ["NaN"] * count,
+    }}
+
+
+def _runner(root, results, calls=None, **kwargs):
+    def run(backend, site, shadow=False):
+        if calls is not None:
+            calls.append((backend, shadow))
+        return results[backend]
+
+    return YMSShadowRunner(store=ShadowComparisonStore(path=os.path.join(root, "cmp.json")),
+                           latency=LatencyTracker("yms", path=os.path.join(root, "lat.json")),
+                           runner=run, **kwargs)
+
+
+def test_normalization_treats_empty_values_alike():
+    a = normalize_result(_main(["DD001", "DD001"], ["ZAZ1->LBA4 ", None], unavailable=[False, True]))
+    b = normalize_result(_main(["DD001", "DD001"], ["ZAZ1->LBA4", ""], unavailable=[0, 1]))
+    assert list(a) == ["DD001|TRAILER|0", "DD001|TRAILER|1"]
+    assert a == b
+    assert normalize_result({"Main": {"error": "no data"}}) is None
+
+
+def test_compare_counts_missing_records_as_disagreement():
+    primary = normalize_result(_main(["DD001", "DD002", "DD003"], ["A", "B", "C"]))
+    shadow = normalize_result(_main(["DD001", "DD002"], ["A", "X"]))
+    comparison = compare_results(primary, shadow)
+    assert comparison["records"] == {"primary": 3, "shadow": 2, "matched": 2}
+    assert comparison["fields"]["YMS_Lane"]["agreement"] == round(1 / 3, 4)
+    assert comparison["fields"]["YMS_Lane"]["mismatches"] == [
+        {"record": "DD002|TRAILER|0", "primary": "B", "shadow": "X"}]
+    assert comparison["fields"]["YMS_SCAC"]["agreement"] == round(2 / 3, 4)
+
+
+def test_shadow_run_records_comparison_and_auto_selects_faster_backend():
+    results = {"YMS": _main(["DD001"], ["A"]), "YMS_API": _main(["DD001"], ["A"])}
+    with tempfile.TemporaryDirectory() as root:
+        calls = []
+        runner = _runner(root, results, calls, shadow_mode=True, auto_select=True, min_comparisons=2)
+        result = runner.run("ZAZ1")
+        assert all(thread.daemon for thread in runner._threads)
+        runner.wait()
+        # Only the shadow backend runs as a shadow (off the serving session pool and yard state)
+        assert calls == [("YMS", False), ("YMS_API", True)]
+        assert result["_audit"]["Backend"]["serving"] == "YMS"
+        assert result["_audit"]["Backend"]["shadow"] == "YMS_API"
+        assert runner.store.recent("ZAZ1")[-1]["agreement"] == 1.0
+        assert runner.select("ZAZ1")[0] == "YMS"
+
+        runner.run("ZAZ1")
+        runner.wait()
+        for seconds in (5.0, 6.0):
+            runner.latency.record("ZAZ1:YMS", seconds)
+            runner.latency.record("ZAZ1:YMS_API", seconds / 10)
+        assert runner.select("ZAZ1") == ("YMS_API", "auto (faster, agreement established)")
+
+        results["YMS"] = _main(["DD001"], ["B"])
+        runner.run("ZAZ1")
+        runner.wait()
+        assert runner.select("ZAZ1")[0] == "YMS"
+
+
+def test_latency_not_recorded_without_shadow_or_auto_select():
+    results = {"YMS": _main(["DD001"], ["A"]), "YMS_API": _main(["DD001"], ["A"])}
+    with tempfile.TemporaryDirectory() as root:
+        runner = _runner(root, results, shadow_mode=False, auto_select=False)
+        runner.run("ZAZ1")
+        assert runner.latency.samples("ZAZ1:YMS") == []
+        assert not os.path.exists(os.path.join(root, "lat.json"))
+
+
+if __name__ == "__main__":
+    for test in (test_normalization_treats_empty_values_alike,
+                 test_compare_counts_missing_records_as_disagreement,
+                 test_shadow_run_records_comparison_and_auto_selects_faster_backend,
+                 test_latency_not_recorded_without_shadow_or_auto_select):
+        test()
+        print(f"✅ {test.__name__}")
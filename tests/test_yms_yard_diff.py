@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Checks incremental yard enrichment (YMS.yms_yard_diff) against a full
+_post_process_and_crosscheck pass on the saved yard fixtures, and the
+movement feed produced between two consecutive pulls.
+"""
+
+import sys
+import os
+import copy
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from YMS.yms_transform import transform_yard_data, _post_process_and_crosscheck
+from YMS.yms_yard_diff import YardStateStore, enrich_incrementally
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "yms", "yard_state_zaz1.json")
+OUTPUT_COLUMNS = ['name', 'isempty', 'equipment_type', 'ownercode', 'unavailable', 'unavailableReason', 'load', 'vrid']
+
+
+def _yard():
+    with open(FIXTURE) as f:
+        return json.load(f)
+
+
+def _frame(yard_state):
+    return pd.DataFrame(transform_yard_data(yard_state))
+
+
+def _fmc(df):
+    """FMC rows that cross-check existing VRIDs and fill missing ones by location."""
+    rows = []
+    for name, vrid in zip(df['name'], df['vrid']):
+        if isinstance(vrid, str):
+            rows.append({"VR ID": vrid, "Facility Sequence": "ZAZ1->MAN1", "Shipper Accounts": "AMZN_UK", "Carrier": "GEFC"})
+        else:
+            rows.append({"VR ID": f"F{name}", "Facility Sequence": f"{name}_LBA4", "Shipper Accounts": "AMZN_UK", "Carrier": "GEFC"})
+    return pd.DataFrame(rows).drop_duplicates("VR ID")
+
+
+def _output(filtered_df):
+    return filtered_df[OUTPUT_COLUMNS].fillna("NaN").astype(str).values.tolist()
+
+
+def _move_yard(yard_state):
+    """Departure of one asset, arrival of another, one status and one lane change."""
+    moved = copy.deepcopy(yard_state)
+    locations = [loc for summary in moved["locationsSummaries"] for loc in summary["locations"]]
+    with_assets = [loc for loc in locations if loc.get("yardAssets")]
+    departed = with_assets[0]["yardAssets"].pop(0)
+    arrived = copy.deepcopy(departed)
+    arrived["owner"] = {"code": "XPOE"}
+    with_assets[-1]["yardAssets"].append(arrived)
+    # The load status is the last status found for an asset
+    with_assets[1]["yardAssets"][0].setdefault("load", {})["status"] = "DEPARTING"
+    with_assets[2]["yardAssets"][0].setdefault("load", {})["lane"] = "ZAZ1->XYZ9"
+    return moved
+
+
+def test_incremental_matches_full_enrichment():
+    """Every run produces the same output columns as enriching the whole yard."""
+    with tempfile.TemporaryDirectory() as root:
+        store = YardStateStore(root=root)
+        first = _frame(_yard())
+        fmc = _fmc(first)
+
+        filtered, movements, stats = enrich_incrementally(first.copy(), fmc, "ZAZ1", store=store, now=1000.0)
+        assert _output(filtered) == _output(_post_process_and_crosscheck(first.copy(), fmc, "ZAZ1"))
+        assert movements["baseline"] and stats["enriched"] == len(first)
+
+        second = _frame(_move_yard(_yard()))
+        filtered, movements, stats = enrich_incrementally(second.copy(), fmc, "ZAZ1", store=store, now=1060.0)
+        assert _output(filtered) == _output(_post_process_and_crosscheck(second.copy(), fmc, "ZAZ1"))
+        assert stats["reused"] > 0 and stats["enriched"] < len(second)
+        assert movements["since"] == 1000.0
+        assert movements["counts"].get("ARRIVAL", 0) >= 1 and movements["counts"].get("DEPARTURE", 0) >= 1
+        assert movements["counts"].get("STATUS_CHANGE", 0) == 1
+        assert movements["counts"].get("LANE_CHANGE", 0) == 1
+
+
+def test_fmc_change_reenriches_everything():
+    """Records are only reused when the FMC columns enrichment reads are unchanged."""
+    with tempfile.TemporaryDirectory() as root:
+        store = YardStateStore(root=root)
+        df = _frame(_yard())
+        fmc = _fmc(df)
+        enrich_incrementally(df.copy(), fmc, "ZAZ1", store=store, now=1000.0)
+
+        _, movements, stats = enrich_incrementally(df.copy(), fmc.assign(Status="ARRIVED"), "ZAZ1", store=store, now=1010.0)
+        assert stats["reused"] == len(df) and movements["events"] == []
+
+        changed_fmc = fmc.iloc[1:]
+        filtered, _, stats = enrich_incrementally(df.copy(), changed_fmc, "ZAZ1", store=store, now=1020.0)
+        assert stats["fmc_changed"] and stats["enriched"] == len(df)
+        assert _output(filtered) == _output(_post_process_and_crosscheck(df.copy(), changed_fmc, "ZAZ1"))
+
+
+def test_stale_state_starts_new_baseline():
+    with tempfile.TemporaryDirectory() as root:
+        store = YardStateStore(root=root, max_age_seconds=60)
+        df = _frame(_yard())
+        enrich_incrementally(df.copy(), pd.DataFrame(), "ZAZ1", store=store, now=1000.0)
+        _, movements, stats = enrich_incrementally(df.copy(), pd.DataFrame(), "ZAZ1", store=store, now=2000.0)
+        assert movements["baseline"] and stats["reused"] == 0
+
+
+def test_shadow_run_keeps_saved_state():
+    with tempfile.TemporaryDirectory() as root:
+        store = YardStateStore(root=root)
+        yard = _yard()
+        enrich_incrementally(_frame(yard), pd.DataFrame(), "ZAZ1", store=store, now=1000.0)
+        saved = store.load("ZAZ1", now=1000.0)
+        # A shadow pull of a moved yard diffs against the saved state but does not replace it
+        _, movements, _ = enrich_incrementally(_frame(_move_yard(yard)), pd.DataFrame(), "ZAZ1",
+                                               store=store, now=1010.0, save=False)
+        assert movements["events"]
+        pd.testing.assert_frame_equal(store.load("ZAZ1", now=1020.0), saved)
+
+
+if __name__ == "__main__":
+    for test in (test_incremental_matches_full_enrichment, test_fmc_change_reenriches_everything,
+                 test_stale_state_starts_new_baseline, test_shadow_run_keeps_saved_state):
+        test()
+        print(f"✅ {test.__name__}")
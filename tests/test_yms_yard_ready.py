@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Checks the yard readiness probe (YMS.yms_network.wait_for_yard_state) on a
+simulated clock: a reused session probes at once but then backs off instead
+of polling the yard state in a busy loop until the deadline.
+"""
+
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from YMS import yms_network
+from YMS.yms_config import YARD_READY_INITIAL_DELAY, YARD_READY_REUSED_DEADLINE
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _wait(initial_delay, ready_after=None):
+    clock = _Clock()
+    probes = []
+
+    def yard_state(session, token):
+        probes.append(clock.now)
+        return {"ready": ready_after is not None and clock.now >= ready_after}
+
+    with mock.patch.object(yms_network.time, "monotonic", clock.monotonic), \
+            mock.patch.object(yms_network.time, "sleep", clock.sleep), \
+            mock.patch.object(yms_network, "get_yard_state", yard_state), \
+            mock.patch.object(yms_network, "is_yard_ready", lambda state, site: state["ready"]):
+        result = yms_network.wait_for_yard_state(None, "token", "ZAZ1",
+                                                 deadline=YARD_READY_REUSED_DEADLINE,
+                                                 initial_delay=initial_delay)
+    return result, probes, clock
+
+
+def test_reused_session_backs_off():
+    (yard_state, readiness), probes, clock = _wait(0.0)
+    assert yard_state == {} and not readiness["ready"]
+    # 0, 0.5, 1.5, 3.5, 7.5 and the deadline: a handful of probes, not a busy loop
+    assert probes[0] == 0.0 and probes[1] == YARD_READY_INITIAL_DELAY
+    assert readiness["probes"] == len(probes) == 6
+    assert clock.now == YARD_READY_REUSED_DEADLINE
+
+
+def test_ready_yard_returns_on_first_probe():
+    (yard_state, readiness), probes, clock = _wait(0.0, ready_after=0.0)
+    assert readiness == {"ready": True, "seconds": 0.0, "probes": 1} and clock.sleeps == [0.0]
+
+
+if __name__ == "__main__":
+    for test in (test_reused_session_backs_off, test_ready_yard_returns_on_first_probe):
+        test()
+        print(f"✅ {test.__name__}")
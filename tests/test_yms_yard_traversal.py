@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Checks the single-pass yard traversal (extract_location_attributes) against
+the recursive_find_* helpers and against transform_yard_data output saved in
+tests/fixtures/yms/*.expected.json.
+"""
+
+import sys
+import os
+import json
+import glob
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from YMS.yms_transform import (
+    extract_location_attributes, transform_yard_data,
+    recursive_find_lane, recursive_find_shipper_accounts, recursive_find_status,
+)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "yms")
+
+
+def _fixtures():
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "yard_state_*.json"))):
+        if not path.endswith(".expected.json"):
+            yield path
+
+
+def _locations(yard_state):
+    for summary in yard_state.get("locationsSummaries", []):
+        for location in summary.get("locations", []):
+            yield location
+
+
+def test_attributes_match_recursive_helpers():
+    """Every location yields exactly what the three recursive walks return."""
+    for path in _fixtures():
+        with open(path) as f:
+            yard_state = json.load(f)
+        for location in _locations(yard_state):
+            attributes = extract_location_attributes(location)
+            assert attributes["lanes"] == recursive_find_lane(location), path
+            assert attributes["shipper_accounts"] == recursive_find_shipper_accounts(location), path
+            expected_statuses = [recursive_find_status(asset) for asset in location.get("yardAssets", [])]
+            assert attributes["asset_statuses"] == expected_statuses, path
+
+
+def test_transform_matches_saved_output():
+    """transform_yard_data output is unchanged for every saved yard state."""
+    for path in _fixtures():
+        with open(path) as f:
+            yard_state = json.load(f)
+        with open(path[:-len(".json")] + ".expected.json") as f:
+            expected = json.load(f)
+        assert transform_yard_data(yard_state) == expected, path
+
+
+def test_cycles_and_depth_are_bounded():
+    """Self-referencing and very deep structures terminate."""
+    location = {"code": "CYCLE", "yardAssets": [{"status": "OPEN", "load": {"lane": "A->B"}}]}
+    location["yardAssets"][0]["self"] = location["yardAssets"][0]
+    location["parent"] = location
+    attributes = extract_location_attributes(location)
+    assert attributes["lanes"] == ["A->B"]
+    assert attributes["asset_statuses"] == [["OPEN"]]
+
+    deep = leaf = {}
+    for _ in range(500):
+        leaf["next"] = {}
+        leaf = leaf["next"]
+    leaf["lane"] = "TOO->DEEP"
+    attributes = extract_location_attributes({"code": "DEEP", "nested": deep, "lane": "X->Y"}, max_depth=50)
+    assert attributes["lanes"] == ["X->Y"]
+
+
+if __name__ == "__main__":
+    for test in (test_attributes_match_recursive_helpers, test_transform_matches_saved_output,
+                 test_cycles_and_depth_are_bounded):
+        test()
+        print(f"✅ {test.__name__}")
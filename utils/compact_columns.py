@@ -0,0 +1,64 @@
+# utils/compact_columns.py
+
+"""
+Dictionary/run-length encoding of output columns.
+
+A column of N values with few distinct ones and long runs (labor pools,
+dates, ...) is written as
+
+    {"encoding": "dict-rle", "length": N, "values": [v0, v1, ...],
+     "runs": [i0, n0, i1, n1, ...]}
+
+which expands to values[i0] repeated n0 times, then values[i1] repeated n1
+times, and so on. Columns where the encoding would not be smaller stay plain
+lists, so a loader only has to check whether a column is a dict.
+"""
+
+DICT_RLE = "dict-rle"
+
+
+def encode_column(values):
+    """Returns the dict-rle form of values if it is more compact, else values."""
+    values = list(values)
+    dictionary = {}
+    runs = []
+    previous = object()
+    for value in values:
+        if runs and value == previous and type(value) is type(previous):
+            runs[-1] += 1
+            continue
+        index = dictionary.setdefault((type(value), value), len(dictionary))
+        runs.extend((index, 1))
+        previous = value
+    # Encoded size in JSON items: distinct values plus two integers per run
+    if len(dictionary) + len(runs) >= len(values):
+        return values
+    return {
+        "encoding": DICT_RLE,
+        "length": len(values),
+        "values": [value for _, value in dictionary],
+        "runs": runs,
+    }
+
+
+def decode_column(column):
+    """Expands a column written by encode_column (plain lists pass through)."""
+    if not isinstance(column, dict) or column.get("encoding") != DICT_RLE:
+        return column
+    values = column["values"]
+    runs = column["runs"]
+    expanded = []
+    for pos in range(0, len(runs), 2):
+        expanded.extend([values[runs[pos]]] * runs[pos + 1])
+    return expanded
+
+
+def encode_columns(columns):
+    """encode_column applied to every list in a {name: list} dict."""
+    return {name: encode_column(values) if isinstance(values, list) else values
+            for name, values in columns.items()}
+
+
+def decode_columns(columns):
+    """decode_column applied to every entry of a {name: column} dict."""
+    return {name: decode_column(column) for name, column in columns.items()}
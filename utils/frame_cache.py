@@ -0,0 +1,98 @@
+# utils/frame_cache.py
+
+import os
+import glob
+import logging
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (enables the parquet format below)
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def write_frame(path_base, df):
+    """
+    Writes a DataFrame next to path_base as a columnar file.
+    Uses parquet when pyarrow is installed, otherwise pandas' pickle format.
+    The write is atomic (temp file + rename) so readers never see partial files.
+
+    Parameters:
+    - path_base (str): Target path without extension.
+    - df (pd.DataFrame): Frame to store.
+
+    Returns:
+    - str: Path of the written file.
+    """
+    os.makedirs(os.path.dirname(path_base) or '.', exist_ok=True)
+    if PYARROW_AVAILABLE:
+        path = path_base + '.parquet'
+        tmp_path = path + '.tmp'
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+            _remove_quietly(path_base + '.pkl')
+            return path
+        except Exception as e:
+            # Mixed-type object columns are not always parquet-serialisable
+            logger.debug(f"Parquet write failed for {path_base} ({e}), using pickle")
+            _remove_quietly(tmp_path)
+
+    path = path_base + '.pkl'
+    tmp_path = path + '.tmp'
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+    _remove_quietly(path_base + '.parquet')
+    return path
+
+
+def read_frame(path_base, columns=None):
+    """
+    Reads a frame written by write_frame.
+
+    Parameters:
+    - path_base (str): Path without extension.
+    - columns (list): Optional projection; only these columns are returned.
+
+    Returns:
+    - pd.DataFrame or None if no cached file exists or it cannot be read.
+    """
+    try:
+        if PYARROW_AVAILABLE and os.path.exists(path_base + '.parquet'):
+            return pd.read_parquet(path_base + '.parquet', columns=columns)
+        if os.path.exists(path_base + '.pkl'):
+            df = pd.read_pickle(path_base + '.pkl')
+            return df[columns] if columns is not None else df
+    except Exception as e:
+        logger.warning(f"Could not read cached frame {path_base}: {e}")
+    return None
+
+
+def frame_exists(path_base):
+    """Returns True if a cached frame exists for path_base."""
+    return any(os.path.exists(path_base + ext) for ext in ('.parquet', '.pkl'))
+
+
+def remove_frame(path_base):
+    """Deletes any cached file for path_base."""
+    for ext in ('.parquet', '.pkl'):
+        _remove_quietly(path_base + ext)
+
+
+def list_frames(directory):
+    """Returns the path bases of every cached frame in directory."""
+    bases = set()
+    for ext in ('.parquet', '.pkl'):
+        for path in glob.glob(os.path.join(directory, '*' + ext)):
+            bases.add(path[:-len(ext)])
+    return sorted(bases)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,93 @@
+# utils/handoff.py
+
+import os
+import uuid
+import logging
+
+from utils.path_utils import get_cache_dir
+from utils.frame_cache import read_frame, write_frame, remove_frame
+
+logger = logging.getLogger(__name__)
+
+# Retrieved data larger than this is spilled to the local cache until it is processed
+HANDOFF_MEMORY_BUDGET_MB = float(os.environ.get('ONEPYFLOW_HANDOFF_BUDGET_MB', 512))
+
+
+class Handoff:
+    """
+    Data handed from a pull module to its processor, without temp files.
+
+    Holds either a DataFrame or text. It stays in memory unless it is larger
+    than the memory budget. Larger data is spilled to the local cache
+    (utils.frame_cache for frames, so parquet when pyarrow is installed) and
+    read back by load(), which also removes the spilled file.
+    """
+
+    def __init__(self, source, kind, data=None, spill_path=None, meta=None):
+        self.source = source
+        self.kind = kind
+        self._data = data
+        self._spill_path = spill_path
+        self.meta = meta or {}
+
+    @property
+    def spilled(self):
+        return self._spill_path is not None
+
+    @classmethod
+    def from_frame(cls, source, df, meta=None, budget_mb=None):
+        """Hands off a DataFrame, spilling it if it exceeds the budget."""
+        size = int(df.memory_usage(deep=True).sum())
+        if size <= _budget_bytes(budget_mb):
+            return cls(source, 'frame', data=df, meta=meta)
+        path_base = _spill_base(source)
+        write_frame(path_base, df)
+        logger.info(f"[HANDOFF] {source}: {size} bytes over the memory budget, spilled to {path_base}")
+        return cls(source, 'frame', spill_path=path_base, meta=meta)
+
+    @classmethod
+    def from_text(cls, source, text, meta=None, budget_mb=None):
+        """Hands off text (e.g. tab-separated lines), spilling it if it exceeds the budget."""
+        size = len(text.encode('utf-8'))
+        if size <= _budget_bytes(budget_mb):
+            return cls(source, 'text', data=text, meta=meta)
+        path = _spill_base(source) + '.txt'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        logger.info(f"[HANDOFF] {source}: {size} bytes over the memory budget, spilled to {path}")
+        return cls(source, 'text', spill_path=path, meta=meta)
+
+    def load(self):
+        """Returns the DataFrame or text; a spilled copy is read back and removed."""
+        if self._spill_path is None:
+            return self._data
+        if self.kind == 'frame':
+            data = read_frame(self._spill_path)
+        else:
+            with open(self._spill_path, 'r', encoding='utf-8', newline='') as f:
+                data = f.read()
+        self.release()
+        self._data = data
+        return data
+
+    def release(self):
+        """Removes a spilled copy that will not be loaded."""
+        if self._spill_path is None:
+            return
+        if self.kind == 'frame':
+            remove_frame(self._spill_path)
+        else:
+            try:
+                os.remove(self._spill_path)
+            except OSError:
+                pass
+        self._spill_path = None
+
+
+def _budget_bytes(budget_mb):
+    return (HANDOFF_MEMORY_BUDGET_MB if budget_mb is None else budget_mb) * 1024 * 1024
+
+
+def _spill_base(source):
+    return os.path.join(get_cache_dir('handoff'), f"{source}_{uuid.uuid4().hex}")
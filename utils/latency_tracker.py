@@ -0,0 +1,73 @@
+# utils/latency_tracker.py
+
+import os
+import json
+import logging
+import threading
+
+from utils.path_utils import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """
+    Keeps a rolling window of observed durations per key in a small JSON file,
+    so thresholds can be learned from previous runs instead of hard-coded.
+    """
+
+    def __init__(self, name, window=50, path=None):
+        """
+        Args:
+            name (str): Store name, used as the JSON file name.
+            window (int): Number of most recent samples kept per key.
+            path (str): Optional explicit file path (defaults to the cache dir).
+        """
+        self.window = window
+        self.path = path or os.path.join(get_cache_dir('latency'), f"{name}.json")
+        self._lock = threading.Lock()
+        self._samples = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return {k: list(v) for k, v in data.items() if isinstance(v, list)}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Could not read latency store {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._samples, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not write latency store {self.path}: {e}")
+
+    def record(self, key, seconds):
+        """Adds one observed duration for key and persists the store."""
+        with self._lock:
+            samples = self._samples.setdefault(key, [])
+            samples.append(round(float(seconds), 3))
+            del samples[:-self.window]
+            self._save()
+
+    def samples(self, key):
+        """Returns a copy of the recorded durations for key."""
+        with self._lock:
+            return list(self._samples.get(key, []))
+
+    def threshold(self, key, quantile=0.9, default=None, min_samples=5):
+        """
+        Returns the given quantile of recorded durations for key, or `default`
+        when fewer than `min_samples` observations exist.
+        """
+        samples = sorted(self.samples(key))
+        if len(samples) < min_samples:
+            return default
+        index = min(len(samples) - 1, int(round(quantile * (len(samples) - 1))))
+        return samples[index]
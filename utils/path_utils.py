@@ -108,4 +108,36 @@ def get_temp_dir():
         temp_dir = os.path.join(system_temp, 'onepyflow_temp')
         os.makedirs(temp_dir, exist_ok=True)
         logger.info(f"Using system temp directory: {temp_dir}")
-        return temp_dir
\ No newline at end of file
+        return temp_dir
+
+
+def get_cache_dir(*subdirs):
+    """
+    Returns a persistent directory for local caches and learned state.
+    1. Uses environment variable ONEPYFLOW_CACHE_DIR if set
+    2. Otherwise a 'cache' directory next to the executable (or the project root
+       when running as a script)
+    3. Falls back to the system temp directory if that is not writable
+
+    Args:
+        *subdirs (str): Optional sub-directories to append (created if missing)
+
+    Returns:
+        str: Path to the cache directory
+    """
+    env_dir = os.environ.get('ONEPYFLOW_CACHE_DIR')
+    if env_dir:
+        base_dir = env_dir
+    elif getattr(sys, 'frozen', False):
+        base_dir = os.path.join(os.path.dirname(sys.executable), 'cache')
+    else:
+        base_dir = os.path.join(os.path.dirname(get_executable_dir()), 'cache')
+
+    path = os.path.join(base_dir, *subdirs)
+    try:
+        os.makedirs(path, exist_ok=True)
+    except Exception as e:
+        logger.warning(f"Cache directory {path} not usable ({e}), using system temp instead")
+        path = os.path.join(tempfile.gettempdir(), 'onepyflow_cache', *subdirs)
+        os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,146 @@
+# utils/single_flight.py
+
+import logging
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+# Completed results are shared with callers arriving this soon after
+DEFAULT_LINGER_SECONDS = 5
+# Results for a window that has already ended no longer change, so they are kept longer
+CLOSED_WINDOW_LINGER_SECONDS = 300
+
+
+def window_linger(window_end, now=None):
+    """
+    Linger for a result covering a report window: CLOSED_WINDOW_LINGER_SECONDS
+    once the window has ended, otherwise None (the registry default), so
+    intraday data still being filled in is not served stale.
+    """
+    if window_end is not None and window_end <= (now or datetime.now()):
+        return CLOSED_WINDOW_LINGER_SECONDS
+    return None
+
+
+def request_key(url):
+    """
+    Builds a canonical key for a GET request so that equivalent URLs coalesce.
+
+    The key is (host, path, normalized query) where the query parameters are
+    sorted, so parameter order in the URL builders does not matter.
+
+    Parameters:
+    - url (str): Full request URL.
+
+    Returns:
+    - tuple: (host, path, normalized_query)
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return parts.netloc.lower(), parts.path, query
+
+
+class _Flight:
+    """One in-flight (or recently completed) call shared by every waiter."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.completed_at = None
+        self.linger_seconds = None
+
+
+class SingleFlight:
+    """
+    Process-wide registry that collapses identical concurrent calls into one.
+
+    The first caller for a key runs the function; every other caller that asks
+    for the same key while it is running waits and receives the same result.
+    Successful results are kept for `linger_seconds` (per call, see
+    window_linger) so that callers arriving shortly after (e.g. a PPR_Q
+    fallback started after the PPR_Q module) reuse them too. Exceptions and
+    results rejected by `keep_result` are never kept.
+    """
+
+    def __init__(self, name, linger_seconds=DEFAULT_LINGER_SECONDS):
+        self.name = name
+        self.linger_seconds = linger_seconds
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    def do(self, key, fn, keep_result=None, linger_seconds=None):
+        """
+        Runs fn() once per key and shares its result with concurrent callers.
+
+        Parameters:
+        - key (hashable): Identity of the call (see request_key).
+        - fn (callable): Zero-argument function doing the real work.
+        - keep_result (callable): Optional predicate; results for which it
+          returns False are handed to current waiters but not retained.
+        - linger_seconds (float): How long a kept result is reused; None uses
+          the registry default.
+
+        Returns:
+        - The value returned by fn(), or raises the exception fn() raised.
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            self._evict_expired()
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = _Flight()
+                flight.linger_seconds = self.linger_seconds if linger_seconds is None else linger_seconds
+                self._flights[key] = flight
+            else:
+                self.stats["shared"] += 1
+
+        if not owner:
+            logger.debug(f"[{self.name}] Joining existing flight for {key}")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.completed_at = time.time()
+            keep = flight.error is None and (keep_result is None or keep_result(flight.result))
+            with self._lock:
+                if not keep and self._flights.get(key) is flight:
+                    del self._flights[key]
+                # Completed flights are also dropped here, not only when a later call arrives
+                self._evict_expired()
+            flight.done.set()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def _evict_expired(self):
+        """Drops completed flights older than their linger. Caller holds the lock."""
+        now = time.time()
+        expired = [
+            key for key, flight in self._flights.items()
+            if flight.completed_at is not None and now - flight.completed_at > flight.linger_seconds
+        ]
+        for key in expired:
+            del self._flights[key]
+
+    def clear(self):
+        """Forgets every completed flight (in-flight calls are left untouched)."""
+        with self._lock:
+            for key in [k for k, f in self._flights.items() if f.completed_at is not None]:
+                del self._flights[key]
+
+
+# Shared by every FCLM report consumer (PPR, PPR_Q and PPR_Q fallbacks).
+FCLM_FLIGHTS = SingleFlight("FCLM")